@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Measure requests/second with and without connection pooling.
+
+Starts a local server and sends sequential requests four ways: a
+throwaway client per request (``httpx.post``, as ad-hoc scripts usually
+do), ``HostTerminalClient`` with keep-alive disabled, the pooled
+``HostTerminalClient``, and ``AsyncHostTerminalClient`` with several
+concurrent tasks sharing one pool. Reports requests/second for a
+cheap ``/cwd`` call and for ``/execute`` of a trivial command.
+
+Requires the ``http`` and ``client`` extras.
+
+Usage:
+    python benchmarks/bench_client.py [--requests 1000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from host_terminal_mcp.client import AsyncHostTerminalClient, HostTerminalClient
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def wait_until_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def unpooled(url: str, workload: str, directory: str, count: int) -> float:
+    """One throwaway client per request, as ad-hoc ``httpx.post`` calls do."""
+    start = time.perf_counter()
+    for _ in range(count):
+        if workload == "cwd":
+            httpx.get(f"{url}/cwd", timeout=30).raise_for_status()
+        else:
+            httpx.post(
+                f"{url}/execute",
+                json={"command": "echo hi", "working_directory": directory},
+                timeout=30,
+            ).raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+def no_keepalive(url: str, workload: str, directory: str, count: int) -> float:
+    """The pooled client with keep-alive disabled: one TCP connection per request."""
+    transport = httpx.HTTPTransport(limits=httpx.Limits(max_keepalive_connections=0))
+    with HostTerminalClient(url, transport=transport) as client:
+        start = time.perf_counter()
+        for _ in range(count):
+            if workload == "cwd":
+                client.cwd()
+            else:
+                client.execute("echo hi", working_directory=directory)
+        return count / (time.perf_counter() - start)
+
+
+def pooled(url: str, workload: str, directory: str, count: int) -> float:
+    with HostTerminalClient(url) as client:
+        start = time.perf_counter()
+        for _ in range(count):
+            if workload == "cwd":
+                client.cwd()
+            else:
+                client.execute("echo hi", working_directory=directory)
+        return count / (time.perf_counter() - start)
+
+
+async def pooled_async(
+    url: str, workload: str, directory: str, count: int, concurrency: int
+) -> float:
+    async with AsyncHostTerminalClient(url) as client:
+
+        async def worker(n: int) -> None:
+            for _ in range(n):
+                if workload == "cwd":
+                    await client.cwd()
+                else:
+                    await client.execute("echo hi", working_directory=directory)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(count // concurrency) for _ in range(concurrency)))
+        return (count // concurrency * concurrency) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.realpath(tmp)
+        config = Path(directory) / "config.yaml"
+        config.write_text(
+            "coalesce_identical_commands: false\n"
+            f"allowed_directories: ['{directory}']\n"
+            "allowed_commands:\n"
+            "  - pattern: 'echo '\n"
+        )
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "host_terminal_mcp.server", "--http",
+             "--config", str(config), "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(url)
+            print(f"{'workload':<10} {'client':<22} {'req/s':>8}")
+            for workload in ("cwd", "execute"):
+                rows = {
+                    "httpx.post per request": unpooled(url, workload, directory, args.requests),
+                    "no keep-alive": no_keepalive(url, workload, directory, args.requests),
+                    "pooled sync": pooled(url, workload, directory, args.requests),
+                    f"pooled async x{args.concurrency}": asyncio.run(
+                        pooled_async(url, workload, directory, args.requests, args.concurrency)
+                    ),
+                }
+                for name, rate in rows.items():
+                    print(f"{workload:<10} {name:<22} {rate:>8.0f}")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Measure stdio server cold start against a stored baseline.
+
+Claude Desktop and plugins spawn ``host-terminal-mcp`` once per client
+session, so the time from process start to the first responses is
+visible to the user. Each run starts fresh interpreters and measures:
+
+    interpreter     ``python -c pass``, for reference
+    import          cumulative import of ``host_terminal_mcp.server`` (``-X importtime``)
+    config_load     ``load_config()`` of the benchmark's YAML file
+    initialize      process start to the ``initialize`` response
+    tools_list      process start to the first ``tools/list`` response
+    first_execute   process start to the first ``execute_command`` result
+
+Medians across ``--runs`` are compared with ``baselines/cold_start.json``
+(``--save-baseline`` rewrites it). Timings are machine-specific: re-save
+the baseline on the machine you compare on before making a change.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 10] [--save-baseline]
+        [--fail-above 20]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import selectors
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp.types import LATEST_PROTOCOL_VERSION
+
+BASELINE = Path(__file__).parent / "baselines" / "cold_start.json"
+
+METRICS = ("interpreter", "import", "config_load", "initialize", "tools_list", "first_execute")
+
+CONFIG_LOAD_SCRIPT = """
+import sys, time
+from pathlib import Path
+from host_terminal_mcp.config import load_config
+start = time.perf_counter()
+load_config(Path(sys.argv[1]))
+print(time.perf_counter() - start)
+"""
+
+
+def interpreter_ms() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def import_ms() -> float:
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import host_terminal_mcp.server"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    # "import time: self [us] | cumulative | imported package"
+    for line in reversed(output.splitlines()):
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*host_terminal_mcp\.server$", line)
+        if match:
+            return int(match.group(1)) / 1000
+    raise RuntimeError("host_terminal_mcp.server missing from -X importtime output")
+
+
+def config_load_ms(config: Path) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", CONFIG_LOAD_SCRIPT, str(config)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output) * 1000
+
+
+class StdioSession:
+    """A server subprocess spoken to in newline-delimited JSON-RPC."""
+
+    def __init__(self, config: Path):
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "host_terminal_mcp.server", "--config", str(config)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._selector = selectors.DefaultSelector()
+        assert self.process.stdout is not None
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._next_id = 0
+
+    def send(self, method: str, params: dict | None = None, notify: bool = False) -> int:
+        message: dict = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notify:
+            self._next_id += 1
+            message["id"] = self._next_id
+        assert self.process.stdin is not None
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        self.process.stdin.flush()
+        return self._next_id
+
+    def response(self, request_id: int, timeout: float = 30.0) -> tuple[dict, float]:
+        """Wait for the response to request_id; returns it with ms since process start."""
+        assert self.process.stdout is not None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._selector.select(deadline - time.monotonic()):
+                break
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError("Server exited before responding")
+            message = json.loads(line)
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise RuntimeError(f"Server error: {message['error']}")
+                return message["result"], (time.perf_counter() - self.started) * 1000
+        raise RuntimeError(f"No response to request {request_id} within {timeout}s")
+
+    def close(self) -> None:
+        assert self.process.stdin is not None
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._selector.close()
+
+
+def first_responses_ms(config: Path, directory: str) -> dict[str, float]:
+    session = StdioSession(config)
+    try:
+        request = session.send(
+            "initialize",
+            {
+                "protocolVersion": LATEST_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "bench_cold_start", "version": "0"},
+            },
+        )
+        _, initialize = session.response(request)
+        session.send("notifications/initialized", notify=True)
+
+        _, tools_list = session.response(session.send("tools/list"))
+
+        request = session.send(
+            "tools/call",
+            {
+                "name": "execute_command",
+                "arguments": {"command": "echo ready", "working_directory": directory},
+            },
+        )
+        result, first_execute = session.response(request)
+        if result.get("isError") or "ready" not in json.dumps(result):
+            raise RuntimeError(f"execute_command failed: {result}")
+    finally:
+        session.close()
+    return {"initialize": initialize, "tools_list": tools_list, "first_execute": first_execute}
+
+
+def measure(runs: int, config: Path, directory: str) -> dict[str, list[float]]:
+    samples: dict[str, list[float]] = {metric: [] for metric in METRICS}
+    for _ in range(runs):
+        samples["interpreter"].append(interpreter_ms())
+        samples["import"].append(import_ms())
+        samples["config_load"].append(config_load_ms(config))
+        for metric, value in first_responses_ms(config, directory).items():
+            samples[metric].append(value)
+    return samples
+
+
+def load_baseline() -> dict | None:
+    if not BASELINE.exists():
+        return None
+    return json.loads(BASELINE.read_text())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help=f"Write the medians to {BASELINE}"
+    )
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="Exit 1 if any median is this much slower than the baseline",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.realpath(tmp)
+        config = Path(directory) / "config.yaml"
+        config.write_text(
+            f"allowed_directories: ['{directory}']\n"
+            "allowed_commands:\n"
+            "  - pattern: 'echo '\n"
+        )
+        samples = measure(args.runs, config, directory)
+
+    medians = {metric: statistics.median(values) for metric, values in samples.items()}
+    baseline = load_baseline()
+    reference = baseline["medians_ms"] if baseline else {}
+
+    print(f"{'metric':<14} {'median ms':>10} {'min':>8} {'max':>8} {'baseline':>9} {'change':>8}")
+    regressions = []
+    for metric in METRICS:
+        values = samples[metric]
+        line = f"{metric:<14} {medians[metric]:>10.1f} {min(values):>8.1f} {max(values):>8.1f}"
+        if metric in reference:
+            change = (medians[metric] / reference[metric] - 1) * 100
+            line += f" {reference[metric]:>9.1f} {change:>+7.1f}%"
+            if args.fail_above is not None and change > args.fail_above:
+                regressions.append(metric)
+        print(line)
+    if baseline:
+        print(f"\nbaseline: {baseline['python']} on {baseline['machine']}, {baseline['runs']} runs")
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(exist_ok=True)
+        BASELINE.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": f"{platform.system()} {platform.machine()}",
+                    "runs": args.runs,
+                    "medians_ms": {metric: round(value, 2) for metric, value in medians.items()},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Saved baseline to {BASELINE}")
+
+    if regressions:
+        print(f"Slower than baseline by more than {args.fail_above}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
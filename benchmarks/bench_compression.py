@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark HTTP response compression on typical command output.
+
+Builds ``/execute`` JSON bodies from real ``git log`` and ``find`` output
+(capped at the default ``max_output_size``) and reports, for every codec
+available in this environment, the bytes saved and the CPU time spent.
+
+Usage:
+    python benchmarks/bench_compression.py [--repo PATH] [--find-root PATH]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from host_terminal_mcp.compression import available_encodings, create_compressor  # noqa: E402
+
+MAX_OUTPUT_SIZE = 100000
+
+
+def command_output(command: list[str], cwd: str | None = None) -> str:
+    """Run a command and return its stdout capped like the executor does."""
+    proc = subprocess.run(command, cwd=cwd, capture_output=True, text=True, errors="replace")
+    return proc.stdout[:MAX_OUTPUT_SIZE]
+
+
+def execute_body(stdout: str) -> bytes:
+    """Serialize output the way /execute does."""
+    return json.dumps({
+        "status": "success",
+        "stdout": stdout,
+        "stderr": "",
+        "exit_code": 0,
+        "return_code": 0,
+        "timed_out": False,
+        "truncated": len(stdout) >= MAX_OUTPUT_SIZE,
+        "working_directory": "/",
+    }).encode()
+
+
+def bench(body: bytes, encoding: str, repeat: int) -> tuple[int, float]:
+    """Return (compressed size, mean seconds per compression)."""
+    size = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(create_compressor(encoding).finish(body))
+    return size, (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", default=".", help="Git repository for the git log sample")
+    parser.add_argument("--find-root", default="/usr", help="Directory for the find sample")
+    parser.add_argument("--repeat", type=int, default=50, help="Compressions per measurement")
+    args = parser.parse_args()
+
+    samples = {
+        "git log --stat": command_output(["git", "log", "--stat", "-n", "500"], cwd=args.repo),
+        "find": command_output(["find", args.find_root, "-maxdepth", "4"]),
+        "seq (numeric)": command_output(["seq", "1", "20000"]),
+    }
+
+    print(f"{'sample':<16} {'codec':<6} {'raw':>9} {'compressed':>11} {'ratio':>7} "
+          f"{'ms':>8} {'MB/s':>8}")
+    for name, stdout in samples.items():
+        if not stdout:
+            print(f"{name:<16} (no output, skipped)")
+            continue
+        body = execute_body(stdout)
+        for encoding in available_encodings():
+            size, seconds = bench(body, encoding, args.repeat)
+            print(
+                f"{name:<16} {encoding:<6} {len(body):>9} {size:>11} "
+                f"{len(body) / size:>6.1f}x {seconds * 1000:>8.2f} "
+                f"{len(body) / seconds / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Compare request latency over a Unix domain socket and over TCP.
+
+Starts one server listening on TCP (127.0.0.1) and one on a Unix socket,
+then issues sequential small requests over a keep-alive connection to each
+and reports p50/p95/p99 latency for ``/health`` and for ``/execute`` of a
+trivial command.
+
+Requires the ``http`` extra and httpx.
+
+Usage:
+    python benchmarks/bench_uds.py [--requests 2000]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_server(config: Path, listen: list[str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "host_terminal_mcp.server", "--http", "--config", str(config), *listen],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(client: httpx.Client, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def measure(client: httpx.Client, method: str, path: str, body: dict | None, count: int) -> list[float]:
+    """Latencies in milliseconds for `count` sequential requests."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.request(method, path, json=body).raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(os.path.realpath(tmp))
+        config = directory / "config.yaml"
+        config.write_text(
+            "coalesce_identical_commands: false\n"
+            f"allowed_directories: ['{directory}']\n"
+            "allowed_commands:\n"
+            "  - pattern: 'echo '\n"
+        )
+        port = free_port()
+        uds = str(directory / "bench.sock")
+        servers = [
+            start_server(config, ["--port", str(port)]),
+            start_server(config, ["--uds", uds]),
+        ]
+        clients = {
+            "tcp": httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30),
+            "uds": httpx.Client(
+                base_url="http://localhost", timeout=30, transport=httpx.HTTPTransport(uds=uds)
+            ),
+        }
+        workloads = {
+            "/health": ("GET", "/health", None),
+            "/execute echo": (
+                "POST", "/execute", {"command": "echo hi", "working_directory": str(directory)}
+            ),
+        }
+
+        try:
+            for client in clients.values():
+                wait_until_ready(client)
+
+            print(f"{'workload':<15} {'transport':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for name, (method, path, body) in workloads.items():
+                for transport, client in clients.items():
+                    measure(client, method, path, body, 50)  # warm up
+                    latencies = measure(client, method, path, body, args.requests)
+                    print(
+                        f"{name:<15} {transport:<9} {percentile(latencies, 50):>8.3f} "
+                        f"{percentile(latencies, 95):>8.3f} {percentile(latencies, 99):>8.3f}"
+                    )
+        finally:
+            for client in clients.values():
+                client.close()
+            for server in servers:
+                server.terminate()
+                server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
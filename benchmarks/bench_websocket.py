@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Compare command throughput over one WebSocket against pooled HTTP.
+
+Starts a local server and runs the same number of trivial commands three
+ways: sequential ``/execute`` calls on a keep-alive connection, concurrent
+``/execute`` calls from ``AsyncHostTerminalClient``, and concurrent streams
+multiplexed over a single ``/ws`` connection. Reports commands/second.
+
+Requires the ``http`` and ``client`` extras and the ``websockets`` package.
+
+Usage:
+    python benchmarks/bench_websocket.py [--commands 500] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import websockets
+
+from host_terminal_mcp.client import AsyncHostTerminalClient, HostTerminalClient
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def wait_until_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def http_sequential(url: str, directory: str, count: int) -> float:
+    with HostTerminalClient(url) as client:
+        start = time.perf_counter()
+        for _ in range(count):
+            client.execute("echo hi", working_directory=directory)
+        return count / (time.perf_counter() - start)
+
+
+async def http_concurrent(url: str, directory: str, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncHostTerminalClient(url) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                await client.execute("echo hi", working_directory=directory)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(count)))
+        return count / (time.perf_counter() - start)
+
+
+async def websocket_multiplexed(url: str, directory: str, count: int, concurrency: int) -> float:
+    ids = (str(i) for i in itertools.count())
+    async with websockets.connect(url.replace("http", "ws", 1) + "/ws") as ws:
+
+        async def start_one() -> None:
+            frame = {"type": "start", "id": next(ids), "command": "echo hi",
+                     "working_directory": directory}
+            await ws.send(json.dumps(frame))
+
+        start = time.perf_counter()
+        started = 0
+        for _ in range(min(concurrency, count)):
+            await start_one()
+            started += 1
+        finished = 0
+        while finished < count:
+            frame = json.loads(await ws.recv())
+            if frame["type"] in ("exit", "error"):
+                finished += 1
+                if started < count:
+                    await start_one()
+                    started += 1
+        return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.realpath(tmp)
+        config = Path(directory) / "config.yaml"
+        config.write_text(
+            "coalesce_identical_commands: false\n"
+            f"allowed_directories: ['{directory}']\n"
+            "allowed_commands:\n"
+            "  - pattern: 'echo '\n"
+        )
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "host_terminal_mcp.server", "--http",
+             "--config", str(config), "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(url)
+            rows = {
+                "http sequential (pooled)": http_sequential(url, directory, args.commands),
+                f"http async x{args.concurrency} (pooled)": asyncio.run(
+                    http_concurrent(url, directory, args.commands, args.concurrency)
+                ),
+                f"websocket x{args.concurrency} (1 conn)": asyncio.run(
+                    websocket_multiplexed(url, directory, args.commands, args.concurrency)
+                ),
+            }
+            print(f"{'transport':<28} {'commands/s':>10}")
+            for name, rate in rows.items():
+                print(f"{name:<28} {rate:>10.0f}")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
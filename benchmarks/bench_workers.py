@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Measure HTTP throughput as the number of uvicorn workers grows.
+
+Starts ``host-terminal-mcp --http --workers N`` for each N, drives it with
+concurrent clients (each with its own session id, so the shared SQLite
+session store is exercised) and reports requests/second for a cheap
+``/cwd`` call and for ``/execute`` of a trivial command.
+
+Requires the ``http`` extra and httpx. Scaling is bounded by the number of
+CPU cores on the host.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def write_config(directory: Path) -> Path:
+    """Config allowing `echo` in a scratch directory, with coalescing off."""
+    path = directory / "config.yaml"
+    path.write_text(
+        "permission_mode: allowlist\n"
+        "coalesce_identical_commands: false\n"
+        f"session_store: {directory / 'sessions.db'}\n"
+        f"allowed_directories: ['{directory}']\n"
+        "allowed_commands:\n"
+        "  - pattern: 'echo '\n"
+    )
+    return path
+
+
+def wait_until_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def drive(url: str, path: str, body: dict | None, concurrency: int, duration: float) -> float:
+    """Run `concurrency` clients for `duration` seconds; return requests/second."""
+    completed = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+
+        async def worker(index: int) -> None:
+            nonlocal completed
+            headers = {"X-Session-Id": f"bench-{index}"}
+            while time.monotonic() < deadline:
+                if body is None:
+                    resp = await client.get(path, headers=headers)
+                else:
+                    resp = await client.post(path, json=body, headers=headers)
+                resp.raise_for_status()
+                completed += 1
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return completed / (time.monotonic() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'workers':>7} {'/cwd req/s':>12} {'/execute req/s':>15}")
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(os.path.realpath(tmp))
+            config = write_config(directory)
+            port = free_port()
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "host_terminal_mcp.server",
+                    "--http", "--port", str(port), "--workers", str(workers),
+                    "--config", str(config),
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                url = f"http://127.0.0.1:{port}"
+                wait_until_ready(url)
+                cwd_rps = asyncio.run(
+                    drive(url, "/cwd", None, args.concurrency, args.duration)
+                )
+                execute_rps = asyncio.run(
+                    drive(url, "/execute", {"command": "echo hi", "working_directory": str(directory)},
+                          args.concurrency, args.duration)
+                )
+                print(f"{workers:>7} {cwd_rps:>12.0f} {execute_rps:>15.0f}")
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Asynchronous, batched audit log of executed and refused commands.
+
+Recording is a dict append onto an in-memory ring; nothing touches the disk
+on the request path. A background task drains the ring in batches (every
+``flush_interval`` seconds, or sooner once a batch has accumulated) and
+appends them as JSON lines from a worker thread.
+
+Memory is bounded by the ring size: if the disk cannot keep up, the oldest
+queued records are overwritten and counted as dropped, as are batches that
+fail to write. Files rotate like ``logging.handlers.RotatingFileHandler``
+(``audit.jsonl`` -> ``audit.jsonl.1`` ...), under an exclusive lock so
+several HTTP workers can share one log.
+
+Which client a record belongs to is taken from a context variable that the
+transports set per request (``set_client``), so the executor does not need
+it passed through every call.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any
+
+logger = logging.getLogger("host-terminal-mcp")
+
+# Queued records that trigger a flush before the interval elapses
+FLUSH_BATCH_SIZE = 512
+
+_client: ContextVar[tuple[str, str | None]] = ContextVar(
+    "host_terminal_audit_client", default=("unknown", None)
+)
+
+
+def set_client(client: str, session: str | None = None) -> None:
+    """Attribute records made in the current context to a transport and session."""
+    _client.set((client, session))
+
+
+class AuditLog:
+    """
+    Queue audit records in memory and write them to rotating JSONL files.
+
+    Args:
+        path: Log file; rotated copies get .1, .2, ... suffixes
+        max_bytes: Size at which the file is rotated
+        backup_count: Rotated files kept
+        buffer_size: Records held in memory before the oldest are dropped
+        flush_interval: Maximum seconds a record waits before being written
+        on_drop: Called with the number of records lost
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        backup_count: int,
+        buffer_size: int,
+        flush_interval: float,
+        on_drop: Callable[[int], None] | None = None,
+    ):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._on_drop = on_drop
+        self._ring: deque[dict[str, Any]] = deque(maxlen=max(buffer_size, 1))
+        self._wakeup: asyncio.Event | None = None
+        self._flusher: asyncio.Task[None] | None = None
+        self._closed = False
+        # Serializes writer threads within this process; flock covers other workers
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def record(self, **fields: Any) -> None:
+        """Queue a record. Never blocks; the oldest record is dropped if the ring is full."""
+        client, session = _client.get()
+        if len(self._ring) == self._ring.maxlen:
+            self._count_dropped(1)
+        self._ring.append({"timestamp": time.time(), "client": client, "session": session, **fields})
+
+        if self._flusher is None:
+            self._start_flusher()
+        if len(self._ring) >= FLUSH_BATCH_SIZE and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _count_dropped(self, count: int) -> None:
+        self.dropped += count
+        if self._on_drop is not None:
+            self._on_drop(count)
+
+    def _start_flusher(self) -> None:
+        if self._closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet; records wait for the next record() or close()
+            return
+        self._wakeup = asyncio.Event()
+        self._flusher = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+        batch = list(self._ring)
+        self._ring.clear()
+        if not batch:
+            return
+        failed = await asyncio.to_thread(self._write, batch)
+        if failed:
+            self._count_dropped(failed)
+
+    async def close(self) -> None:
+        """Stop the background task and write what is left."""
+        self._closed = True
+        if self._flusher is not None:
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        await self.flush()
+
+    def _write(self, batch: list[dict[str, Any]]) -> int:
+        """Append a batch (in a worker thread); returns how many records were lost."""
+        data = "".join(json.dumps(_format(entry), separators=(",", ":")) + "\n" for entry in batch)
+        payload = data.encode("utf-8")
+        try:
+            with self._write_lock, open(self.path + ".lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._rotate_if_needed(len(payload))
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(fd, payload)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            logger.warning(f"Could not write {len(batch)} audit records to {self.path}: {e}")
+            return len(batch)
+        self.written += len(batch)
+        return 0
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        if size == 0 or size + incoming <= self.max_bytes:
+            return
+        if self.backup_count <= 0:
+            os.unlink(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def _format(entry: dict[str, Any]) -> dict[str, Any]:
+    # Timestamps are formatted in the writer thread, off the request path
+    timestamp = datetime.fromtimestamp(entry["timestamp"], timezone.utc)
+    return {**entry, "timestamp": timestamp.isoformat(timespec="milliseconds")}
@@ -0,0 +1,409 @@
+"""Python client for the host-terminal-mcp HTTP transport.
+
+``HostTerminalClient`` (sync) and ``AsyncHostTerminalClient`` wrap one
+pooled ``httpx`` client each, so consecutive calls reuse keep-alive
+connections instead of opening a new TCP connection per command. Both speak
+TCP or a Unix domain socket (``uds=``), carry an optional session id, and
+return ``ExecutionResult`` objects like the in-process executor does.
+
+Example:
+    async with AsyncHostTerminalClient("http://127.0.0.1:8099") as client:
+        result = await client.execute("ls -la", working_directory="/tmp")
+        print(result.stdout)
+
+Requires httpx (``pip install 'host-terminal-mcp[client]'``).
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import Any, TypeVar
+
+import httpx
+
+from .executor import ExecutionResult, OutputEncoding
+from .sessions import SESSION_HEADER
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8099"
+
+# Reads wait for the command itself, so allow longer than the server's
+# default command timeout (300s); connecting should be quick.
+DEFAULT_TIMEOUT = httpx.Timeout(330.0, connect=5.0)
+
+# Failures where the request never reached the server, so retrying any
+# request, a POST /execute included, cannot run a command twice.
+RETRYABLE_ERRORS: tuple[type[Exception], ...] = (httpx.ConnectError,)
+
+# A closed connection is also retried for GETs, which change nothing. httpx
+# raises RemoteProtocolError both for a keep-alive connection the server had
+# just closed and for a server that died mid-request after running the
+# command, so POSTs are never retried on it. Timeouts and read errors are
+# never retried.
+IDEMPOTENT_RETRYABLE_ERRORS: tuple[type[Exception], ...] = (
+    httpx.ConnectError,
+    httpx.RemoteProtocolError,
+)
+
+T = TypeVar("T")
+
+
+def _retryable_errors(method: str) -> tuple[type[Exception], ...]:
+    return IDEMPOTENT_RETRYABLE_ERRORS if method == "GET" else RETRYABLE_ERRORS
+
+
+class HostTerminalError(Exception):
+    """The server rejected a request (``"status": "error"``)."""
+
+    def __init__(self, message: str, response: dict[str, Any] | None = None):
+        super().__init__(message)
+        self.response = response or {}
+
+
+class ApprovalRequiredError(HostTerminalError):
+    """The command needs approval (``ask`` mode), which HTTP cannot grant."""
+
+    def __init__(self, command: str, response: dict[str, Any]):
+        super().__init__(response.get("message", f"Command needs approval: {command}"), response)
+        self.command = command
+
+
+def _check(data: dict[str, Any], command: str = "") -> dict[str, Any]:
+    """Raise for error responses; return successful ones unchanged."""
+    status = data.get("status")
+    if status == "needs_approval":
+        raise ApprovalRequiredError(data.get("command", command), data)
+    if status == "error":
+        raise HostTerminalError(data.get("error") or data.get("message", "Request failed"), data)
+    return data
+
+
+def _to_result(command: str, data: dict[str, Any]) -> ExecutionResult:
+    """Build an ExecutionResult from an /execute response."""
+    return ExecutionResult(
+        command=command,
+        stdout=data["stdout"],
+        stderr=data["stderr"],
+        return_code=data["return_code"],
+        timed_out=data["timed_out"],
+        truncated=data["truncated"],
+        working_directory=data["working_directory"],
+        output_encoding=OutputEncoding(data.get("output_encoding", "text")),
+    )
+
+
+def _batch_body(
+    commands: list[str | tuple[str, str | None]], max_parallel: int | None
+) -> tuple[list[str], dict[str, Any]]:
+    """Normalize batch items into (command names, request body)."""
+    items = [(c, None) if isinstance(c, str) else c for c in commands]
+    body: dict[str, Any] = {
+        "commands": [{"command": c, "working_directory": wd} for c, wd in items],
+        "max_parallel": max_parallel,
+    }
+    return [c for c, _ in items], body
+
+
+def _batch_results(
+    names: list[str], data: dict[str, Any]
+) -> list[ExecutionResult | HostTerminalError]:
+    """Per-item results; denied items become (unraised) HostTerminalError instances."""
+    results: list[ExecutionResult | HostTerminalError] = []
+    for command, item in zip(names, _check(data)["results"], strict=True):
+        try:
+            results.append(_to_result(command, _check(item, command)))
+        except HostTerminalError as e:
+            results.append(e)
+    return results
+
+
+def _stream_error(command: str, body: bytes) -> HostTerminalError:
+    """Error for a raw-mode request that came back as JSON instead of a stream."""
+    try:
+        _check(json.loads(body), command)
+    except HostTerminalError as e:
+        return e
+    return HostTerminalError("Unexpected JSON response to a streaming request")
+
+
+class _ClientOptions:
+    """Settings shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        base_url: str,
+        session_id: str | None,
+        retries: int,
+        retry_backoff: float,
+    ):
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.base_url = base_url
+        self.headers = {SESSION_HEADER: session_id} if session_id else {}
+
+    def backoff(self, attempt: int) -> float:
+        return float(self.retry_backoff * (2**attempt))
+
+
+class HostTerminalClient:
+    """Blocking client with a pooled keep-alive connection.
+
+    Args:
+        base_url: Server URL (ignored apart from the Host header when ``uds`` is set)
+        uds: Path of a Unix domain socket to connect through instead of TCP
+        session_id: Sent as ``X-Session-Id`` so /cd state is private to this client
+        timeout: Seconds, or an ``httpx.Timeout``
+        retries: Extra attempts after a connection failure, or for GETs a reset
+        retry_backoff: Seconds before the first retry, doubled each time
+        max_connections: Size of the connection pool
+        transport: Custom httpx transport (overrides ``uds``)
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        *,
+        uds: str | None = None,
+        session_id: str | None = None,
+        timeout: float | httpx.Timeout = DEFAULT_TIMEOUT,
+        retries: int = 2,
+        retry_backoff: float = 0.05,
+        max_connections: int = 100,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self._options = _ClientOptions(base_url, session_id, retries, retry_backoff)
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        if transport is None:
+            transport = httpx.HTTPTransport(uds=uds, limits=limits)
+        self._http = httpx.Client(
+            base_url=self._options.base_url,
+            headers=self._options.headers,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    def __enter__(self) -> "HostTerminalClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self._http.close()
+
+    def _retry(self, method: str, send: Callable[[], T]) -> T:
+        for attempt in range(self._options.retries + 1):
+            try:
+                return send()
+            except _retryable_errors(method):
+                if attempt == self._options.retries:
+                    raise
+                time.sleep(self._options.backoff(attempt))
+        raise AssertionError("unreachable")
+
+    def _request(self, method: str, path: str, body: dict[str, Any] | None = None) -> Any:
+        response = self._retry(method, lambda: self._http.request(method, path, json=body))
+        response.raise_for_status()
+        return response.json()
+
+    def health(self) -> dict[str, Any]:
+        """Server status and execution counters."""
+        return dict(self._request("GET", "/health"))
+
+    def permissions(self) -> dict[str, Any]:
+        """Permission mode, pattern counts and allowed directories."""
+        return _check(self._request("GET", "/permissions"))
+
+    def execute(
+        self,
+        command: str,
+        working_directory: str | None = None,
+        output_encoding: OutputEncoding | str = OutputEncoding.TEXT,
+    ) -> ExecutionResult:
+        """
+        Run a command and wait for its result.
+
+        Raises:
+            ApprovalRequiredError: The server is in ask mode and the command is not allow-listed
+            HostTerminalError: The command or directory is not allowed
+        """
+        encoding = OutputEncoding(output_encoding)
+        if encoding == OutputEncoding.RAW:
+            raise ValueError("Use stream() for raw output")
+        body = {
+            "command": command,
+            "working_directory": working_directory,
+            "output_encoding": encoding.value,
+        }
+        return _to_result(command, _check(self._request("POST", "/execute", body), command))
+
+    def execute_batch(
+        self,
+        commands: list[str | tuple[str, str | None]],
+        max_parallel: int | None = None,
+    ) -> list[ExecutionResult | HostTerminalError]:
+        """
+        Run independent commands concurrently on the server.
+
+        Args:
+            commands: Command strings or (command, working_directory) pairs
+            max_parallel: Most commands run at once; the server's
+                max_parallel_commands still caps it
+
+        Returns:
+            One entry per command, in order; denied commands are returned
+            as HostTerminalError instances rather than raised
+        """
+        names, body = _batch_body(commands, max_parallel)
+        return _batch_results(names, self._request("POST", "/execute/batch", body))
+
+    def stream(self, command: str, working_directory: str | None = None) -> Iterator[bytes]:
+        """Yield raw stdout bytes as the command produces them."""
+        body = {
+            "command": command,
+            "working_directory": working_directory,
+            "output_encoding": OutputEncoding.RAW.value,
+        }
+        request = self._http.build_request("POST", "/execute", json=body)
+        response = self._retry("POST", lambda: self._http.send(request, stream=True))
+        try:
+            response.raise_for_status()
+            if response.headers.get("content-type", "").startswith("application/json"):
+                raise _stream_error(command, response.read())
+            yield from response.iter_bytes()
+        finally:
+            response.close()
+
+    def cd(self, path: str) -> str:
+        """Change this session's directory; returns the new directory."""
+        return str(_check(self._request("POST", "/cd", {"path": path}))["current_directory"])
+
+    def cwd(self) -> str:
+        """This session's current directory."""
+        return str(_check(self._request("GET", "/cwd"))["current_directory"])
+
+
+class AsyncHostTerminalClient:
+    """Asyncio client with a pooled keep-alive connection.
+
+    Safe to share between tasks; concurrent calls use up to
+    ``max_connections`` connections. Arguments are as for
+    ``HostTerminalClient``.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        *,
+        uds: str | None = None,
+        session_id: str | None = None,
+        timeout: float | httpx.Timeout = DEFAULT_TIMEOUT,
+        retries: int = 2,
+        retry_backoff: float = 0.05,
+        max_connections: int = 100,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._options = _ClientOptions(base_url, session_id, retries, retry_backoff)
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits)
+        self._http = httpx.AsyncClient(
+            base_url=self._options.base_url,
+            headers=self._options.headers,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncHostTerminalClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        await self._http.aclose()
+
+    async def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        for attempt in range(self._options.retries + 1):
+            try:
+                return await self._http.send(request, stream=stream)
+            except _retryable_errors(request.method):
+                if attempt == self._options.retries:
+                    raise
+                await asyncio.sleep(self._options.backoff(attempt))
+        raise AssertionError("unreachable")
+
+    async def _request(self, method: str, path: str, body: dict[str, Any] | None = None) -> Any:
+        response = await self._send(self._http.build_request(method, path, json=body))
+        response.raise_for_status()
+        return response.json()
+
+    async def health(self) -> dict[str, Any]:
+        """Server status and execution counters."""
+        return dict(await self._request("GET", "/health"))
+
+    async def permissions(self) -> dict[str, Any]:
+        """Permission mode, pattern counts and allowed directories."""
+        return _check(await self._request("GET", "/permissions"))
+
+    async def execute(
+        self,
+        command: str,
+        working_directory: str | None = None,
+        output_encoding: OutputEncoding | str = OutputEncoding.TEXT,
+    ) -> ExecutionResult:
+        """Run a command and wait for its result (see ``HostTerminalClient.execute``)."""
+        encoding = OutputEncoding(output_encoding)
+        if encoding == OutputEncoding.RAW:
+            raise ValueError("Use stream() for raw output")
+        body = {
+            "command": command,
+            "working_directory": working_directory,
+            "output_encoding": encoding.value,
+        }
+        data = await self._request("POST", "/execute", body)
+        return _to_result(command, _check(data, command))
+
+    async def execute_batch(
+        self,
+        commands: list[str | tuple[str, str | None]],
+        max_parallel: int | None = None,
+    ) -> list[ExecutionResult | HostTerminalError]:
+        """Run independent commands concurrently (see ``HostTerminalClient.execute_batch``)."""
+        names, body = _batch_body(commands, max_parallel)
+        return _batch_results(names, await self._request("POST", "/execute/batch", body))
+
+    async def stream(
+        self, command: str, working_directory: str | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yield raw stdout bytes as the command produces them."""
+        body = {
+            "command": command,
+            "working_directory": working_directory,
+            "output_encoding": OutputEncoding.RAW.value,
+        }
+        request = self._http.build_request("POST", "/execute", json=body)
+        response = await self._send(request, stream=True)
+        try:
+            response.raise_for_status()
+            if response.headers.get("content-type", "").startswith("application/json"):
+                raise _stream_error(command, await response.aread())
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def cd(self, path: str) -> str:
+        """Change this session's directory; returns the new directory."""
+        data = _check(await self._request("POST", "/cd", {"path": path}))
+        return str(data["current_directory"])
+
+    async def cwd(self) -> str:
+        """This session's current directory."""
+        return str(_check(await self._request("GET", "/cwd"))["current_directory"])
@@ -0,0 +1,253 @@
+"""Response compression for the HTTP transport.
+
+Command output (``git log``, ``find``, build logs) is highly repetitive text,
+so compressing ``/execute`` responses saves most of the bytes on the wire to
+clients running in containers or on another host. gzip is always available;
+zstd and brotli are used when the optional ``zstandard`` / ``brotli`` packages
+are installed (``pip install 'host-terminal-mcp[compression]'``) and the client
+advertises them.
+
+Streaming responses are compressed incrementally and flushed after every
+chunk so clients keep receiving output as it is produced.
+"""
+
+import asyncio
+import zlib
+from collections.abc import Callable
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_ZSTD = False
+
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_BROTLI = False
+
+# Chunks larger than this are compressed in a worker thread so a single big
+# response doesn't stall the event loop for other clients.
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+# Media types that are already compressed; recompressing them wastes CPU.
+EXCLUDED_MEDIA_TYPES = frozenset({
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+})
+
+
+class Compressor(Protocol):
+    """Incremental compressor for one response body."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it immediately."""
+        ...
+
+    def finish(self, data: bytes) -> bytes:
+        """Compress the final chunk and end the stream."""
+        ...
+
+
+class GzipCompressor:
+    """gzip via zlib (always available)."""
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class ZstdCompressor:
+    """zstd via the optional ``zstandard`` package."""
+
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(flush_block)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor:
+    """brotli via the optional ``brotli`` package."""
+
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._compressor.process(data) + self._compressor.flush())
+
+    def finish(self, data: bytes) -> bytes:
+        return bytes(self._compressor.process(data) + self._compressor.finish())
+
+
+def available_encodings() -> list[str]:
+    """Content codings this server can produce, in order of preference."""
+    encodings = []
+    if HAS_ZSTD:
+        encodings.append("zstd")
+    if HAS_BROTLI:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def create_compressor(encoding: str) -> Compressor:
+    """Create a compressor for a content coding returned by available_encodings()."""
+    if encoding == "zstd":
+        return ZstdCompressor()
+    if encoding == "br":
+        return BrotliCompressor()
+    return GzipCompressor()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Pick the best content coding the client accepts.
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+
+    Returns:
+        The chosen coding, or None if the response should be sent uncompressed
+    """
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best: str | None = None
+    best_quality = 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best codec the client accepts."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    """Compresses a single response, buffering only the start message."""
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor: Compressor | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk tells us whether to compress
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or media_type in EXCLUDED_MEDIA_TYPES
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(self.initial_message)
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            self.compressor = create_compressor(self.encoding)
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            message["body"] = await self._apply(body, more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        message["body"] = await self._apply(body, more_body)
+        await self.send(message)
+
+    async def _apply(self, body: bytes, more_body: bool) -> bytes:
+        """Compress a body chunk, off the event loop when it is large."""
+        assert self.compressor is not None
+        func: Callable[[bytes], bytes]
+        func = self.compressor.compress if more_body else self.compressor.finish
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await asyncio.to_thread(func, body)
+        return func(body)
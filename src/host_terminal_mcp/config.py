@@ -17,12 +17,26 @@ class PermissionMode(str, Enum):
     ALLOW_ALL = "allow_all"  # Allow all commands (dangerous!)
 
 
+class TraceFormat(str, Enum):
+    """Line format of the trace file."""
+
+    JSONL = "jsonl"  # One span per line
+    OTLP = "otlp"  # One OTLP/JSON ExportTraceServiceRequest per trace
+
+
 class CommandPattern(BaseModel):
     """A pattern for matching commands."""
 
     pattern: str = Field(description="Regex pattern or exact command prefix")
     description: str = Field(default="", description="Human-readable description")
     is_regex: bool = Field(default=False, description="Whether pattern is a regex")
+    cacheable: bool = Field(
+        default=False,
+        description=(
+            "Whether concurrent identical runs may share one subprocess; "
+            "set only for read-only commands"
+        ),
+    )
 
     def matches(self, command: str) -> bool:
         """Check if a command matches this pattern."""
@@ -76,6 +90,146 @@ class Config(BaseModel):
         description="Maximum output size in characters"
     )
 
+    max_parallel_commands: int = Field(
+        default=8,
+        description="Maximum number of commands a batch runs concurrently"
+    )
+
+    search_workers: int = Field(
+        default=8,
+        description="Threads the search_files, disk_usage, explore_project and hash_files tools read files and directories with"
+    )
+
+    tail_poll_interval_seconds: float = Field(
+        default=1.0,
+        description="How often tail_file followers poll a file where inotify is unavailable"
+    )
+
+    file_index: bool = Field(
+        default=False,
+        description=(
+            "Keep an in-memory index of the allowed directories, updated with inotify, "
+            "so find_files answers without walking the tree"
+        )
+    )
+
+    file_index_snapshot: str | None = Field(
+        default=None,
+        description=(
+            "File the index is saved to and loaded from at startup "
+            "(default: file-index.json.gz in the state directory; empty to disable)"
+        )
+    )
+
+    file_index_max_entries: int = Field(
+        default=2_000_000,
+        description="Maximum number of paths kept in the file index"
+    )
+
+    file_index_rescan_seconds: int = Field(
+        default=600,
+        description="How often the file index re-checks every directory for missed changes (seconds)"
+    )
+
+    max_streams_per_connection: int = Field(
+        default=16,
+        description="Maximum number of commands running at once on one WebSocket connection"
+    )
+
+    max_terminal_sessions: int = Field(
+        default=8,
+        description="Maximum number of interactive PTY terminal sessions open at once"
+    )
+
+    terminal_idle_timeout_seconds: int = Field(
+        default=900,
+        description="Idle time after which an interactive terminal session is killed (seconds)"
+    )
+
+    coalesce_identical_commands: bool = Field(
+        default=True,
+        description=(
+            "Let concurrent identical allow-listed commands in the same directory "
+            "share a single subprocess and its result"
+        )
+    )
+
+    compress_responses: bool = Field(
+        default=True,
+        description="Compress HTTP responses (zstd, brotli or gzip, as the client accepts)"
+    )
+
+    compression_min_size: int = Field(
+        default=1024,
+        description="Minimum HTTP response size in bytes before compression is applied"
+    )
+
+    max_sessions: int = Field(
+        default=256,
+        description="Maximum number of live HTTP client sessions"
+    )
+
+    session_idle_timeout_seconds: int = Field(
+        default=3600,
+        description="Idle time after which an HTTP client session is discarded (seconds)"
+    )
+
+    session_store: str | None = Field(
+        default=None,
+        description=(
+            "SQLite file holding HTTP session state, shared by all workers "
+            "(default: in memory, single worker only)"
+        )
+    )
+
+    metrics_file: str | None = Field(
+        default=None,
+        description=(
+            "Write Prometheus-format metrics to this file periodically in stdio mode "
+            "(HTTP mode serves them at /metrics)"
+        )
+    )
+
+    metrics_interval_seconds: int = Field(
+        default=15,
+        description="How often metrics_file is rewritten (seconds)"
+    )
+
+    trace_file: str | None = Field(
+        default=None,
+        description="Append request traces (one span per phase) to this file; tracing is off when unset"
+    )
+
+    trace_format: TraceFormat = Field(
+        default=TraceFormat.JSONL,
+        description="Trace file format: jsonl (one span per line) or otlp (OTLP/JSON per trace)"
+    )
+
+    audit_log: str | None = Field(
+        default=None,
+        description="Append a JSON line per executed or refused command to this file; off when unset"
+    )
+
+    audit_max_bytes: int = Field(
+        default=10 * 1024 * 1024,
+        description="Size at which the audit log is rotated (bytes)"
+    )
+
+    audit_backup_count: int = Field(
+        default=5,
+        description="Rotated audit log files to keep"
+    )
+
+    audit_buffer_size: int = Field(
+        default=10000,
+        description="Audit records held in memory awaiting a write; the oldest are dropped beyond this"
+    )
+
+    audit_flush_interval_seconds: float = Field(
+        default=1.0,
+        description="Maximum time an audit record waits in memory before being written (seconds)"
+    )
+
     shell: str = Field(
         default="/bin/bash",
         description="Shell to use for command execution"
@@ -99,27 +253,75 @@ class Config(BaseModel):
         Returns:
             Tuple of (is_allowed, reason)
         """
+        is_allowed, reason, _ = self.check_command(command)
+        return is_allowed, reason
+
+    def check_command(self, command: str) -> tuple[bool, str, CommandPattern | None]:
+        """
+        Check if a command is allowed and report the pattern that decided it.
+
+        Returns:
+            Tuple of (is_allowed, reason, matching blocked or allowed pattern or None)
+        """
         # First check blocked commands - they always take precedence
         for blocked in self.blocked_commands:
             if blocked.matches(command):
-                return False, f"Command matches blocked pattern: {blocked.description or blocked.pattern}"
+                return (
+                    False,
+                    f"Command matches blocked pattern: {blocked.description or blocked.pattern}",
+                    blocked,
+                )
 
         # Check if in allowed commands
         for allowed in self.allowed_commands:
             if allowed.matches(command):
-                return True, f"Command matches allowed pattern: {allowed.description or allowed.pattern}"
+                return (
+                    True,
+                    f"Command matches allowed pattern: {allowed.description or allowed.pattern}",
+                    allowed,
+                )
 
         # Check session-approved commands
         if command in self.session_approved_commands:
-            return True, "Command was approved during this session"
+            return True, "Command was approved during this session", None
 
         # Handle based on permission mode
         if self.permission_mode == PermissionMode.ALLOW_ALL:
-            return True, "allow_all mode is enabled"
+            return True, "allow_all mode is enabled", None
         elif self.permission_mode == PermissionMode.ASK:
-            return False, "NEEDS_APPROVAL"
+            return False, "NEEDS_APPROVAL", None
         else:  # ALLOWLIST
-            return False, "Command not in allow list"
+            return False, "Command not in allow list", None
+
+    def check_path(self, path: str) -> tuple[bool, str]:
+        """
+        Check if the file tools may access a path, already resolved with realpath.
+
+        The path must be inside allowed_directories and must not match a regex
+        blocked pattern: the sensitive-file rules (.*\\.ssh/, .*/etc/shadow, ...)
+        apply to paths as they do to command lines.
+
+        Returns:
+            Tuple of (is_allowed, reason)
+        """
+        blocked = self.blocked_path(path)
+        if blocked is not None:
+            return False, f"Path matches blocked pattern: {blocked}"
+
+        for allowed_dir in self.allowed_directories:
+            root = os.path.realpath(os.path.expanduser(allowed_dir))
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return True, "Path is in allowed directories"
+
+        return False, "Path not in allowed directories"
+
+    def blocked_path(self, path: str) -> str | None:
+        """The regex blocked pattern a resolved path matches (its description), or None."""
+        for blocked in self.blocked_commands:
+            # Directories are matched with a trailing slash, so ~/.ssh itself is covered
+            if blocked.is_regex and (blocked.matches(path) or blocked.matches(path + "/")):
+                return blocked.description or blocked.pattern
+        return None
 
     def approve_command_for_session(self, command: str) -> None:
         """Approve a command for the current session."""
@@ -139,120 +341,129 @@ def get_default_config_path() -> Path:
     return config_dir / "config.yaml"
 
 
+def get_default_state_dir() -> Path:
+    """Get the directory for runtime state (session databases, logs)."""
+    xdg_state = os.environ.get("XDG_STATE_HOME")
+    if xdg_state:
+        return Path(xdg_state) / "host-terminal-mcp"
+    return Path.home() / ".local" / "state" / "host-terminal-mcp"
+
+
 def get_default_allowed_commands() -> list[CommandPattern]:
     """Get the default list of allowed developer commands."""
     return [
         # File listing and navigation
-        CommandPattern(pattern="ls", description="List directory contents"),
-        CommandPattern(pattern="ll", description="List directory contents (long format alias)"),
-        CommandPattern(pattern="la", description="List all files including hidden"),
-        CommandPattern(pattern="pwd", description="Print working directory"),
+        CommandPattern(pattern="ls", description="List directory contents", cacheable=True),
+        CommandPattern(pattern="ll", description="List directory contents (long format alias)", cacheable=True),
+        CommandPattern(pattern="la", description="List all files including hidden", cacheable=True),
+        CommandPattern(pattern="pwd", description="Print working directory", cacheable=True),
         CommandPattern(pattern="tree", description="Display directory tree"),
         CommandPattern(pattern="find ", description="Find files", is_regex=False),
         CommandPattern(pattern="locate ", description="Locate files"),
-        CommandPattern(pattern="which ", description="Locate a command"),
-        CommandPattern(pattern="whereis ", description="Locate binary, source, and manual"),
-        CommandPattern(pattern="file ", description="Determine file type"),
+        CommandPattern(pattern="which ", description="Locate a command", cacheable=True),
+        CommandPattern(pattern="whereis ", description="Locate binary, source, and manual", cacheable=True),
+        CommandPattern(pattern="file ", description="Determine file type", cacheable=True),
 
         # File content viewing
-        CommandPattern(pattern="cat ", description="Display file contents"),
-        CommandPattern(pattern="head ", description="Display first lines of file"),
-        CommandPattern(pattern="tail ", description="Display last lines of file"),
+        CommandPattern(pattern="cat ", description="Display file contents", cacheable=True),
+        CommandPattern(pattern="head ", description="Display first lines of file", cacheable=True),
+        CommandPattern(pattern="tail ", description="Display last lines of file", cacheable=True),
         CommandPattern(pattern="less ", description="View file with pagination"),
         CommandPattern(pattern="more ", description="View file with pagination"),
-        CommandPattern(pattern="bat ", description="Cat with syntax highlighting"),
-        CommandPattern(pattern="wc ", description="Word, line, character count"),
+        CommandPattern(pattern="bat ", description="Cat with syntax highlighting", cacheable=True),
+        CommandPattern(pattern="wc ", description="Word, line, character count", cacheable=True),
 
         # Search and grep
-        CommandPattern(pattern="grep ", description="Search text patterns"),
-        CommandPattern(pattern="rg ", description="Ripgrep - fast search"),
-        CommandPattern(pattern="ag ", description="Silver searcher"),
-        CommandPattern(pattern="ack ", description="Ack search tool"),
+        CommandPattern(pattern="grep ", description="Search text patterns", cacheable=True),
+        CommandPattern(pattern="rg ", description="Ripgrep - fast search", cacheable=True),
+        CommandPattern(pattern="ag ", description="Silver searcher", cacheable=True),
+        CommandPattern(pattern="ack ", description="Ack search tool", cacheable=True),
         CommandPattern(pattern="fzf", description="Fuzzy finder"),
 
         # Git read operations
-        CommandPattern(pattern="git status", description="Git status"),
+        CommandPattern(pattern="git status", description="Git status", cacheable=True),
+        # log, diff and show can write a file with --output, so they are not cacheable
         CommandPattern(pattern="git log", description="Git log"),
         CommandPattern(pattern="git diff", description="Git diff"),
         CommandPattern(pattern="git show", description="Git show"),
         CommandPattern(pattern="git branch", description="Git branches"),
         CommandPattern(pattern="git remote", description="Git remotes"),
         CommandPattern(pattern="git tag", description="Git tags"),
-        CommandPattern(pattern="git stash list", description="Git stash list"),
-        CommandPattern(pattern="git rev-parse", description="Git rev-parse"),
-        CommandPattern(pattern="git config --get", description="Git config read"),
-        CommandPattern(pattern="git config --list", description="Git config list"),
-        CommandPattern(pattern="git blame", description="Git blame"),
-        CommandPattern(pattern="git shortlog", description="Git shortlog"),
-        CommandPattern(pattern="git describe", description="Git describe"),
+        CommandPattern(pattern="git stash list", description="Git stash list", cacheable=True),
+        CommandPattern(pattern="git rev-parse", description="Git rev-parse", cacheable=True),
+        CommandPattern(pattern="git config --get", description="Git config read", cacheable=True),
+        CommandPattern(pattern="git config --list", description="Git config list", cacheable=True),
+        CommandPattern(pattern="git blame", description="Git blame", cacheable=True),
+        CommandPattern(pattern="git shortlog", description="Git shortlog", cacheable=True),
+        CommandPattern(pattern="git describe", description="Git describe", cacheable=True),
 
         # System info
-        CommandPattern(pattern="uname", description="System info"),
+        CommandPattern(pattern="uname", description="System info", cacheable=True),
         CommandPattern(pattern="hostname", description="System hostname"),
-        CommandPattern(pattern="whoami", description="Current user"),
-        CommandPattern(pattern="id", description="User/group IDs"),
+        CommandPattern(pattern="whoami", description="Current user", cacheable=True),
+        CommandPattern(pattern="id", description="User/group IDs", cacheable=True),
         CommandPattern(pattern="date", description="Current date/time"),
-        CommandPattern(pattern="uptime", description="System uptime"),
-        CommandPattern(pattern="df", description="Disk space usage"),
-        CommandPattern(pattern="du ", description="Directory space usage"),
-        CommandPattern(pattern="free", description="Memory usage"),
+        CommandPattern(pattern="uptime", description="System uptime", cacheable=True),
+        CommandPattern(pattern="df", description="Disk space usage", cacheable=True),
+        CommandPattern(pattern="du ", description="Directory space usage", cacheable=True),
+        CommandPattern(pattern="free", description="Memory usage", cacheable=True),
         CommandPattern(pattern="top -l 1", description="Process info (macOS)"),
-        CommandPattern(pattern="ps", description="Process status"),
+        CommandPattern(pattern="ps", description="Process status", cacheable=True),
 
         # Network info (read-only)
         CommandPattern(pattern="ping -c", description="Ping with count"),
         CommandPattern(pattern="curl -I", description="HTTP headers only"),
         CommandPattern(pattern="curl --head", description="HTTP headers only"),
-        CommandPattern(pattern="dig ", description="DNS lookup"),
-        CommandPattern(pattern="nslookup ", description="DNS lookup"),
-        CommandPattern(pattern="host ", description="DNS lookup"),
+        CommandPattern(pattern="dig ", description="DNS lookup", cacheable=True),
+        CommandPattern(pattern="nslookup ", description="DNS lookup", cacheable=True),
+        CommandPattern(pattern="host ", description="DNS lookup", cacheable=True),
         CommandPattern(pattern="ifconfig", description="Network interfaces"),
         CommandPattern(pattern="ip addr", description="IP addresses"),
-        CommandPattern(pattern="netstat", description="Network stats"),
-        CommandPattern(pattern="ss ", description="Socket stats"),
+        CommandPattern(pattern="netstat", description="Network stats", cacheable=True),
+        CommandPattern(pattern="ss ", description="Socket stats", cacheable=True),
 
         # Package managers (info only)
-        CommandPattern(pattern="npm list", description="NPM list packages"),
-        CommandPattern(pattern="npm ls", description="NPM list packages"),
-        CommandPattern(pattern="npm view", description="NPM view package"),
-        CommandPattern(pattern="npm show", description="NPM show package"),
-        CommandPattern(pattern="npm outdated", description="NPM outdated packages"),
-        CommandPattern(pattern="pip list", description="Pip list packages"),
-        CommandPattern(pattern="pip show", description="Pip show package"),
-        CommandPattern(pattern="pip freeze", description="Pip freeze"),
-        CommandPattern(pattern="brew list", description="Homebrew list"),
-        CommandPattern(pattern="brew info", description="Homebrew info"),
-        CommandPattern(pattern="apt list", description="APT list packages"),
-        CommandPattern(pattern="dpkg -l", description="DPKG list packages"),
+        CommandPattern(pattern="npm list", description="NPM list packages", cacheable=True),
+        CommandPattern(pattern="npm ls", description="NPM list packages", cacheable=True),
+        CommandPattern(pattern="npm view", description="NPM view package", cacheable=True),
+        CommandPattern(pattern="npm show", description="NPM show package", cacheable=True),
+        CommandPattern(pattern="npm outdated", description="NPM outdated packages", cacheable=True),
+        CommandPattern(pattern="pip list", description="Pip list packages", cacheable=True),
+        CommandPattern(pattern="pip show", description="Pip show package", cacheable=True),
+        CommandPattern(pattern="pip freeze", description="Pip freeze", cacheable=True),
+        CommandPattern(pattern="brew list", description="Homebrew list", cacheable=True),
+        CommandPattern(pattern="brew info", description="Homebrew info", cacheable=True),
+        CommandPattern(pattern="apt list", description="APT list packages", cacheable=True),
+        CommandPattern(pattern="dpkg -l", description="DPKG list packages", cacheable=True),
 
         # Development tools (read operations)
-        CommandPattern(pattern="python --version", description="Python version"),
-        CommandPattern(pattern="python3 --version", description="Python3 version"),
-        CommandPattern(pattern="node --version", description="Node version"),
-        CommandPattern(pattern="npm --version", description="NPM version"),
-        CommandPattern(pattern="cargo --version", description="Cargo version"),
-        CommandPattern(pattern="rustc --version", description="Rust version"),
-        CommandPattern(pattern="go version", description="Go version"),
-        CommandPattern(pattern="java --version", description="Java version"),
-        CommandPattern(pattern="javac --version", description="Javac version"),
-        CommandPattern(pattern="ruby --version", description="Ruby version"),
-        CommandPattern(pattern="docker --version", description="Docker version"),
-        CommandPattern(pattern="docker ps", description="Docker containers"),
-        CommandPattern(pattern="docker images", description="Docker images"),
-        CommandPattern(pattern="docker logs", description="Docker logs"),
+        CommandPattern(pattern="python --version", description="Python version", cacheable=True),
+        CommandPattern(pattern="python3 --version", description="Python3 version", cacheable=True),
+        CommandPattern(pattern="node --version", description="Node version", cacheable=True),
+        CommandPattern(pattern="npm --version", description="NPM version", cacheable=True),
+        CommandPattern(pattern="cargo --version", description="Cargo version", cacheable=True),
+        CommandPattern(pattern="rustc --version", description="Rust version", cacheable=True),
+        CommandPattern(pattern="go version", description="Go version", cacheable=True),
+        CommandPattern(pattern="java --version", description="Java version", cacheable=True),
+        CommandPattern(pattern="javac --version", description="Javac version", cacheable=True),
+        CommandPattern(pattern="ruby --version", description="Ruby version", cacheable=True),
+        CommandPattern(pattern="docker --version", description="Docker version", cacheable=True),
+        CommandPattern(pattern="docker ps", description="Docker containers", cacheable=True),
+        CommandPattern(pattern="docker images", description="Docker images", cacheable=True),
+        CommandPattern(pattern="docker logs", description="Docker logs", cacheable=True),
 
         # JSON/YAML processing
-        CommandPattern(pattern="jq ", description="JSON processor"),
+        CommandPattern(pattern="jq ", description="JSON processor", cacheable=True),
         CommandPattern(pattern="yq ", description="YAML processor"),
 
         # Misc read operations
         CommandPattern(pattern="man ", description="Manual pages"),
         CommandPattern(pattern="help ", description="Help for commands"),
-        CommandPattern(pattern="type ", description="Command type"),
-        CommandPattern(pattern="stat ", description="File statistics"),
-        CommandPattern(pattern="md5sum ", description="MD5 checksum"),
-        CommandPattern(pattern="sha256sum ", description="SHA256 checksum"),
-        CommandPattern(pattern="shasum ", description="SHA checksum"),
+        CommandPattern(pattern="type ", description="Command type", cacheable=True),
+        CommandPattern(pattern="stat ", description="File statistics", cacheable=True),
+        CommandPattern(pattern="md5sum ", description="MD5 checksum", cacheable=True),
+        CommandPattern(pattern="sha256sum ", description="SHA256 checksum", cacheable=True),
+        CommandPattern(pattern="shasum ", description="SHA checksum", cacheable=True),
     ]
 
 
@@ -417,14 +628,25 @@ def save_config(config: Config, config_path: Path | None = None) -> None:
 
     # Convert permission_mode enum to string value
     data["permission_mode"] = config.permission_mode.value
+    data["trace_format"] = config.trace_format.value
 
     # Convert CommandPattern objects to dicts
     data["allowed_commands"] = [
-        {"pattern": cmd["pattern"], "description": cmd["description"], "is_regex": cmd["is_regex"]}
+        {
+            "pattern": cmd["pattern"],
+            "description": cmd["description"],
+            "is_regex": cmd["is_regex"],
+            "cacheable": cmd["cacheable"],
+        }
         for cmd in data["allowed_commands"]
     ]
     data["blocked_commands"] = [
-        {"pattern": cmd["pattern"], "description": cmd["description"], "is_regex": cmd["is_regex"]}
+        {
+            "pattern": cmd["pattern"],
+            "description": cmd["description"],
+            "is_regex": cmd["is_regex"],
+            "cacheable": cmd["cacheable"],
+        }
         for cmd in data["blocked_commands"]
     ]
 
@@ -0,0 +1,245 @@
+"""Parallel, cached disk usage for the disk_usage tool.
+
+``DiskUsage.measure`` answers what ``du -d N | sort -h | tail`` would:
+the total under a directory and its largest subtrees down to a depth.
+Sizes are allocated bytes (``st_blocks * 512``), as du reports, with the
+apparent size (``st_size``) alongside.
+
+The tree is walked breadth-first, each level's directories scanned with
+``os.scandir`` in a thread pool. Every directory's own totals (the files
+directly in it, and its subdirectory names) are cached keyed by the
+directory's mtime, which changes whenever an entry is added, removed or
+renamed in it. A repeated run stats each directory and re-scans only
+those whose mtime moved, so re-measuring an unchanged home directory
+costs one stat per directory instead of one per file. A file that grows
+in place (or gains a hard link elsewhere) does not touch its directory's
+mtime; pass ``refresh`` to re-scan everything.
+
+Symlinks are counted but not followed, a file with several hard links
+is counted once, and directories on other filesystems are skipped unless
+``cross_filesystems`` is set, so the walk stays inside the directory it
+was given.
+"""
+
+import itertools
+import os
+import stat
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from .listing import MAX_DEPTH
+from .workers import LRUCache, WorkerPool
+
+# Directories whose totals are cached; each entry is a few hundred bytes
+DISK_USAGE_CACHE_SIZE = 100_000
+
+# Directories handed to a worker at a time; one task per directory costs
+# more in futures than a cached directory takes to check
+_BATCH_SIZE = 256
+
+
+@dataclass(frozen=True)
+class _Directory:
+    """What one scan of a directory found, not counting its subdirectories' contents."""
+
+    mtime_ns: int
+    bytes: int  # Allocated bytes of the directory itself and the single-link files in it
+    apparent_bytes: int
+    files: int
+    subdirectories: tuple[tuple[str, int], ...]  # (name, st_dev)
+    # Files with several hard links, counted only where the walk first meets them
+    links: tuple[tuple[int, int, int, int], ...]  # (st_dev, st_ino, allocated, apparent)
+
+
+def _scan(path: str, st: os.stat_result) -> _Directory:
+    allocated = st.st_blocks * 512
+    apparent = st.st_size
+    files = 0
+    subdirectories = []
+    links = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                entry_st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(entry_st.st_mode):
+                subdirectories.append((entry.name, entry_st.st_dev))
+            elif entry_st.st_nlink > 1:
+                links.append(
+                    (entry_st.st_dev, entry_st.st_ino, entry_st.st_blocks * 512, entry_st.st_size)
+                )
+            else:
+                allocated += entry_st.st_blocks * 512
+                apparent += entry_st.st_size
+                files += 1
+    return _Directory(
+        st.st_mtime_ns, allocated, apparent, files, tuple(subdirectories), tuple(links)
+    )
+
+
+class DiskUsage:
+    """
+    Measure directory trees, caching each directory's scan between calls.
+
+    Args:
+        workers: Threads scanning directories
+        cache_size: Directories whose scan is kept
+    """
+
+    def __init__(self, workers: int, cache_size: int = DISK_USAGE_CACHE_SIZE):
+        self.pool = WorkerPool(workers, "du")
+        self._cache: LRUCache[str, _Directory] = LRUCache(cache_size)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _directory(self, path: str, refresh: bool) -> tuple[_Directory | None, bool]:
+        """The scan of path, and whether it was read from disk rather than the cache."""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None, False
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(path)
+                if cached is not None and cached.mtime_ns == st.st_mtime_ns:
+                    return cached, False
+        try:
+            directory = _scan(path, st)
+        except OSError:
+            # Unreadable: counted as empty, and not cached so a later run retries
+            return None, True
+        with self._lock:
+            self._cache.put(path, directory)
+        return directory, True
+
+    def _directories(self, paths: list[str], refresh: bool) -> list[tuple[_Directory | None, bool]]:
+        return [self._directory(path, refresh) for path in paths]
+
+    def measure(
+        self,
+        root: str,
+        depth: int = 2,
+        limit: int = 20,
+        cross_filesystems: bool = False,
+        refresh: bool = False,
+        exclude: Callable[[str], bool] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Total size of the tree under root, and its largest subtrees, like du.
+
+        Args:
+            root: Directory to measure
+            depth: Deepest level of subtrees considered for the largest list
+            limit: Largest subtrees returned
+            cross_filesystems: Descend into directories on other filesystems
+            refresh: Re-scan every directory instead of using cached scans
+            exclude: Called with each subdirectory; True skips its subtree,
+                which then counts toward no total
+
+        Raises:
+            ValueError: For an invalid argument, or a path that is not a directory
+            OSError: If root cannot be read
+        """
+        if not 1 <= depth <= MAX_DEPTH:
+            raise ValueError(f"depth must be between 1 and {MAX_DEPTH}")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if not os.path.isdir(root):
+            raise ValueError(f"Not a directory: {root}")
+        # Unreadable subdirectories count as empty, but an unreadable root is an error
+        os.scandir(root).close()
+        root_device = os.stat(root).st_dev
+
+        # Breadth-first, one level of directories scanned in parallel at a time
+        # Each directory's own (allocated, apparent, files), and its level
+        found: dict[str, tuple[tuple[int, int, int], int]] = {}
+        children: dict[str, list[str]] = {}
+        seen_links: set[tuple[int, int]] = set()
+        scanned = cached = unreadable = 0
+        level = 0
+        frontier = [root]
+        while frontier:
+            batches = [
+                frontier[start : start + _BATCH_SIZE]
+                for start in range(0, len(frontier), _BATCH_SIZE)
+            ]
+            results = itertools.chain.from_iterable(
+                self.pool.map(self._directories, batches, itertools.repeat(refresh))
+            )
+            next_frontier = []
+            for path, (directory, from_disk) in zip(frontier, results, strict=True):
+                if directory is None:
+                    unreadable += 1
+                    continue
+                if from_disk:
+                    scanned += 1
+                else:
+                    cached += 1
+                allocated, apparent, files = (
+                    directory.bytes,
+                    directory.apparent_bytes,
+                    directory.files,
+                )
+                for device, inode, link_allocated, link_apparent in directory.links:
+                    if (device, inode) not in seen_links:
+                        seen_links.add((device, inode))
+                        allocated += link_allocated
+                        apparent += link_apparent
+                        files += 1
+                found[path] = ((allocated, apparent, files), level)
+                children[path] = []
+                for name, device in directory.subdirectories:
+                    if device != root_device and not cross_filesystems:
+                        continue
+                    child = os.path.join(path, name)
+                    if exclude is not None and exclude(child):
+                        continue
+                    children[path].append(child)
+                    next_frontier.append(child)
+            frontier = next_frontier
+            level += 1
+
+        # Children were found after their parents, so totals add up in reverse
+        totals: dict[str, tuple[int, int, int]] = {}
+        for path in reversed(found):
+            (allocated, apparent, files), _ = found[path]
+            for child in children[path]:
+                if child in totals:
+                    child_allocated, child_apparent, child_files = totals[child]
+                    allocated += child_allocated
+                    apparent += child_apparent
+                    files += child_files
+            totals[path] = (allocated, apparent, files)
+
+        prefix = len(root.rstrip(os.sep)) + 1
+        subtrees = sorted(
+            (path for path, (_, path_level) in found.items() if 1 <= path_level <= depth),
+            key=lambda path: totals[path][0],
+            reverse=True,
+        )
+        total = totals.get(root, (0, 0, 0))
+        return {
+            "status": "success",
+            "path": root,
+            "bytes": total[0],
+            "apparent_bytes": total[1],
+            "files": total[2],
+            "directories": len(found),
+            "scanned": scanned,
+            "cached": cached,
+            "unreadable": unreadable,
+            "largest": [
+                {
+                    "path": path[prefix:],
+                    "bytes": totals[path][0],
+                    "apparent_bytes": totals[path][1],
+                    "files": totals[path][2],
+                }
+                for path in subtrees[:limit]
+            ],
+        }
@@ -1,11 +1,36 @@
 """Command execution with safety controls."""
 
 import asyncio
+import base64
 import os
-from dataclasses import dataclass
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, replace
+from enum import Enum
 from pathlib import Path
 
-from .config import Config
+from .audit import AuditLog
+from .config import CommandPattern, Config, TraceFormat
+from .metrics import OTHER_PATTERN, CommandMetrics
+from .pty_session import DEFAULT_COLS, DEFAULT_ROWS, PtySession, open_pty_process, strip_ansi
+from .tracing import Tracer
+
+# Commands whose metrics label is remembered between the permission check and the run
+PATTERN_LABEL_CACHE_SIZE = 1024
+
+# Shell syntax that runs more than the matched command or writes files:
+# ; & | ` $( > and newlines
+_SHELL_OPERATORS = re.compile(r"[;&|`>\n]|\$\(")
+
+
+class OutputEncoding(str, Enum):
+    """How command stdout is returned to the caller."""
+
+    TEXT = "text"  # Decoded as UTF-8, invalid bytes replaced
+    BASE64 = "base64"  # Raw bytes, base64-encoded, never decoded
+    RAW = "raw"  # Raw bytes streamed as produced (HTTP only, see stream_output)
 
 
 @dataclass
@@ -19,6 +44,15 @@ class ExecutionResult:
     timed_out: bool = False
     truncated: bool = False
     working_directory: str = ""
+    output_encoding: OutputEncoding = OutputEncoding.TEXT
+
+
+@dataclass
+class ExecutorStats:
+    """Counters describing how commands were executed."""
+
+    spawned: int = 0  # Subprocesses actually started
+    coalesced: int = 0  # Requests served by attaching to an identical in-flight run
 
 
 class CommandExecutor:
@@ -27,6 +61,31 @@ class CommandExecutor:
     def __init__(self, config: Config):
         self.config = config
         self._current_directory = str(Path.home())
+        self.stats = ExecutorStats()
+        self.metrics = CommandMetrics()
+        self.tracer = Tracer.from_file(
+            config.trace_file, otlp=config.trace_format == TraceFormat.OTLP
+        )
+        self.audit = (
+            AuditLog(
+                config.audit_log,
+                config.audit_max_bytes,
+                config.audit_backup_count,
+                config.audit_buffer_size,
+                config.audit_flush_interval_seconds,
+                on_drop=lambda count: self.metrics.audit_dropped.inc(count),
+            )
+            if config.audit_log
+            else None
+        )
+        # Metrics label (matched config pattern) of recently seen commands
+        self._pattern_labels: dict[str, str] = {}
+        # Tasks that record each subprocess's exit for the metrics
+        self._exit_watchers: set[asyncio.Task[None]] = set()
+        # Identical read-only commands currently running, keyed by (command, cwd, encoding)
+        self._inflight: dict[tuple[str, str, str], asyncio.Task[ExecutionResult]] = {}
+        # Interactive terminal sessions that outlive a single call, keyed by session id
+        self._pty_sessions: dict[str, PtySession] = {}
 
     @property
     def current_directory(self) -> str:
@@ -40,12 +99,26 @@ class CommandExecutor:
         Returns:
             Tuple of (success, message)
         """
+        success, result = self.resolve_directory(path, self._current_directory)
+        if not success:
+            return False, result
+
+        self._current_directory = result
+        return True, f"Changed directory to: {result}"
+
+    def resolve_directory(self, path: str, base: str) -> tuple[bool, str]:
+        """
+        Resolve a cd target relative to base and check it is allowed.
+
+        Returns:
+            Tuple of (success, resolved path or error message)
+        """
         # Expand user home directory
         expanded_path = os.path.expanduser(path)
 
         # Make absolute if relative
         if not os.path.isabs(expanded_path):
-            expanded_path = os.path.join(self._current_directory, expanded_path)
+            expanded_path = os.path.join(base, expanded_path)
 
         # Normalize the path
         normalized_path = os.path.normpath(expanded_path)
@@ -71,10 +144,115 @@ class CommandExecutor:
         if not is_allowed:
             return False, f"Directory not in allowed paths: {normalized_path}"
 
-        self._current_directory = normalized_path
-        return True, f"Changed directory to: {normalized_path}"
+        return True, normalized_path
+
+    def check_permission(self, command: str) -> tuple[bool, str]:
+        """
+        Check a command against the config, recording the check's latency and any denial.
+
+        Returns:
+            Tuple of (is_allowed, reason) as from Config.is_command_allowed
+        """
+        with self.tracer.span("permission.check") as span:
+            started = time.perf_counter()
+            is_allowed, reason, pattern = self.config.check_command(command)
+            label = self._remember_pattern(command, pattern)
+            if is_allowed:
+                outcome = "allowed"
+            elif reason == "NEEDS_APPROVAL":
+                outcome = "needs_approval"
+            elif pattern is not None:
+                outcome = "blocked"
+            else:
+                outcome = "not_allowed"
+            span.set_attribute("outcome", outcome)
+            span.set_attribute("pattern", label)
+        self.metrics.permission_check_seconds.observe(
+            time.perf_counter() - started, outcome=outcome, pattern=label
+        )
+        if not is_allowed:
+            self.metrics.denials.inc(reason=outcome, pattern=label)
+            self._audit_denial(outcome, command, label, None)
+        return is_allowed, reason
+
+    def record_denial(self, reason: str, command: str, cwd: str | None = None) -> None:
+        """Count a command refused for a reason other than its permission check."""
+        label = self.pattern_label(command)
+        self.metrics.denials.inc(reason=reason, pattern=label)
+        self._audit_denial(reason, command, label, cwd)
+
+    def _audit_denial(self, reason: str, command: str, label: str, cwd: str | None) -> None:
+        if self.audit is not None:
+            self.audit.record(
+                command=command, cwd=cwd, decision=reason, pattern=label, exit_code=None
+            )
+
+    def audit_execution(
+        self,
+        command: str,
+        cwd: str,
+        mode: str,
+        duration: float,
+        exit_code: int | None,
+        timed_out: bool = False,
+        stdout_bytes: int = 0,
+        stderr_bytes: int = 0,
+    ) -> None:
+        """
+        Queue an audit record for a command that ran; does nothing unless audit_log is set.
 
-    def _build_environment(self) -> dict[str, str]:
+        Args:
+            command: The command line
+            cwd: Working directory it ran in
+            mode: How it ran: pipe, pty, stream, ws or terminal
+            duration: Seconds from spawning it to its exit
+            exit_code: Its exit code, or None if it never exited normally
+            timed_out: Whether it was killed at timeout_seconds
+            stdout_bytes: Bytes of stdout read (all output, for PTYs)
+            stderr_bytes: Bytes of stderr read
+        """
+        if self.audit is None:
+            return
+        self.audit.record(
+            command=command,
+            cwd=cwd,
+            decision="allowed",
+            pattern=self.pattern_label(command),
+            mode=mode,
+            exit_code=exit_code,
+            timed_out=timed_out,
+            duration_ms=round(duration * 1000, 3),
+            stdout_bytes=stdout_bytes,
+            stderr_bytes=stderr_bytes,
+        )
+
+    def pattern_label(self, command: str) -> str:
+        """The metrics label for a command: the config pattern it matches, or "other"."""
+        label = self._pattern_labels.get(command)
+        if label is None:
+            _, _, pattern = self.config.check_command(command)
+            label = self._remember_pattern(command, pattern)
+        return label
+
+    def _remember_pattern(self, command: str, pattern: CommandPattern | None) -> str:
+        label = pattern.pattern if pattern is not None else OTHER_PATTERN
+        if len(self._pattern_labels) >= PATTERN_LABEL_CACHE_SIZE:
+            self._pattern_labels.clear()
+        self._pattern_labels[command] = label
+        return label
+
+    def _directory_not_allowed(self, command: str, cwd: str) -> ExecutionResult:
+        """Result for a command whose working directory is outside allowed_directories."""
+        self.record_denial("directory", command, cwd)
+        return ExecutionResult(
+            command=command,
+            stdout="",
+            stderr=f"Working directory not allowed: {cwd}",
+            return_code=1,
+            working_directory=cwd,
+        )
+
+    def build_environment(self) -> dict[str, str]:
         """Build environment variables for command execution."""
         env = {}
         for var in self.config.environment_passthrough:
@@ -82,10 +260,60 @@ class CommandExecutor:
                 env[var] = os.environ[var]
         return env
 
+    def resolve_working_directory(self, working_directory: str | None = None) -> tuple[str, bool]:
+        """
+        Resolve the directory a command would run in.
+
+        Returns:
+            Tuple of (resolved path, whether it is inside allowed_directories)
+        """
+        # Use provided directory or current directory
+        cwd = working_directory or self._current_directory
+
+        # Expand, normalize, and resolve symlinks to prevent traversal
+        cwd = os.path.realpath(os.path.expanduser(cwd))
+
+        # Verify working directory is allowed
+        for allowed_dir in self.config.allowed_directories:
+            allowed_expanded = os.path.realpath(os.path.expanduser(allowed_dir))
+            if cwd.startswith(allowed_expanded):
+                return cwd, True
+
+        return cwd, False
+
+    def resolve_path(self, path: str, base: str | None = None) -> tuple[str, str | None]:
+        """
+        Resolve a path given to a file tool and check that it may be accessed.
+
+        Relative paths are taken from base (default: the current directory).
+
+        Returns:
+            Tuple of (resolved path, error message or None if allowed)
+        """
+        expanded = os.path.expanduser(path)
+        if not os.path.isabs(expanded):
+            expanded = os.path.join(base or self._current_directory, expanded)
+        # Resolve symlinks, so a link cannot lead outside allowed_directories
+        resolved = os.path.realpath(expanded)
+        is_allowed, reason = self.config.check_path(resolved)
+        if not is_allowed:
+            return resolved, f"Access denied: {resolved}: {reason}"
+        return resolved, None
+
+    def is_allowed_command(self, command: str) -> bool:
+        """Whether the permission config lets command run without asking."""
+        is_allowed, _, _ = self.config.check_command(command)
+        return is_allowed
+
+    def is_blocked_path(self, path: str) -> bool:
+        """Whether a path found by walking an allowed directory matches a blocked pattern."""
+        return self.config.blocked_path(path) is not None
+
     async def execute(
         self,
         command: str,
         working_directory: str | None = None,
+        output_encoding: OutputEncoding = OutputEncoding.TEXT,
     ) -> ExecutionResult:
         """
         Execute a command.
@@ -93,56 +321,339 @@ class CommandExecutor:
         Args:
             command: The command to execute
             working_directory: Optional working directory (uses current if not specified)
+            output_encoding: TEXT or BASE64; RAW output is only available via stream_output
 
         Returns:
             ExecutionResult with stdout, stderr, return code, etc.
         """
-        # Use provided directory or current directory
-        cwd = working_directory or self._current_directory
+        if output_encoding == OutputEncoding.RAW:
+            raise ValueError("Raw output must be streamed with stream_output()")
 
-        # Expand, normalize, and resolve symlinks to prevent traversal
-        cwd = os.path.realpath(os.path.expanduser(cwd))
+        with self.tracer.span("directory.resolve") as span:
+            cwd, is_allowed = self.resolve_working_directory(working_directory)
+            span.set_attribute("working_directory", cwd)
+            span.set_attribute("allowed", is_allowed)
 
-        # Verify working directory is allowed
-        is_allowed = False
-        for allowed_dir in self.config.allowed_directories:
-            allowed_expanded = os.path.realpath(os.path.expanduser(allowed_dir))
-            if cwd.startswith(allowed_expanded):
-                is_allowed = True
-                break
+        if not is_allowed:
+            return self._directory_not_allowed(command, cwd)
+
+        if not self._can_coalesce(command):
+            return await self._run(command, cwd, output_encoding)
+
+        # Single-flight: concurrent identical requests share one subprocess.
+        # The run is a separate task so a cancelled caller doesn't take the
+        # shared process down with it.
+        key = (command, cwd, output_encoding.value)
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._run(command, cwd, output_encoding))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(key, done))
+        else:
+            self.stats.coalesced += 1
+            with self.tracer.span("coalesce.wait"):
+                return replace(await asyncio.shield(task))
+
+        result = await asyncio.shield(task)
+        return replace(result)
+
+    def _can_coalesce(self, command: str) -> bool:
+        """Whether concurrent runs of this command may share one subprocess.
+
+        Only single commands matched by an allow-list pattern marked
+        cacheable (the read-only defaults, or patterns a user opts in) are
+        shared. Redirection, pipes, chaining, backgrounding and command
+        substitution could smuggle a side effect past the pattern, so
+        commands containing them always run on their own.
+        """
+        if not self.config.coalesce_identical_commands or _SHELL_OPERATORS.search(command):
+            return False
+        return any(
+            pattern.cacheable and pattern.matches(command)
+            for pattern in self.config.allowed_commands
+        )
+
+    def _forget_inflight(self, key: tuple[str, str, str], task: asyncio.Task[ExecutionResult]) -> None:
+        """Drop a finished run from the in-flight registry."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _spawn(
+        self,
+        command: str,
+        cwd: str,
+        stderr: int = asyncio.subprocess.PIPE,
+        stdin: int = asyncio.subprocess.DEVNULL,
+    ) -> asyncio.subprocess.Process:
+        """Start the command under the configured shell with piped stdout."""
+        self.stats.spawned += 1
+        with self.tracer.span("process.spawn", command=command) as span:
+            started = time.perf_counter()
+            process = await asyncio.create_subprocess_shell(
+                command,
+                # Never inherit the server's stdin: in stdio mode it carries the MCP
+                # protocol, and when it is a socket bash sources ~/.bashrc on every
+                # command.
+                stdin=stdin,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=stderr,
+                cwd=cwd,
+                env=self.build_environment(),
+                shell=True,
+                executable=self.config.shell,
+            )
+            span.set_attribute("pid", process.pid)
+        self._watch_exit(process, self.pattern_label(command), started)
+        return process
+
+    def _watch_exit(
+        self, process: asyncio.subprocess.Process, label: str, started: float
+    ) -> None:
+        """Record spawn latency now, and the active count and run time until exit."""
+        self.metrics.spawn_seconds.observe(time.perf_counter() - started, pattern=label)
+        self.metrics.active_subprocesses.inc(pattern=label)
+        watcher = asyncio.ensure_future(self._observe_exit(process, label, started))
+        self._exit_watchers.add(watcher)
+        watcher.add_done_callback(self._exit_watchers.discard)
+
+    async def _observe_exit(
+        self, process: asyncio.subprocess.Process, label: str, started: float
+    ) -> None:
+        try:
+            await process.wait()
+        finally:
+            self.metrics.active_subprocesses.dec(pattern=label)
+        self.metrics.execution_seconds.observe(time.perf_counter() - started, pattern=label)
+
+    async def start_interactive(self, command: str, cwd: str) -> asyncio.subprocess.Process:
+        """
+        Start a command with piped stdin, stdout and stderr.
 
+        The caller owns the process: it must feed stdin, drain both output
+        pipes, enforce config.timeout_seconds and kill the process when done.
+
+        Args:
+            command: The command to execute
+            cwd: Working directory, already checked with resolve_working_directory()
+        """
+        return await self._spawn(command, cwd, stdin=asyncio.subprocess.PIPE)
+
+    async def spawn_pty(
+        self,
+        command: str,
+        cwd: str,
+        rows: int = DEFAULT_ROWS,
+        cols: int = DEFAULT_COLS,
+    ) -> PtySession:
+        """
+        Start a command on a pseudo-terminal; the caller owns the returned session.
+
+        Args:
+            command: The command to execute
+            cwd: Working directory, already checked with resolve_working_directory()
+            rows: Terminal height
+            cols: Terminal width
+        """
+        env = self.build_environment()
+        # Full-screen and colored programs need to know what they are talking to
+        env.setdefault("TERM", "xterm-256color")
+        self.stats.spawned += 1
+        with self.tracer.span("process.spawn", command=command, pty=True) as span:
+            started = time.perf_counter()
+            process, master_fd = await open_pty_process(
+                command, cwd, env, self.config.shell, rows, cols
+            )
+            span.set_attribute("pid", process.pid)
+        self._watch_exit(process, self.pattern_label(command), started)
+        return PtySession(
+            uuid.uuid4().hex[:12], command, process, master_fd, self.config.max_output_size, cwd
+        )
+
+    async def execute_pty(
+        self,
+        command: str,
+        working_directory: str | None = None,
+        rows: int = DEFAULT_ROWS,
+        cols: int = DEFAULT_COLS,
+        strip_escapes: bool = True,
+    ) -> ExecutionResult:
+        """
+        Execute a command under a pseudo-terminal and collect its output.
+
+        stdout and stderr share the terminal, so everything is returned in
+        stdout. Escape sequences are removed unless strip_escapes is False.
+        """
+        cwd, is_allowed = self.resolve_working_directory(working_directory)
         if not is_allowed:
+            return self._directory_not_allowed(command, cwd)
+
+        try:
+            session = await self.spawn_pty(command, cwd, rows, cols)
+        except Exception as e:
             return ExecutionResult(
                 command=command,
                 stdout="",
-                stderr=f"Working directory not allowed: {cwd}",
+                stderr=f"Execution error: {str(e)}",
                 return_code=1,
                 working_directory=cwd,
             )
 
-        # Build environment
-        env = self._build_environment()
-
-        # Execute the command
+        # Keep enough bytes for max_output_size characters; drain and drop the rest
+        limit = self.config.max_output_size * 4
+        output = bytearray()
+        read = 0
+        timed_out = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.timeout_seconds
         try:
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=env,
-                shell=True,
-                executable=self.config.shell,
+            with self.tracer.span("process.wait") as span:
+                while not session.finished:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    await session.wait_for_output(remaining)
+                    chunk = session.read_bytes()
+                    read += len(chunk)
+                    output += chunk[: max(limit - len(output), 0)]
+                span.set_attribute("timed_out", timed_out)
+                span.set_attribute("output_bytes", read)
+        finally:
+            await session.close()
+
+        label = self.pattern_label(command)
+        self.metrics.output_bytes.inc(read, pattern=label, stream="stdout")
+        text = output.decode("utf-8", errors="replace")
+        if strip_escapes:
+            text = strip_ansi(text)
+        stdout, truncated = self._truncate_text(text)
+        if truncated or read > limit:
+            truncated = True
+            self.metrics.truncations.inc(pattern=label)
+        if timed_out:
+            self.metrics.timeouts.inc(pattern=label)
+        self.audit_execution(
+            command,
+            cwd,
+            "pty",
+            time.monotonic() - session.started,
+            None if timed_out else session.return_code,
+            timed_out=timed_out,
+            stdout_bytes=read,
+        )
+        return ExecutionResult(
+            command=command,
+            stdout=stdout,
+            stderr=(
+                f"Command timed out after {self.config.timeout_seconds} seconds"
+                if timed_out
+                else ""
+            ),
+            return_code=-1 if timed_out else session.return_code or 0,
+            timed_out=timed_out,
+            truncated=truncated,
+            working_directory=cwd,
+        )
+
+    async def start_terminal(
+        self,
+        command: str,
+        working_directory: str | None = None,
+        rows: int = DEFAULT_ROWS,
+        cols: int = DEFAULT_COLS,
+    ) -> tuple[PtySession | None, str]:
+        """
+        Start an interactive terminal session that persists across calls.
+
+        Sessions idle for longer than terminal_idle_timeout_seconds are killed.
+
+        Returns:
+            Tuple of (session, error message); session is None on error
+        """
+        cwd, is_allowed = self.resolve_working_directory(working_directory)
+        if not is_allowed:
+            self.record_denial("directory", command, cwd)
+            return None, f"Working directory not allowed: {cwd}"
+
+        await self.reap_idle_terminals()
+        if len(self._pty_sessions) >= self.config.max_terminal_sessions:
+            return None, (
+                f"Too many terminal sessions ({self.config.max_terminal_sessions} open); "
+                "close one first"
             )
 
+        session = await self.spawn_pty(command, cwd, rows, cols)
+        self._pty_sessions[session.session_id] = session
+        return session, ""
+
+    def get_terminal(self, session_id: str) -> PtySession | None:
+        """Look up an open terminal session."""
+        return self._pty_sessions.get(session_id)
+
+    async def close_terminal(self, session_id: str) -> bool:
+        """Kill and forget a terminal session; returns whether it existed."""
+        session = self._pty_sessions.pop(session_id, None)
+        if session is None:
+            return False
+        await session.close()
+        self.audit_execution(
+            session.command,
+            session.cwd,
+            "terminal",
+            time.monotonic() - session.started,
+            session.return_code,
+            stdout_bytes=session.bytes_read,
+        )
+        return True
+
+    async def close_all_terminals(self) -> None:
+        """Kill every open terminal session (on shutdown)."""
+        for session_id in list(self._pty_sessions):
+            await self.close_terminal(session_id)
+
+    async def reap_idle_terminals(self) -> int:
+        """Close terminal sessions unused for terminal_idle_timeout_seconds; returns how many."""
+        cutoff = time.monotonic() - self.config.terminal_idle_timeout_seconds
+        idle = [sid for sid, s in self._pty_sessions.items() if s.last_used < cutoff]
+        for session_id in idle:
+            await self.close_terminal(session_id)
+        return len(idle)
+
+    def _truncate_text(self, text: str) -> tuple[str, bool]:
+        """Cap decoded output at max_output_size characters."""
+        if len(text) <= self.config.max_output_size:
+            return text, False
+        text = text[: self.config.max_output_size]
+        text += f"\n\n[Output truncated at {self.config.max_output_size} characters]"
+        return text, True
+
+    async def _run(
+        self,
+        command: str,
+        cwd: str,
+        output_encoding: OutputEncoding = OutputEncoding.TEXT,
+    ) -> ExecutionResult:
+        """Spawn the command in an already validated directory and collect its output."""
+        label = self.pattern_label(command)
+        started = time.perf_counter()
+        try:
+            process = await self._spawn(command, cwd)
+
             try:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=self.config.timeout_seconds,
-                )
+                with self.tracer.span("process.wait") as span:
+                    stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                        process.communicate(),
+                        timeout=self.config.timeout_seconds,
+                    )
+                    span.set_attribute("exit_code", process.returncode or 0)
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
+                span.set_error("timed out")
+                self.metrics.timeouts.inc(pattern=label)
+                self.audit_execution(
+                    command, cwd, "pipe", time.perf_counter() - started, None, timed_out=True
+                )
                 return ExecutionResult(
                     command=command,
                     stdout="",
@@ -152,32 +663,51 @@ class CommandExecutor:
                     working_directory=cwd,
                 )
 
-            # Decode output
-            stdout = stdout_bytes.decode("utf-8", errors="replace")
-            stderr = stderr_bytes.decode("utf-8", errors="replace")
-
-            # Truncate if too large
-            truncated = False
-            if len(stdout) > self.config.max_output_size:
-                stdout = stdout[: self.config.max_output_size]
-                stdout += f"\n\n[Output truncated at {self.config.max_output_size} characters]"
-                truncated = True
+            self.metrics.output_bytes.inc(len(stdout_bytes), pattern=label, stream="stdout")
+            self.metrics.output_bytes.inc(len(stderr_bytes), pattern=label, stream="stderr")
+            self.audit_execution(
+                command,
+                cwd,
+                "pipe",
+                time.perf_counter() - started,
+                process.returncode,
+                stdout_bytes=len(stdout_bytes),
+                stderr_bytes=len(stderr_bytes),
+            )
 
-            if len(stderr) > self.config.max_output_size:
-                stderr = stderr[: self.config.max_output_size]
-                stderr += f"\n\n[Output truncated at {self.config.max_output_size} characters]"
-                truncated = True
+            with self.tracer.span(
+                "output.decode", stdout_bytes=len(stdout_bytes), stderr_bytes=len(stderr_bytes)
+            ):
+                if output_encoding == OutputEncoding.BASE64:
+                    # Binary-safe: cut at a byte boundary and never decode. No
+                    # truncation marker is appended since it would corrupt the data.
+                    stdout_truncated = len(stdout_bytes) > self.config.max_output_size
+                    stdout_bytes = stdout_bytes[: self.config.max_output_size]
+                    stdout = base64.b64encode(stdout_bytes).decode("ascii")
+                else:
+                    stdout, stdout_truncated = self._truncate_text(
+                        stdout_bytes.decode("utf-8", errors="replace")
+                    )
+
+                # stderr carries diagnostics, so it is always returned as text
+                stderr, stderr_truncated = self._truncate_text(
+                    stderr_bytes.decode("utf-8", errors="replace")
+                )
+            if stdout_truncated or stderr_truncated:
+                self.metrics.truncations.inc(pattern=label)
 
             return ExecutionResult(
                 command=command,
                 stdout=stdout,
                 stderr=stderr,
                 return_code=process.returncode or 0,
-                truncated=truncated,
+                truncated=stdout_truncated or stderr_truncated,
                 working_directory=cwd,
+                output_encoding=output_encoding,
             )
 
         except Exception as e:
+            self.audit_execution(command, cwd, "pipe", time.perf_counter() - started, None)
             return ExecutionResult(
                 command=command,
                 stdout="",
@@ -185,3 +715,97 @@ class CommandExecutor:
                 return_code=1,
                 working_directory=cwd,
             )
+
+    async def stream_output(
+        self,
+        command: str,
+        cwd: str,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a command's stdout as raw bytes while it runs.
+
+        Nothing is decoded or buffered beyond one chunk, so binary output
+        (tar, gzip -c, images) passes through untouched. stderr is discarded
+        and the exit code is not reported; use BASE64 when either matters.
+        The process is killed on timeout or when the consumer stops reading.
+
+        Args:
+            command: The command to execute
+            cwd: Working directory, already checked with resolve_working_directory()
+            chunk_size: Maximum bytes per yielded chunk
+        """
+        started = time.perf_counter()
+        process = await self._spawn(command, cwd, stderr=asyncio.subprocess.DEVNULL)
+        assert process.stdout is not None
+        label = self.pattern_label(command)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.timeout_seconds
+        sent = 0
+        timed_out = False
+
+        try:
+            while True:
+                chunk = await asyncio.wait_for(
+                    process.stdout.read(chunk_size), max(deadline - loop.time(), 0)
+                )
+                if not chunk:
+                    break
+                self.metrics.output_bytes.inc(len(chunk), pattern=label, stream="stdout")
+                sent += len(chunk)
+                yield chunk
+            await asyncio.wait_for(process.wait(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            timed_out = True
+            self.metrics.timeouts.inc(pattern=label)
+        finally:
+            # A return code set here is a real exit; a process killed below is not
+            exit_code = process.returncode
+            if exit_code is None:
+                process.kill()
+                await process.wait()
+            self.audit_execution(
+                command,
+                cwd,
+                "stream",
+                time.perf_counter() - started,
+                exit_code,
+                timed_out=timed_out,
+                stdout_bytes=sent,
+            )
+
+    async def execute_batch(
+        self,
+        commands: list[tuple[str, str | None]],
+        max_parallel: int | None = None,
+    ) -> list[ExecutionResult]:
+        """
+        Execute several independent commands concurrently.
+
+        Args:
+            commands: List of (command, working_directory) pairs
+            max_parallel: Optional concurrency cap (never above config.max_parallel_commands)
+
+        Returns:
+            One ExecutionResult per command, in the same order as the input
+        """
+        limit = self.config.max_parallel_commands
+        if max_parallel is not None:
+            limit = min(limit, max_parallel)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def run_one(command: str, working_directory: str | None) -> ExecutionResult:
+            queued = time.perf_counter()
+            with self.tracer.span("queue.wait"):
+                await semaphore.acquire()
+            try:
+                self.metrics.queue_wait_seconds.observe(
+                    time.perf_counter() - queued, pattern=self.pattern_label(command)
+                )
+                return await self.execute(command, working_directory)
+            finally:
+                semaphore.release()
+
+        return list(
+            await asyncio.gather(*(run_one(command, cwd) for command, cwd in commands))
+        )
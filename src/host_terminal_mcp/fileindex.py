@@ -0,0 +1,776 @@
+"""Background index of the allowed directories for the find_files tool.
+
+``find`` walks the tree on every call and ``locate`` answers from a
+system database that is often stale or missing. ``FileIndex`` keeps the
+paths under the allowed directories in memory instead, so a query is a
+scan of one string:
+
+- Each directory's entries are kept as its children's full paths, one
+  per line (directories end in ``/``), with the directory's mtime.
+- For queries these are joined into one newline-separated string,
+  ordered so every subtree is a contiguous slice of it. A query finds a
+  literal part of the pattern with ``str.find`` inside the slice for
+  its directory, and checks only the lines that contain it.
+
+The index is built in the background when the server starts, and kept
+fresh by inotify watches on every directory (Linux). A change to a
+directory re-reads just that directory. Every ``rescan_seconds`` the
+tree is walked again, as a fallback for missed events, directories past
+the inotify watch limit, and systems without inotify. That walk stats
+each directory and re-reads only those whose mtime changed. Each walk is
+saved as a snapshot, so after a restart queries are answered at once
+(possibly slightly stale) while the first walk catches up.
+
+Only one process maintains the index for a given snapshot file: the one
+holding a lock on it. The other workers of a multi-worker HTTP server
+stand by and walk for each query, instead of each keeping its own copy
+of the index and its own inotify watches.
+
+Memory is bounded by ``max_entries``; past it, directories are left out
+and the index reports itself incomplete. ``.git`` directories are not
+indexed. Blocked sensitive directories are skipped while walking, and
+blocked files are filtered out of results.
+"""
+
+import asyncio
+import contextlib
+import ctypes
+import errno
+import fcntl
+import gzip
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from .config import Config, get_default_state_dir
+from .gitignore import ALWAYS_IGNORED, IgnoreRules
+from .tail import IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW, inotify_libc
+
+logger = logging.getLogger("host-terminal-mcp")
+
+EntryType = Literal["file", "dir"]
+ENTRY_TYPES: tuple[EntryType, ...] = ("file", "dir")
+
+DEFAULT_LIMIT = 100
+
+SNAPSHOT_VERSION = 1
+
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x01000000
+_WATCH_MASK = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# Changes are applied this long after the first event, so a burst of
+# them (a checkout, a build) is one update
+_SETTLE_SECONDS = 0.2
+
+
+@dataclass(frozen=True)
+class _Directory:
+    """One directory's children, as indexed."""
+
+    mtime_ns: int
+    lines: str  # Children's full paths, newline-separated; directories end in "/"
+    subdirectories: tuple[str, ...]
+    entries: int
+
+
+def _sort_key(path: str) -> str:
+    # "a/b" must sort before "a-c" so that a subtree is contiguous
+    return path.replace("/", "\0")
+
+
+def _scan(path: str, mtime_ns: int, exclude: Callable[[str], bool] | None) -> _Directory:
+    lines = []
+    subdirectories = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if "\n" in entry.name:
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                # Checking every file against the blocked patterns would cost more
+                # than the walk; files are checked when they are returned instead
+                if entry.name in ALWAYS_IGNORED or (exclude is not None and exclude(entry.path)):
+                    continue
+                lines.append(entry.path + "/")
+                subdirectories.append(entry.name)
+            else:
+                lines.append(entry.path)
+    return _Directory(mtime_ns, "\n".join(lines), tuple(subdirectories), len(lines))
+
+
+def _walk(
+    roots: Iterable[str],
+    exclude: Callable[[str], bool] | None,
+    max_entries: int,
+    previous: dict[str, _Directory],
+    entries: int = 0,
+) -> tuple[dict[str, _Directory], int, bool]:
+    """
+    Index the trees under roots, reusing directories of previous whose mtime is unchanged.
+
+    Returns:
+        The directories, how many were read from disk, and whether all fit in max_entries
+    """
+    directories: dict[str, _Directory] = {}
+    scanned = 0
+    stack = list(roots)
+    while stack:
+        path = stack.pop()
+        try:
+            mtime_ns = os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            continue
+        directory = previous.get(path)
+        if directory is None or directory.mtime_ns != mtime_ns:
+            try:
+                directory = _scan(path, mtime_ns, exclude)
+            except OSError:
+                continue
+            scanned += 1
+        if entries + directory.entries > max_entries:
+            return directories, scanned, False
+        directories[path] = directory
+        entries += directory.entries
+        stack.extend(os.path.join(path, name) for name in reversed(directory.subdirectories))
+    return directories, scanned, True
+
+
+class _Query:
+    """Which index lines a find_files call wants."""
+
+    def __init__(
+        self,
+        scope: str,
+        glob: str | None,
+        contains: str | None,
+        extension: str | None,
+        entry_type: EntryType | None,
+        ignore_case: bool,
+        exclude: Callable[[str], bool] | None,
+    ):
+        self.prefix = scope.rstrip("/") + "/"
+        self.ignore_case = ignore_case
+        fold = str.lower if ignore_case else str
+        self.contains = fold(contains) if contains else None
+        self.extension = fold("." + extension.lstrip(".")) if extension else None
+        self.entry_type = entry_type
+        self.exclude = exclude
+        self.glob = None
+        if glob:
+            # gitignore semantics: a pattern without a slash matches names at any depth.
+            # A leading ! or # is part of the name here, not negation or a comment
+            self.glob = IgnoreRules(scope, ["\\" + glob if glob[0] in "!#" else glob])
+            if ignore_case:
+                self.glob.rules = [
+                    (re.compile(regex.pattern, re.IGNORECASE), negated, directories_only)
+                    for regex, negated, directories_only in self.glob.rules
+                ]
+
+        # A literal every match contains, found with str.find before anything is parsed
+        candidates = [self.contains or "", self.extension or ""]
+        if glob and "\\" not in glob:
+            candidates += re.split(r"\*+|\?|\[[^\]]*\]|/", glob.rsplit("/", 1)[-1])
+        needle = max(candidates, key=len)
+        self.needle = fold(needle) if needle else None
+
+    def accepts(self, line: str) -> str | None:
+        """The path relative to the scope if the line matches, else None."""
+        is_dir = line.endswith("/")
+        if self.entry_type is not None and (self.entry_type == "dir") != is_dir:
+            return None
+        path = line[:-1] if is_dir else line
+        relative = path[len(self.prefix) :]
+        folded = relative.lower() if self.ignore_case else relative
+        if self.contains is not None and self.contains not in folded:
+            return None
+        if self.extension is not None and (is_dir or not folded.endswith(self.extension)):
+            return None
+        if self.glob is not None and self.glob.match(path, is_dir) is not True:
+            return None
+        if not is_dir and self.exclude is not None and self.exclude(path):
+            return None
+        return relative + "/" if is_dir else relative
+
+    def run(self, text: str, start: int, end: int, limit: int) -> tuple[list[str], bool]:
+        """Matching lines of text[start:end], at most limit, and whether there were more."""
+        matches: list[str] = []
+        finder = None
+        if self.needle is not None and self.ignore_case:
+            finder = re.compile(re.escape(self.needle), re.IGNORECASE)
+        position = start
+        while position < end:
+            if self.needle is None:
+                hit = position
+            elif finder is not None:
+                found = finder.search(text, position, end)
+                hit = found.start() if found else -1
+            else:
+                hit = text.find(self.needle, position, end)
+            if hit < 0:
+                break
+            newline = text.rfind("\n", start, hit)
+            line_start = start if newline < 0 else newline + 1
+            line_end = text.find("\n", hit, end)
+            if line_end < 0:
+                line_end = end
+            if hit < line_start + len(self.prefix):
+                # Found in the scope's own path, which every line starts with; the
+                # needle is in the relative part of any match
+                position = line_start + len(self.prefix)
+                continue
+            match = self.accepts(text[line_start:line_end])
+            if match is not None:
+                if len(matches) == limit:
+                    return matches, True
+                matches.append(match)
+            position = line_end + 1
+        return matches, False
+
+
+class _Tree:
+    """
+    Indexed directories and the joined text queries scan.
+
+    A tree is never changed once built: updates build a new one and swap it
+    in, so a query keeps scanning the tree it started on.
+    """
+
+    def __init__(self, directories: dict[str, _Directory]):
+        self.directories = directories
+        self._text: str | None = None
+        self._keys: list[str] = []
+        self._offsets: list[int] = []
+        # The text is joined by the first query; later ones wait for it
+        self._join_lock = threading.Lock()
+
+    @property
+    def entries(self) -> int:
+        return sum(directory.entries for directory in self.directories.values())
+
+    def find(self, query: _Query, scope: str, limit: int) -> tuple[list[str], bool] | None:
+        """Run a query over scope's subtree, or None if scope is not indexed."""
+        if scope not in self.directories:
+            return None
+        with self._join_lock:
+            if self._text is None:
+                self._join()
+        text = self._text
+        assert text is not None
+        key = _sort_key(scope)
+        low = bisect_left(self._keys, key)
+        # Descendants' keys continue with "\0"; anything else sorts after "\1"
+        high = bisect_left(self._keys, key + "\1", low)
+        start = self._offsets[low]
+        end = self._offsets[high] if high < len(self._offsets) else len(text)
+        return query.run(text, start, end, limit)
+
+    def _join(self) -> None:
+        self._keys = sorted((_sort_key(path) for path in self.directories), key=str)
+        parts = []
+        offsets = []
+        position = 0
+        for key in self._keys:
+            offsets.append(position)
+            lines = self.directories[key.replace("\0", "/")].lines
+            if lines:
+                parts.append(lines)
+                position += len(lines) + 1
+        self._offsets = offsets
+        self._text = "\n".join(parts) + "\n" if parts else ""
+
+
+class FileIndex:
+    """
+    In-memory index of directory trees, kept fresh in the background.
+
+    Args:
+        roots: Directories to index (the allowed directories)
+        exclude: Called with paths as they are walked and re-read; True keeps
+            them out of the index, so no query can return them
+        max_entries: Most paths kept; beyond it the index is incomplete
+        rescan_seconds: How often the trees are walked again for changes
+            inotify missed
+        snapshot: File the index is saved to after each walk and loaded
+            from at start, or None
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[str],
+        exclude: Callable[[str], bool] | None = None,
+        max_entries: int = 2_000_000,
+        rescan_seconds: float = 600.0,
+        snapshot: str | None = None,
+    ):
+        resolved = sorted({os.path.realpath(os.path.expanduser(root)) for root in roots})
+        # A root inside another is already covered by it
+        self.roots = [
+            root
+            for root in resolved
+            if not any(root.startswith(other.rstrip("/") + "/") for other in resolved)
+        ]
+        self.exclude = exclude
+        self.max_entries = max_entries
+        self.rescan_seconds = rescan_seconds
+        self.snapshot = snapshot
+        # Then "snapshot" (loaded, not yet checked) and "ready"; "standby" while
+        # another process maintains the index for the same snapshot
+        self.state = "starting"
+        self.complete = True
+        self.updated: float | None = None
+        # Replaced whole, never changed in place, so readers need no lock
+        self._tree = _Tree({})
+        # Guards the watch maps, which worker threads and the loop both update
+        self._watch_lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._libc: Any = None
+        self._fd = -1
+        self._owner_fd = -1
+        self._watches: dict[int, str] = {}
+        self._watched: dict[str, int] = {}
+        self._watch_limit_reached = False
+        self._dirty: set[str] = set()
+        self._rescan_needed = False
+        self._settle: asyncio.TimerHandle | None = None
+        self._applying: asyncio.Task[None] | None = None
+        # Rescans and event updates each replace the tree; one at a time
+        self._updating = asyncio.Lock()
+
+    def start(self) -> None:
+        """Build and maintain the index in a background task on the running loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._settle is not None:
+            self._settle.cancel()
+        if self._fd >= 0:
+            with contextlib.suppress(RuntimeError, ValueError):
+                asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+        if self._owner_fd >= 0:
+            os.close(self._owner_fd)
+            self._owner_fd = -1
+
+    def status(self) -> dict[str, Any]:
+        tree = self._tree
+        entries = tree.entries
+        directories = len(tree.directories)
+        return {
+            "state": self.state,
+            "roots": self.roots,
+            "entries": entries,
+            "directories": directories,
+            "complete": self.complete,
+            "watching": self._fd >= 0 and not self._watch_limit_reached,
+            "updated": self.updated,
+        }
+
+    def find(
+        self,
+        scope: str,
+        glob: str | None = None,
+        contains: str | None = None,
+        extension: str | None = None,
+        entry_type: EntryType | None = None,
+        ignore_case: bool = False,
+        limit: int = DEFAULT_LIMIT,
+    ) -> dict[str, Any] | None:
+        """
+        Paths under scope matching every given criterion, or None if scope is not indexed yet.
+
+        Args:
+            scope: Absolute, symlink-free directory to search
+            glob: gitignore-style pattern; without a slash it matches names at any depth
+            contains: Substring of the path relative to scope
+            extension: File extension, with or without the dot
+            entry_type: "file" or "dir"
+            ignore_case: Match case-insensitively
+            limit: Most paths returned
+
+        Raises:
+            ValueError: For an invalid argument
+        """
+        query = _make_query(
+            scope, glob, contains, extension, entry_type, ignore_case, limit, self.exclude
+        )
+        found = self._tree.find(query, scope, limit)
+        if found is None:
+            return None
+        matches, truncated = found
+        return _result(scope, matches, truncated, {"source": "index", **self.status()})
+
+    async def _run(self) -> None:
+        while not self._claim():
+            # Queries here walk until the owner exits and the lock frees up
+            self.state = "standby"
+            await asyncio.sleep(self.rescan_seconds)
+        if self.snapshot is not None:
+            directories = await asyncio.to_thread(self._load_snapshot)
+            if directories:
+                self._tree = _Tree(directories)
+                self.state = "snapshot"
+        # Watch first so changes made during the walk are not missed
+        self._open_watches()
+        while True:
+            try:
+                await self._rescan()
+            except Exception:
+                logger.exception("File index rescan failed")
+            self.state = "ready"
+            await asyncio.sleep(self.rescan_seconds)
+
+    def _claim(self) -> bool:
+        """Take the lock on the snapshot, or say another process holds it."""
+        if self.snapshot is None:
+            return True
+        if self._owner_fd < 0:
+            try:
+                os.makedirs(os.path.dirname(self.snapshot) or ".", exist_ok=True)
+                self._owner_fd = os.open(
+                    self.snapshot + ".lock", os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600
+                )
+            except OSError as e:
+                # The snapshot cannot be saved either; index in this process regardless
+                logger.warning(f"File index: cannot lock {self.snapshot}: {e}")
+                return True
+        try:
+            fcntl.flock(self._owner_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    async def _rescan(self) -> None:
+        async with self._updating:
+            await self._walk_all()
+
+    async def _walk_all(self) -> None:
+        previous = self._tree.directories
+        directories, scanned, complete = await asyncio.to_thread(
+            _walk, self.roots, self.exclude, self.max_entries, previous
+        )
+        self._tree = _Tree(directories)
+        self.complete = complete
+        self.updated = time.time()
+        self._rescan_needed = False
+        if self._fd >= 0:
+            await asyncio.to_thread(self._sync_watches, directories)
+        if self.snapshot is not None and (scanned or len(directories) != len(previous)):
+            await asyncio.to_thread(self._save_snapshot, directories)
+
+    # inotify
+
+    def _open_watches(self) -> None:
+        self._libc = inotify_libc()
+        if self._libc is None:
+            return
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._read_events)
+
+    def _watch(self, path: str) -> None:
+        # Called from worker threads; _read_events edits the same maps on the loop
+        with self._watch_lock:
+            if path in self._watched or self._watch_limit_reached:
+                return
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() == errno.ENOSPC:
+                    # fs.inotify.max_user_watches; the periodic rescan covers the rest
+                    self._watch_limit_reached = True
+                    logger.warning(
+                        f"File index: inotify watch limit reached after {len(self._watched)} "
+                        f"directories; the rest are refreshed every {self.rescan_seconds:g}s"
+                    )
+                return
+            self._watches[wd] = path
+            self._watched[path] = wd
+
+    def _sync_watches(self, directories: dict[str, _Directory]) -> None:
+        with self._watch_lock:
+            gone = [(path, wd) for path, wd in self._watched.items() if path not in directories]
+            for path, wd in gone:
+                del self._watched[path]
+                self._watches.pop(wd, None)
+            if self._watch_limit_reached and len(self._watched) < len(directories):
+                self._watch_limit_reached = False
+        for _, wd in gone:
+            self._libc.inotify_rm_watch(self._fd, wd)
+        for path in directories:
+            self._watch(path)
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except (BlockingIOError, OSError):
+                break
+            position = 0
+            with self._watch_lock:
+                while position + _EVENT_HEADER.size <= len(data):
+                    wd, mask, _, length = _EVENT_HEADER.unpack_from(data, position)
+                    position += _EVENT_HEADER.size + length
+                    if mask & IN_Q_OVERFLOW:
+                        self._rescan_needed = True
+                        continue
+                    path = self._watches.get(wd)
+                    if path is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        # The directory is gone; its parent's event updates the index
+                        del self._watches[wd]
+                        self._watched.pop(path, None)
+                    elif not mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        self._dirty.add(path)
+        if (self._dirty or self._rescan_needed) and self._settle is None:
+            self._settle = asyncio.get_running_loop().call_later(
+                _SETTLE_SECONDS, self._schedule_changes
+            )
+
+    def _schedule_changes(self) -> None:
+        self._applying = asyncio.get_running_loop().create_task(self._apply_changes())
+
+    async def _apply_changes(self) -> None:
+        self._settle = None
+        try:
+            if self._rescan_needed:
+                # Events were lost (IN_Q_OVERFLOW)
+                self._dirty.clear()
+                await self._rescan()
+                return
+            async with self._updating:
+                dirty, self._dirty = self._dirty, set()
+                await asyncio.to_thread(self._update, dirty)
+            self.updated = time.time()
+        except Exception:
+            logger.exception("File index update failed")
+
+    def _update(self, dirty: set[str]) -> None:
+        """Re-read changed directories: new subdirectories are walked, removed ones dropped."""
+        directories = dict(self._tree.directories)
+        entries = sum(directory.entries for directory in directories.values())
+        added: list[str] = []
+        # Parents first, so a subtree dropped by its parent is not re-read
+        for path in sorted(dirty, key=lambda path: path.count("/")):
+            old = directories.get(path)
+            if old is None:
+                continue
+            try:
+                mtime_ns = os.stat(path, follow_symlinks=False).st_mtime_ns
+                new = _scan(path, mtime_ns, self.exclude)
+            except OSError:
+                continue
+            directories[path] = new
+            entries += new.entries - old.entries
+            for name in set(old.subdirectories) - set(new.subdirectories):
+                gone = os.path.join(path, name)
+                for inner in [
+                    inner for inner in directories if inner == gone or inner.startswith(gone + "/")
+                ]:
+                    entries -= directories.pop(inner).entries
+            for name in set(new.subdirectories) - set(old.subdirectories):
+                walked, _, complete = _walk(
+                    [os.path.join(path, name)], self.exclude, self.max_entries, {}, entries
+                )
+                directories.update(walked)
+                entries += sum(directory.entries for directory in walked.values())
+                added.extend(walked)
+                if not complete:
+                    self.complete = False
+        self._tree = _Tree(directories)
+        for path in added:
+            self._watch(path)
+
+    # Snapshot
+
+    def _load_snapshot(self) -> dict[str, _Directory] | None:
+        assert self.snapshot is not None
+        try:
+            with gzip.open(self.snapshot, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION or data.get("roots") != self.roots:
+            return None
+        self.updated = data.get("updated")
+        return {
+            path: _Directory(
+                mtime_ns, lines, tuple(subdirectories), lines.count("\n") + 1 if lines else 0
+            )
+            for path, (mtime_ns, lines, subdirectories) in data["directories"].items()
+        }
+
+    def _save_snapshot(self, directories: dict[str, _Directory]) -> None:
+        assert self.snapshot is not None
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "roots": self.roots,
+            "updated": self.updated,
+            "directories": {
+                path: [directory.mtime_ns, directory.lines, directory.subdirectories]
+                for path, directory in directories.items()
+            },
+        }
+        os.makedirs(os.path.dirname(self.snapshot) or ".", exist_ok=True)
+        temporary = f"{self.snapshot}.{os.getpid()}.tmp"
+        try:
+            # Paths can be private: readable by the owner only
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with (
+                os.fdopen(fd, "wb") as raw,
+                gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=1) as f,
+            ):
+                f.write(json.dumps(data, separators=(",", ":")).encode())
+            os.replace(temporary, self.snapshot)
+        except OSError as e:
+            logger.warning(f"File index: cannot save snapshot to {self.snapshot}: {e}")
+            with contextlib.suppress(OSError):
+                os.unlink(temporary)
+
+
+def _make_query(
+    scope: str,
+    glob: str | None,
+    contains: str | None,
+    extension: str | None,
+    entry_type: EntryType | None,
+    ignore_case: bool,
+    limit: int,
+    exclude: Callable[[str], bool] | None,
+) -> _Query:
+    if entry_type is not None and entry_type not in ENTRY_TYPES:
+        raise ValueError(f"type must be one of: {', '.join(ENTRY_TYPES)}")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return _Query(scope, glob, contains, extension, entry_type, ignore_case, exclude)
+
+
+def _result(
+    scope: str, matches: list[str], truncated: bool, index: dict[str, Any]
+) -> dict[str, Any]:
+    return {
+        "status": "success",
+        "path": scope,
+        "count": len(matches),
+        "truncated": truncated,
+        "matches": matches,
+        "index": index,
+    }
+
+
+def walk_and_find(
+    scope: str,
+    glob: str | None = None,
+    contains: str | None = None,
+    extension: str | None = None,
+    entry_type: EntryType | None = None,
+    ignore_case: bool = False,
+    limit: int = DEFAULT_LIMIT,
+    exclude: Callable[[str], bool] | None = None,
+    max_entries: int = 2_000_000,
+) -> dict[str, Any]:
+    """
+    FileIndex.find() without an index: walk scope now, as find would.
+
+    Raises:
+        ValueError: For an invalid argument, or a scope that is not a directory
+    """
+    query = _make_query(scope, glob, contains, extension, entry_type, ignore_case, limit, exclude)
+    if not os.path.isdir(scope):
+        raise ValueError(f"Not a directory: {scope}")
+    started = time.perf_counter()
+    directories, _, complete = _walk([scope], exclude, max_entries, {})
+    found = _Tree(directories).find(query, scope, limit)
+    matches, truncated = found if found is not None else ([], False)
+    return _result(
+        scope,
+        matches,
+        truncated,
+        {
+            "source": "walk",
+            "complete": complete,
+            "walk_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    )
+
+
+async def find_files(
+    index: FileIndex | None,
+    scope: str,
+    glob: str | None = None,
+    contains: str | None = None,
+    extension: str | None = None,
+    entry_type: EntryType | None = None,
+    ignore_case: bool = False,
+    limit: int = DEFAULT_LIMIT,
+    exclude: Callable[[str], bool] | None = None,
+    max_entries: int = 2_000_000,
+) -> dict[str, Any]:
+    """
+    Paths under scope matching every given criterion, from the index where it covers scope.
+
+    Args:
+        index: The server's FileIndex, or None when file_index is off
+        scope: Absolute, symlink-free directory; answered by the index only inside its roots
+        exclude: For the walk when the index cannot answer; the index applies its own
+
+    Raises:
+        ValueError: For an invalid argument, or a scope that is not a directory
+    """
+    if index is not None:
+        result = await asyncio.to_thread(
+            index.find, scope, glob, contains, extension, entry_type, ignore_case, limit
+        )
+        if result is not None:
+            return result
+    return await asyncio.to_thread(
+        walk_and_find,
+        scope,
+        glob,
+        contains,
+        extension,
+        entry_type,
+        ignore_case,
+        limit,
+        exclude,
+        max_entries,
+    )
+
+
+def create_file_index(config: Config, exclude: Callable[[str], bool]) -> FileIndex | None:
+    """The FileIndex config asks for (not yet started), or None if file_index is off."""
+    if not config.file_index:
+        return None
+    snapshot = config.file_index_snapshot
+    if snapshot is None:
+        snapshot = str(get_default_state_dir() / "file-index.json.gz")
+    return FileIndex(
+        config.allowed_directories,
+        exclude=exclude,
+        max_entries=config.file_index_max_entries,
+        rescan_seconds=config.file_index_rescan_seconds,
+        snapshot=os.path.expanduser(snapshot) if snapshot else None,
+    )
@@ -0,0 +1,300 @@
+"""In-process ranged file reads.
+
+``FileReader.read`` returns a byte range or a line range of a file without
+spawning ``cat``/``head``/``tail`` and without reading more of the file
+than it has to. Ranges are read with ``os.pread``, never through a memory
+map: a log truncated while it is being read (``copytruncate`` rotation)
+just yields a shorter result, where touching a mapped page past the new
+end of the file would kill the process with SIGBUS.
+
+Line ranges use a sparse line index: the byte offset of every
+``LINE_INDEX_STRIDE``-th line, found with a regular expression that skips
+``stride`` lines per call in C over blocks read from the file. The index is built lazily, only as far
+as the furthest line asked for, and cached per (path, mtime, size,
+inode). Reading lines 50000-50100 of a large log therefore scans the
+file up to line 50000 once; later reads of any earlier line, or
+of nearby lines, are a lookup plus a scan of fewer than ``stride`` lines.
+Line ranges counted from the end (``start_line=-100``) need the whole
+file indexed once.
+
+Reads block, so async callers run them with ``asyncio.to_thread``.
+"""
+
+import base64
+import os
+import re
+import stat
+import threading
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from .executor import OutputEncoding
+from .workers import LRUCache
+
+# Lines between indexed offsets; 1024 lines of a typical log is ~100 KB to skip
+LINE_INDEX_STRIDE = 1024
+
+# Bytes read per call while indexing lines
+INDEX_CHUNK_SIZE = 1024 * 1024
+
+# Bytes read per call while skipping the lines between two indexed offsets
+SKIP_CHUNK_SIZE = 64 * 1024
+
+# Files whose line index is kept; each costs 8 bytes per LINE_INDEX_STRIDE lines
+LINE_INDEX_CACHE_SIZE = 64
+
+
+@dataclass
+class FileContent:
+    """A range of a file, as returned by the read_file tool."""
+
+    path: str
+    size: int  # Whole file, in bytes
+    offset: int  # First byte returned
+    length: int  # Bytes returned
+    content: str
+    encoding: OutputEncoding = OutputEncoding.TEXT
+    start_line: int | None = None  # 1-based, for line reads
+    end_line: int | None = None  # Inclusive; None if no lines were returned
+    total_lines: int | None = None  # Known once the whole file has been indexed
+    truncated: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"status": "success", **asdict(self), "encoding": self.encoding.value}
+
+
+class LineIndex:
+    """Byte offsets of every stride-th line of one version of a file.
+
+    Methods take an open file descriptor and the size the file had when it
+    was opened; nothing past that size is read.
+    """
+
+    def __init__(self, stride: int = LINE_INDEX_STRIDE):
+        self.stride = stride
+        # offsets[k] is where 0-based line k * stride starts
+        self.offsets = array("Q", [0])
+        self.total_lines: int | None = None
+        self._pattern = re.compile(rb"(?:[^\n]*\n){%d}" % stride)
+        self._lock = threading.Lock()
+
+    def line_offset(self, fd: int, size: int, line: int) -> int | None:
+        """Where 0-based line starts in the file, or None if it has fewer lines."""
+        checkpoint = line // self.stride
+        with self._lock:
+            self._extend(fd, size, checkpoint)
+            if checkpoint >= len(self.offsets):
+                return None
+            start = self.offsets[checkpoint]
+        return _skip_lines(fd, size, start, line - checkpoint * self.stride)
+
+    def count_lines(self, fd: int, size: int) -> int:
+        """Total lines in the file (a final line without a newline counts)."""
+        with self._lock:
+            self._extend(fd, size, None)
+            assert self.total_lines is not None
+            return self.total_lines
+
+    def _extend(self, fd: int, size: int, checkpoint: int | None) -> None:
+        """Index up to the given checkpoint, or the whole file if None."""
+        position = self.offsets[-1]
+        # Start of the line being scanned, and whole lines since the last offset
+        line_start = position
+        lines = 0
+        while self.total_lines is None and (checkpoint is None or len(self.offsets) <= checkpoint):
+            chunk = os.pread(fd, min(INDEX_CHUNK_SIZE, max(size - position, 0)), position)
+            if not chunk:
+                # The end of the file, or of what a concurrent truncation left
+                partial = 1 if position > line_start else 0
+                self.total_lines = (len(self.offsets) - 1) * self.stride + lines + partial
+                return
+            offset = 0
+            while checkpoint is None or len(self.offsets) <= checkpoint:
+                match = self._pattern.match(chunk, offset) if lines == 0 else None
+                if match is not None:
+                    offset = match.end()
+                    self.offsets.append(position + offset)
+                    continue
+                newlines = chunk.count(b"\n", offset)
+                if lines + newlines < self.stride:
+                    lines += newlines
+                    break
+                # The stride begun in an earlier chunk ends in this one
+                for _ in range(self.stride - lines):
+                    offset = chunk.index(b"\n", offset) + 1
+                self.offsets.append(position + offset)
+                lines = 0
+            last_newline = chunk.rfind(b"\n")
+            if last_newline >= 0:
+                line_start = position + last_newline + 1
+            position += len(chunk)
+
+
+def _skip_lines(fd: int, size: int, position: int, count: int) -> int | None:
+    """Offset after skipping count lines from position, or None past the end."""
+    while count:
+        chunk = os.pread(fd, min(SKIP_CHUNK_SIZE, max(size - position, 0)), position)
+        if not chunk:
+            return None
+        newlines = chunk.count(b"\n")
+        if newlines < count:
+            count -= newlines
+            position += len(chunk)
+            continue
+        offset = 0
+        for _ in range(count):
+            offset = chunk.index(b"\n", offset) + 1
+        position += offset
+        count = 0
+    # A file ending in a newline has no line starting at its end
+    return position if position < size else None
+
+
+class FileReader:
+    """
+    Read byte or line ranges of files, reusing line indexes between calls.
+
+    Args:
+        max_bytes: Most bytes returned by one read
+        cache_size: Files whose line index is kept
+    """
+
+    def __init__(self, max_bytes: int, cache_size: int = LINE_INDEX_CACHE_SIZE):
+        self.max_bytes = max(max_bytes, 1)
+        self._indexes: LRUCache[tuple[str, int, int, int], LineIndex] = LRUCache(cache_size)
+        self._lock = threading.Lock()
+
+    def _index(self, path: str, st: os.stat_result) -> LineIndex:
+        key = (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                # Earlier versions of the same file are stale now
+                for stale in [k for k in self._indexes if k[0] == path]:
+                    self._indexes.pop(stale)
+                index = LineIndex()
+                self._indexes.put(key, index)
+            return index
+
+    def read(
+        self,
+        path: str,
+        offset: int | None = None,
+        length: int | None = None,
+        start_line: int | None = None,
+        end_line: int | None = None,
+        encoding: OutputEncoding = OutputEncoding.TEXT,
+    ) -> FileContent:
+        """
+        Read a byte or line range of the regular file at path.
+
+        Give a byte range (offset, length) or a line range (start_line,
+        end_line; 1-based and inclusive), not both. Negative offsets and line
+        numbers count from the end: start_line=-100 reads the last 100 lines.
+        With neither, the file is read from the start. At most max_bytes are
+        returned; a truncated line range ends on a whole line where possible.
+
+        Raises:
+            ValueError: For invalid or conflicting ranges, or a path that is not a regular file
+            OSError: If the file cannot be opened
+        """
+        by_lines = start_line is not None or end_line is not None
+        if by_lines and (offset is not None or length is not None):
+            raise ValueError("Give either offset/length or start_line/end_line, not both")
+        if length is not None and length < 0:
+            raise ValueError("length must not be negative")
+        if start_line == 0 or end_line == 0:
+            raise ValueError("Line numbers start at 1 (negative numbers count from the end)")
+
+        # Checked before opening: opening a FIFO would block until a writer appears
+        if not stat.S_ISREG(os.stat(path).st_mode):
+            raise ValueError(f"Not a regular file: {path}")
+        with open(path, "rb") as f:
+            fd = f.fileno()
+            st = os.fstat(fd)
+            result = FileContent(
+                path=path, size=st.st_size, offset=0, length=0, content="", encoding=encoding
+            )
+            if by_lines:
+                index = self._index(path, st)
+                self._read_lines(fd, st.st_size, index, result, start_line, end_line)
+            else:
+                self._read_bytes(fd, st.st_size, result, offset or 0, length)
+        return result
+
+    def _read_bytes(
+        self, fd: int, size: int, result: FileContent, offset: int, length: int | None
+    ) -> None:
+        start = max(size + offset, 0) if offset < 0 else min(offset, size)
+        end = size if length is None else min(start + length, size)
+        if end - start > self.max_bytes:
+            end = start + self.max_bytes
+            result.truncated = True
+        self._fill(result, start, os.pread(fd, end - start, start))
+
+    def _read_lines(
+        self,
+        fd: int,
+        size: int,
+        index: LineIndex,
+        result: FileContent,
+        start_line: int | None,
+        end_line: int | None,
+    ) -> None:
+        # Work in 0-based line numbers, end exclusive
+        if (start_line or 0) < 0 or (end_line or 0) < 0:
+            total = index.count_lines(fd, size)
+            result.total_lines = total
+        first = _line_number(start_line or 1, result.total_lines)
+        stop = _line_number(end_line, result.total_lines) + 1 if end_line is not None else None
+
+        start = index.line_offset(fd, size, first)
+        if start is None:
+            # Past the end of the file
+            result.start_line = first + 1
+            result.offset = size
+            result.total_lines = index.count_lines(fd, size)
+            return
+        end = size
+        if stop is not None and stop <= first:
+            end = start
+        elif stop is not None:
+            stop_offset = index.line_offset(fd, size, stop)
+            if stop_offset is not None:
+                end = stop_offset
+
+        truncated = end - start > self.max_bytes
+        # Shorter than asked for if the file was truncated since it was opened
+        chunk = os.pread(fd, min(end - start, self.max_bytes), start)
+        if truncated:
+            result.truncated = True
+            # Stop after the last whole line, if at least one fits
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                chunk = chunk[: newline + 1]
+
+        self._fill(result, start, chunk)
+        result.start_line = first + 1
+        if chunk:
+            lines = chunk.count(b"\n")
+            ends_partial = not chunk.endswith(b"\n")
+            result.end_line = first + lines + (1 if ends_partial else 0)
+        if index.total_lines is not None:
+            result.total_lines = index.total_lines
+
+    def _fill(self, result: FileContent, start: int, chunk: bytes) -> None:
+        result.offset = start
+        result.length = len(chunk)
+        if result.encoding == OutputEncoding.BASE64:
+            result.content = base64.b64encode(chunk).decode("ascii")
+        else:
+            result.content = chunk.decode("utf-8", errors="replace")
+
+
+def _line_number(line: int, total: int | None) -> int:
+    """A 1-based or from-the-end line number as a 0-based index."""
+    if line > 0:
+        return line - 1
+    assert total is not None
+    return max(total + line, 0)
@@ -0,0 +1,168 @@
+""".gitignore matching for the in-process directory walkers.
+
+Implements the pattern rules of gitignore(5): ``#`` comments, ``!``
+negation, trailing ``/`` for directories only, patterns containing a
+``/`` anchored to their file's directory, ``*``/``?``/``[...]`` within
+one path component and ``**`` across components. Each pattern becomes
+one compiled regular expression.
+
+``IgnoreRules`` holds the patterns of one file. Walkers keep a tuple of
+them, one per directory level (``descend``), and ask the deepest
+first: as in git, a nested .gitignore overrides its parents and
+the last matching line of a file wins. Git itself never descends into an
+ignored directory, so a file inside one cannot be re-included.
+"""
+
+import os
+import re
+from collections.abc import Iterable, Sequence
+
+GITIGNORE = ".gitignore"
+
+# Skipped by the walkers whenever .gitignore files are honored, as git does
+ALWAYS_IGNORED = frozenset({".git"})
+
+
+def _translate(pattern: str) -> str:
+    """Regex source for a gitignore glob, matched against a /-separated relative path."""
+    parts: list[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            # Zero or more leading directories
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            # Everything inside
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1 : i + 2] in ("!", "^") else i + 1)
+            if end < 0:
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            body = pattern[i + 1 : end]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif char == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    The patterns of one ignore file, relative to the directory it applies to.
+
+    Args:
+        base: Directory the patterns are relative to
+        lines: Pattern lines in gitignore syntax
+    """
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        # (regex, negated, directories only), in file order
+        self.rules: list[tuple[re.Pattern[str], bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n\r")
+            if not line.startswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith(("\\#", "\\!")):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                source = _translate(line.lstrip("/"))
+            else:
+                source = "(?:.*/)?" + _translate(line)
+            try:
+                self.rules.append((re.compile(f"^{source}$", re.DOTALL), negated, dir_only))
+            except re.error:
+                # A malformed line is ignored, as git does
+                continue
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "IgnoreRules | None":
+        """The rules of directory's .gitignore, or None if it has none."""
+        try:
+            with open(os.path.join(directory, GITIGNORE), encoding="utf-8", errors="replace") as f:
+                rules = cls(directory, f)
+        except OSError:
+            return None
+        return rules or None
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        """True if path is ignored, False if re-included with !, None if no pattern applies."""
+        # path is always below base; slicing is much cheaper than relpath
+        relative = path[len(self.base.rstrip(os.sep)) + 1 :].replace(os.sep, "/")
+        for pattern, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(relative):
+                return not negated
+        return None
+
+
+def is_ignored(stack: Sequence[IgnoreRules], path: str, is_dir: bool) -> bool:
+    """Whether path is ignored by the rules in effect, checked deepest first."""
+    for rules in reversed(stack):
+        decision = rules.match(path, is_dir)
+        if decision is not None:
+            return decision
+    return False
+
+
+def descend(stack: tuple[IgnoreRules, ...], directory: str) -> tuple[IgnoreRules, ...]:
+    """The rules in effect inside directory: the parent's plus its own .gitignore."""
+    rules = IgnoreRules.from_directory(directory)
+    return stack + (rules,) if rules is not None else stack
+
+
+def rules_for(directory: str) -> tuple[IgnoreRules, ...]:
+    """
+    The rules in effect in directory, including the .gitignore files above it.
+
+    Parents are read up to the enclosing repository's root (the nearest
+    directory containing .git); outside a repository only directory's own
+    .gitignore applies.
+    """
+    chain = [directory]
+    parent = directory
+    while not os.path.exists(os.path.join(parent, ".git")):
+        above = os.path.dirname(parent)
+        if above == parent:
+            # Not in a repository
+            chain = [directory]
+            break
+        parent = above
+        chain.append(parent)
+    stack: tuple[IgnoreRules, ...] = ()
+    for level in reversed(chain):
+        stack = descend(stack, level)
+    return stack
@@ -0,0 +1,227 @@
+"""Parallel, cached file hashing for the hash_files tool.
+
+``FileHasher.hash`` answers what ``sha256sum``/``md5sum`` over many files
+would, in one call and without a subprocess per file. Files are hashed
+in a thread pool: hashlib releases the GIL while it digests more than a
+couple of kilobytes, so workers hash on separate cores. Each file is read
+once however many algorithms are asked for, a chunk at a time into one
+reused buffer that every hasher is fed from, so each chunk is still in
+the CPU cache when the next algorithm reads it. Files are read rather
+than memory-mapped: one truncated while it is hashed just ends early,
+where a mapped page past its new end would raise SIGBUS.
+
+Digests are cached keyed by (path, size, mtime, inode). The calling
+thread stats every file and only those that are new or changed go to the
+pool, so re-verifying an unchanged tree of build artifacts reads no file
+contents. A file that changes while it is being hashed is reported but
+not cached.
+
+Hashing blocks, so async callers run it with ``asyncio.to_thread``.
+"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from .gitignore import ALWAYS_IGNORED
+from .workers import LRUCache, WorkerPool
+
+# Fixed-length algorithms every Python build provides (shake_* need a length)
+ALGORITHMS = tuple(
+    sorted(name for name in hashlib.algorithms_guaranteed if not name.startswith("shake_"))
+)
+DEFAULT_ALGORITHMS = ("sha256",)
+
+# Files whose digests are cached; each entry is a couple of hundred bytes
+HASH_CACHE_SIZE = 100_000
+
+# Bytes read and given to each hasher at a time; small enough to stay in the CPU cache
+CHUNK_SIZE = 1024 * 1024
+
+_Key = tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+def _digest(path: str, algorithms: Iterable[str]) -> dict[str, str]:
+    hashers = [hashlib.new(name) for name in algorithms]
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer = bytearray(min(max(size, 1), CHUNK_SIZE))
+        with memoryview(buffer) as view:
+            while read := f.readinto(buffer):
+                with view[:read] as chunk:
+                    for hasher in hashers:
+                        hasher.update(chunk)
+    return {hasher.name: hasher.hexdigest() for hasher in hashers}
+
+
+def _key(st: os.stat_result) -> _Key:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _walk(root: str, exclude: Callable[[str], bool] | None) -> Iterator[str]:
+    """Regular files under root in sorted, depth-first order, not following symlinks."""
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if exclude is not None and exclude(entry.path):
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ALWAYS_IGNORED:
+                    yield from _walk(entry.path, exclude)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path
+        except OSError:
+            continue
+
+
+class FileHasher:
+    """
+    Hash files in parallel, caching digests between calls.
+
+    Args:
+        workers: Threads hashing files
+        cache_size: Files whose digests are kept
+    """
+
+    def __init__(self, workers: int, cache_size: int = HASH_CACHE_SIZE):
+        self.pool = WorkerPool(workers, "hash")
+        self._cache: LRUCache[str, tuple[_Key, dict[str, str]]] = LRUCache(cache_size)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _cached(self, path: str, key: _Key, algorithms: tuple[str, ...]) -> dict[str, str] | None:
+        with self._lock:
+            found = self._cache.get(path)
+            if found is None or found[0] != key:
+                return None
+            if not all(name in found[1] for name in algorithms):
+                return None
+            return {name: found[1][name] for name in algorithms}
+
+    def _store(self, path: str, key: _Key, digests: dict[str, str]) -> None:
+        with self._lock:
+            found = self._cache.get(path)
+            if found is not None and found[0] == key:
+                # Keep digests of other algorithms computed earlier
+                digests = {**found[1], **digests}
+            self._cache.put(path, (key, digests))
+
+    def _hash_file(self, path: str, key: _Key, algorithms: tuple[str, ...]) -> dict[str, str]:
+        digests = _digest(path, algorithms)
+        try:
+            unchanged = _key(os.stat(path)) == key
+        except OSError:
+            unchanged = False
+        if unchanged:
+            self._store(path, key, digests)
+        return digests
+
+    def hash(
+        self,
+        paths: Iterable[str],
+        algorithms: Iterable[str] = DEFAULT_ALGORITHMS,
+        limit: int = 1000,
+        refresh: bool = False,
+        exclude: Callable[[str], bool] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Digests of the given files, and of every file under the given directories.
+
+        Args:
+            paths: Files, and directories whose files (recursively) are hashed
+            algorithms: hashlib names, all computed in one read of each file
+            limit: Most files hashed; the rest are left out and truncated is set
+            refresh: Re-read every file instead of using cached digests
+            exclude: Called with each path found while expanding a directory
+                (not with the paths given); True skips it
+
+        Raises:
+            ValueError: For an unknown algorithm or an invalid limit
+        """
+        names = tuple(dict.fromkeys(name.lower() for name in algorithms))
+        unknown = [name for name in names if name not in ALGORITHMS]
+        if not names or unknown:
+            raise ValueError(
+                f"Unknown algorithms: {', '.join(unknown) or 'none given'}. "
+                f"Available: {', '.join(ALGORITHMS)}"
+            )
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        files: list[dict[str, Any]] = []
+        errors: list[dict[str, str]] = []
+        pending = []
+        truncated = False
+        cached = 0
+        total_bytes = 0
+        seen: set[str] = set()
+        for path in self._expand(paths, exclude, errors):
+            if path in seen:
+                continue
+            seen.add(path)
+            if len(files) == limit:
+                truncated = True
+                break
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                errors.append({"path": path, "error": e.strerror or str(e)})
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                errors.append({"path": path, "error": "Not a regular file"})
+                continue
+            key = _key(st)
+            entry: dict[str, Any] = {"path": path, "size": st.st_size}
+            files.append(entry)
+            total_bytes += st.st_size
+            digests = None if refresh else self._cached(path, key, names)
+            if digests is not None:
+                entry.update(digests)
+                cached += 1
+            else:
+                pending.append((entry, self.pool.submit(self._hash_file, path, key, names)))
+
+        read_bytes = 0
+        for entry, future in pending:
+            try:
+                entry.update(future.result())
+                read_bytes += entry["size"]
+            except OSError as e:
+                files.remove(entry)
+                total_bytes -= entry["size"]
+                errors.append({"path": entry["path"], "error": e.strerror or str(e)})
+
+        return {
+            "status": "success",
+            "algorithms": list(names),
+            "count": len(files),
+            "bytes": total_bytes,
+            "bytes_read": read_bytes,
+            "cached": cached,
+            "truncated": truncated,
+            "files": files,
+            "errors": errors,
+        }
+
+    def _expand(
+        self,
+        paths: Iterable[str],
+        exclude: Callable[[str], bool] | None,
+        errors: list[dict[str, str]],
+    ) -> Iterator[str]:
+        for path in paths:
+            if os.path.isdir(path):
+                yield from _walk(path, exclude)
+            elif os.path.lexists(path):
+                yield path
+            else:
+                errors.append({"path": path, "error": "No such file or directory"})
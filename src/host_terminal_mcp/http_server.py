@@ -5,12 +5,50 @@ allowing external services (e.g. Annie's MCP server running in Docker)
 to call host-terminal-mcp via HTTP instead of stdio.
 """
 
+import asyncio
+import json
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request, WebSocket
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.requests import HTTPConnection
 
+from .audit import set_client
+from .compression import CompressionMiddleware
 from .config import Config
-from .executor import CommandExecutor
+from .diskusage import DiskUsage
+from .executor import CommandExecutor, ExecutionResult, OutputEncoding
+from .explore import SECTIONS as EXPLORE_SECTIONS
+from .explore import ProjectExplorer
+from .fileindex import DEFAULT_LIMIT as FIND_LIMIT
+from .fileindex import EntryType, create_file_index, find_files
+from .files import FileReader
+from .hashing import DEFAULT_ALGORITHMS as DEFAULT_HASH_ALGORITHMS
+from .hashing import FileHasher
+from .listing import SortKey, list_directory
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .multiplex import CommandMultiplexer
+from .processes import SortKey as ProcessSortKey
+from .processes import list_processes
+from .search import FileSearch
+from .sessions import (
+    SESSION_COOKIE,
+    SESSION_HEADER,
+    Session,
+    SessionManager,
+    SQLiteSessionStore,
+)
+from .sysinfo import SECTIONS, system_info
+from .tail import DEFAULT_LINES, MAX_WAIT_SECONDS, follow, wait_for_lines
+from .tracing import TracingMiddleware
+
+# Worker processes started by uvicorn re-create the app from this variable
+CONFIG_ENV_VAR = "HOST_TERMINAL_MCP_CONFIG_JSON"
 
 
 class ExecuteRequest(BaseModel):
@@ -18,6 +56,21 @@ class ExecuteRequest(BaseModel):
 
     command: str
     working_directory: str | None = None
+    output_encoding: OutputEncoding = OutputEncoding.TEXT
+
+
+class BatchCommand(BaseModel):
+    """A single command within a /execute/batch request."""
+
+    command: str
+    working_directory: str | None = None
+
+
+class BatchExecuteRequest(BaseModel):
+    """Request body for /execute/batch endpoint."""
+
+    commands: list[BatchCommand]
+    max_parallel: int | None = None
 
 
 class CdRequest(BaseModel):
@@ -26,6 +79,21 @@ class CdRequest(BaseModel):
     path: str
 
 
+def _result_to_dict(result: ExecutionResult) -> dict:
+    """Serialize an ExecutionResult into the /execute response shape."""
+    return {
+        "status": "success",
+        "stdout": result.stdout,
+        "stderr": result.stderr,
+        "exit_code": result.return_code,
+        "return_code": result.return_code,
+        "timed_out": result.timed_out,
+        "truncated": result.truncated,
+        "working_directory": result.working_directory,
+        "output_encoding": result.output_encoding.value,
+    }
+
+
 def create_app(config: Config) -> FastAPI:
     """Create a FastAPI app that delegates to existing command execution logic.
 
@@ -35,25 +103,62 @@ def create_app(config: Config) -> FastAPI:
     Returns:
         A FastAPI application instance.
     """
-    app = FastAPI(title="host-terminal-mcp", version="0.1.0")
     executor = CommandExecutor(config)
 
-    @app.get("/health")
-    async def health() -> dict:
-        return {
-            "status": "ok",
-            "service": "host-terminal-mcp",
-            "permission_mode": config.permission_mode.value,
-        }
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        if file_index is not None:
+            file_index.start()
+        yield
+        if executor.audit is not None:
+            # Write out audit records still queued in memory
+            await executor.audit.close()
+        search.close()
+        disk_usage.close()
+        explorer.close()
+        hasher.close()
+        if file_index is not None:
+            file_index.close()
+        if store is not None:
+            store.close()
+        # Write out traces still queued for the writer thread
+        executor.tracer.close()
 
-    @app.post("/execute")
-    async def execute(req: ExecuteRequest) -> dict:
-        command = req.command.strip()
+    app = FastAPI(title="host-terminal-mcp", version="0.1.0", lifespan=lifespan)
+    store: SQLiteSessionStore | None = None
+    if config.session_store:
+        store = SQLiteSessionStore(config.session_store)
+    files = FileReader(config.max_output_size)
+    search = FileSearch(config.search_workers)
+    disk_usage = DiskUsage(config.search_workers)
+    explorer = ProjectExplorer(
+        config.search_workers,
+        config.timeout_seconds,
+        allow_command=executor.is_allowed_command,
+        environment=executor.build_environment,
+    )
+    hasher = FileHasher(config.search_workers)
+    file_index = create_file_index(config, executor.is_blocked_path)
+    sessions = SessionManager(
+        executor,
+        max_sessions=config.max_sessions,
+        idle_timeout=config.session_idle_timeout_seconds,
+        store=store,
+    )
+
+    if config.compress_responses:
+        app.add_middleware(CompressionMiddleware, minimum_size=config.compression_min_size)
+    if executor.tracer.enabled:
+        # Outermost, so the root span covers compression and streamed bodies
+        app.add_middleware(TracingMiddleware, tracer=executor.tracer)
+
+    def check_permission(command: str) -> dict | None:
+        """Return an error response if the command may not run, else None."""
         if not command:
             return {"status": "error", "error": "No command provided"}
 
         # Permission check (reuses existing config logic)
-        is_allowed, reason = config.is_command_allowed(command)
+        is_allowed, reason = executor.check_permission(command)
 
         if reason == "NEEDS_APPROVAL":
             return {
@@ -71,39 +176,510 @@ def create_app(config: Config) -> FastAPI:
                 "error": f"Command not allowed: {reason}",
             }
 
-        result = await executor.execute(command, req.working_directory)
+        return None
 
+    def lookup_session(connection: HTTPConnection) -> Session | dict:
+        """Resolve the caller's session from the session header or cookie.
+
+        Returns the Session, or an error response if none can be assigned.
+        """
+        session_id = connection.headers.get(SESSION_HEADER) or connection.cookies.get(
+            SESSION_COOKIE
+        )
+        with executor.tracer.span("session.lookup"):
+            session, error = sessions.get(session_id)
+        if session is None:
+            return {"status": "error", "error": error}
+        set_client("http", session.session_id)
+        return session
+
+    @app.get("/health")
+    async def health() -> dict:
         return {
-            "status": "success",
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "exit_code": result.return_code,
-            "return_code": result.return_code,
-            "timed_out": result.timed_out,
-            "truncated": result.truncated,
-            "working_directory": result.working_directory,
+            "status": "ok",
+            "service": "host-terminal-mcp",
+            "permission_mode": config.permission_mode.value,
+            "commands_spawned": executor.stats.spawned,
+            "spawns_saved": executor.stats.coalesced,
+            "active_sessions": len(sessions),
         }
 
+    @app.get("/metrics")
+    async def metrics() -> PlainTextResponse:
+        # Per process: with several workers each scrape sees one worker's counters
+        return PlainTextResponse(executor.metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @app.post("/execute", response_model=None)
+    async def execute(req: ExecuteRequest, request: Request) -> dict | StreamingResponse:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        command = req.command.strip()
+        denied = check_permission(command)
+        if denied is not None:
+            return denied
+
+        working_directory = req.working_directory or session.current_directory
+
+        if req.output_encoding == OutputEncoding.RAW:
+            # Stream stdout bytes as they are produced, without decoding
+            cwd, is_allowed = executor.resolve_working_directory(working_directory)
+            if not is_allowed:
+                executor.record_denial("directory", command, cwd)
+                return {"status": "error", "error": f"Working directory not allowed: {cwd}"}
+            return StreamingResponse(
+                executor.stream_output(command, cwd),
+                media_type="application/octet-stream",
+                headers={"X-Working-Directory": cwd},
+            )
+
+        result = await executor.execute(command, working_directory, req.output_encoding)
+        with executor.tracer.span("response.format"):
+            return _result_to_dict(result)
+
+    @app.post("/execute/batch")
+    async def execute_batch(req: BatchExecuteRequest, request: Request) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        if not req.commands:
+            return {"status": "error", "error": "No commands provided"}
+
+        # Check every command before running any of them; denied entries
+        # are reported in place and the rest of the batch still runs.
+        results: list[dict | None] = []
+        runnable: list[tuple[int, str, str | None]] = []
+        for index, item in enumerate(req.commands):
+            command = item.command.strip()
+            denied = check_permission(command)
+            results.append(denied)
+            if denied is None:
+                cwd = item.working_directory or session.current_directory
+                runnable.append((index, command, cwd))
+
+        executed = await executor.execute_batch(
+            [(command, cwd) for _, command, cwd in runnable],
+            max_parallel=req.max_parallel,
+        )
+        for (index, _, _), result in zip(runnable, executed, strict=True):
+            results[index] = _result_to_dict(result)
+
+        return {"status": "success", "results": results}
+
     @app.post("/cd")
-    async def change_directory(req: CdRequest) -> dict:
+    async def change_directory(req: CdRequest, request: Request) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
         path = req.path.strip()
         if not path:
             return {"status": "error", "error": "No path provided"}
 
-        success, message = executor.change_directory(path)
+        success, message = sessions.change_directory(session, path)
         return {
             "status": "success" if success else "error",
             "message": message,
-            "current_directory": executor.current_directory,
+            "current_directory": session.current_directory,
         }
 
     @app.get("/cwd")
-    async def get_current_directory() -> dict:
+    async def get_current_directory(request: Request) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
         return {
             "status": "success",
-            "current_directory": executor.current_directory,
+            "current_directory": session.current_directory,
         }
 
+    @app.get("/files/read")
+    async def read_file(
+        request: Request,
+        path: str,
+        start_line: int | None = None,
+        end_line: int | None = None,
+        offset: int | None = None,
+        length: int | None = None,
+        encoding: OutputEncoding = OutputEncoding.TEXT,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        if encoding == OutputEncoding.RAW:
+            return {"status": "error", "error": "encoding must be 'text' or 'base64'"}
+
+        resolved, error = executor.resolve_path(path, session.current_directory)
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            content = await asyncio.to_thread(
+                files.read,
+                resolved,
+                offset=offset,
+                length=length,
+                start_line=start_line,
+                end_line=end_line,
+                encoding=encoding,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+        return content.to_dict()
+
+    @app.get("/files/list")
+    async def list_files(
+        request: Request,
+        path: str = "",
+        depth: int = 1,
+        ignore: Annotated[list[str] | None, Query()] = None,
+        use_gitignore: bool = True,
+        show_hidden: bool = False,
+        sort: SortKey = "name",
+        reverse: bool = False,
+        max_entries: int = 1000,
+        long: bool = False,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(
+            path or session.current_directory, session.current_directory
+        )
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            listing = await asyncio.to_thread(
+                list_directory,
+                resolved,
+                depth=depth,
+                show_hidden=show_hidden,
+                ignore=ignore or [],
+                use_gitignore=use_gitignore,
+                sort=sort,
+                reverse=reverse,
+                max_entries=max_entries,
+                long=long,
+                exclude=executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+        return listing.to_dict()
+
+    @app.get("/files/search")
+    async def search_files(
+        request: Request,
+        pattern: str,
+        path: str = "",
+        fixed_strings: bool = False,
+        ignore_case: bool = False,
+        include: Annotated[list[str] | None, Query()] = None,
+        ignore: Annotated[list[str] | None, Query()] = None,
+        use_gitignore: bool = True,
+        show_hidden: bool = False,
+        max_results: int = 100,
+        max_bytes: int | None = None,
+        offset: int = 0,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(
+            path or session.current_directory, session.current_directory
+        )
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            results = await asyncio.to_thread(
+                search.search,
+                resolved,
+                pattern,
+                fixed_strings=fixed_strings,
+                ignore_case=ignore_case,
+                include=include or [],
+                ignore=ignore or [],
+                use_gitignore=use_gitignore,
+                show_hidden=show_hidden,
+                max_results=max_results,
+                max_bytes=min(max_bytes or config.max_output_size, config.max_output_size),
+                offset=offset,
+                exclude=executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+        return results.to_dict()
+
+    @app.get("/files/usage")
+    async def files_usage(
+        request: Request,
+        path: str = "",
+        depth: int = 2,
+        limit: int = 20,
+        cross_filesystems: bool = False,
+        refresh: bool = False,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(
+            path or session.current_directory, session.current_directory
+        )
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            return await asyncio.to_thread(
+                disk_usage.measure,
+                resolved,
+                depth=depth,
+                limit=limit,
+                cross_filesystems=cross_filesystems,
+                refresh=refresh,
+                exclude=executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.get("/files/find")
+    async def files_find(
+        request: Request,
+        path: str = "",
+        glob: str | None = None,
+        contains: str | None = None,
+        extension: str | None = None,
+        entry_type: Annotated[EntryType | None, Query(alias="type")] = None,
+        ignore_case: bool = False,
+        limit: int = FIND_LIMIT,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(
+            path or session.current_directory, session.current_directory
+        )
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            return await find_files(
+                file_index,
+                resolved,
+                glob=glob or None,
+                contains=contains or None,
+                extension=extension or None,
+                entry_type=entry_type,
+                ignore_case=ignore_case,
+                limit=limit,
+                exclude=executor.is_blocked_path,
+                max_entries=config.file_index_max_entries,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.get("/files/hash")
+    async def files_hash(
+        request: Request,
+        paths: Annotated[list[str], Query()],
+        algorithms: Annotated[list[str] | None, Query()] = None,
+        limit: int = 1000,
+        refresh: bool = False,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved_paths = []
+        for path in paths:
+            resolved, error = executor.resolve_path(path, session.current_directory)
+            if error is not None:
+                return {"status": "error", "error": error}
+            resolved_paths.append(resolved)
+
+        try:
+            return await asyncio.to_thread(
+                hasher.hash,
+                resolved_paths,
+                algorithms=algorithms or DEFAULT_HASH_ALGORITHMS,
+                limit=limit,
+                refresh=refresh,
+                exclude=executor.is_blocked_path,
+            )
+        except ValueError as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.get("/project")
+    async def explore_project(
+        request: Request,
+        path: str = "",
+        sections: Annotated[list[str] | None, Query()] = None,
+        refresh: bool = False,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(
+            path or session.current_directory, session.current_directory
+        )
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        try:
+            return await explorer.explore(
+                resolved,
+                sections=sections or EXPLORE_SECTIONS,
+                refresh=refresh,
+                exclude=executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.get("/files/tail", response_model=None)
+    async def tail_file(
+        request: Request,
+        path: str,
+        cursor: str | None = None,
+        lines: int = DEFAULT_LINES,
+        wait: float = 0.0,
+        follow_file: Annotated[bool, Query(alias="follow")] = False,
+        duration: float | None = None,
+    ) -> dict | StreamingResponse:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        resolved, error = executor.resolve_path(path, session.current_directory)
+        if error is not None:
+            return {"status": "error", "error": error}
+
+        if not follow_file:
+            try:
+                chunk = await wait_for_lines(
+                    resolved,
+                    cursor=cursor,
+                    lines=lines,
+                    max_bytes=config.max_output_size,
+                    wait=min(wait, MAX_WAIT_SECONDS),
+                    poll_interval=config.tail_poll_interval_seconds,
+                    exclude=executor.is_blocked_path,
+                )
+            except (OSError, ValueError) as e:
+                return {"status": "error", "error": str(e)}
+            return chunk.to_dict()
+
+        chunks = follow(
+            resolved,
+            cursor=cursor,
+            lines=lines,
+            max_bytes=config.max_output_size,
+            poll_interval=config.tail_poll_interval_seconds,
+            exclude=executor.is_blocked_path,
+        )
+        try:
+            # Open errors are reported as a normal response, before streaming starts
+            first = await anext(chunks)
+        except (OSError, ValueError) as e:
+            await chunks.aclose()
+            return {"status": "error", "error": str(e)}
+
+        async def lines_as_ndjson() -> AsyncIterator[bytes]:
+            # Without a duration, following ends when the client disconnects
+            deadline = None if duration is None else time.monotonic() + duration
+            yield json.dumps(first.to_dict()).encode() + b"\n"
+            try:
+                while True:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(anext(chunks), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    yield json.dumps(chunk.to_dict()).encode() + b"\n"
+            finally:
+                await chunks.aclose()
+
+        return StreamingResponse(lines_as_ndjson(), media_type="application/x-ndjson")
+
+    @app.get("/system/info")
+    async def get_system_info(
+        sections: Annotated[list[str] | None, Query()] = None,
+        sample_seconds: float = 0.0,
+    ) -> dict:
+        try:
+            return await system_info(
+                sections=sections or SECTIONS,
+                sample_seconds=sample_seconds,
+                paths=[os.path.expanduser(path) for path in config.allowed_directories],
+            )
+        except ValueError as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.get("/processes")
+    async def get_processes(
+        request: Request,
+        name: str | None = None,
+        user: str | None = None,
+        cwd: str | None = None,
+        sort: ProcessSortKey = "cpu",
+        limit: int = 20,
+        sample_seconds: float = 0.0,
+    ) -> dict:
+        session = lookup_session(request)
+        if not isinstance(session, Session):
+            return session
+
+        if cwd:
+            cwd = os.path.realpath(
+                os.path.join(session.current_directory, os.path.expanduser(cwd))
+            )
+        try:
+            return await list_processes(
+                name=name,
+                user=user,
+                cwd=cwd or None,
+                sort=sort,
+                limit=limit,
+                sample_seconds=sample_seconds,
+            )
+        except (OSError, ValueError) as e:
+            return {"status": "error", "error": str(e)}
+
+    @app.websocket("/ws")
+    async def websocket_commands(websocket: WebSocket) -> None:
+        """Run many commands concurrently over one connection (see multiplex.py)."""
+        session = lookup_session(websocket)
+        await websocket.accept()
+        if not isinstance(session, Session):
+            await websocket.send_json({"type": "error", "id": None, **session})
+            await websocket.close(code=1008)
+            return
+        set_client("ws", session.session_id)
+
+        def current_directory() -> str:
+            # Re-read so a /cd made over HTTP applies to commands started later
+            latest, _ = sessions.get(session.session_id)
+            return (latest or session).current_directory
+
+        multiplexer = CommandMultiplexer(
+            websocket,
+            executor,
+            check_permission,
+            current_directory,
+            max_streams=config.max_streams_per_connection,
+        )
+        await multiplexer.run()
+
     @app.get("/permissions")
     async def get_permissions() -> dict:
         return {
@@ -116,3 +692,13 @@ def create_app(config: Config) -> FastAPI:
         }
 
     return app
+
+
+def create_app_from_env() -> FastAPI:
+    """App factory for uvicorn worker processes.
+
+    ``server.main()`` serializes the fully resolved Config (including
+    command-line overrides) into ``HOST_TERMINAL_MCP_CONFIG_JSON`` before
+    starting uvicorn with several workers; each worker rebuilds it here.
+    """
+    return create_app(Config(**json.loads(os.environ[CONFIG_ENV_VAR])))
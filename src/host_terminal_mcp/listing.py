@@ -0,0 +1,217 @@
+"""In-process directory listings for the list_directory tool.
+
+``list_directory`` walks a tree with ``os.scandir`` instead of running
+``ls``/``tree`` and re-parsing their text. ``scandir`` returns each
+entry's type with its name, so only files are stat'ed (for their size)
+unless sorting or ``long`` output asks for more.
+
+Entries come back depth-first, sorted within each directory, with paths
+relative to the listed directory. Symlinks are reported with their
+target and never followed. The walk stops after ``max_entries``.
+
+Listings block, so async callers run them with ``asyncio.to_thread``.
+"""
+
+import os
+import stat
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from .gitignore import ALWAYS_IGNORED, IgnoreRules, descend, is_ignored, rules_for
+
+SortKey = Literal["name", "size", "mtime"]
+SORT_KEYS: tuple[SortKey, ...] = ("name", "size", "mtime")
+
+MAX_DEPTH = 32
+
+
+@dataclass
+class DirectoryListing:
+    """The result of list_directory()."""
+
+    path: str
+    depth: int
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    directories: int = 0
+    files: int = 0
+    truncated: bool = False  # max_entries was reached
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "status": "success",
+            "path": self.path,
+            "depth": self.depth,
+            "count": len(self.entries),
+            "directories": self.directories,
+            "files": self.files,
+            "truncated": self.truncated,
+            "entries": self.entries,
+        }
+
+
+class _Walk:
+    """State of one listing, so the recursion only passes what changes per level."""
+
+    def __init__(
+        self,
+        listing: DirectoryListing,
+        show_hidden: bool,
+        ignore: IgnoreRules | None,
+        use_gitignore: bool,
+        sort: SortKey,
+        reverse: bool,
+        max_entries: int,
+        long: bool,
+        exclude: Callable[[str], bool] | None,
+    ):
+        self.listing = listing
+        self.show_hidden = show_hidden
+        self.ignore = ignore
+        self.use_gitignore = use_gitignore
+        self.sort = sort
+        self.reverse = reverse
+        self.max_entries = max_entries
+        self.long = long
+        self.exclude = exclude
+        self.root_length = len(listing.path.rstrip(os.sep)) + 1
+
+    def visible(self, entry: os.DirEntry[str], is_dir: bool, stack: Sequence[IgnoreRules]) -> bool:
+        name = entry.name
+        if name.startswith(".") and not self.show_hidden:
+            return False
+        if self.use_gitignore and name in ALWAYS_IGNORED:
+            return False
+        if self.ignore is not None and self.ignore.match(entry.path, is_dir):
+            return False
+        if stack and is_ignored(stack, entry.path, is_dir):
+            return False
+        return self.exclude is None or not self.exclude(entry.path)
+
+    def walk(self, directory: str, level: int, stack: tuple[IgnoreRules, ...]) -> None:
+        """List directory, recursing into subdirectories while level < depth."""
+        try:
+            with os.scandir(directory) as it:
+                scanned = list(it)
+        except OSError:
+            # Unreadable subdirectories are listed but not entered, like tree
+            return
+
+        children: list[tuple[os.DirEntry[str], str, os.stat_result | None]] = []
+        for entry in scanned:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_dir:
+                    kind = "dir"
+                elif entry.is_symlink():
+                    kind = "link"
+                elif entry.is_file(follow_symlinks=False):
+                    kind = "file"
+                else:
+                    kind = "other"
+            except OSError:
+                continue
+            if not self.visible(entry, is_dir, stack):
+                continue
+            st = None
+            if kind == "file" or self.long or self.sort != "name":
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    pass
+            children.append((entry, kind, st))
+
+        children.sort(key=lambda child: child[0].name, reverse=self.reverse)
+        if self.sort == "size":
+            children.sort(key=lambda child: child[2].st_size if child[2] else 0, reverse=not self.reverse)
+        elif self.sort == "mtime":
+            children.sort(key=lambda child: child[2].st_mtime if child[2] else 0, reverse=not self.reverse)
+
+        listing = self.listing
+        for entry, kind, st in children:
+            if len(listing.entries) >= self.max_entries:
+                listing.truncated = True
+                return
+            item: dict[str, Any] = {"path": entry.path[self.root_length :], "type": kind}
+            if st is not None and kind == "file":
+                item["size"] = st.st_size
+            if kind == "link":
+                try:
+                    item["target"] = os.readlink(entry.path)
+                except OSError:
+                    pass
+            if self.long and st is not None:
+                item["mode"] = stat.filemode(st.st_mode)
+                item["mtime"] = st.st_mtime
+            listing.entries.append(item)
+
+            if kind == "dir":
+                listing.directories += 1
+                if level < listing.depth:
+                    inner = descend(stack, entry.path) if self.use_gitignore else stack
+                    self.walk(entry.path, level + 1, inner)
+                    if listing.truncated:
+                        return
+            else:
+                listing.files += 1
+
+
+def list_directory(
+    path: str,
+    depth: int = 1,
+    show_hidden: bool = False,
+    ignore: Iterable[str] = (),
+    use_gitignore: bool = True,
+    sort: SortKey = "name",
+    reverse: bool = False,
+    max_entries: int = 1000,
+    long: bool = False,
+    exclude: Callable[[str], bool] | None = None,
+) -> DirectoryListing:
+    """
+    List path, and below it up to depth levels, in the order ls or tree would.
+
+    Args:
+        path: Directory to list
+        depth: Levels to descend; 1 lists only the directory's own entries
+        show_hidden: Include entries whose name starts with a dot
+        ignore: Extra gitignore-style patterns, relative to path
+        use_gitignore: Skip what .gitignore files (including those above path
+            in its repository) ignore, and the .git directory
+        sort: Order within each directory: "name", or largest/newest first for
+            "size"/"mtime"
+        reverse: Reverse the order
+        max_entries: Stop after this many entries and set truncated
+        long: Add each entry's mode string and mtime
+        exclude: Called with each entry's absolute path; True hides the
+            entry and, for a directory, everything below it
+
+    Raises:
+        ValueError: For an invalid argument, or a path that is not a directory
+        OSError: If the directory cannot be read
+    """
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"depth must be between 1 and {MAX_DEPTH}")
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+    if max_entries < 1:
+        raise ValueError("max_entries must be at least 1")
+    if not os.path.isdir(path):
+        raise ValueError(f"Not a directory: {path}")
+    # The walk skips entries it cannot read; the top directory must open, or it is an error
+    os.scandir(path).close()
+
+    patterns = list(ignore)
+    listing = DirectoryListing(path=path, depth=depth)
+    _Walk(
+        listing,
+        show_hidden=show_hidden,
+        ignore=IgnoreRules(path, patterns) if patterns else None,
+        use_gitignore=use_gitignore,
+        sort=sort,
+        reverse=reverse,
+        max_entries=max_entries,
+        long=long,
+        exclude=exclude,
+    ).walk(path, 1, rules_for(path) if use_gitignore else ())
+    return listing
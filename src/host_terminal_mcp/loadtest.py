@@ -0,0 +1,513 @@
+"""Load generator for the HTTP transport.
+
+Starts ``host-terminal-mcp --http`` on a free local port (or targets a
+running server with ``--url``) and drives it from ``--concurrency``
+closed-loop workers for ``--duration`` seconds. Each worker has its own
+session and picks operations at random, weighted by ``--mix``:
+
+    echo    POST /execute  ``echo hello`` (spawn and round-trip overhead)
+    cat     POST /execute  ``cat`` of a ``--cat-bytes`` file (output-heavy)
+    sleep   POST /execute  ``sleep --sleep-seconds`` (slow, holds a slot)
+    cd      POST /cd       change the session's directory (no subprocess)
+    batch   POST /execute/batch  ``--batch-size`` echo commands at once
+    stream  POST /execute  ``cat`` with ``output_encoding: raw``, read to the end
+
+The report gives throughput, p50/p95/p99 latency and error rate per
+operation and overall, and the server's resident memory sampled every
+``--sample-interval`` seconds (summed over its process tree: uvicorn
+workers and the commands they are running).
+
+Requires the ``http`` and ``client`` extras.
+
+Usage:
+    python -m host_terminal_mcp.loadtest [--concurrency 16] [--duration 30]
+        [--mix echo=60,cat=15,sleep=10,cd=5,batch=5,stream=5] [--workers 1]
+        [--url http://127.0.0.1:8099 --directory /tmp] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .sessions import SESSION_HEADER
+
+OPERATIONS = ("echo", "cat", "sleep", "cd", "batch", "stream")
+
+DEFAULT_MIX = "echo=60,cat=15,sleep=10,cd=5,batch=5,stream=5"
+
+# Name of the file the cat and stream operations read, inside the work directory
+DATA_FILE = "loadtest.dat"
+
+
+class LoadTestError(Exception):
+    """A request that completed but did not succeed."""
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """
+    Parse an operation mix such as ``echo=3,cat=1``.
+
+    Raises:
+        ValueError: For an unknown operation or a weight that is not a positive number
+    """
+    mix: dict[str, float] = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        try:
+            value = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Weight for {name} is not a number: {weight!r}") from None
+        if not value > 0:
+            raise ValueError(f"Weight for {name} must be positive")
+        mix[name] = value
+    return mix
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q from 0 to 100) of already sorted values."""
+    if not values:
+        return math.nan
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+@dataclass
+class OperationStats:
+    """Latencies and failures of one operation."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        failed = sum(self.errors.values())
+        return {
+            "requests": self.requests,
+            "throughput": self.requests / elapsed if elapsed else 0.0,
+            "errors": failed,
+            "error_rate": failed / self.requests if self.requests else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "error_kinds": dict(self.errors),
+        }
+
+
+@dataclass
+class LoadTestResult:
+    """Everything measured during one run."""
+
+    elapsed: float
+    concurrency: int
+    operations: dict[str, OperationStats]
+    # (seconds since start, resident bytes) samples of the server processes
+    rss: list[tuple[float, int]] = field(default_factory=list)
+
+    def total(self) -> OperationStats:
+        total = OperationStats()
+        for stats in self.operations.values():
+            total.latencies.extend(stats.latencies)
+            total.errors.update(stats.errors)
+        return total
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "elapsed_seconds": self.elapsed,
+            "concurrency": self.concurrency,
+            "operations": {
+                name: stats.summary(self.elapsed) for name, stats in self.operations.items()
+            },
+            "total": self.total().summary(self.elapsed),
+            "rss": [{"seconds": round(at, 3), "bytes": size} for at, size in self.rss],
+        }
+
+    def format_report(self) -> str:
+        rows = {**self.operations, "total": self.total()}
+        lines = [
+            f"{self.concurrency} workers for {self.elapsed:.1f}s",
+            "",
+            f"{'operation':<10} {'requests':>9} {'req/s':>8} {'errors':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+        ]
+        for name, stats in rows.items():
+            s = stats.summary(self.elapsed)
+            lines.append(
+                f"{name:<10} {s['requests']:>9} {s['throughput']:>8.1f} "
+                f"{s['error_rate']:>6.1%} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+                f"{s['p99_ms']:>8.1f}"
+            )
+        errors = self.total().errors
+        if errors:
+            lines += ["", "errors:"]
+            lines += [f"  {count:>6}  {kind}" for kind, count in errors.most_common(10)]
+        if self.rss:
+            lines += ["", "server RSS:"]
+            lines += [f"  {at:>6.1f}s  {size / 2**20:8.1f} MiB" for at, size in self.rss]
+        return "\n".join(lines)
+
+
+class Workload:
+    """
+    Issue each operation against the server.
+
+    Args:
+        client: Client with base_url pointing at the server
+        directory: Allowed directory holding DATA_FILE
+        sleep_seconds: Duration of the sleep operation
+        batch_size: Commands per batch operation
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        directory: str,
+        sleep_seconds: float = 0.1,
+        batch_size: int = 4,
+    ):
+        self.client = client
+        self.directory = directory
+        self.data_file = os.path.join(directory, DATA_FILE)
+        self.sleep_seconds = sleep_seconds
+        self.batch_size = batch_size
+        # Each operation takes the worker's session headers
+        self.operations: dict[str, Callable[[dict[str, str]], Awaitable[None]]] = {
+            "echo": self._echo,
+            "cat": self._cat,
+            "sleep": self._sleep,
+            "cd": self._cd,
+            "batch": self._batch,
+            "stream": self._stream,
+        }
+
+    async def _execute(self, command: str, headers: dict[str, str]) -> None:
+        response = await self.client.post(
+            "/execute",
+            json={"command": command, "working_directory": self.directory},
+            headers=headers,
+        )
+        _check(response, ran_command=True)
+
+    async def _echo(self, headers: dict[str, str]) -> None:
+        await self._execute("echo hello", headers)
+
+    async def _cat(self, headers: dict[str, str]) -> None:
+        await self._execute(f"cat {self.data_file}", headers)
+
+    async def _sleep(self, headers: dict[str, str]) -> None:
+        await self._execute(f"sleep {self.sleep_seconds}", headers)
+
+    async def _cd(self, headers: dict[str, str]) -> None:
+        response = await self.client.post("/cd", json={"path": self.directory}, headers=headers)
+        _check(response)
+
+    async def _batch(self, headers: dict[str, str]) -> None:
+        commands = [
+            {"command": f"echo {index}", "working_directory": self.directory}
+            for index in range(self.batch_size)
+        ]
+        response = await self.client.post(
+            "/execute/batch", json={"commands": commands}, headers=headers
+        )
+        data = _check(response)
+        for result in data.get("results", []):
+            if not result or result.get("status") != "success" or result.get("exit_code"):
+                raise LoadTestError("batch command failed")
+
+    async def _stream(self, headers: dict[str, str]) -> None:
+        async with self.client.stream(
+            "POST",
+            "/execute",
+            json={
+                "command": f"cat {self.data_file}",
+                "working_directory": self.directory,
+                "output_encoding": "raw",
+            },
+            headers=headers,
+        ) as response:
+            if response.status_code != 200:
+                raise LoadTestError(f"HTTP {response.status_code}")
+            if not response.headers.get("content-type", "").startswith("application/octet-stream"):
+                # Refusals come back as a JSON body instead of a stream
+                await response.aread()
+                _check(response)
+            async for _ in response.aiter_raw():
+                pass
+
+
+def _check(response: httpx.Response, ran_command: bool = False) -> dict[str, Any]:
+    if response.status_code != 200:
+        raise LoadTestError(f"HTTP {response.status_code}")
+    data: dict[str, Any] = response.json()
+    if data.get("status") != "success":
+        raise LoadTestError(f"status {data.get('status')}: {data.get('error', '')}"[:120])
+    if ran_command and data.get("timed_out"):
+        raise LoadTestError("timed out")
+    if ran_command and data.get("exit_code"):
+        raise LoadTestError(f"exit code {data['exit_code']}")
+    return data
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    directory: str,
+    mix: dict[str, float],
+    concurrency: int = 16,
+    duration: float = 30.0,
+    requests: int | None = None,
+    sleep_seconds: float = 0.1,
+    batch_size: int = 4,
+    sample_rss: Callable[[], int | None] | None = None,
+    sample_interval: float = 1.0,
+    seed: int | None = None,
+) -> LoadTestResult:
+    """
+    Drive the server with closed-loop workers and collect the results.
+
+    Args:
+        client: Client with base_url pointing at the server
+        directory: Allowed directory holding DATA_FILE
+        mix: Operation weights, as from parse_mix()
+        concurrency: Workers, each with its own session, issuing one request at a time
+        duration: Seconds to run for
+        requests: Stop after this many requests instead, if set
+        sleep_seconds: Duration of the sleep operation
+        batch_size: Commands per batch operation
+        sample_rss: Returns the server's resident bytes; called every sample_interval
+        sample_interval: Seconds between RSS samples
+        seed: Seed for the operation choice, for repeatable mixes
+    """
+    workload = Workload(client, directory, sleep_seconds, batch_size)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    stats = {name: OperationStats() for name in names}
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + duration
+    issued = 0
+    rss: list[tuple[float, int]] = []
+
+    async def worker(index: int) -> None:
+        nonlocal issued
+        headers = {SESSION_HEADER: f"loadtest-{index}"}
+        while loop.time() < deadline and (requests is None or issued < requests):
+            issued += 1
+            name = rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                await workload.operations[name](headers)
+            except (LoadTestError, httpx.HTTPError, ValueError) as e:
+                stats[name].errors[f"{name}: {type(e).__name__}: {e}"[:160]] += 1
+            stats[name].latencies.append(time.perf_counter() - began)
+
+    async def sampler() -> None:
+        assert sample_rss is not None
+        while True:
+            size = await asyncio.to_thread(sample_rss)
+            if size is not None:
+                rss.append((loop.time() - started, size))
+            await asyncio.sleep(sample_interval)
+
+    sampling = asyncio.create_task(sampler()) if sample_rss is not None else None
+    try:
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    finally:
+        if sampling is not None:
+            sampling.cancel()
+            await asyncio.gather(sampling, return_exceptions=True)
+    elapsed = loop.time() - started
+    if sample_rss is not None:
+        size = sample_rss()
+        if size is not None:
+            rss.append((elapsed, size))
+    return LoadTestResult(elapsed, concurrency, stats, rss)
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Resident memory of a process and all of its descendants (uvicorn workers), via ps."""
+    try:
+        output = subprocess.run(
+            ["ps", "-A", "-o", "pid=,ppid=,rss="],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    children: dict[int, list[int]] = {}
+    rss_kib: dict[int, int] = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) != 3:
+            continue
+        child, parent, size = (int(value) for value in fields)
+        children.setdefault(parent, []).append(child)
+        rss_kib[child] = size
+    if pid not in rss_kib:
+        return None
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += rss_kib.get(current, 0)
+        pending.extend(children.get(current, []))
+    return total * 1024
+
+
+def write_data_file(directory: str, size: int) -> None:
+    """Write the file the cat and stream operations read."""
+    line = b"0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ-load\n"
+    with open(os.path.join(directory, DATA_FILE), "wb") as f:
+        f.write((line * (size // len(line) + 1))[:size])
+
+
+def write_config(directory: str, concurrency: int) -> Path:
+    """Write a server config allowing the workload in directory; returns its path."""
+    config = Path(directory) / "config.yaml"
+    # Every request spawns its own process, as distinct agents' commands would
+    config.write_text(
+        "coalesce_identical_commands: false\n"
+        f"max_sessions: {max(256, concurrency)}\n"
+        f"allowed_directories: ['{directory}']\n"
+        "allowed_commands:\n"
+        "  - pattern: 'echo '\n"
+        "  - pattern: 'cat '\n"
+        "  - pattern: 'sleep '\n"
+    )
+    return config
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_server(config: Path, port: int, workers: int) -> subprocess.Popen[bytes]:
+    return subprocess.Popen(
+        [sys.executable, "-m", "host_terminal_mcp.server", "--http",
+         "--config", str(config), "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+async def _run(args: argparse.Namespace, url: str, directory: str, pid: int | None) -> LoadTestResult:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        return await run_load(
+            client,
+            directory,
+            parse_mix(args.mix),
+            concurrency=args.concurrency,
+            duration=args.duration,
+            requests=args.requests,
+            sleep_seconds=args.sleep_seconds,
+            batch_size=args.batch_size,
+            sample_rss=(lambda: rss_bytes(pid)) if pid is not None else None,
+            sample_interval=args.sample_interval,
+            seed=args.seed,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m host_terminal_mcp.loadtest",
+        description="Load-test the host-terminal-mcp HTTP transport",
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help=f"Operation weights (default {DEFAULT_MIX})"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+    parser.add_argument("--cat-bytes", type=int, default=256 * 1024, help="Size of the cat file")
+    parser.add_argument("--sleep-seconds", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout")
+    parser.add_argument("--seed", type=int, help="Seed for repeatable operation choices")
+    parser.add_argument(
+        "--url",
+        help="Target a running server instead of starting one; it must allow echo, cat and "
+        "sleep in --directory",
+    )
+    parser.add_argument(
+        "--directory",
+        help="With --url: allowed directory to run in (the data file is written there)",
+    )
+    parser.add_argument(
+        "--pid", type=int, help="With --url: server process to sample RSS from"
+    )
+    parser.add_argument("--json", help="Also write the results to this file as JSON")
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.url and not args.directory:
+        parser.error("--url requires --directory")
+
+    if args.url:
+        directory = os.path.realpath(args.directory)
+        write_data_file(directory, args.cat_bytes)
+        try:
+            result = asyncio.run(_run(args, args.url.rstrip("/"), directory, args.pid))
+        finally:
+            os.unlink(os.path.join(directory, DATA_FILE))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.realpath(tmp)
+            write_data_file(directory, args.cat_bytes)
+            config = write_config(directory, args.concurrency)
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            server = start_server(config, port, args.workers)
+            try:
+                wait_until_ready(url)
+                result = asyncio.run(_run(args, url, directory, server.pid))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+    print(result.format_report())
+    if args.json:
+        Path(args.json).write_text(json.dumps(result.summary(), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python objects updated inline on
+the event loop: no background threads, no locks and no client library. A
+histogram observation is one ``bisect`` plus two additions.
+
+``CommandMetrics`` holds the server's instruments. Series are labeled by
+the config pattern a command matched (the pattern text, or ``other`` when
+it was allowed by mode or session approval rather than by a pattern), so
+label cardinality is bounded by the size of the config.
+"""
+
+import abc
+import bisect
+import math
+import os
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; permission checks land in the sub-millisecond buckets, commands above
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+# Label value for commands not allowed by any configured pattern
+OTHER_PATTERN = "other"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    """A named metric family with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """The family's sample lines, without the HELP and TYPE header."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines) + "\n"
+
+
+_M = TypeVar("_M", bound=_Metric)
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        if not self.labelnames:
+            # A single unlabeled series is reported as 0 before its first update
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int):
+        # One slot per bucket plus the +Inf overflow; made cumulative on render
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class Histogram(_Metric):
+    """Observations counted into buckets, plus their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.total += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series.counts) if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series.total if series else 0.0
+
+    def _samples(self) -> Iterator[str]:
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series.counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series.total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """A collection of metric families rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _M) -> _M:
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        return "".join(metric.render() for metric in self._metrics)
+
+
+class CommandMetrics:
+    """The instruments recorded by CommandExecutor."""
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        registry = self.registry
+        self.permission_check_seconds = registry.histogram(
+            "host_terminal_permission_check_seconds",
+            "Time spent deciding whether a command may run.",
+            ["outcome", "pattern"],
+        )
+        self.denials = registry.counter(
+            "host_terminal_denials_total",
+            "Commands refused, by reason (blocked, not_allowed, needs_approval, directory).",
+            ["reason", "pattern"],
+        )
+        self.queue_wait_seconds = registry.histogram(
+            "host_terminal_queue_wait_seconds",
+            "Time batch commands waited for a free max_parallel_commands slot.",
+            ["pattern"],
+        )
+        self.spawn_seconds = registry.histogram(
+            "host_terminal_spawn_seconds",
+            "Time taken to start the shell subprocess.",
+            ["pattern"],
+        )
+        self.execution_seconds = registry.histogram(
+            "host_terminal_execution_seconds",
+            "Wall time from spawning a subprocess to its exit.",
+            ["pattern"],
+        )
+        self.active_subprocesses = registry.gauge(
+            "host_terminal_active_subprocesses",
+            "Subprocesses currently running.",
+            ["pattern"],
+        )
+        self.output_bytes = registry.counter(
+            "host_terminal_output_bytes_total",
+            "Bytes of command output read, by stream.",
+            ["pattern", "stream"],
+        )
+        self.truncations = registry.counter(
+            "host_terminal_truncations_total",
+            "Results whose output was cut at max_output_size.",
+            ["pattern"],
+        )
+        self.timeouts = registry.counter(
+            "host_terminal_timeouts_total",
+            "Commands killed at timeout_seconds.",
+            ["pattern"],
+        )
+        self.audit_dropped = registry.counter(
+            "host_terminal_audit_dropped_total",
+            "Audit records lost because the buffer was full or the write failed.",
+        )
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+def write_metrics_file(text: str, path: str) -> None:
+    """Atomically replace path with text, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,467 @@
+"""Multiplexed command streams over one WebSocket connection.
+
+A client opens ``/ws`` once and runs many commands over it concurrently.
+Every message is a JSON text frame carrying a client-chosen stream ``id``.
+
+Client to server::
+
+    {"type": "start", "id": "1", "command": "tail -f app.log",
+     "working_directory": "/tmp", "output_encoding": "text"}
+    {"type": "stdin", "id": "1", "data": "yes\\n"}           # "encoding": "base64" for bytes
+    {"type": "stdin", "id": "1", "eof": true}                # close the command's stdin
+    {"type": "cancel", "id": "1"}
+
+    {"type": "start", "id": "2", "command": "top", "pty": {"rows": 40, "cols": 120}}
+    {"type": "resize", "id": "2", "rows": 50, "cols": 160}
+
+Server to client::
+
+    {"type": "started", "id": "1", "working_directory": "/tmp"}
+    {"type": "stdout", "id": "1", "data": "..."}             # likewise "stderr"
+    {"type": "exit", "id": "1", "return_code": 0, "timed_out": false, "cancelled": false}
+    {"type": "error", "id": "1", "status": "error", "error": "..."}
+
+With ``pty`` the command runs under a pseudo-terminal: output (stdout and
+stderr together) arrives as ``stdout`` frames with escape sequences intact
+for the client's terminal emulator, and stdin ``eof`` sends Ctrl-D.
+
+Denied commands get an ``error`` frame with the same ``status`` and
+``error``/``message`` fields as ``/execute`` (including ``needs_approval``).
+Output is not truncated; ``config.timeout_seconds`` still applies.
+
+Backpressure: outgoing frames pass through a bounded queue drained by a
+single writer. When the client reads slowly the queue fills, output readers
+stop reading their pipes, and the commands block on write, so a fast
+producer cannot exhaust server memory. Stdin frames are queued per stream
+(bounded too); a frame that does not fit is refused with an ``error`` frame
+rather than stalling every other stream on the connection.
+"""
+
+import asyncio
+import base64
+import codecs
+import contextlib
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from .executor import CommandExecutor, OutputEncoding
+from .pty_session import DEFAULT_COLS, DEFAULT_ROWS, PtySession
+
+# Outgoing frames buffered per connection before output readers are paused
+SEND_QUEUE_SIZE = 64
+
+# Stdin frames buffered per stream before further frames are refused
+STDIN_QUEUE_SIZE = 64
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class _Stream:
+    """One running command on a connection."""
+
+    stream_id: str
+    stdin: asyncio.Queue[bytes | None] = field(
+        default_factory=lambda: asyncio.Queue(STDIN_QUEUE_SIZE)
+    )
+    task: asyncio.Task[None] | None = None
+    cancelled: bool = False
+    pty: PtySession | None = None
+    # Metrics label of the command (the config pattern it matched)
+    pattern: str = ""
+    # Output bytes read from each pipe, for the audit log
+    bytes_read: dict[str, int] = field(default_factory=lambda: {"stdout": 0, "stderr": 0})
+
+
+class CommandMultiplexer:
+    """Serve one WebSocket connection, running each started command as a stream.
+
+    Args:
+        websocket: Accepted WebSocket connection
+        executor: Shared CommandExecutor
+        check_permission: Returns an error response for a denied command, else None
+        current_directory: Returns the session's directory for commands that name none
+        max_streams: Maximum commands running at once on this connection
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        executor: CommandExecutor,
+        check_permission: Callable[[str], dict | None],
+        current_directory: Callable[[], str],
+        max_streams: int,
+    ):
+        self.websocket = websocket
+        self.executor = executor
+        self.check_permission = check_permission
+        self.current_directory = current_directory
+        self.max_streams = max_streams
+        self._streams: dict[str, _Stream] = {}
+        self._outgoing: asyncio.Queue[dict[str, Any]] = asyncio.Queue(SEND_QUEUE_SIZE)
+        self._closed = False
+
+    async def run(self) -> None:
+        """Handle messages until the client disconnects, then stop every stream."""
+        writer = asyncio.create_task(self._write_frames())
+        try:
+            while True:
+                try:
+                    message = await self.websocket.receive_text()
+                except WebSocketDisconnect:
+                    break
+                await self._dispatch(message)
+        finally:
+            self._closed = True
+            streams = [s.task for s in self._streams.values() if s.task is not None]
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await writer
+
+    async def _write_frames(self) -> None:
+        """Single writer, so frames from concurrent streams never interleave."""
+        while True:
+            frame = await self._outgoing.get()
+            try:
+                await self.websocket.send_text(json.dumps(frame))
+            except (WebSocketDisconnect, RuntimeError):
+                # Client went away; run() notices on its next receive
+                return
+
+    async def _send(self, frame: dict[str, Any]) -> None:
+        await self._outgoing.put(frame)
+
+    async def _error(self, stream_id: Any, error: str) -> None:
+        await self._send({"type": "error", "id": stream_id, "status": "error", "error": error})
+
+    async def _dispatch(self, message: str) -> None:
+        try:
+            frame = json.loads(message)
+        except json.JSONDecodeError:
+            await self._error(None, "Invalid JSON")
+            return
+        if not isinstance(frame, dict):
+            await self._error(None, "Expected a JSON object")
+            return
+
+        stream_id = frame.get("id")
+        if not isinstance(stream_id, str) or not stream_id:
+            await self._error(stream_id, "Missing stream id")
+            return
+
+        kind = frame.get("type")
+        if kind == "start":
+            await self._start(stream_id, frame)
+        elif kind == "stdin":
+            await self._stdin(stream_id, frame)
+        elif kind == "cancel":
+            await self._cancel(stream_id)
+        elif kind == "resize":
+            await self._resize(stream_id, frame)
+        else:
+            await self._error(stream_id, f"Unknown message type: {kind}")
+
+    async def _start(self, stream_id: str, frame: dict[str, Any]) -> None:
+        if stream_id in self._streams:
+            await self._error(stream_id, "Stream id already in use")
+            return
+        if len(self._streams) >= self.max_streams:
+            await self._error(
+                stream_id, f"Too many concurrent commands ({self.max_streams} per connection)"
+            )
+            return
+
+        command = str(frame.get("command") or "").strip()
+        denied = self.check_permission(command)
+        if denied is not None:
+            await self._send({"type": "error", "id": stream_id, **denied})
+            return
+
+        encoding_name = frame.get("output_encoding", OutputEncoding.TEXT.value)
+        if encoding_name not in (OutputEncoding.TEXT.value, OutputEncoding.BASE64.value):
+            await self._error(stream_id, "output_encoding must be 'text' or 'base64'")
+            return
+        encoding = OutputEncoding(encoding_name)
+
+        cwd, is_allowed = self.executor.resolve_working_directory(
+            frame.get("working_directory") or self.current_directory()
+        )
+        if not is_allowed:
+            self.executor.record_denial("directory", command, cwd)
+            await self._error(stream_id, f"Working directory not allowed: {cwd}")
+            return
+
+        # Window size when the command should run under a pseudo-terminal
+        size: tuple[int, int] | None = None
+        pty = frame.get("pty")
+        if pty:
+            size = _window_size(pty if isinstance(pty, dict) else {})
+            if size is None:
+                await self._error(stream_id, "pty rows and cols must be integers from 1 to 1000")
+                return
+
+        stream = _Stream(stream_id, pattern=self.executor.pattern_label(command))
+        self._streams[stream_id] = stream
+        if size is not None:
+            runner = self._run_pty_stream(stream, command, cwd, encoding, *size)
+        else:
+            runner = self._run_stream(stream, command, cwd, encoding)
+        stream.task = asyncio.create_task(runner)
+
+    async def _stdin(self, stream_id: str, frame: dict[str, Any]) -> None:
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            await self._error(stream_id, "No such stream")
+            return
+
+        data: bytes | None
+        if frame.get("eof"):
+            data = None
+        elif frame.get("encoding") == "base64":
+            try:
+                data = base64.b64decode(str(frame.get("data", "")), validate=True)
+            except ValueError:
+                await self._error(stream_id, "Invalid base64 stdin data")
+                return
+        else:
+            data = str(frame.get("data", "")).encode("utf-8")
+
+        try:
+            stream.stdin.put_nowait(data)
+        except asyncio.QueueFull:
+            await self._error(stream_id, "Stdin buffer full; wait for the command to read it")
+
+    async def _cancel(self, stream_id: str) -> None:
+        stream = self._streams.get(stream_id)
+        if stream is None or stream.task is None:
+            await self._error(stream_id, "No such stream")
+            return
+        stream.cancelled = True
+        stream.task.cancel()
+
+    async def _resize(self, stream_id: str, frame: dict[str, Any]) -> None:
+        stream = self._streams.get(stream_id)
+        if stream is None or stream.pty is None:
+            await self._error(stream_id, "No such PTY stream")
+            return
+        size = _window_size(frame, stream.pty.window_size)
+        if size is None:
+            await self._error(stream_id, "rows and cols must be integers from 1 to 1000")
+            return
+        stream.pty.resize(*size)
+
+    async def _send_exit(
+        self, stream: _Stream, return_code: int | None, timed_out: bool
+    ) -> None:
+        if timed_out:
+            self.executor.metrics.timeouts.inc(pattern=stream.pattern)
+        if self._closed:
+            return
+        exit_frame = {
+            "type": "exit",
+            "id": stream.stream_id,
+            "return_code": return_code,
+            "timed_out": timed_out,
+            "cancelled": stream.cancelled,
+        }
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._send(exit_frame)
+
+    async def _run_stream(
+        self, stream: _Stream, command: str, cwd: str, encoding: OutputEncoding
+    ) -> None:
+        """Run one command, forwarding its stdin and output until it exits."""
+        stream_id = stream.stream_id
+        process: asyncio.subprocess.Process | None = None
+        timed_out = False
+        started = time.perf_counter()
+        try:
+            try:
+                process = await self.executor.start_interactive(command, cwd)
+            except Exception as e:
+                await self._error(stream_id, f"Execution error: {e}")
+                return
+
+            await self._send({"type": "started", "id": stream_id, "working_directory": cwd})
+            assert process.stdout is not None and process.stderr is not None
+            pumps = [
+                asyncio.create_task(self._pump(stream, "stdout", process.stdout, encoding)),
+                asyncio.create_task(self._pump(stream, "stderr", process.stderr, encoding)),
+                asyncio.create_task(self._feed_stdin(stream, process)),
+            ]
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(pumps[0], pumps[1], process.wait()),
+                    timeout=self.executor.config.timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+            finally:
+                for pump in pumps:
+                    pump.cancel()
+                await asyncio.gather(*pumps, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Cancelled by the client, or the connection closed
+            pass
+        finally:
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            del self._streams[stream_id]
+
+        if process is not None:
+            self.executor.audit_execution(
+                command,
+                cwd,
+                "ws",
+                time.perf_counter() - started,
+                process.returncode,
+                timed_out=timed_out,
+                stdout_bytes=stream.bytes_read["stdout"],
+                stderr_bytes=stream.bytes_read["stderr"],
+            )
+            await self._send_exit(stream, process.returncode, timed_out)
+
+    async def _run_pty_stream(
+        self,
+        stream: _Stream,
+        command: str,
+        cwd: str,
+        encoding: OutputEncoding,
+        rows: int,
+        cols: int,
+    ) -> None:
+        """Run one command under a pseudo-terminal, forwarding input and output."""
+        stream_id = stream.stream_id
+        timed_out = False
+        try:
+            try:
+                stream.pty = await self.executor.spawn_pty(command, cwd, rows, cols)
+            except Exception as e:
+                await self._error(stream_id, f"Execution error: {e}")
+                return
+
+            await self._send({"type": "started", "id": stream_id, "working_directory": cwd})
+            pumps = [
+                asyncio.create_task(self._pump_pty(stream, stream.pty, encoding)),
+                asyncio.create_task(self._feed_pty(stream, stream.pty)),
+            ]
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(pumps[0], stream.pty.process.wait()),
+                    timeout=self.executor.config.timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+            finally:
+                for pump in pumps:
+                    pump.cancel()
+                await asyncio.gather(*pumps, return_exceptions=True)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if stream.pty is not None:
+                await stream.pty.close()
+            del self._streams[stream_id]
+
+        if stream.pty is not None:
+            self.executor.audit_execution(
+                command,
+                cwd,
+                "ws",
+                time.monotonic() - stream.pty.started,
+                stream.pty.return_code,
+                timed_out=timed_out,
+                stdout_bytes=stream.pty.bytes_read,
+            )
+            await self._send_exit(stream, stream.pty.return_code, timed_out)
+
+    async def _pump(
+        self,
+        stream: _Stream,
+        name: str,
+        pipe: asyncio.StreamReader,
+        encoding: OutputEncoding,
+    ) -> None:
+        """Forward one output pipe; blocks while the send queue is full."""
+        stream_id = stream.stream_id
+        output_bytes = self.executor.metrics.output_bytes
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await pipe.read(READ_CHUNK_SIZE)
+            output_bytes.inc(len(chunk), pattern=stream.pattern, stream=name)
+            stream.bytes_read[name] += len(chunk)
+            if encoding == OutputEncoding.BASE64:
+                data = base64.b64encode(chunk).decode("ascii")
+            else:
+                data = decoder.decode(chunk, final=not chunk)
+            if data:
+                await self._send({"type": name, "id": stream_id, "data": data})
+            if not chunk:
+                return
+
+    async def _pump_pty(
+        self, stream: _Stream, session: PtySession, encoding: OutputEncoding
+    ) -> None:
+        """Forward terminal output; reading pauses while the send queue is full."""
+        stream_id = stream.stream_id
+        output_bytes = self.executor.metrics.output_bytes
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        async for chunk in session.iter_bytes():
+            output_bytes.inc(len(chunk), pattern=stream.pattern, stream="stdout")
+            if encoding == OutputEncoding.BASE64:
+                data = base64.b64encode(chunk).decode("ascii")
+            else:
+                data = decoder.decode(chunk)
+            if data:
+                await self._send({"type": "stdout", "id": stream_id, "data": data})
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            await self._send({"type": "stdout", "id": stream_id, "data": tail})
+
+    async def _feed_pty(self, stream: _Stream, session: PtySession) -> None:
+        """Type queued stdin frames into the terminal; eof sends Ctrl-D."""
+        while True:
+            data = await stream.stdin.get()
+            try:
+                await session.write(b"\x04" if data is None else data)
+            except OSError:
+                # The terminal closed; further input is dropped
+                return
+
+    async def _feed_stdin(self, stream: _Stream, process: asyncio.subprocess.Process) -> None:
+        """Write queued stdin frames to the process in order."""
+        assert process.stdin is not None
+        try:
+            while True:
+                data = await stream.stdin.get()
+                if data is None:
+                    break
+                process.stdin.write(data)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The command exited or closed its stdin; further input is dropped
+            return
+        finally:
+            if not process.stdin.is_closing():
+                process.stdin.close()
+
+
+def _window_size(
+    frame: dict[str, Any], current: tuple[int, int] = (DEFAULT_ROWS, DEFAULT_COLS)
+) -> tuple[int, int] | None:
+    """Validated (rows, cols) from a frame; a missing one keeps current (default 24x80)."""
+    rows = frame.get("rows", current[0])
+    cols = frame.get("cols", current[1])
+    for value in (rows, cols):
+        if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= 1000:
+            return None
+    return rows, cols
@@ -0,0 +1,216 @@
+"""Process listings read from /proc for the list_processes tool.
+
+``list_processes`` replaces ``ps aux`` and ``top -l 1``: it reads
+``/proc/[pid]/stat``, ``cmdline`` and ``cwd`` in-process, filters,
+sorts, and returns the top rows as small dicts instead of a wide text
+table to re-parse.
+
+CPU% comes in two forms, like ``ps`` and ``top``:
+
+- Without sampling, it is the process's average over its lifetime
+  (CPU time / time since it started), as ``ps`` reports.
+- With ``sample_seconds``, CPU times are read twice that far apart and
+  the percentage is the share of one CPU used during the interval, as
+  ``top`` reports; a busy multi-threaded process can exceed 100.
+
+Requires /proc (Linux). Reads block, so they run in a worker thread.
+"""
+
+import asyncio
+import os
+import pwd
+import time
+from functools import lru_cache
+from typing import Any, Literal
+
+from .sysinfo import MAX_SAMPLE_SECONDS
+
+PROC = "/proc"
+
+SortKey = Literal["cpu", "rss", "pid"]
+SORT_KEYS: tuple[SortKey, ...] = ("cpu", "rss", "pid")
+
+# Command lines are cut to this many characters
+MAX_COMMAND_LENGTH = 200
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+@lru_cache(maxsize=256)
+def _user_name(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def _read_stat(pid: str) -> list[str] | None:
+    """Fields of /proc/[pid]/stat, with the command name (which may hold spaces) as field 1."""
+    try:
+        with open(f"{PROC}/{pid}/stat") as f:
+            data = f.read()
+    except OSError:
+        # Exited since the directory was listed
+        return None
+    open_paren = data.find("(")
+    close_paren = data.rfind(")")
+    return [data[:open_paren].strip(), data[open_paren + 1 : close_paren]] + data[
+        close_paren + 2 :
+    ].split()
+
+
+def _cpu_ticks() -> dict[str, int]:
+    """utime + stime of every process, in clock ticks."""
+    ticks = {}
+    for pid in os.listdir(PROC):
+        if pid.isdigit():
+            fields = _read_stat(pid)
+            if fields is not None:
+                ticks[pid] = int(fields[13]) + int(fields[14])
+    return ticks
+
+
+def _memory_total() -> int:
+    try:
+        with open(f"{PROC}/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _uptime() -> float:
+    with open(f"{PROC}/uptime") as f:
+        return float(f.read().split()[0])
+
+
+def _snapshot(
+    name: str | None,
+    user: str | None,
+    cwd: str | None,
+    before: dict[str, int] | None,
+    elapsed: float,
+) -> list[dict[str, Any]]:
+    """Rows for the processes that pass the filters."""
+    uptime = _uptime()
+    boot_time = time.time() - uptime
+    memory_total = _memory_total()
+    needle = name.lower() if name else None
+    rows = []
+    for pid in os.listdir(PROC):
+        if not pid.isdigit():
+            continue
+        fields = _read_stat(pid)
+        if fields is None:
+            continue
+        try:
+            uid = os.stat(f"{PROC}/{pid}").st_uid
+            with open(f"{PROC}/{pid}/cmdline", "rb") as f:
+                command = f.read().rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        owner = _user_name(uid)
+        if user is not None and owner != user:
+            continue
+        comm = fields[1]
+        if needle is not None and needle not in comm.lower() and needle not in command.lower():
+            continue
+        try:
+            process_cwd: str | None = os.readlink(f"{PROC}/{pid}/cwd")
+        except OSError:
+            # Other users' processes, unless running as root
+            process_cwd = None
+        if cwd is not None and (
+            process_cwd is None
+            or (process_cwd != cwd and not process_cwd.startswith(cwd.rstrip("/") + "/"))
+        ):
+            continue
+
+        ticks = int(fields[13]) + int(fields[14])
+        started = int(fields[21]) / _CLOCK_TICKS
+        if before is not None:
+            # New since the first sample: count its whole CPU time
+            used = ticks - before.get(pid, 0)
+            cpu_percent = 100 * used / _CLOCK_TICKS / elapsed
+        else:
+            lifetime = uptime - started
+            cpu_percent = 100 * ticks / _CLOCK_TICKS / lifetime if lifetime > 0 else 0.0
+        rss = int(fields[23]) * _PAGE_SIZE
+        rows.append(
+            {
+                "pid": int(pid),
+                "ppid": int(fields[3]),
+                "user": owner,
+                "name": comm,
+                "state": fields[2],
+                "cpu_percent": round(cpu_percent, 1),
+                "rss": rss,
+                "memory_percent": round(100 * rss / memory_total, 1) if memory_total else None,
+                "threads": int(fields[19]),
+                "started": round(boot_time + started),
+                "cwd": process_cwd,
+                # Kernel threads have no command line
+                "command": (command or f"[{comm}]")[:MAX_COMMAND_LENGTH],
+            }
+        )
+    return rows
+
+
+async def list_processes(
+    name: str | None = None,
+    user: str | None = None,
+    cwd: str | None = None,
+    sort: SortKey = "cpu",
+    limit: int = 20,
+    sample_seconds: float = 0.0,
+) -> dict[str, Any]:
+    """
+    List processes, filtered and sorted, top `limit` rows first.
+
+    Args:
+        name: Case-insensitive substring of the process name or command line
+        user: Owner's user name
+        cwd: Directory that the process's working directory is, or is under
+            (only processes whose cwd is readable can match)
+        sort: "cpu" or "rss" (highest first), or "pid"
+        limit: Most rows returned
+        sample_seconds: If positive, CPU% is measured over this interval
+            instead of averaged over each process's lifetime
+
+    Raises:
+        ValueError: For an invalid argument, or a system without /proc
+    """
+    if not os.path.isdir(f"{PROC}/self"):
+        raise ValueError("list_processes needs /proc (Linux); use ps on this system")
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if not 0 <= sample_seconds <= MAX_SAMPLE_SECONDS:
+        raise ValueError(f"sample_seconds must be between 0 and {MAX_SAMPLE_SECONDS}")
+
+    before = None
+    elapsed = 0.0
+    if sample_seconds > 0:
+        before = await asyncio.to_thread(_cpu_ticks)
+        started = time.monotonic()
+        await asyncio.sleep(sample_seconds)
+        elapsed = time.monotonic() - started
+    rows = await asyncio.to_thread(_snapshot, name, user, cwd, before, elapsed)
+
+    if sort == "pid":
+        rows.sort(key=lambda row: row["pid"])
+    else:
+        key = "cpu_percent" if sort == "cpu" else "rss"
+        rows.sort(key=lambda row: (row[key], row["rss"]), reverse=True)
+    return {
+        "status": "success",
+        "sort": sort,
+        "sample_seconds": sample_seconds if sample_seconds > 0 else None,
+        "matched": len(rows),
+        "count": min(limit, len(rows)),
+        "processes": rows[:limit],
+    }
@@ -0,0 +1,301 @@
+"""Commands running under a pseudo-terminal.
+
+Programs that check ``isatty`` (REPLs, ``top``, progress bars, anything that
+switches to block buffering on a pipe) behave interactively under a PTY and
+flush output as they produce it. A ``PtySession`` owns one such process: it
+reads the PTY master as output arrives, accepts input across calls and can
+resize the window.
+
+Output is buffered up to a limit; past it, reading from the PTY pauses until
+the buffer is drained, so a chatty program blocks on write instead of
+growing server memory without bound.
+"""
+
+import asyncio
+import codecs
+import contextlib
+import fcntl
+import os
+import re
+import signal
+import struct
+import termios
+import time
+from collections.abc import AsyncIterator
+
+DEFAULT_ROWS = 24
+DEFAULT_COLS = 80
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# CSI sequences (colors, cursor movement), OSC (window titles), DCS/SOS/PM/APC
+# strings and two-character escapes.
+_ANSI_ESCAPE = re.compile(
+    r"\x1b(?:"
+    r"\[[0-?]*[ -/]*[@-~]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[PX^_][^\x1b]*\x1b\\"
+    r"|[@-Z\\-_]"
+    r")"
+)
+
+
+def strip_ansi(text: str) -> str:
+    """Remove terminal escape sequences and turn the PTY's CRLF line endings into LF."""
+    return _ANSI_ESCAPE.sub("", text).replace("\r\n", "\n")
+
+
+def set_window_size(fd: int, rows: int, cols: int) -> None:
+    """Set the window size of the terminal behind fd."""
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+
+def get_window_size(fd: int) -> tuple[int, int]:
+    """The (rows, cols) window size of the terminal behind fd."""
+    rows, cols, _, _ = struct.unpack(
+        "HHHH", fcntl.ioctl(fd, termios.TIOCGWINSZ, struct.pack("HHHH", 0, 0, 0, 0))
+    )
+    return rows, cols
+
+
+def _make_controlling_terminal() -> None:
+    """Run in the child after fork: adopt stdin (the PTY slave) as controlling terminal.
+
+    With a controlling terminal, Ctrl-C written as input interrupts the
+    foreground job and window resizes deliver SIGWINCH.
+    """
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+async def open_pty_process(
+    command: str,
+    cwd: str,
+    env: dict[str, str],
+    shell: str,
+    rows: int = DEFAULT_ROWS,
+    cols: int = DEFAULT_COLS,
+) -> tuple[asyncio.subprocess.Process, int]:
+    """
+    Start a shell command on a new pseudo-terminal in its own session.
+
+    Returns:
+        Tuple of (process, PTY master file descriptor)
+    """
+    master_fd, slave_fd = os.openpty()
+    try:
+        set_window_size(slave_fd, rows, cols)
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdin=slave_fd,
+            stdout=slave_fd,
+            stderr=slave_fd,
+            cwd=cwd,
+            env=env,
+            executable=shell,
+            start_new_session=True,
+            preexec_fn=_make_controlling_terminal,
+        )
+    except BaseException:
+        os.close(master_fd)
+        raise
+    finally:
+        # The child has its own copies; the parent only talks through the master
+        os.close(slave_fd)
+    return process, master_fd
+
+
+class PtySession:
+    """A process attached to a pseudo-terminal.
+
+    Args:
+        session_id: Identifier used by callers to address the session
+        command: The command line, for reporting
+        process: The process, started on the PTY slave in its own session
+        master_fd: The PTY master, owned by this object from now on
+        max_buffer: Bytes of unread output held before reading pauses
+        cwd: The working directory, for reporting
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        command: str,
+        process: asyncio.subprocess.Process,
+        master_fd: int,
+        max_buffer: int,
+        cwd: str = "",
+    ):
+        self.session_id = session_id
+        self.command = command
+        self.cwd = cwd
+        self.process = process
+        self.started = time.monotonic()
+        self.last_used = self.started
+        # Output bytes read from the terminal so far
+        self.bytes_read = 0
+        self._master_fd = master_fd
+        self._max_buffer = max(max_buffer, 1)
+        self._buffer = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._eof = False
+        self._closed = False
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._reading = False
+
+        os.set_blocking(master_fd, False)
+        self._resume_reading()
+        self._exit_waiter = asyncio.ensure_future(self._wait_for_exit())
+
+    @property
+    def running(self) -> bool:
+        return self.process.returncode is None
+
+    @property
+    def return_code(self) -> int | None:
+        return self.process.returncode
+
+    @property
+    def finished(self) -> bool:
+        """The process has exited and all of its output has been read."""
+        return self._eof and not self._buffer and not self.running
+
+    async def _wait_for_exit(self) -> None:
+        await self.process.wait()
+        self._changed.set()
+
+    def _resume_reading(self) -> None:
+        if not self._reading and not self._eof and not self._closed:
+            self._loop.add_reader(self._master_fd, self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self) -> None:
+        if self._reading:
+            self._loop.remove_reader(self._master_fd)
+            self._reading = False
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._master_fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            # EIO: every slave descriptor is closed, i.e. the process exited
+            data = b""
+
+        if not data:
+            self._eof = True
+            self._pause_reading()
+        else:
+            self._buffer += data
+            self.bytes_read += len(data)
+            if len(self._buffer) >= self._max_buffer:
+                self._pause_reading()
+        self._changed.set()
+
+    async def wait_for_output(self, timeout: float) -> None:
+        """Wait until output is available, the process exits, or timeout elapses."""
+        deadline = self._loop.time() + timeout
+        while not self._buffer and not self._eof:
+            self._changed.clear()
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._changed.wait(), remaining)
+        if self._eof and self.running:
+            # The PTY closed; the exit status follows shortly
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.shield(self._exit_waiter), max(deadline - self._loop.time(), 0)
+                )
+
+    def read_bytes(self) -> bytes:
+        """Return and clear the buffered output."""
+        self.last_used = time.monotonic()
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._resume_reading()
+        return data
+
+    async def read_output(self, timeout: float, settle: float = 0.2, strip: bool = True) -> str:
+        """
+        Read output for an interactive caller.
+
+        Waits up to timeout for output, then keeps reading until the program
+        has been quiet for settle seconds (or timeout is reached), so a
+        prompt and the output before it come back together.
+
+        Args:
+            timeout: Maximum seconds to wait
+            settle: Quiet period that ends the read once output has started
+            strip: Remove ANSI escape sequences and normalize line endings
+        """
+        deadline = self._loop.time() + timeout
+        await self.wait_for_output(timeout)
+        data = bytearray(self.read_bytes())
+        while data and not self._eof:
+            remaining = min(settle, deadline - self._loop.time())
+            if remaining <= 0:
+                break
+            await self.wait_for_output(remaining)
+            more = self.read_bytes()
+            if not more:
+                break
+            data += more
+        data += self.read_bytes()
+        text = self._decoder.decode(bytes(data), final=self._eof)
+        return strip_ansi(text) if strip else text
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield output as it arrives until the process exits."""
+        while True:
+            await self.wait_for_output(3600)
+            data = self.read_bytes()
+            if data:
+                yield data
+            elif self._eof:
+                return
+
+    async def write(self, data: bytes) -> None:
+        """Send input to the process as if typed (b"\\x03" is Ctrl-C, b"\\x04" Ctrl-D)."""
+        self.last_used = time.monotonic()
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._master_fd, view)
+                view = view[written:]
+            except BlockingIOError:
+                # Terminal input queue is full; wait until the program reads
+                ready: asyncio.Future[None] = self._loop.create_future()
+
+                def on_writable(ready: asyncio.Future[None] = ready) -> None:
+                    if not ready.done():
+                        ready.set_result(None)
+
+                self._loop.add_writer(self._master_fd, on_writable)
+                try:
+                    await ready
+                finally:
+                    self._loop.remove_writer(self._master_fd)
+
+    @property
+    def window_size(self) -> tuple[int, int]:
+        """The current (rows, cols)."""
+        return get_window_size(self._master_fd)
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Change the window size; the foreground program receives SIGWINCH."""
+        set_window_size(self._master_fd, rows, cols)
+
+    async def close(self) -> None:
+        """Kill the process group and release the PTY."""
+        if self._closed:
+            return
+        # The whole group, so background jobs holding the PTY open go too
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(self.process.pid, signal.SIGKILL)
+        await asyncio.shield(self._exit_waiter)
+        self._pause_reading()
+        self._closed = True
+        os.close(self._master_fd)
@@ -0,0 +1,316 @@
+"""In-process parallel content search for the search_files tool.
+
+``FileSearch.search`` is ``grep -rn`` without a subprocess and without
+depending on ``rg`` being installed. The calling thread lists files with
+``os.scandir``, honoring .gitignore files (see gitignore.py), and hands
+them to a thread pool. Each worker reads its file in blocks that end on a
+line boundary, skips it if the first ``BINARY_SNIFF_BYTES`` contain a NUL
+byte (as grep does), and runs the compiled pattern over each block. Files
+are read rather than memory-mapped so that one truncated under a running
+search (a rotated log) just ends early; a mapped page past the new end of
+the file would raise SIGBUS and take the server down.
+
+Results are consumed in walk order, whichever worker finishes first, so
+pages are stable: the page after ``offset=100`` starts exactly where the
+first page stopped. Only a bounded number of files is in flight ahead of
+the consumer, and once ``max_results`` or ``max_bytes`` is reached a
+shared event stops the walker and the workers, so a search whose first
+page fills early reads little of the tree.
+
+Workers overlap file I/O. The regex engine holds the
+GIL, so on a warm page cache the scan itself is not parallel.
+
+Searches block, so async callers run them with ``asyncio.to_thread``.
+"""
+
+import os
+import re
+import stat
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from .gitignore import ALWAYS_IGNORED, IgnoreRules, descend, is_ignored, rules_for
+from .workers import WorkerPool
+
+# Bytes checked for a NUL to decide that a file is binary
+BINARY_SNIFF_BYTES = 8192
+
+# Bytes read per block; blocks are cut after their last newline
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Matched lines longer than this are cut, so a minified file cannot fill a page
+MAX_LINE_LENGTH = 500
+
+# Files queued ahead of the consumer, per worker
+QUEUE_DEPTH_PER_WORKER = 4
+
+
+@dataclass
+class SearchResults:
+    """One page of search_files results."""
+
+    path: str
+    pattern: str
+    offset: int
+    matches: list[dict[str, Any]] = field(default_factory=list)
+    files_searched: int = 0
+    binary_files_skipped: int = 0
+    truncated: bool = False  # max_results or max_bytes was reached
+    next_offset: int | None = None  # Pass as offset for the next page
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "status": "success",
+            "path": self.path,
+            "pattern": self.pattern,
+            "offset": self.offset,
+            "count": len(self.matches),
+            "files_searched": self.files_searched,
+            "binary_files_skipped": self.binary_files_skipped,
+            "truncated": self.truncated,
+            "next_offset": self.next_offset,
+            "matches": self.matches,
+        }
+
+
+def _search_file(
+    path: str, regex: re.Pattern[bytes], limit: int, stop: threading.Event
+) -> list[tuple[int, bytes]] | None:
+    """(line number, line) of up to limit matching lines, or None for a binary file."""
+    found: list[tuple[int, bytes]] = []
+    try:
+        with open(path, "rb", buffering=0) as f:
+            block = f.read(READ_BLOCK_SIZE)
+            if block.find(b"\0", 0, BINARY_SNIFF_BYTES) >= 0:
+                return None
+            line_number = 1
+            # The unfinished last line of the previous block
+            tail = b""
+            while len(found) < limit and not stop.is_set():
+                if not block:
+                    if tail:
+                        _search_lines(tail, regex, line_number, limit, stop, found)
+                    break
+                data = tail + block
+                cut = data.rfind(b"\n") + 1
+                data, tail = data[:cut], data[cut:]
+                line_number = _search_lines(data, regex, line_number, limit, stop, found)
+                block = f.read(READ_BLOCK_SIZE)
+    except OSError:
+        # Unreadable, or gone since the walk listed it
+        return []
+    return found
+
+
+def _search_lines(
+    data: bytes,
+    regex: re.Pattern[bytes],
+    line_number: int,
+    limit: int,
+    stop: threading.Event,
+    found: list[tuple[int, bytes]],
+) -> int:
+    """Append matches in data (whole lines from line_number on); returns the next line number."""
+    counted_to = 0
+    position = 0
+    size = len(data)
+    while position < size and len(found) < limit and not stop.is_set():
+        match = regex.search(data, position)
+        if match is None:
+            break
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        end = data.find(b"\n", match.end())
+        if end < 0:
+            end = size
+        line_number += data.count(b"\n", counted_to, start)
+        counted_to = start
+        found.append((line_number, data[start : min(end, start + MAX_LINE_LENGTH * 4)]))
+        # One result per line, like grep
+        position = end + 1
+    return line_number + data.count(b"\n", counted_to)
+
+
+class FileSearch:
+    """
+    Search file contents under a directory with a shared thread pool.
+
+    Args:
+        workers: Threads reading and scanning files
+    """
+
+    def __init__(self, workers: int):
+        self.pool = WorkerPool(workers, "search")
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def search(
+        self,
+        root: str,
+        pattern: str,
+        fixed_strings: bool = False,
+        ignore_case: bool = False,
+        include: Iterable[str] = (),
+        ignore: Iterable[str] = (),
+        use_gitignore: bool = True,
+        show_hidden: bool = False,
+        max_results: int = 100,
+        max_bytes: int = 100000,
+        offset: int = 0,
+        exclude: Callable[[str], bool] | None = None,
+    ) -> SearchResults:
+        """
+        One page of the lines under root that match pattern, in walk order.
+
+        Args:
+            root: Directory to search, or a single file
+            pattern: Python regular expression, or a literal with fixed_strings
+            fixed_strings: Treat pattern as a literal string
+            ignore_case: Match case-insensitively
+            include: Gitignore-style patterns a file must match, e.g. ["*.py"]
+            ignore: Extra gitignore-style patterns to leave out
+            use_gitignore: Skip what .gitignore files ignore, and .git
+            show_hidden: Search dotfiles and dot-directories
+            max_results: Most matching lines returned in this page
+            max_bytes: Most bytes of matching lines returned in this page
+            offset: Matching lines to skip, from a previous page's next_offset
+            exclude: Called with each walked path; True neither searches a
+                file nor descends into a directory
+
+        Raises:
+            ValueError: For an invalid pattern or argument
+            OSError: If root cannot be read
+        """
+        if not pattern:
+            raise ValueError("No pattern provided")
+        if max_results < 1 or max_bytes < 1:
+            raise ValueError("max_results and max_bytes must be at least 1")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        source = re.escape(pattern) if fixed_strings else pattern
+        try:
+            regex = re.compile(
+                source.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+            )
+        except re.error as e:
+            raise ValueError(f"Invalid pattern: {e}") from e
+
+        results = SearchResults(path=root, pattern=pattern, offset=offset)
+        include_patterns, ignore_patterns = list(include), list(ignore)
+        include_rules = IgnoreRules(root, include_patterns) if include_patterns else None
+        ignore_rules = IgnoreRules(root, ignore_patterns) if ignore_patterns else None
+        stop = threading.Event()
+        # One more than a page needs, to know whether there is a next page
+        wanted = offset + max_results + 1
+
+        if os.path.isdir(root):
+            os.scandir(root).close()
+            files: Iterator[str] = _walk(
+                root,
+                rules_for(root) if use_gitignore else (),
+                use_gitignore,
+                show_hidden,
+                ignore_rules,
+                include_rules,
+                exclude,
+                stop,
+            )
+            prefix = len(root.rstrip(os.sep)) + 1
+        elif os.path.isfile(root):
+            files = iter([root])
+            prefix = len(os.path.dirname(root).rstrip(os.sep)) + 1
+        else:
+            raise ValueError(f"Not a file or directory: {root}")
+
+        pending: deque[tuple[str, Future[list[tuple[int, bytes]] | None]]] = deque()
+        depth = self.pool.workers * QUEUE_DEPTH_PER_WORKER
+        skipped = 0
+        returned_bytes = 0
+        try:
+            while True:
+                while len(pending) < depth and not stop.is_set():
+                    path = next(files, None)
+                    if path is None:
+                        break
+                    pending.append((path, self.pool.submit(_search_file, path, regex, wanted, stop)))
+                if not pending:
+                    break
+
+                path, future = pending.popleft()
+                found = future.result()
+                if stop.is_set():
+                    break
+                results.files_searched += 1
+                if found is None:
+                    results.binary_files_skipped += 1
+                    continue
+                relative = path[prefix:]
+                for line_number, line in found:
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    text = line.decode("utf-8", errors="replace")[:MAX_LINE_LENGTH]
+                    returned_bytes += len(line)
+                    # A page holds at least one line, so paging always advances
+                    over_bytes = returned_bytes > max_bytes and results.matches
+                    if len(results.matches) >= max_results or over_bytes:
+                        results.truncated = True
+                        results.next_offset = offset + len(results.matches)
+                        stop.set()
+                        break
+                    results.matches.append({"path": relative, "line": line_number, "text": text})
+        finally:
+            stop.set()
+            for _, future in pending:
+                future.cancel()
+        return results
+
+
+def _walk(
+    directory: str,
+    stack: tuple[IgnoreRules, ...],
+    use_gitignore: bool,
+    show_hidden: bool,
+    ignore: IgnoreRules | None,
+    include: IgnoreRules | None,
+    exclude: Callable[[str], bool] | None,
+    stop: threading.Event,
+) -> Iterator[str]:
+    """Regular files under directory, depth-first in name order."""
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if stop.is_set():
+            return
+        name = entry.name
+        if name.startswith(".") and not show_hidden:
+            continue
+        if use_gitignore and name in ALWAYS_IGNORED:
+            continue
+        try:
+            # Symlinks are not followed, so a search cannot leave the tree
+            mode = entry.stat(follow_symlinks=False).st_mode
+        except OSError:
+            continue
+        is_dir = stat.S_ISDIR(mode)
+        if not is_dir and not stat.S_ISREG(mode):
+            continue
+        path = entry.path
+        if ignore is not None and ignore.match(path, is_dir):
+            continue
+        if stack and is_ignored(stack, path, is_dir):
+            continue
+        if exclude is not None and exclude(path):
+            continue
+        if is_dir:
+            inner = descend(stack, path) if use_gitignore else stack
+            yield from _walk(path, inner, use_gitignore, show_hidden, ignore, include, exclude, stop)
+        elif include is None or include.match(path, False):
+            yield path
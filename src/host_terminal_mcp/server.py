@@ -2,8 +2,13 @@
 
 import argparse
 import asyncio
+import contextlib
+import hashlib
 import json
 import logging
+import os
+import socket
+import stat
 import sys
 from pathlib import Path
 from typing import Any
@@ -16,14 +21,33 @@ from mcp.types import (
     Tool,
 )
 
+from .audit import set_client
 from .config import (
     Config,
     PermissionMode,
     create_default_config_file,
+    get_default_state_dir,
     load_config,
     save_config,
 )
-from .executor import CommandExecutor
+from .diskusage import DiskUsage
+from .executor import CommandExecutor, OutputEncoding
+from .explore import SECTIONS as EXPLORE_SECTIONS
+from .explore import ProjectExplorer
+from .fileindex import DEFAULT_LIMIT as FIND_LIMIT
+from .fileindex import ENTRY_TYPES, create_file_index, find_files
+from .files import FileReader
+from .hashing import ALGORITHMS as HASH_ALGORITHMS
+from .hashing import DEFAULT_ALGORITHMS as DEFAULT_HASH_ALGORITHMS
+from .hashing import FileHasher
+from .listing import MAX_DEPTH, SORT_KEYS, list_directory
+from .metrics import write_metrics_file
+from .processes import SORT_KEYS as PROCESS_SORT_KEYS
+from .processes import list_processes
+from .pty_session import DEFAULT_COLS, DEFAULT_ROWS, PtySession
+from .search import FileSearch
+from .sysinfo import MAX_SAMPLE_SECONDS, SECTIONS, system_info
+from .tail import DEFAULT_LINES, MAX_WAIT_SECONDS, wait_for_lines
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, stream=sys.stderr)
@@ -36,6 +60,17 @@ class HostTerminalServer:
     def __init__(self, config: Config):
         self.config = config
         self.executor = CommandExecutor(config)
+        self.files = FileReader(config.max_output_size)
+        self.search = FileSearch(config.search_workers)
+        self.disk_usage = DiskUsage(config.search_workers)
+        self.explorer = ProjectExplorer(
+            config.search_workers,
+            config.timeout_seconds,
+            allow_command=self.executor.is_allowed_command,
+            environment=self.executor.build_environment,
+        )
+        self.hasher = FileHasher(config.search_workers)
+        self.file_index = create_file_index(config, self.executor.is_blocked_path)
         self.server = Server("host-terminal-mcp")
         self._pending_approvals: dict[str, asyncio.Event] = {}
         self._approval_results: dict[str, bool] = {}
@@ -69,10 +104,581 @@ class HostTerminalServer:
                                 "type": "string",
                                 "description": "Optional working directory for the command (defaults to current directory)",
                             },
+                            "output_encoding": {
+                                "type": "string",
+                                "enum": ["text", "base64"],
+                                "description": (
+                                    "How to return stdout: 'text' (UTF-8, default) or 'base64' "
+                                    "(raw bytes, for binary output such as tar or gzip -c)"
+                                ),
+                                "default": "text",
+                            },
+                            "pty": {
+                                "type": "boolean",
+                                "description": (
+                                    "Run under a pseudo-terminal, for programs that behave "
+                                    "differently or buffer output when not attached to a terminal. "
+                                    "stderr is merged into stdout."
+                                ),
+                                "default": False,
+                            },
+                            "strip_ansi": {
+                                "type": "boolean",
+                                "description": "With pty, remove color and cursor escape sequences (default: true)",
+                                "default": True,
+                            },
                         },
                         "required": ["command"],
                     },
                 ),
+                Tool(
+                    name="execute_commands",
+                    description=(
+                        "Execute several independent terminal commands concurrently. "
+                        "Every command is permission-checked before any of them run; "
+                        "results are returned in input order and a failing, denied or "
+                        "timed-out command does not affect the others."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "commands": {
+                                "type": "array",
+                                "description": "Commands to execute",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "command": {
+                                            "type": "string",
+                                            "description": "The command to execute",
+                                        },
+                                        "working_directory": {
+                                            "type": "string",
+                                            "description": "Optional working directory for the command (defaults to current directory)",
+                                        },
+                                    },
+                                    "required": ["command"],
+                                },
+                            },
+                            "max_parallel": {
+                                "type": "integer",
+                                "description": "Optional cap on concurrently running commands (bounded by config)",
+                            },
+                        },
+                        "required": ["commands"],
+                    },
+                ),
+                Tool(
+                    name="start_terminal_session",
+                    description=(
+                        "Start an interactive command (REPL, installer prompt, top, etc.) under a "
+                        "pseudo-terminal that stays open between calls. Returns a session_id and "
+                        "the first output. Input sent with send_terminal_input is passed to the "
+                        "program unchecked, so the command itself must be allowed."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "command": {
+                                "type": "string",
+                                "description": "The command to start",
+                            },
+                            "working_directory": {
+                                "type": "string",
+                                "description": "Optional working directory for the command (defaults to current directory)",
+                            },
+                            "rows": {
+                                "type": "integer",
+                                "description": "Terminal height (default: 24)",
+                                "default": DEFAULT_ROWS,
+                            },
+                            "cols": {
+                                "type": "integer",
+                                "description": "Terminal width (default: 80)",
+                                "default": DEFAULT_COLS,
+                            },
+                            "wait_seconds": {
+                                "type": "number",
+                                "description": "How long to wait for output before returning (default: 1)",
+                                "default": 1,
+                            },
+                            "strip_ansi": {
+                                "type": "boolean",
+                                "description": "Remove color and cursor escape sequences (default: true)",
+                                "default": True,
+                            },
+                        },
+                        "required": ["command"],
+                    },
+                ),
+                Tool(
+                    name="send_terminal_input",
+                    description=(
+                        "Send input to a terminal session and return the output produced since the "
+                        "last call. Include '\\n' to press Enter; '\\u0003' is Ctrl-C and '\\u0004' "
+                        "Ctrl-D. Send empty input to just read new output."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "session_id": {
+                                "type": "string",
+                                "description": "Session id returned by start_terminal_session",
+                            },
+                            "input": {
+                                "type": "string",
+                                "description": "Text to type into the terminal",
+                                "default": "",
+                            },
+                            "wait_seconds": {
+                                "type": "number",
+                                "description": "How long to wait for output before returning (default: 1)",
+                                "default": 1,
+                            },
+                            "strip_ansi": {
+                                "type": "boolean",
+                                "description": "Remove color and cursor escape sequences (default: true)",
+                                "default": True,
+                            },
+                            "rows": {
+                                "type": "integer",
+                                "description": "Resize the terminal to this height before sending input",
+                            },
+                            "cols": {
+                                "type": "integer",
+                                "description": "Resize the terminal to this width before sending input",
+                            },
+                        },
+                        "required": ["session_id"],
+                    },
+                ),
+                Tool(
+                    name="close_terminal_session",
+                    description="Kill a terminal session's processes and close it.",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "session_id": {
+                                "type": "string",
+                                "description": "Session id returned by start_terminal_session",
+                            },
+                        },
+                        "required": ["session_id"],
+                    },
+                ),
+                Tool(
+                    name="read_file",
+                    description=(
+                        "Read a file, or a byte or line range of it, without running a command. "
+                        "Prefer this to cat, head and tail: only the requested range is read, "
+                        "and line ranges deep into large files are found through a cached "
+                        "line index. Paths follow allowed_directories and the blocked "
+                        "sensitive-file patterns."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "File to read (absolute, or relative to the current directory)",
+                            },
+                            "start_line": {
+                                "type": "integer",
+                                "description": "First line to return, 1-based; negative counts from the end (-100 = last 100 lines)",
+                            },
+                            "end_line": {
+                                "type": "integer",
+                                "description": "Last line to return, inclusive (default: end of file)",
+                            },
+                            "offset": {
+                                "type": "integer",
+                                "description": "First byte to return, for byte ranges; negative counts from the end",
+                            },
+                            "length": {
+                                "type": "integer",
+                                "description": "Bytes to return from offset (default: to the end)",
+                            },
+                            "encoding": {
+                                "type": "string",
+                                "enum": ["text", "base64"],
+                                "description": "'text' (UTF-8, default) or 'base64' for binary files",
+                                "default": "text",
+                            },
+                        },
+                        "required": ["path"],
+                    },
+                ),
+                Tool(
+                    name="list_directory",
+                    description=(
+                        "List a directory, or a tree of it down to a depth, without running "
+                        "ls or tree. Returns structured entries (path, type, size) sorted "
+                        "within each directory; .gitignore'd, hidden and blocked sensitive "
+                        "paths are left out."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "Directory to list (default: the current directory)",
+                            },
+                            "depth": {
+                                "type": "integer",
+                                "description": f"Levels to descend, 1-{MAX_DEPTH}; 1 lists only the directory's own entries",
+                                "default": 1,
+                            },
+                            "ignore": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Extra gitignore-style patterns to leave out, e.g. ['node_modules/', '*.log']",
+                            },
+                            "use_gitignore": {
+                                "type": "boolean",
+                                "description": "Leave out what .gitignore files ignore, and .git",
+                                "default": True,
+                            },
+                            "show_hidden": {
+                                "type": "boolean",
+                                "description": "Include dotfiles",
+                                "default": False,
+                            },
+                            "sort": {
+                                "type": "string",
+                                "enum": list(SORT_KEYS),
+                                "description": "Order within each directory: by name, or largest/newest first",
+                                "default": "name",
+                            },
+                            "reverse": {
+                                "type": "boolean",
+                                "description": "Reverse the order",
+                                "default": False,
+                            },
+                            "max_entries": {
+                                "type": "integer",
+                                "description": "Stop after this many entries",
+                                "default": 1000,
+                            },
+                            "long": {
+                                "type": "boolean",
+                                "description": "Add each entry's mode and mtime, like ls -l",
+                                "default": False,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="search_files",
+                    description=(
+                        "Search file contents under a directory, like grep -rn, without "
+                        "running a command (rg need not be installed). Files are scanned in "
+                        "parallel; binary, .gitignore'd, hidden and blocked sensitive files "
+                        "are skipped. Results are paged: pass next_offset as offset to "
+                        "continue."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "pattern": {
+                                "type": "string",
+                                "description": "Python regular expression (or a literal with fixed_strings)",
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "Directory or file to search (default: the current directory)",
+                            },
+                            "fixed_strings": {
+                                "type": "boolean",
+                                "description": "Treat pattern as a literal string",
+                                "default": False,
+                            },
+                            "ignore_case": {
+                                "type": "boolean",
+                                "description": "Match case-insensitively",
+                                "default": False,
+                            },
+                            "include": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Only search files matching these gitignore-style patterns, e.g. ['*.py']",
+                            },
+                            "ignore": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Extra gitignore-style patterns to skip",
+                            },
+                            "use_gitignore": {
+                                "type": "boolean",
+                                "description": "Skip what .gitignore files ignore, and .git",
+                                "default": True,
+                            },
+                            "show_hidden": {
+                                "type": "boolean",
+                                "description": "Search dotfiles",
+                                "default": False,
+                            },
+                            "max_results": {
+                                "type": "integer",
+                                "description": "Most matching lines per page",
+                                "default": 100,
+                            },
+                            "offset": {
+                                "type": "integer",
+                                "description": "Matching lines to skip: the next_offset of the previous page",
+                                "default": 0,
+                            },
+                        },
+                        "required": ["pattern"],
+                    },
+                ),
+                Tool(
+                    name="tail_file",
+                    description=(
+                        "Read the lines appended to a file since a cursor, to watch a log "
+                        "without re-reading it. Call without a cursor for the last lines "
+                        "and a cursor, then pass the returned cursor to get only new lines. "
+                        "Log rotation and truncation are handled."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "File to read (absolute, or relative to the current directory)",
+                            },
+                            "cursor": {
+                                "type": "string",
+                                "description": "The cursor returned by the previous call",
+                            },
+                            "lines": {
+                                "type": "integer",
+                                "description": "Without a cursor: how many last lines to return (0 to start at the end)",
+                                "default": DEFAULT_LINES,
+                            },
+                            "wait_seconds": {
+                                "type": "number",
+                                "description": f"If there are no new lines, wait up to this long for some (at most {MAX_WAIT_SECONDS})",
+                                "default": 0,
+                            },
+                        },
+                        "required": ["path"],
+                    },
+                ),
+                Tool(
+                    name="system_info",
+                    description=(
+                        "Get structured host information in one call, without running "
+                        "uname, uptime, free, df or ip: OS and kernel, uptime, CPU and "
+                        "load, memory and swap, disk usage and network interfaces. Set "
+                        "sample_seconds to also measure CPU utilization and network "
+                        "throughput over an interval."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "sections": {
+                                "type": "array",
+                                "items": {"type": "string", "enum": list(SECTIONS)},
+                                "description": "Sections to collect (default: all)",
+                            },
+                            "sample_seconds": {
+                                "type": "number",
+                                "description": f"Measure rates over this many seconds, at most {MAX_SAMPLE_SECONDS:g} (default: 0, no rates)",
+                                "default": 0,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="list_processes",
+                    description=(
+                        "List running processes as compact rows (pid, user, name, CPU%, RSS, "
+                        "cwd, command) without running ps or top. Filter by name, user or "
+                        "working directory and get the top N by CPU or memory. Set "
+                        "sample_seconds to measure current CPU% over an interval, as top does."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "name": {
+                                "type": "string",
+                                "description": "Case-insensitive substring of the process name or command line",
+                            },
+                            "user": {
+                                "type": "string",
+                                "description": "Only processes owned by this user",
+                            },
+                            "cwd": {
+                                "type": "string",
+                                "description": "Only processes working in this directory or below it",
+                            },
+                            "sort": {
+                                "type": "string",
+                                "enum": list(PROCESS_SORT_KEYS),
+                                "description": "Highest CPU% or RSS first, or by pid",
+                                "default": "cpu",
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Most rows to return",
+                                "default": 20,
+                            },
+                            "sample_seconds": {
+                                "type": "number",
+                                "description": f"Measure CPU% over this many seconds, at most {MAX_SAMPLE_SECONDS:g} (default: 0, lifetime average as ps reports)",
+                                "default": 0,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="disk_usage",
+                    description=(
+                        "Total size of a directory and its largest subtrees, like du -d N | sort -h, "
+                        "without running du. Directory scans are cached, so measuring the same tree "
+                        "again only re-scans directories whose contents changed. Stays on the "
+                        "directory's filesystem unless cross_filesystems is set."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "Directory to measure (default: the current directory)",
+                            },
+                            "depth": {
+                                "type": "integer",
+                                "description": f"Deepest level of subtrees to rank, 1-{MAX_DEPTH}",
+                                "default": 2,
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Largest subtrees to return",
+                                "default": 20,
+                            },
+                            "cross_filesystems": {
+                                "type": "boolean",
+                                "description": "Descend into mounted filesystems below the directory",
+                                "default": False,
+                            },
+                            "refresh": {
+                                "type": "boolean",
+                                "description": "Re-scan everything; cached scans miss files that grew in place",
+                                "default": False,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="find_files",
+                    description=(
+                        "Find files and directories by glob, name substring or extension, "
+                        "instead of running find. With file_index enabled, answers in "
+                        "milliseconds from an in-memory index kept fresh with inotify; "
+                        "otherwise walks the directory. Returns paths relative to it, "
+                        "directories ending in /."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "Directory to search (default: the current directory)",
+                            },
+                            "glob": {
+                                "type": "string",
+                                "description": "Pattern such as *.py or src/**/test_*; without a / it matches names at any depth",
+                            },
+                            "contains": {
+                                "type": "string",
+                                "description": "Substring of the relative path",
+                            },
+                            "extension": {
+                                "type": "string",
+                                "description": "File extension, e.g. py",
+                            },
+                            "type": {
+                                "type": "string",
+                                "enum": list(ENTRY_TYPES),
+                                "description": "Only files or only directories",
+                            },
+                            "ignore_case": {
+                                "type": "boolean",
+                                "description": "Match case-insensitively",
+                                "default": False,
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Most paths to return",
+                                "default": FIND_LIMIT,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="hash_files",
+                    description=(
+                        "Checksum files, like sha256sum or md5sum, to compare build artifacts "
+                        "or verify downloads. Files are hashed in parallel, several algorithms "
+                        "at once in a single read, and digests are cached until a file's size, "
+                        "mtime or inode changes. Directories are hashed recursively."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "paths": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Files or directories to hash (absolute or relative)",
+                            },
+                            "algorithms": {
+                                "type": "array",
+                                "items": {"type": "string", "enum": list(HASH_ALGORITHMS)},
+                                "description": "Digests to compute (default: sha256)",
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Most files to hash",
+                                "default": 1000,
+                            },
+                            "refresh": {
+                                "type": "boolean",
+                                "description": "Re-read every file instead of using cached digests",
+                                "default": False,
+                            },
+                        },
+                        "required": ["paths"],
+                    },
+                ),
+                Tool(
+                    name="explore_project",
+                    description=(
+                        "Get an overview of a project in one call instead of running tree, "
+                        "ls, cat package.json, find, wc -l and git log one by one: layout, "
+                        "manifests (name, dependencies, frameworks, scripts), lines of code "
+                        "per language, entry points, largest files and a git summary. "
+                        "Reports are cached until the repository changes."
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "Project directory (default: the current directory)",
+                            },
+                            "sections": {
+                                "type": "array",
+                                "items": {"type": "string", "enum": list(EXPLORE_SECTIONS)},
+                                "description": "Sections to build (default: all)",
+                            },
+                            "refresh": {
+                                "type": "boolean",
+                                "description": "Rebuild the report even if the repository looks unchanged",
+                                "default": False,
+                            },
+                        },
+                    },
+                ),
                 Tool(
                     name="change_directory",
                     description="Change the current working directory for subsequent commands.",
@@ -158,38 +764,250 @@ class HostTerminalServer:
                 ),
             ]
 
-        @self.server.call_tool()
-        async def call_tool(name: str, arguments: dict[str, Any]) -> CallToolResult:
-            """Handle tool calls."""
-            try:
-                if name == "execute_command":
-                    return await self._handle_execute_command(arguments)
-                elif name == "change_directory":
-                    return await self._handle_change_directory(arguments)
-                elif name == "get_current_directory":
-                    return await self._handle_get_current_directory()
-                elif name == "approve_command":
-                    return await self._handle_approve_command(arguments)
-                elif name == "get_permission_status":
-                    return await self._handle_get_permission_status(arguments)
-                elif name == "set_permission_mode":
-                    return await self._handle_set_permission_mode(arguments)
-                else:
-                    return CallToolResult(
-                        content=[TextContent(type="text", text=f"Unknown tool: {name}")],
-                        isError=True,
-                    )
-            except Exception as e:
-                logger.exception(f"Error handling tool {name}")
-                return CallToolResult(
-                    content=[TextContent(type="text", text=f"Error: {str(e)}")],
-                    isError=True,
-                )
+        @self.server.call_tool()
+        async def call_tool(name: str, arguments: dict[str, Any]) -> CallToolResult:
+            """Handle tool calls."""
+            set_client("mcp")
+            with self.executor.tracer.span(
+                f"tool {name}", self._incoming_traceparent(), **{"mcp.tool": name}
+            ) as span:
+                result = await self._call_tool(name, arguments)
+                if result.isError:
+                    span.set_error("tool returned an error")
+                return result
+
+    def _incoming_traceparent(self) -> str | None:
+        """The caller's W3C traceparent, sent as _meta.traceparent on the tool call."""
+        if not self.executor.tracer.enabled:
+            return None
+        try:
+            meta = self.server.request_context.meta
+        except LookupError:
+            return None
+        value = getattr(meta, "traceparent", None)
+        return value if isinstance(value, str) else None
+
+    async def _call_tool(self, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        """Dispatch a tool call to its handler."""
+        try:
+            if name == "execute_command":
+                return await self._handle_execute_command(arguments)
+            elif name == "execute_commands":
+                return await self._handle_execute_commands(arguments)
+            elif name == "start_terminal_session":
+                return await self._handle_start_terminal_session(arguments)
+            elif name == "send_terminal_input":
+                return await self._handle_send_terminal_input(arguments)
+            elif name == "close_terminal_session":
+                return await self._handle_close_terminal_session(arguments)
+            elif name == "read_file":
+                return await self._handle_read_file(arguments)
+            elif name == "list_directory":
+                return await self._handle_list_directory(arguments)
+            elif name == "search_files":
+                return await self._handle_search_files(arguments)
+            elif name == "tail_file":
+                return await self._handle_tail_file(arguments)
+            elif name == "system_info":
+                return await self._handle_system_info(arguments)
+            elif name == "list_processes":
+                return await self._handle_list_processes(arguments)
+            elif name == "disk_usage":
+                return await self._handle_disk_usage(arguments)
+            elif name == "find_files":
+                return await self._handle_find_files(arguments)
+            elif name == "hash_files":
+                return await self._handle_hash_files(arguments)
+            elif name == "explore_project":
+                return await self._handle_explore_project(arguments)
+            elif name == "change_directory":
+                return await self._handle_change_directory(arguments)
+            elif name == "get_current_directory":
+                return await self._handle_get_current_directory()
+            elif name == "approve_command":
+                return await self._handle_approve_command(arguments)
+            elif name == "get_permission_status":
+                return await self._handle_get_permission_status(arguments)
+            elif name == "set_permission_mode":
+                return await self._handle_set_permission_mode(arguments)
+            else:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"Unknown tool: {name}")],
+                    isError=True,
+                )
+        except Exception as e:
+            logger.exception(f"Error handling tool {name}")
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {str(e)}")],
+                isError=True,
+            )
+
+    def _check_permission(self, command: str) -> CallToolResult | None:
+        """Return the tool result for a command that may not run, or None if it may."""
+        is_allowed, reason = self.executor.check_permission(command)
+
+        if reason == "NEEDS_APPROVAL":
+            # In ask mode, return a message indicating approval is needed
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text=json.dumps({
+                            "status": "needs_approval",
+                            "command": command,
+                            "message": (
+                                f"Command '{command}' is not in the allow list. "
+                                "Use the 'approve_command' tool to approve or deny this command, "
+                                "or change the permission mode."
+                            ),
+                        }, indent=2),
+                    )
+                ],
+            )
+
+        if not is_allowed:
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text=f"Command not allowed: {reason}\n\n"
+                        f"To allow this command:\n"
+                        f"1. Use 'set_permission_mode' to change to 'ask' mode and then approve it\n"
+                        f"2. Or add the command pattern to your config file",
+                    )
+                ],
+                isError=True,
+            )
+
+        return None
+
+    async def _handle_execute_command(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle execute_command tool call."""
+        command = arguments.get("command", "").strip()
+        working_directory = arguments.get("working_directory")
+        encoding_str = arguments.get("output_encoding", OutputEncoding.TEXT.value)
+
+        if not command:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No command provided")],
+                isError=True,
+            )
+
+        # Raw streaming is HTTP-only; MCP results must be JSON-safe text
+        if encoding_str not in (OutputEncoding.TEXT.value, OutputEncoding.BASE64.value):
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text=f"Invalid output_encoding: {encoding_str}. Valid values: text, base64",
+                    )
+                ],
+                isError=True,
+            )
+        output_encoding = OutputEncoding(encoding_str)
+
+        denied = self._check_permission(command)
+        if denied is not None:
+            return denied
+
+        # Execute the command
+        if arguments.get("pty", False):
+            result = await self.executor.execute_pty(
+                command,
+                working_directory,
+                strip_escapes=arguments.get("strip_ansi", True),
+            )
+        else:
+            result = await self.executor.execute(command, working_directory, output_encoding)
+
+        # Format the response
+        with self.executor.tracer.span("response.format"):
+            response_parts = []
+
+            if result.timed_out:
+                response_parts.append(f"⏱️ Command timed out after {self.config.timeout_seconds}s")
 
-    async def _handle_execute_command(self, arguments: dict[str, Any]) -> CallToolResult:
-        """Handle execute_command tool call."""
+            if result.stdout:
+                label = "stdout (base64)" if output_encoding == OutputEncoding.BASE64 else "stdout"
+                response_parts.append(f"{label}:\n{result.stdout}")
+
+            if result.stderr:
+                response_parts.append(f"stderr:\n{result.stderr}")
+
+            if result.truncated:
+                response_parts.append("⚠️ Output was truncated")
+
+            response_parts.append(f"\nExit code: {result.return_code}")
+            response_parts.append(f"Working directory: {result.working_directory}")
+
+            return CallToolResult(
+                content=[TextContent(type="text", text="\n".join(response_parts))],
+                isError=result.return_code != 0,
+            )
+
+    async def _handle_execute_commands(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle execute_commands tool call."""
+        items = arguments.get("commands") or []
+        max_parallel = arguments.get("max_parallel")
+
+        if not items:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No commands provided")],
+                isError=True,
+            )
+
+        # Check every command up front; denied entries are reported in place
+        results: list[dict[str, Any] | None] = []
+        runnable: list[tuple[int, str, str | None]] = []
+        for index, item in enumerate(items):
+            command = item.get("command", "").strip()
+            if not command:
+                results.append({"status": "error", "error": "No command provided"})
+                continue
+
+            is_allowed, reason = self.executor.check_permission(command)
+            if reason == "NEEDS_APPROVAL":
+                results.append({
+                    "status": "needs_approval",
+                    "command": command,
+                    "message": (
+                        f"Command '{command}' is not in the allow list. "
+                        "Use the 'approve_command' tool to approve or deny this command."
+                    ),
+                })
+            elif not is_allowed:
+                results.append({
+                    "status": "error",
+                    "command": command,
+                    "error": f"Command not allowed: {reason}",
+                })
+            else:
+                results.append(None)
+                runnable.append((index, command, item.get("working_directory")))
+
+        executed = await self.executor.execute_batch(
+            [(command, cwd) for _, command, cwd in runnable],
+            max_parallel=max_parallel,
+        )
+        for (index, command, _), result in zip(runnable, executed, strict=True):
+            results[index] = {
+                "status": "success",
+                "command": command,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "exit_code": result.return_code,
+                "timed_out": result.timed_out,
+                "truncated": result.truncated,
+                "working_directory": result.working_directory,
+            }
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps({"results": results}, indent=2))],
+        )
+
+    async def _handle_start_terminal_session(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle start_terminal_session tool call."""
         command = arguments.get("command", "").strip()
-        working_directory = arguments.get("working_directory")
 
         if not command:
             return CallToolResult(
@@ -197,66 +1015,416 @@ class HostTerminalServer:
                 isError=True,
             )
 
-        # Check if command is allowed
-        is_allowed, reason = self.config.is_command_allowed(command)
+        denied = self._check_permission(command)
+        if denied is not None:
+            return denied
 
-        if reason == "NEEDS_APPROVAL":
-            # In ask mode, return a message indicating approval is needed
+        session, error = await self.executor.start_terminal(
+            command,
+            arguments.get("working_directory"),
+            rows=arguments.get("rows", DEFAULT_ROWS),
+            cols=arguments.get("cols", DEFAULT_COLS),
+        )
+        if session is None:
             return CallToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps({
-                            "status": "needs_approval",
-                            "command": command,
-                            "message": (
-                                f"Command '{command}' is not in the allow list. "
-                                "Use the 'approve_command' tool to approve or deny this command, "
-                                "or change the permission mode."
-                            ),
-                        }, indent=2),
-                    )
-                ],
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
             )
 
-        if not is_allowed:
+        return await self._terminal_output(session, arguments)
+
+    async def _handle_send_terminal_input(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle send_terminal_input tool call."""
+        session_id = arguments.get("session_id", "")
+        session = self.executor.get_terminal(session_id)
+        if session is None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: No terminal session: {session_id}")],
+                isError=True,
+            )
+
+        if "rows" in arguments or "cols" in arguments:
+            # A dimension left out keeps its current value
+            rows, cols = session.window_size
+            session.resize(arguments.get("rows", rows), arguments.get("cols", cols))
+
+        text = arguments.get("input", "")
+        if text and session.running:
+            await session.write(text.encode("utf-8"))
+
+        return await self._terminal_output(session, arguments)
+
+    async def _terminal_output(self, session: PtySession, arguments: dict[str, Any]) -> CallToolResult:
+        """Read new output from a terminal session and report its state."""
+        output = await session.read_output(
+            timeout=float(arguments.get("wait_seconds", 1)),
+            strip=arguments.get("strip_ansi", True),
+        )
+        status: dict[str, Any] = {
+            "session_id": session.session_id,
+            "output": output,
+            "running": session.running,
+        }
+        if session.finished:
+            # Nothing more will arrive; free the slot
+            status["exit_code"] = session.return_code
+            await self.executor.close_terminal(session.session_id)
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(status, indent=2))],
+        )
+
+    async def _handle_close_terminal_session(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle close_terminal_session tool call."""
+        session_id = arguments.get("session_id", "")
+        if not await self.executor.close_terminal(session_id):
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: No terminal session: {session_id}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=f"Closed terminal session: {session_id}")],
+        )
+
+    async def _handle_read_file(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle read_file tool call."""
+        path = arguments.get("path", "").strip()
+        if not path:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No path provided")],
+                isError=True,
+            )
+
+        encoding_str = arguments.get("encoding", OutputEncoding.TEXT.value)
+        if encoding_str not in (OutputEncoding.TEXT.value, OutputEncoding.BASE64.value):
             return CallToolResult(
                 content=[
                     TextContent(
                         type="text",
-                        text=f"Command not allowed: {reason}\n\n"
-                        f"To allow this command:\n"
-                        f"1. Use 'set_permission_mode' to change to 'ask' mode and then approve it\n"
-                        f"2. Or add the command pattern to your config file",
+                        text=f"Invalid encoding: {encoding_str}. Valid values: text, base64",
                     )
                 ],
                 isError=True,
             )
 
-        # Execute the command
-        result = await self.executor.execute(command, working_directory)
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
 
-        # Format the response
-        response_parts = []
+        try:
+            content = await asyncio.to_thread(
+                self.files.read,
+                resolved,
+                offset=arguments.get("offset"),
+                length=arguments.get("length"),
+                start_line=arguments.get("start_line"),
+                end_line=arguments.get("end_line"),
+                encoding=OutputEncoding(encoding_str),
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(content.to_dict(), indent=2))],
+        )
+
+    async def _handle_list_directory(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle list_directory tool call."""
+        path = arguments.get("path", "").strip() or self.executor.current_directory
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
+
+        try:
+            listing = await asyncio.to_thread(
+                list_directory,
+                resolved,
+                depth=arguments.get("depth", 1),
+                show_hidden=arguments.get("show_hidden", False),
+                ignore=arguments.get("ignore", []),
+                use_gitignore=arguments.get("use_gitignore", True),
+                sort=arguments.get("sort", "name"),
+                reverse=arguments.get("reverse", False),
+                max_entries=arguments.get("max_entries", 1000),
+                long=arguments.get("long", False),
+                exclude=self.executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        # Compact: a deep tree is mostly entries, and indentation would double it
+        return CallToolResult(
+            content=[
+                TextContent(type="text", text=json.dumps(listing.to_dict(), separators=(",", ":")))
+            ],
+        )
+
+    async def _handle_search_files(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle search_files tool call."""
+        pattern = arguments.get("pattern", "")
+        if not pattern:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No pattern provided")],
+                isError=True,
+            )
+
+        path = arguments.get("path", "").strip() or self.executor.current_directory
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
+
+        try:
+            results = await asyncio.to_thread(
+                self.search.search,
+                resolved,
+                pattern,
+                fixed_strings=arguments.get("fixed_strings", False),
+                ignore_case=arguments.get("ignore_case", False),
+                include=arguments.get("include", []),
+                ignore=arguments.get("ignore", []),
+                use_gitignore=arguments.get("use_gitignore", True),
+                show_hidden=arguments.get("show_hidden", False),
+                max_results=arguments.get("max_results", 100),
+                max_bytes=self.config.max_output_size,
+                offset=arguments.get("offset", 0),
+                exclude=self.executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[
+                TextContent(type="text", text=json.dumps(results.to_dict(), separators=(",", ":")))
+            ],
+        )
+
+    async def _handle_tail_file(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle tail_file tool call."""
+        path = arguments.get("path", "").strip()
+        if not path:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No path provided")],
+                isError=True,
+            )
+
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
+
+        try:
+            chunk = await wait_for_lines(
+                resolved,
+                cursor=arguments.get("cursor") or None,
+                lines=arguments.get("lines", DEFAULT_LINES),
+                max_bytes=self.config.max_output_size,
+                wait=min(float(arguments.get("wait_seconds", 0)), MAX_WAIT_SECONDS),
+                poll_interval=self.config.tail_poll_interval_seconds,
+                exclude=self.executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(chunk.to_dict(), indent=2))],
+        )
+
+    async def _handle_system_info(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle system_info tool call."""
+        try:
+            info = await system_info(
+                sections=arguments.get("sections") or SECTIONS,
+                sample_seconds=float(arguments.get("sample_seconds", 0)),
+                paths=[os.path.expanduser(path) for path in self.config.allowed_directories],
+            )
+        except ValueError as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(info, indent=2))],
+        )
+
+    async def _handle_list_processes(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle list_processes tool call."""
+        cwd = arguments.get("cwd", "").strip()
+        if cwd:
+            # A filter, not an access: the directory need not be allowed
+            cwd = os.path.realpath(
+                os.path.join(self.executor.current_directory, os.path.expanduser(cwd))
+            )
+
+        try:
+            processes = await list_processes(
+                name=arguments.get("name") or None,
+                user=arguments.get("user") or None,
+                cwd=cwd or None,
+                sort=arguments.get("sort", "cpu"),
+                limit=arguments.get("limit", 20),
+                sample_seconds=float(arguments.get("sample_seconds", 0)),
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(processes, separators=(",", ":")))],
+        )
+
+    async def _handle_disk_usage(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle disk_usage tool call."""
+        path = arguments.get("path", "").strip() or self.executor.current_directory
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
+
+        try:
+            usage = await asyncio.to_thread(
+                self.disk_usage.measure,
+                resolved,
+                depth=arguments.get("depth", 2),
+                limit=arguments.get("limit", 20),
+                cross_filesystems=arguments.get("cross_filesystems", False),
+                refresh=arguments.get("refresh", False),
+                exclude=self.executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(usage, indent=2))],
+        )
+
+    async def _handle_find_files(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle find_files tool call."""
+        path = arguments.get("path", "").strip() or self.executor.current_directory
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
+
+        try:
+            found = await find_files(
+                self.file_index,
+                resolved,
+                glob=arguments.get("glob") or None,
+                contains=arguments.get("contains") or None,
+                extension=arguments.get("extension") or None,
+                entry_type=arguments.get("type") or None,
+                ignore_case=arguments.get("ignore_case", False),
+                limit=arguments.get("limit", FIND_LIMIT),
+                exclude=self.executor.is_blocked_path,
+                max_entries=self.config.file_index_max_entries,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
+
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(found, separators=(",", ":")))],
+        )
+
+    async def _handle_hash_files(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle hash_files tool call."""
+        paths = [path for path in arguments.get("paths") or [] if path.strip()]
+        if not paths:
+            return CallToolResult(
+                content=[TextContent(type="text", text="Error: No paths provided")],
+                isError=True,
+            )
 
-        if result.timed_out:
-            response_parts.append(f"⏱️ Command timed out after {self.config.timeout_seconds}s")
+        resolved_paths = []
+        for path in paths:
+            resolved, error = self.executor.resolve_path(path.strip())
+            if error is not None:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"Error: {error}")],
+                    isError=True,
+                )
+            resolved_paths.append(resolved)
 
-        if result.stdout:
-            response_parts.append(f"stdout:\n{result.stdout}")
+        try:
+            digests = await asyncio.to_thread(
+                self.hasher.hash,
+                resolved_paths,
+                algorithms=arguments.get("algorithms") or DEFAULT_HASH_ALGORITHMS,
+                limit=arguments.get("limit", 1000),
+                refresh=arguments.get("refresh", False),
+                exclude=self.executor.is_blocked_path,
+            )
+        except ValueError as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
 
-        if result.stderr:
-            response_parts.append(f"stderr:\n{result.stderr}")
+        return CallToolResult(
+            content=[TextContent(type="text", text=json.dumps(digests, separators=(",", ":")))],
+        )
 
-        if result.truncated:
-            response_parts.append("⚠️ Output was truncated")
+    async def _handle_explore_project(self, arguments: dict[str, Any]) -> CallToolResult:
+        """Handle explore_project tool call."""
+        path = arguments.get("path", "").strip() or self.executor.current_directory
+        resolved, error = self.executor.resolve_path(path)
+        if error is not None:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {error}")],
+                isError=True,
+            )
 
-        response_parts.append(f"\nExit code: {result.return_code}")
-        response_parts.append(f"Working directory: {result.working_directory}")
+        try:
+            report = await self.explorer.explore(
+                resolved,
+                sections=arguments.get("sections") or EXPLORE_SECTIONS,
+                refresh=arguments.get("refresh", False),
+                exclude=self.executor.is_blocked_path,
+            )
+        except (OSError, ValueError) as e:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Error: {e}")],
+                isError=True,
+            )
 
         return CallToolResult(
-            content=[TextContent(type="text", text="\n".join(response_parts))],
-            isError=result.return_code != 0,
+            content=[TextContent(type="text", text=json.dumps(report, separators=(",", ":")))],
         )
 
     async def _handle_change_directory(self, arguments: dict[str, Any]) -> CallToolResult:
@@ -382,14 +1550,102 @@ class HostTerminalServer:
             content=[TextContent(type="text", text=message)],
         )
 
+    def write_metrics(self) -> None:
+        """Write the current metrics to config.metrics_file."""
+        if not self.config.metrics_file:
+            return
+        try:
+            write_metrics_file(self.executor.metrics.render(), self.config.metrics_file)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.config.metrics_file}: {e}")
+
+    async def _write_metrics_periodically(self) -> None:
+        while True:
+            self.write_metrics()
+            await asyncio.sleep(self.config.metrics_interval_seconds)
+
     async def run(self) -> None:
         """Run the MCP server."""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options(),
-            )
+        # stdio has no endpoint to scrape, so metrics are dumped to a file on request
+        metrics_writer = None
+        if self.config.metrics_file:
+            metrics_writer = asyncio.create_task(self._write_metrics_periodically())
+        if self.file_index is not None:
+            self.file_index.start()
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options(),
+                )
+        finally:
+            # Terminal sessions run in their own process groups and would outlive us
+            await self.executor.close_all_terminals()
+            if self.executor.audit is not None:
+                await self.executor.audit.close()
+            self.search.close()
+            self.disk_usage.close()
+            self.explorer.close()
+            self.hasher.close()
+            if self.file_index is not None:
+                self.file_index.close()
+            if metrics_writer is not None:
+                metrics_writer.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await metrics_writer
+                self.write_metrics()
+            self.executor.tracer.close()
+
+
+def bind_unix_socket(path: str, mode: int) -> socket.socket:
+    """
+    Bind a listening Unix domain socket with the given file permissions.
+
+    A stale socket file left by a previous run is replaced, but a socket
+    another server is still listening on is not.
+
+    Raises:
+        OSError: If the path is in use or exists and is not a socket
+    """
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise OSError(f"Refusing to replace non-socket file: {path}")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            if probe.connect_ex(path) == 0:
+                raise OSError(f"Socket already in use: {path}")
+        os.unlink(path)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Restrict the umask while binding so the socket is never briefly
+    # accessible with looser permissions than requested.
+    old_umask = os.umask(0o777 & ~mode)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, mode)
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def default_session_store(port: int, uds: str | None = None) -> str:
+    """
+    SQLite session store shared by one multi-worker HTTP server's workers.
+
+    Named after the listening address, so two servers never share sessions:
+    the socket path when serving on a Unix socket, the port otherwise.
+    """
+    if uds:
+        digest = hashlib.sha1(os.path.abspath(uds).encode()).hexdigest()[:16]
+        name = f"sessions-uds-{digest}.db"
+    else:
+        name = f"sessions-{port}.db"
+    return str(get_default_state_dir() / name)
 
 
 def main() -> None:
@@ -421,6 +1677,16 @@ def main() -> None:
         dest="allowed_dirs",
         help="Add allowed directory (can be specified multiple times)",
     )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Periodically write Prometheus-format metrics to this file (stdio mode)",
+    )
+    parser.add_argument(
+        "--trace-file",
+        default=None,
+        help="Append request traces as JSON lines to this file",
+    )
     parser.add_argument(
         "--http",
         action="store_true",
@@ -432,6 +1698,26 @@ def main() -> None:
         default=8099,
         help="HTTP server port (default: 8099, only used with --http)",
     )
+    parser.add_argument(
+        "--uds",
+        default=None,
+        help="Serve HTTP on this Unix domain socket path instead of TCP (only used with --http)",
+    )
+    parser.add_argument(
+        "--uds-mode",
+        type=lambda value: int(value, 8),
+        default=0o660,
+        help="Octal file permissions for the --uds socket (default: 660)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of HTTP worker processes (default: 1, only used with --http). "
+            "Caches are per worker; the file index is kept by one worker per snapshot"
+        ),
+    )
 
     args = parser.parse_args()
 
@@ -449,6 +1735,12 @@ def main() -> None:
         config.permission_mode = PermissionMode(args.mode)
         logger.info(f"Permission mode overridden to: {args.mode}")
 
+    if args.metrics_file:
+        config.metrics_file = args.metrics_file
+
+    if args.trace_file:
+        config.trace_file = args.trace_file
+
     if args.allowed_dirs:
         config.allowed_directories.extend(args.allowed_dirs)
         logger.info(f"Added allowed directories: {args.allowed_dirs}")
@@ -462,9 +1754,46 @@ def main() -> None:
 
         from .http_server import create_app
 
-        app = create_app(config)
-        logger.info(f"Starting Host Terminal MCP HTTP Server on port {args.port}")
-        uvicorn.run(app, host="0.0.0.0", port=args.port)
+        # Listen on a pre-bound Unix socket (so its permissions are set before
+        # any client can connect) or on TCP.
+        listener = None
+        bind: dict[str, Any]
+        if args.uds:
+            listener = bind_unix_socket(args.uds, args.uds_mode)
+            bind = {"fd": listener.fileno()}
+            address = f"unix socket {args.uds} (mode {args.uds_mode:o})"
+        else:
+            bind = {"host": "0.0.0.0", "port": args.port}
+            address = f"port {args.port}"
+
+        try:
+            if args.workers > 1:
+                # Workers are separate processes: share session state through
+                # SQLite and hand them the resolved config via the environment.
+                from .http_server import CONFIG_ENV_VAR
+
+                if not config.session_store:
+                    config.session_store = default_session_store(args.port, args.uds)
+                os.environ[CONFIG_ENV_VAR] = config.model_dump_json()
+                logger.info(
+                    f"Starting Host Terminal MCP HTTP Server on {address} "
+                    f"with {args.workers} workers (session store: {config.session_store})"
+                )
+                uvicorn.run(
+                    "host_terminal_mcp.http_server:create_app_from_env",
+                    factory=True,
+                    workers=args.workers,
+                    **bind,
+                )
+            else:
+                app = create_app(config)
+                logger.info(f"Starting Host Terminal MCP HTTP Server on {address}")
+                uvicorn.run(app, **bind)
+        finally:
+            if listener is not None:
+                listener.close()
+                if os.path.exists(args.uds):
+                    os.unlink(args.uds)
     else:
         # Run as stdio MCP server (default)
         server = HostTerminalServer(config)
@@ -0,0 +1,269 @@
+"""Per-client session state for the HTTP transport.
+
+Each HTTP client identifies itself with an ``X-Session-Id`` header (or the
+``host_terminal_session`` cookie) and gets its own current directory, so one
+client's ``/cd`` never changes where another client's commands run. Clients
+that send no session id share the default session, which keeps the original
+single-client behavior.
+
+Sessions are lightweight: they hold only per-client state, while the
+``CommandExecutor`` (and its single-flight registry) stays shared. The state
+lives in a ``SessionStore``: in memory for a single server process, or in a
+SQLite database (WAL mode) when several uvicorn workers must see the same
+sessions.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+from .executor import CommandExecutor
+
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "host_terminal_session"
+DEFAULT_SESSION_ID = "default"
+
+# last_used is only written back once it is this stale, so a busy session
+# costs one store write every few seconds rather than one per request.
+TOUCH_INTERVAL_SECONDS = 5.0
+
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+@dataclass
+class Session:
+    """State belonging to one HTTP client."""
+
+    session_id: str
+    current_directory: str = field(default_factory=lambda: str(Path.home()))
+    last_used: float = field(default_factory=time.time)
+
+
+class SessionStore(Protocol):
+    """Storage for sessions. The default session is never counted or evicted."""
+
+    def load(self, session_id: str) -> Session | None:
+        """Return the stored session, or None."""
+        ...
+
+    def save(self, session: Session) -> None:
+        """Insert or update a session."""
+        ...
+
+    def create(self, session: Session, max_sessions: int) -> bool:
+        """Atomically insert a new session unless max_sessions are already stored."""
+        ...
+
+    def count(self) -> int:
+        """Number of stored named sessions."""
+        ...
+
+    def evict_idle(self, cutoff: float) -> int:
+        """Delete named sessions last used before cutoff; returns how many."""
+        ...
+
+
+class MemorySessionStore:
+    """Sessions held in this process (single worker)."""
+
+    def __init__(self) -> None:
+        # Named sessions, least recently saved first
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._default: Session | None = None
+
+    def load(self, session_id: str) -> Session | None:
+        if session_id == DEFAULT_SESSION_ID:
+            return self._default
+        return self._sessions.get(session_id)
+
+    def save(self, session: Session) -> None:
+        if session.session_id == DEFAULT_SESSION_ID:
+            self._default = session
+            return
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+
+    def create(self, session: Session, max_sessions: int) -> bool:
+        if len(self._sessions) >= max_sessions:
+            return False
+        self.save(session)
+        return True
+
+    def count(self) -> int:
+        return len(self._sessions)
+
+    def evict_idle(self, cutoff: float) -> int:
+        evicted = 0
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff:
+                break
+            del self._sessions[oldest.session_id]
+            evicted += 1
+        return evicted
+
+
+class SQLiteSessionStore:
+    """Sessions shared by every worker process through a SQLite database in WAL mode."""
+
+    def __init__(self, path: str | Path):
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection per worker; the lock guards it across the event loop
+        # thread and the threadpool that FastAPI may call us from.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(path), timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " current_directory TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)"
+        )
+
+    def load(self, session_id: str) -> Session | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT current_directory, last_used FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Session(session_id, current_directory=row[0], last_used=row[1])
+
+    def save(self, session: Session) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, current_directory, last_used)"
+                " VALUES (?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET"
+                " current_directory = excluded.current_directory,"
+                " last_used = excluded.last_used",
+                (session.session_id, session.current_directory, session.last_used),
+            )
+
+    def create(self, session: Session, max_sessions: int) -> bool:
+        # A single statement, so concurrent workers can't overshoot the cap
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, current_directory, last_used)"
+                " SELECT ?, ?, ?"
+                " WHERE (SELECT COUNT(*) FROM sessions WHERE session_id != ?) < ?",
+                (
+                    session.session_id,
+                    session.current_directory,
+                    session.last_used,
+                    DEFAULT_SESSION_ID,
+                    max_sessions,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def count(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE session_id != ?", (DEFAULT_SESSION_ID,)
+            ).fetchone()
+        return int(row[0])
+
+    def evict_idle(self, cutoff: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE last_used < ? AND session_id != ?",
+                (cutoff, DEFAULT_SESSION_ID),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SessionManager:
+    """Map session ids to Session state with idle eviction and a size cap."""
+
+    def __init__(
+        self,
+        executor: CommandExecutor,
+        max_sessions: int,
+        idle_timeout: float,
+        store: SessionStore | None = None,
+    ):
+        self.executor = executor
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.store: SessionStore = store if store is not None else MemorySessionStore()
+
+    def __len__(self) -> int:
+        """Number of live named sessions (the default session is not counted)."""
+        return self.store.count()
+
+    def get(self, session_id: str | None) -> tuple[Session | None, str]:
+        """
+        Look up or create the session for a request.
+
+        Args:
+            session_id: Id sent by the client, or None for the default session
+
+        Returns:
+            Tuple of (session, error message); session is None on error
+        """
+        if not session_id:
+            session_id = DEFAULT_SESSION_ID
+
+        if not _SESSION_ID_PATTERN.match(session_id):
+            return None, "Invalid session id (use 1-128 letters, digits, '.', '_' or '-')"
+
+        now = time.time()
+        session = self.store.load(session_id)
+
+        if session is None and session_id == DEFAULT_SESSION_ID:
+            session = Session(DEFAULT_SESSION_ID, last_used=now)
+            self.store.save(session)
+        elif session is None:
+            self.evict_idle(now)
+            session = Session(session_id, last_used=now)
+            if not self.store.create(session, self.max_sessions):
+                # Another worker may have created it in the meantime
+                session = self.store.load(session_id)
+                if session is None:
+                    return None, f"Session limit reached ({self.max_sessions} active sessions)"
+        elif now - session.last_used > TOUCH_INTERVAL_SECONDS:
+            session.last_used = now
+            self.store.save(session)
+
+        return session, ""
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Drop sessions unused for longer than idle_timeout; returns how many."""
+        if now is None:
+            now = time.time()
+        return self.store.evict_idle(now - self.idle_timeout)
+
+    def change_directory(self, session: Session, path: str) -> tuple[bool, str]:
+        """
+        Change a session's working directory.
+
+        Returns:
+            Tuple of (success, message)
+        """
+        success, result = self.executor.resolve_directory(path, session.current_directory)
+        if not success:
+            return False, result
+
+        session.current_directory = result
+        session.last_used = time.time()
+        self.store.save(session)
+        return True, f"Changed directory to: {result}"
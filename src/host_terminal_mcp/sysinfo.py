@@ -0,0 +1,350 @@
+"""Structured host information for the system_info tool.
+
+``system_info`` answers what ``uname``, ``uptime``, ``free``, ``df`` and
+``ip addr`` would, in one call and without subprocesses: it reads
+``/proc`` and ``/sys`` and calls ``os.statvfs``, ``os.uname`` and
+``os.getloadavg`` directly. Sizes are in bytes.
+
+Rates need two readings. With ``sample_seconds``, CPU time counters
+(``/proc/stat``) and interface byte counters (``/proc/net/dev``) are read
+before and after the interval, and the result reports CPU utilization
+percentages and network bytes per second over it.
+
+Outside Linux the ``/proc`` fields are absent; what ``os`` and
+``platform`` provide is still returned.
+"""
+
+import asyncio
+import fcntl
+import os
+import platform
+import re
+import socket
+import struct
+import time
+from collections.abc import Iterable
+from typing import Any
+
+SECTIONS = ("os", "cpu", "memory", "disk", "network")
+
+# Longest sampling interval a caller may ask for
+MAX_SAMPLE_SECONDS = 10.0
+
+# Filesystems that hold no user data; df leaves them out too
+PSEUDO_FILESYSTEMS = frozenset(
+    {
+        "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+        "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs",
+        "proc", "pstore", "ramfs", "rpc_pipefs", "securityfs", "squashfs",
+        "sysfs", "tmpfs", "tracefs",
+    }
+)  # fmt: skip
+
+# /proc/stat cpu line fields, in order
+_CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+_SIOCGIFADDR = 0x8915
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def os_info() -> dict[str, Any]:
+    uname = os.uname()
+    info: dict[str, Any] = {
+        "system": uname.sysname,
+        "hostname": uname.nodename,
+        "kernel": uname.release,
+        "kernel_version": uname.version,
+        "architecture": uname.machine,
+        "distribution": None,
+        "uptime_seconds": None,
+        "boot_time": None,
+    }
+    os_release = _read("/etc/os-release")
+    if os_release is not None:
+        for line in os_release.splitlines():
+            if line.startswith("PRETTY_NAME="):
+                info["distribution"] = line.split("=", 1)[1].strip().strip('"')
+    elif uname.sysname == "Darwin":
+        info["distribution"] = f"macOS {platform.mac_ver()[0]}"
+    uptime = _read("/proc/uptime")
+    if uptime is not None:
+        seconds = float(uptime.split()[0])
+        info["uptime_seconds"] = round(seconds, 1)
+        info["boot_time"] = round(time.time() - seconds)
+    return info
+
+
+def _cpu_times() -> dict[str, list[int]]:
+    """Cumulative jiffies per CPU line of /proc/stat ("cpu" is the total)."""
+    stat = _read("/proc/stat")
+    if stat is None:
+        return {}
+    times = {}
+    for line in stat.splitlines():
+        if not line.startswith("cpu"):
+            break
+        name, *values = line.split()
+        times[name] = [int(value) for value in values[: len(_CPU_FIELDS)]]
+    return times
+
+
+def _utilization(before: list[int], after: list[int]) -> dict[str, float]:
+    """Percent of the interval spent in each state, plus "busy" (everything but idle/iowait)."""
+    deltas = [b - a for a, b in zip(before, after, strict=False)]
+    total = sum(deltas) or 1
+    usage = {
+        field: round(100 * delta / total, 1)
+        for field, delta in zip(_CPU_FIELDS, deltas, strict=False)
+    }
+    idle = usage.get("idle", 0.0) + usage.get("iowait", 0.0)
+    return {"busy": round(100 - idle, 1), **usage}
+
+
+def cpu_info() -> dict[str, Any]:
+    info: dict[str, Any] = {
+        "count": os.cpu_count(),
+        "available": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        "model": None,
+        "load_average": list(os.getloadavg()),
+    }
+    cpuinfo = _read("/proc/cpuinfo")
+    if cpuinfo is not None:
+        for line in cpuinfo.splitlines():
+            if line.startswith(("model name", "Model")):
+                info["model"] = line.split(":", 1)[1].strip()
+                break
+    elif platform.processor():
+        info["model"] = platform.processor()
+    return info
+
+
+def memory_info() -> dict[str, Any]:
+    meminfo = _read("/proc/meminfo")
+    if meminfo is None:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return {"total": os.sysconf("SC_PHYS_PAGES") * page_size}
+    values = {}
+    for line in meminfo.splitlines():
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts:
+            # Reported in kB
+            values[name] = int(parts[0]) * (1024 if len(parts) > 1 else 1)
+    total = values.get("MemTotal", 0)
+    available = values.get("MemAvailable", values.get("MemFree", 0))
+    swap_total = values.get("SwapTotal", 0)
+    swap_free = values.get("SwapFree", 0)
+    return {
+        "total": total,
+        "available": available,
+        "used": total - available,
+        "free": values.get("MemFree"),
+        "buffers": values.get("Buffers"),
+        "cached": values.get("Cached"),
+        "percent_used": round(100 * (total - available) / total, 1) if total else None,
+        "swap": {
+            "total": swap_total,
+            "used": swap_total - swap_free,
+            "free": swap_free,
+            "percent_used": round(100 * (swap_total - swap_free) / swap_total, 1)
+            if swap_total
+            else 0.0,
+        },
+    }
+
+
+def _mounts() -> list[tuple[str, str, str]]:
+    """(device, mount point, type) of filesystems holding data, one per device."""
+    mounts = _read("/proc/mounts")
+    if mounts is None:
+        return [("", "/", "")]
+    found: dict[str, tuple[str, str, str]] = {}
+    for line in mounts.splitlines():
+        fields = line.split()
+        if len(fields) < 3 or fields[2] in PSEUDO_FILESYSTEMS:
+            continue
+        # Octal escapes, e.g. \040 for a space
+        mount_point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1])
+        # The first mount of a device is the one df shows
+        found.setdefault(fields[0], (fields[0], mount_point, fields[2]))
+    return list(found.values())
+
+
+def disk_info(paths: Iterable[str] = ()) -> list[dict[str, Any]]:
+    """Usage of each mounted filesystem, and of the filesystems holding paths."""
+    targets = _mounts() + [("", path, "") for path in paths]
+    disks = []
+    seen: set[int] = set()
+    for device, mount_point, fs_type in targets:
+        try:
+            st = os.statvfs(mount_point)
+            device_id = os.stat(mount_point).st_dev
+        except OSError:
+            continue
+        if device_id in seen or st.f_blocks == 0:
+            continue
+        seen.add(device_id)
+        total = st.f_blocks * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        disks.append(
+            {
+                "mount_point": mount_point,
+                "device": device or None,
+                "type": fs_type or None,
+                "total": total,
+                "used": used,
+                "free": free,
+                # As df computes it: used out of what non-root users can fill
+                "percent_used": round(100 * used / (used + free), 1) if used + free else 0.0,
+                "inodes_total": st.f_files,
+                "inodes_free": st.f_favail,
+            }
+        )
+    return disks
+
+
+def _interface_counters() -> dict[str, dict[str, int]]:
+    dev = _read("/proc/net/dev")
+    if dev is None:
+        return {}
+    counters = {}
+    # Two header lines, then "  eth0: rx_bytes rx_packets rx_errs rx_drop ... tx_bytes ..."
+    for line in dev.splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        values = [int(value) for value in rest.split()]
+        counters[name.strip()] = {
+            "rx_bytes": values[0],
+            "rx_packets": values[1],
+            "rx_errors": values[2],
+            "rx_dropped": values[3],
+            "tx_bytes": values[8],
+            "tx_packets": values[9],
+            "tx_errors": values[10],
+            "tx_dropped": values[11],
+        }
+    return counters
+
+
+def _ipv4_address(name: str) -> str | None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            request = struct.pack("256s", name.encode()[:15])
+            return socket.inet_ntoa(fcntl.ioctl(sock.fileno(), _SIOCGIFADDR, request)[20:24])
+        except OSError:
+            return None
+
+
+def _ipv6_addresses() -> dict[str, list[str]]:
+    """Addresses per interface from /proc/net/if_inet6."""
+    table = _read("/proc/net/if_inet6")
+    addresses: dict[str, list[str]] = {}
+    for line in (table or "").splitlines():
+        fields = line.split()
+        if len(fields) == 6:
+            address = socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[0]))
+            addresses.setdefault(fields[5], []).append(address)
+    return addresses
+
+
+def network_info() -> list[dict[str, Any]]:
+    counters = _interface_counters()
+    ipv6 = _ipv6_addresses()
+    interfaces = []
+    for _, name in socket.if_nameindex():
+        sys_dir = f"/sys/class/net/{name}"
+        mtu = _read(f"{sys_dir}/mtu")
+        interfaces.append(
+            {
+                "name": name,
+                "state": (_read(f"{sys_dir}/operstate") or "").strip() or None,
+                "mac": (_read(f"{sys_dir}/address") or "").strip() or None,
+                "mtu": int(mtu) if mtu else None,
+                "ipv4": _ipv4_address(name),
+                "ipv6": ipv6.get(name, []),
+                **counters.get(name, {}),
+            }
+        )
+    return interfaces
+
+
+def _collect(sections: Iterable[str], paths: Iterable[str]) -> dict[str, Any]:
+    collectors = {
+        "os": os_info,
+        "cpu": cpu_info,
+        "memory": memory_info,
+        "disk": lambda: disk_info(paths),
+        "network": network_info,
+    }
+    return {section: collectors[section]() for section in sections}
+
+
+async def system_info(
+    sections: Iterable[str] = SECTIONS,
+    sample_seconds: float = 0.0,
+    paths: Iterable[str] = (),
+) -> dict[str, Any]:
+    """
+    Collect host information, optionally sampling rates over an interval.
+
+    Args:
+        sections: Any of SECTIONS; all by default
+        sample_seconds: If positive, measure CPU utilization and network
+            throughput over this many seconds (at most MAX_SAMPLE_SECONDS)
+        paths: Directories whose filesystems are reported even if /proc/mounts
+            does not list them (the server passes allowed_directories)
+
+    Raises:
+        ValueError: For an unknown section or an invalid interval
+    """
+    sections = list(dict.fromkeys(sections))
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}. Valid: {', '.join(SECTIONS)}")
+    if not 0 <= sample_seconds <= MAX_SAMPLE_SECONDS:
+        raise ValueError(f"sample_seconds must be between 0 and {MAX_SAMPLE_SECONDS}")
+
+    sample = sample_seconds > 0 and bool({"cpu", "network"} & set(sections))
+    if sample:
+        cpu_before, network_before = _cpu_times(), _interface_counters()
+        started = time.monotonic()
+        await asyncio.sleep(sample_seconds)
+
+    # statvfs can block on an unresponsive network mount
+    info = await asyncio.to_thread(_collect, sections, list(paths))
+
+    if sample:
+        elapsed = time.monotonic() - started
+        cpu_after, network_after = _cpu_times(), _interface_counters()
+        if "cpu" in info and "cpu" in cpu_before and "cpu" in cpu_after:
+            info["cpu"]["utilization"] = _utilization(cpu_before["cpu"], cpu_after["cpu"])
+            info["cpu"]["per_cpu_busy"] = [
+                _utilization(cpu_before[name], cpu_after[name])["busy"]
+                for name in cpu_after
+                if name != "cpu" and name in cpu_before
+            ]
+        if "network" in info:
+            for interface in info["network"]:
+                before = network_before.get(interface["name"])
+                after = network_after.get(interface["name"])
+                if before and after:
+                    interface["rx_bytes_per_second"] = round(
+                        (after["rx_bytes"] - before["rx_bytes"]) / elapsed
+                    )
+                    interface["tx_bytes_per_second"] = round(
+                        (after["tx_bytes"] - before["tx_bytes"]) / elapsed
+                    )
+
+    return {
+        "status": "success",
+        "collected_at": round(time.time(), 3),
+        "sample_seconds": sample_seconds if sample else None,
+        **info,
+    }
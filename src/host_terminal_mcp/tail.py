@@ -0,0 +1,369 @@
+"""Incremental reads of growing log files for the tail_file tool.
+
+A tail cursor is ``"<inode>:<offset>"``: which file was read, and how far.
+``read_new`` returns the whole lines written since the cursor, so a
+client watching a log transfers each byte once instead of re-reading
+``tail -n 100`` in a loop. A partial last line is held back until its
+newline arrives.
+
+Rotation and truncation are detected from the cursor:
+
+- A different inode at the path means the file was rotated. The rest of
+  the old file is read first if it is still in the same directory (as
+  with ``app.log`` -> ``app.log.1``), then the new file from its start.
+- The same inode with a size below the offset means the file was
+  truncated in place (``copytruncate``); reading restarts at 0.
+
+``follow`` yields chunks as lines arrive. It waits on inotify events for
+the file's directory where available (Linux), and polls otherwise.
+"""
+
+import asyncio
+import contextlib
+import ctypes
+import os
+import stat
+import struct
+import time
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO
+
+# Lines returned when there is no cursor yet, like tail's default
+DEFAULT_LINES = 10
+
+# Bytes read per step when searching backwards for the last lines
+_BACKWARD_CHUNK = 65536
+
+# Longest a tail_file call may wait for new lines; follow over HTTP for longer
+MAX_WAIT_SECONDS = 60.0
+
+# With inotify, files are still re-checked this often in case an event was missed
+WATCH_RESCAN_SECONDS = 5.0
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+@dataclass
+class TailChunk:
+    """Lines read from a file since a cursor, as returned by the tail_file tool."""
+
+    path: str
+    cursor: str  # Pass back to read what comes next
+    offset: int  # Where content starts in the current file
+    size: int  # Current file size
+    content: str
+    rotated: bool = False  # The path now names a new file
+    file_truncated: bool = False  # The file shrank, so reading restarted at 0
+    truncated: bool = False  # Capped at max_bytes; more can be read right away
+    pending_bytes: int = 0  # Partial last line held back until it is complete
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"status": "success", **asdict(self)}
+
+
+def parse_cursor(cursor: str) -> tuple[int, int]:
+    """(inode, offset) of a cursor returned by read_new()."""
+    try:
+        inode, offset = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    if inode < 0 or offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return inode, offset
+
+
+def _last_lines_offset(f: BinaryIO, size: int, lines: int) -> int:
+    """Where the last `lines` lines of an open file start, reading backwards."""
+    if lines <= 0:
+        return size
+    position = size
+    # A final newline ends the last line rather than starting another
+    wanted = lines + 1 if size and _byte_at(f, size - 1) == b"\n" else lines
+    while position > 0:
+        start = max(position - _BACKWARD_CHUNK, 0)
+        f.seek(start)
+        chunk = f.read(position - start)
+        end = len(chunk)
+        while True:
+            newline = chunk.rfind(b"\n", 0, end)
+            if newline < 0:
+                break
+            wanted -= 1
+            if wanted == 0:
+                return start + newline + 1
+            end = newline
+        position = start
+    return 0
+
+
+def _byte_at(f: BinaryIO, offset: int) -> bytes:
+    f.seek(offset)
+    return f.read(1)
+
+
+def _find_inode(directory: str, inode: int) -> str | None:
+    """A regular file in directory with the given inode, e.g. a rotated log."""
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.inode() == inode and entry.is_file(follow_symlinks=False):
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
+
+def _read_range(path: str, offset: int, budget: int, whole_lines: bool) -> tuple[bytes, int]:
+    """Up to budget bytes from offset, cut after the last newline if whole_lines; and the size."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset >= size:
+            return b"", size
+        f.seek(offset)
+        data = f.read(min(size - offset, budget))
+    if whole_lines:
+        end = data.rfind(b"\n") + 1
+        # A single line longer than the budget is returned in pieces
+        if end or len(data) < budget:
+            data = data[:end]
+    return data, size
+
+
+def read_new(
+    path: str,
+    cursor: str | None = None,
+    lines: int = DEFAULT_LINES,
+    max_bytes: int = 100000,
+    exclude: Callable[[str], bool] | None = None,
+) -> TailChunk:
+    """
+    Read what was written to path since cursor.
+
+    Without a cursor, the last `lines` lines are returned (0 for none, to
+    start following from the end). At most max_bytes are returned; when
+    more is waiting, truncated is set and the returned cursor continues it.
+
+    Args:
+        exclude: Called with a rotated file found by inode, which the caller
+            never saw and so never checked; True leaves it unread
+
+    Raises:
+        ValueError: For an invalid cursor, or a path that is not a regular file
+        OSError: If the file cannot be read
+    """
+    max_bytes = max(max_bytes, 1)
+    st = os.stat(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise ValueError(f"Not a regular file: {path}")
+
+    if cursor is None:
+        with open(path, "rb") as f:
+            offset = _last_lines_offset(f, os.fstat(f.fileno()).st_size, lines)
+        return _chunk(path, st.st_ino, offset, max_bytes)
+
+    inode, offset = parse_cursor(cursor)
+    if inode == st.st_ino:
+        if st.st_size < offset:
+            return _chunk(path, inode, 0, max_bytes, file_truncated=True)
+        return _chunk(path, inode, offset, max_bytes)
+
+    # Rotated: finish the old file, wherever it was moved to in the same directory
+    head = b""
+    old = _find_inode(os.path.dirname(path), inode)
+    if old is not None and (exclude is None or not exclude(old)):
+        # The old file is complete, so its last line is returned even without a newline
+        head, old_size = _read_range(old, offset, max_bytes, whole_lines=False)
+        if offset + len(head) < old_size:
+            return TailChunk(
+                path=path,
+                cursor=f"{inode}:{offset + len(head)}",
+                offset=offset,
+                size=old_size,
+                content=head.decode("utf-8", errors="replace"),
+                truncated=True,
+            )
+    chunk = _chunk(path, st.st_ino, 0, max_bytes - len(head), rotated=True)
+    chunk.content = head.decode("utf-8", errors="replace") + chunk.content
+    return chunk
+
+
+def _chunk(
+    path: str,
+    inode: int,
+    offset: int,
+    budget: int,
+    rotated: bool = False,
+    file_truncated: bool = False,
+) -> TailChunk:
+    data, size = _read_range(path, offset, budget, whole_lines=True) if budget > 0 else (b"", 0)
+    end = offset + len(data)
+    if budget <= 0:
+        size = os.stat(path).st_size
+    waiting = size - end
+    # Bytes after end are either more than the budget allowed, or a partial line
+    truncated = waiting > 0 and (budget <= 0 or b"\n" in _peek(path, end, waiting))
+    return TailChunk(
+        path=path,
+        cursor=f"{inode}:{end}",
+        offset=offset,
+        size=size,
+        content=data.decode("utf-8", errors="replace"),
+        rotated=rotated,
+        file_truncated=file_truncated,
+        truncated=truncated,
+        pending_bytes=0 if truncated else waiting,
+    )
+
+
+def _peek(path: str, offset: int, length: int) -> bytes:
+    """Bytes after a read, to tell a partial last line from more lines."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(min(length, _BACKWARD_CHUNK))
+
+
+def inotify_libc() -> Any:
+    """libc with inotify, or None where it is unavailable (shared with fileindex.py)."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1  # noqa: B018
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class DirectoryWatch:
+    """inotify events for one file name in a directory, awaited on the event loop."""
+
+    def __init__(self, fd: int, name: str):
+        self._fd = fd
+        self._name = os.fsencode(name)
+
+    @classmethod
+    def open(cls, path: str) -> "DirectoryWatch | None":
+        """Watch path's directory for changes to path, or None without inotify."""
+        libc = inotify_libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        directory = os.path.dirname(path) or "."
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return cls(fd, os.path.basename(path))
+
+    async def wait(self, timeout: float) -> None:
+        """Return when the file may have changed, or after timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            readable = asyncio.Event()
+            loop.add_reader(self._fd, readable.set)
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                await asyncio.wait_for(readable.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                loop.remove_reader(self._fd)
+            if self._drain():
+                return
+
+    def _drain(self) -> bool:
+        """Read queued events; whether any concerned the watched name."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return relevant
+            position = 0
+            while position + _EVENT_HEADER.size <= len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, position)
+                position += _EVENT_HEADER.size
+                name = data[position : position + length].rstrip(b"\0")
+                position += length
+                if name == self._name or mask & IN_Q_OVERFLOW:
+                    relevant = True
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+async def follow(
+    path: str,
+    cursor: str | None = None,
+    lines: int = DEFAULT_LINES,
+    max_bytes: int = 100000,
+    poll_interval: float = 1.0,
+    use_inotify: bool = True,
+    exclude: Callable[[str], bool] | None = None,
+) -> AsyncGenerator[TailChunk, None]:
+    """
+    Yield chunks of a file as lines are written, like tail -F.
+
+    The first chunk is yielded at once, even if empty, so the caller has a
+    cursor. After that only chunks with new content, or that report a
+    rotation or truncation, are yielded. If the file disappears, following
+    waits for it to come back.
+    """
+    chunk = await asyncio.to_thread(read_new, path, cursor, lines, max_bytes, exclude)
+    yield chunk
+    watch = DirectoryWatch.open(path) if use_inotify else None
+    # A capped chunk means more is already waiting
+    more = chunk.truncated
+    try:
+        while True:
+            if not more:
+                if watch is not None:
+                    await watch.wait(WATCH_RESCAN_SECONDS)
+                else:
+                    await asyncio.sleep(poll_interval)
+            try:
+                chunk = await asyncio.to_thread(
+                    read_new, path, chunk.cursor, lines, max_bytes, exclude
+                )
+            except FileNotFoundError:
+                more = False
+                continue
+            more = chunk.truncated
+            if chunk.content or chunk.rotated or chunk.file_truncated:
+                yield chunk
+    finally:
+        if watch is not None:
+            watch.close()
+
+
+async def wait_for_lines(
+    path: str,
+    cursor: str | None = None,
+    lines: int = DEFAULT_LINES,
+    max_bytes: int = 100000,
+    wait: float = 0.0,
+    poll_interval: float = 1.0,
+    exclude: Callable[[str], bool] | None = None,
+) -> TailChunk:
+    """read_new(), but if nothing is new, wait up to `wait` seconds for lines (long poll)."""
+    chunks = follow(path, cursor, lines, max_bytes, poll_interval, exclude=exclude)
+    try:
+        chunk = await anext(chunks)
+        if chunk.content or wait <= 0:
+            return chunk
+        with contextlib.suppress(asyncio.TimeoutError):
+            chunk = await asyncio.wait_for(anext(chunks), wait)
+        return chunk
+    finally:
+        await chunks.aclose()
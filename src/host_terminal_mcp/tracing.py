@@ -0,0 +1,413 @@
+"""Lightweight request tracing with a local JSONL exporter.
+
+A trace is a tree of timed spans, one per phase of a request (permission
+check, directory resolution, spawn, waiting on the child, formatting the
+response). The current span lives in a context variable, so nested
+``tracer.span()`` calls become children without passing anything around,
+and asyncio tasks started inside a span inherit it.
+
+Trace ids follow W3C Trace Context: a ``traceparent`` HTTP header (or
+``traceparent`` in an MCP request's ``_meta``) makes the request's spans
+part of the caller's trace.
+
+Spans are buffered until the request's root span ends, then the whole
+trace is queued for a background writer thread, which serializes it and
+appends it as JSON lines: one span per line by default, or one OTLP/JSON
+``ExportTraceServiceRequest`` per line (the format the OpenTelemetry
+collector's ``otlpjsonfile`` receiver reads). A span that ends after its
+root (work the request left running in the background) is exported on its
+own.
+
+Tracing is off unless a trace file is configured; ``span()`` then returns a
+shared no-op object and costs one attribute check.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from types import TracebackType
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("host-terminal-mcp")
+
+TRACEPARENT_HEADER = "traceparent"
+
+SERVICE_NAME = "host-terminal-mcp"
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+AttributeValue = str | int | float | bool
+
+# Finished traces held in memory before the oldest are dropped
+TRACE_BUFFER_SIZE = 10000
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """
+    Parse a W3C traceparent header.
+
+    Returns:
+        Tuple of (trace_id, parent span_id), or None if the value is invalid
+    """
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation; use as a context manager via Tracer.span()."""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "error", "_root", "_finished", "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        parent: "Span | None",
+        attributes: dict[str, AttributeValue],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+        # Spans are exported together when the local root span ends
+        self._root: Span = parent._root if parent is not None else self
+        self._finished: list[Span] = []
+        self._token: Token[Span | None] | None = None
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    @property
+    def traceparent(self) -> str:
+        """This span as a W3C traceparent value, for propagating to callees."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None and self.error is None:
+            self.error = f"{exc_type.__name__ if exc_type else 'Error'}: {exc}"
+        if self._token is not None:
+            _current_span.reset(self._token)
+        root = self._root
+        if root is self:
+            self._finished.append(self)
+            self.tracer.export(self._finished)
+        elif root.end_ns:
+            # The trace was exported when its root ended; send this span alone
+            self.tracer.export([self])
+        else:
+            root._finished.append(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class _NoopSpan:
+    """Stands in for a Span when tracing is disabled."""
+
+    __slots__ = ()
+
+    recording = False
+    traceparent = ""
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("host_terminal_span", default=None)
+
+
+def current_span() -> Span | None:
+    """The span active in this context, if tracing is on and one is open."""
+    return _current_span.get()
+
+
+class JsonlSpanExporter:
+    """
+    Append finished traces to a file as JSON lines, from a writer thread.
+
+    export() only queues the trace, so the event loop never waits on the
+    disk. If the writer falls behind, the oldest queued traces are dropped
+    and counted in ``dropped``.
+
+    Args:
+        path: File to append to
+        otlp: Write OTLP/JSON ExportTraceServiceRequest lines instead of one span per line
+        buffer_size: Traces held in memory before the oldest are dropped
+    """
+
+    def __init__(self, path: str, otlp: bool = False, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.path = path
+        self.otlp = otlp
+        self.dropped = 0
+        # One unbuffered O_APPEND write per batch of whole lines, so HTTP
+        # workers sharing the file don't interleave partial lines
+        self._fd = os.open(os.path.expanduser(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._queue: deque[list[Span]] = deque(maxlen=max(buffer_size, 1))
+        self._ready = threading.Condition()
+        self._writer: threading.Thread | None = None
+        self._closed = False
+
+    def export(self, spans: list[Span]) -> None:
+        """Queue a trace for the writer thread. Never blocks on the disk."""
+        with self._ready:
+            if self._closed:
+                self.dropped += 1
+                return
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(spans)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_queued, name="trace-writer", daemon=True
+                )
+                self._writer.start()
+            self._ready.notify()
+
+    def _write_queued(self) -> None:
+        while True:
+            with self._ready:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                batch = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: list[list[Span]]) -> None:
+        if self.otlp:
+            lines = [json.dumps(_otlp_request(spans), separators=(",", ":")) for spans in batch]
+        else:
+            lines = [
+                json.dumps(span.to_dict(), separators=(",", ":"))
+                for spans in batch
+                for span in spans
+            ]
+        try:
+            os.write(self._fd, ("\n".join(lines) + "\n").encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not write {len(batch)} traces to {self.path}: {e}")
+            with self._ready:
+                self.dropped += len(batch)
+
+    def close(self) -> None:
+        """Write the traces still queued, then stop the writer thread."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_request(spans: list[Span]) -> dict[str, Any]:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "host_terminal_mcp"},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                                "name": span.name,
+                                # SPAN_KIND_SERVER for request roots, INTERNAL otherwise
+                                "kind": 2 if span._root is span else 1,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class Tracer:
+    """
+    Creates spans and hands finished traces to an exporter.
+
+    Args:
+        exporter: Where finished traces go; None disables tracing
+    """
+
+    def __init__(self, exporter: JsonlSpanExporter | None = None):
+        self.exporter = exporter
+
+    @classmethod
+    def from_file(cls, path: str | None, otlp: bool = False) -> "Tracer":
+        """A tracer writing to path, or a disabled tracer if path is None."""
+        return cls(JsonlSpanExporter(path, otlp) if path else None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(
+        self, name: str, traceparent: str | None = None, **attributes: AttributeValue
+    ) -> Span | _NoopSpan:
+        """
+        Start a span as a child of the current one.
+
+        Args:
+            name: Operation name
+            traceparent: Incoming W3C traceparent, used when there is no current span
+            attributes: Initial span attributes
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, parent, attributes)
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            return Span(self, name, remote[0], remote[1], None, attributes)
+        return Span(self, name, _new_id(128), None, None, attributes)
+
+    def export(self, spans: list[Span]) -> None:
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per HTTP request.
+
+    The span covers the whole response, including streamed bodies, and its
+    traceparent is returned in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == TRACEPARENT_HEADER.encode():
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope.get("method", "")
+        path = scope.get("path", "")
+        with self.tracer.span(
+            f"{method} {path}", traceparent, **{"http.method": method, "http.target": path}
+        ) as span:
+
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    headers = list(message.get("headers", []))
+                    headers.append((TRACEPARENT_HEADER.encode(), span.traceparent.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -0,0 +1,92 @@
+"""Thread pool and cache shared by the file tools.
+
+The tools that fan work out to threads each own a ``WorkerPool``: a
+``ThreadPoolExecutor`` that is only started the first time work is
+submitted, so a server that never runs the tool starts no threads for
+it, and that is shut down without waiting when the server stops. A pool
+closed that way starts again if more work arrives.
+
+``LRUCache`` is the bounded mapping behind their caches, such as
+``read_file``'s line indexes. It is not locked itself: the owners
+already hold a lock around each cache lookup and update.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Generic, TypeVar
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+_T = TypeVar("_T")
+
+
+class WorkerPool(Executor):
+    """
+    A ThreadPoolExecutor started on first use.
+
+    Args:
+        workers: Threads in the pool
+        name: Prefix of the threads' names
+    """
+
+    def __init__(self, workers: int, name: str):
+        self.workers = max(workers, 1)
+        self.name = name
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., _T], /, *args: Any, **kwargs: Any) -> Future[_T]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def close(self) -> None:
+        """Stop the threads without waiting, dropping work that has not started."""
+        self.shutdown(wait=False, cancel_futures=True)
+
+
+class LRUCache(Generic[_K, _V]):
+    """
+    A mapping of at most maxsize entries that drops the least recently used.
+
+    Args:
+        maxsize: Entries kept
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[_K, _V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[_K]:
+        return iter(self._entries)
+
+    def get(self, key: _K) -> _V | None:
+        """The value for key, marked as just used, or None."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: _K, value: _V) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: _K) -> _V | None:
+        return self._entries.pop(key, None)
+
+    def values(self) -> Iterator[_V]:
+        return iter(self._entries.values())
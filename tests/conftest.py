@@ -0,0 +1,79 @@
+"""Fixtures shared by the tests of the file tools (read_file, search_files, ...)."""
+
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+
+from host_terminal_mcp.config import Config, get_default_blocked_commands
+
+
+@dataclass(frozen=True)
+class FileTool:
+    """A file tool, its HTTP endpoint, and how to point either at a path."""
+
+    name: str
+    endpoint: str
+    walks: bool  # Takes a directory and reports on the files under it
+    path_argument: str = "path"
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+    def target(self, path: str) -> dict[str, Any]:
+        """Tool arguments (or query parameters) aimed at path."""
+        value = [path] if self.path_argument == "paths" else path
+        return {**self.arguments, self.path_argument: value}
+
+
+FILE_TOOLS = [
+    FileTool("read_file", "/files/read", walks=False),
+    FileTool("tail_file", "/files/tail", walks=False),
+    FileTool("hash_files", "/files/hash", walks=True, path_argument="paths"),
+    FileTool("list_directory", "/files/list", walks=True, arguments={"show_hidden": True}),
+    FileTool(
+        "search_files",
+        "/files/search",
+        walks=True,
+        arguments={"pattern": "key", "show_hidden": True},
+    ),
+    FileTool("find_files", "/files/find", walks=True),
+    FileTool("disk_usage", "/files/usage", walks=True),
+    FileTool("explore_project", "/project", walks=True),
+]
+
+
+def _make_config(directory: str, **overrides: Any) -> Config:
+    return Config(
+        allowed_directories=[directory],
+        blocked_commands=get_default_blocked_commands(),
+        **overrides,
+    )
+
+
+@pytest.fixture
+def make_config() -> Callable[..., Config]:
+    """Config allowing only the given directory, with the default blocked paths."""
+    return _make_config
+
+
+@pytest.fixture
+def sandbox(tmp_path) -> str:
+    """An allowed directory holding notes.txt and a private key under .ssh/."""
+    root = os.path.realpath(tmp_path)
+    os.makedirs(os.path.join(root, ".ssh"))
+    with open(os.path.join(root, ".ssh", "id_rsa"), "w") as f:
+        f.write("private key\n")
+    with open(os.path.join(root, "notes.txt"), "w") as f:
+        f.write("key notes\n")
+    return root
+
+
+@pytest.fixture(params=FILE_TOOLS, ids=lambda tool: tool.name)
+def file_tool(request) -> FileTool:
+    return request.param
+
+
+@pytest.fixture(params=[tool for tool in FILE_TOOLS if tool.walks], ids=lambda tool: tool.name)
+def walking_tool(request) -> FileTool:
+    return request.param
@@ -0,0 +1,163 @@
+"""Tests for the audit log."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.audit import AuditLog, set_client
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.sessions import SESSION_HEADER
+
+
+def make_config(audit_log, **overrides) -> Config:
+    settings = {
+        "permission_mode": PermissionMode.ALLOWLIST,
+        "allowed_commands": [CommandPattern(pattern="echo ", description="Echo")],
+        "blocked_commands": [CommandPattern(pattern="sudo ", description="Superuser")],
+        "allowed_directories": ["/tmp"],
+        "timeout_seconds": 5,
+        "audit_log": str(audit_log),
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def audit_file(tmp_path):
+    return tmp_path / "audit.jsonl"
+
+
+def make_log(path, **overrides) -> AuditLog:
+    settings = {
+        "max_bytes": 1024 * 1024,
+        "backup_count": 2,
+        "buffer_size": 100,
+        "flush_interval": 60,
+    }
+    settings.update(overrides)
+    return AuditLog(str(path), **settings)
+
+
+class TestAuditLog:
+    async def test_records_written_in_batches(self, audit_file):
+        log = make_log(audit_file)
+        set_client("test", "abc")
+        log.record(command="echo 1")
+        log.record(command="echo 2")
+
+        # Nothing touches the disk until a flush
+        assert not audit_file.exists()
+        await log.close()
+
+        first, second = read_records(audit_file)
+        assert first["command"] == "echo 1"
+        assert second["command"] == "echo 2"
+        assert first["client"] == "test"
+        assert first["session"] == "abc"
+        assert first["timestamp"].endswith("+00:00")
+        assert log.written == 2
+
+    async def test_flushed_after_interval(self, audit_file):
+        log = make_log(audit_file, flush_interval=0.05)
+        log.record(command="echo 1")
+        await asyncio.sleep(0.3)
+
+        assert len(read_records(audit_file)) == 1
+        await log.close()
+
+    async def test_full_ring_drops_oldest(self, audit_file):
+        dropped = []
+        log = make_log(audit_file, buffer_size=3, on_drop=dropped.append)
+        for index in range(5):
+            log.record(command=f"echo {index}")
+        await log.close()
+
+        assert [r["command"] for r in read_records(audit_file)] == ["echo 2", "echo 3", "echo 4"]
+        assert log.dropped == 2
+        assert dropped == [1, 1]
+
+    async def test_failed_write_counted_as_dropped(self, tmp_path):
+        log = make_log(tmp_path / "missing" / "audit.jsonl")
+        log.record(command="echo 1")
+        await log.close()
+
+        assert log.dropped == 1
+
+    async def test_rotation(self, audit_file):
+        log = make_log(audit_file, max_bytes=200, backup_count=2)
+        for index in range(6):
+            log.record(command=f"echo {index}", padding="x" * 100)
+            await log.flush()
+        await log.close()
+
+        assert [r["command"] for r in read_records(audit_file)] == ["echo 5"]
+        assert [r["command"] for r in read_records(audit_file.with_name("audit.jsonl.1"))] == [
+            "echo 4"
+        ]
+        assert audit_file.with_name("audit.jsonl.2").exists()
+        assert not audit_file.with_name("audit.jsonl.3").exists()
+
+
+class TestExecutorAudit:
+    async def test_execution_record(self, audit_file):
+        executor = CommandExecutor(make_config(audit_file))
+        await executor.execute("echo hi", "/tmp")
+        await executor.audit.close()
+
+        (record,) = read_records(audit_file)
+        assert record["command"] == "echo hi"
+        assert record["cwd"] == "/tmp"
+        assert record["decision"] == "allowed"
+        assert record["pattern"] == "echo "
+        assert record["mode"] == "pipe"
+        assert record["exit_code"] == 0
+        assert record["stdout_bytes"] == 3
+        assert record["stderr_bytes"] == 0
+        assert record["duration_ms"] > 0
+
+    async def test_denial_records(self, audit_file):
+        executor = CommandExecutor(make_config(audit_file))
+        executor.check_permission("sudo ls")
+        await executor.execute("echo hi", "/etc")
+        await executor.audit.close()
+
+        blocked, directory = read_records(audit_file)
+        assert blocked["decision"] == "blocked"
+        assert blocked["pattern"] == "sudo "
+        assert blocked["exit_code"] is None
+        assert directory["decision"] == "directory"
+        assert directory["cwd"] == "/etc"
+
+    async def test_dropped_metric(self, audit_file):
+        executor = CommandExecutor(make_config(audit_file, audit_buffer_size=1))
+        executor.check_permission("sudo a")
+        executor.check_permission("sudo b")
+        await executor.audit.close()
+
+        assert executor.metrics.audit_dropped.value() == 1
+        assert "host_terminal_audit_dropped_total 1" in executor.metrics.render()
+
+    def test_off_by_default(self):
+        assert CommandExecutor(Config(allowed_directories=["/tmp"])).audit is None
+
+    def test_http_client_and_session(self, audit_file):
+        with TestClient(create_app(make_config(audit_file))) as client:
+            client.post(
+                "/execute",
+                json={"command": "echo hi", "working_directory": "/tmp"},
+                headers={SESSION_HEADER: "agent-1"},
+            )
+        # Leaving the client runs the app's shutdown, which flushes the log
+
+        (record,) = read_records(audit_file)
+        assert record["client"] == "http"
+        assert record["session"] == "agent-1"
+        assert record["command"] == "echo hi"
@@ -0,0 +1,243 @@
+"""Tests for the HTTP client."""
+
+import base64
+import tempfile
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+
+from host_terminal_mcp.client import (
+    ApprovalRequiredError,
+    AsyncHostTerminalClient,
+    HostTerminalClient,
+    HostTerminalError,
+)
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.executor import ExecutionResult, OutputEncoding
+from host_terminal_mcp.http_server import create_app
+
+
+def make_app(mode: PermissionMode = PermissionMode.ALLOWLIST):
+    return create_app(
+        Config(
+            permission_mode=mode,
+            allowed_commands=[
+                CommandPattern(pattern="echo ", description="Echo"),
+                CommandPattern(pattern="printf ", description="Printf"),
+                CommandPattern(pattern="pwd", description="Print directory"),
+            ],
+            allowed_directories=["/tmp", "/"],
+            timeout_seconds=10,
+        )
+    )
+
+
+@pytest.fixture
+def async_client():
+    return AsyncHostTerminalClient(transport=httpx.ASGITransport(app=make_app()))
+
+
+@pytest.fixture(scope="module")
+def uds_server():
+    """A real server listening on a Unix domain socket in a background thread."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/api.sock"
+        server = uvicorn.Server(uvicorn.Config(make_app(), uds=path, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.05)
+        yield path
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+class TestAsyncClient:
+    async def test_execute_returns_execution_result(self, async_client):
+        async with async_client as client:
+            result = await client.execute("echo hello", working_directory="/tmp")
+
+        assert isinstance(result, ExecutionResult)
+        assert result.command == "echo hello"
+        assert result.stdout.strip() == "hello"
+        assert result.return_code == 0
+        assert result.working_directory == "/tmp"
+
+    async def test_base64_output(self, async_client):
+        async with async_client as client:
+            result = await client.execute("printf 'a\\377b'", output_encoding="base64")
+
+        assert result.output_encoding == OutputEncoding.BASE64
+        assert base64.b64decode(result.stdout) == b"a\xffb"
+
+    async def test_denied_command_raises(self, async_client):
+        async with async_client as client:
+            with pytest.raises(HostTerminalError, match="not allowed"):
+                await client.execute("rm -rf /tmp/nothing")
+
+    async def test_needs_approval_raises(self):
+        transport = httpx.ASGITransport(app=make_app(PermissionMode.ASK))
+        async with AsyncHostTerminalClient(transport=transport) as client:
+            with pytest.raises(ApprovalRequiredError) as excinfo:
+                await client.execute("uname -a")
+
+        assert excinfo.value.command == "uname -a"
+
+    async def test_batch(self, async_client):
+        async with async_client as client:
+            results = await client.execute_batch(["echo one", ("pwd", "/tmp"), "rm x"])
+
+        assert results[0].stdout.strip() == "one"
+        assert results[1].stdout.strip() == "/tmp"
+        assert isinstance(results[2], HostTerminalError)
+
+    async def test_stream(self, async_client):
+        async with async_client as client:
+            chunks = [chunk async for chunk in client.stream("printf 'x\\000y'")]
+
+        assert b"".join(chunks) == b"x\x00y"
+
+    async def test_stream_denied_raises(self, async_client):
+        async with async_client as client:
+            with pytest.raises(HostTerminalError):
+                async for _ in client.stream("rm x"):
+                    pass
+
+    async def test_session_directory(self):
+        app = make_app()
+        first = AsyncHostTerminalClient(
+            session_id="first", transport=httpx.ASGITransport(app=app)
+        )
+        second = AsyncHostTerminalClient(
+            session_id="second", transport=httpx.ASGITransport(app=app)
+        )
+        async with first, second:
+            assert await first.cd("/tmp") == "/tmp"
+            await second.cd("/")
+            assert await first.cwd() == "/tmp"
+            assert (await first.execute("pwd")).stdout.strip() == "/tmp"
+
+    async def test_cd_error_raises(self, async_client):
+        async with async_client as client:
+            with pytest.raises(HostTerminalError, match="not exist"):
+                await client.cd("/nonexistent/path/xyz")
+
+
+class TestSyncClient:
+    def test_execute_over_uds(self, uds_server):
+        with HostTerminalClient(uds=uds_server) as client:
+            assert client.health()["status"] == "ok"
+            result = client.execute("echo hello", working_directory="/tmp")
+
+        assert result.stdout.strip() == "hello"
+
+    def test_connection_reused(self, uds_server):
+        with HostTerminalClient(uds=uds_server) as client:
+            for _ in range(5):
+                client.execute("echo hi")
+            # The pool keeps a single keep-alive connection for sequential calls
+            pool = client._http._transport._pool
+            assert len(pool.connections) == 1
+
+    def test_batch_and_stream(self, uds_server):
+        with HostTerminalClient(uds=uds_server) as client:
+            results = client.execute_batch(["echo a", "echo b"], max_parallel=2)
+            streamed = b"".join(client.stream("printf 'x\\000y'"))
+
+        assert [r.stdout.strip() for r in results] == ["a", "b"]
+        assert streamed == b"x\x00y"
+
+    def test_permissions(self, uds_server):
+        with HostTerminalClient(uds=uds_server) as client:
+            assert client.permissions()["permission_mode"] == "allowlist"
+
+
+class TestRetries:
+    @staticmethod
+    def flaky_handler(failures: int):
+        calls = {"count": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls["count"] += 1
+            if calls["count"] <= failures:
+                raise httpx.RemoteProtocolError("Server disconnected", request=request)
+            return httpx.Response(200, json={"status": "ok"})
+
+        return handler, calls
+
+    def test_retries_connection_reset(self):
+        handler, calls = self.flaky_handler(failures=2)
+        with HostTerminalClient(
+            transport=httpx.MockTransport(handler), retries=2, retry_backoff=0
+        ) as client:
+            assert client.health()["status"] == "ok"
+        assert calls["count"] == 3
+
+    def test_gives_up_after_retries(self):
+        handler, calls = self.flaky_handler(failures=5)
+        with HostTerminalClient(
+            transport=httpx.MockTransport(handler), retries=1, retry_backoff=0
+        ) as client:
+            with pytest.raises(httpx.RemoteProtocolError):
+                client.health()
+        assert calls["count"] == 2
+
+    def test_post_not_retried_after_connection_closed(self):
+        # The server may have died after running the command
+        handler, calls = self.flaky_handler(failures=1)
+        with HostTerminalClient(
+            transport=httpx.MockTransport(handler), retries=3, retry_backoff=0
+        ) as client:
+            with pytest.raises(httpx.RemoteProtocolError):
+                client.execute("echo hi")
+        assert calls["count"] == 1
+
+    def test_post_retried_when_connect_fails(self):
+        calls = {"count": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise httpx.ConnectError("Connection refused", request=request)
+            return httpx.Response(200, json={"status": "success", "current_directory": "/tmp"})
+
+        with HostTerminalClient(
+            transport=httpx.MockTransport(handler), retries=1, retry_backoff=0
+        ) as client:
+            assert client.cd("/tmp") == "/tmp"
+        assert calls["count"] == 2
+
+    def test_timeout_not_retried(self):
+        calls = {"count": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls["count"] += 1
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        with HostTerminalClient(
+            transport=httpx.MockTransport(handler), retries=3, retry_backoff=0
+        ) as client:
+            with pytest.raises(httpx.ReadTimeout):
+                client.execute("echo hi")
+        assert calls["count"] == 1
+
+    async def test_async_retries_connection_reset(self):
+        handler, calls = self.flaky_handler(failures=1)
+        async with AsyncHostTerminalClient(
+            transport=httpx.MockTransport(handler), retry_backoff=0
+        ) as client:
+            assert (await client.health())["status"] == "ok"
+        assert calls["count"] == 2
+
+    async def test_async_post_not_retried_after_connection_closed(self):
+        handler, calls = self.flaky_handler(failures=1)
+        async with AsyncHostTerminalClient(
+            transport=httpx.MockTransport(handler), retry_backoff=0
+        ) as client:
+            with pytest.raises(httpx.RemoteProtocolError):
+                await client.execute("echo hi")
+        assert calls["count"] == 1
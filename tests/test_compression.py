@@ -0,0 +1,140 @@
+"""Tests for HTTP response compression."""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp import compression
+from host_terminal_mcp.compression import CompressionMiddleware, negotiate_encoding
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.http_server import create_app
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    """Pretend the optional codecs are not installed."""
+    monkeypatch.setattr(compression, "HAS_ZSTD", False)
+    monkeypatch.setattr(compression, "HAS_BROTLI", False)
+
+
+def make_config(**overrides):
+    return Config(
+        permission_mode=PermissionMode.ALLOWLIST,
+        allowed_commands=[CommandPattern(pattern="echo ", description="Echo")],
+        allowed_directories=["/tmp", "/"],
+        timeout_seconds=10,
+        **overrides,
+    )
+
+
+class TestNegotiateEncoding:
+    def test_gzip(self, gzip_only):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_nothing_acceptable(self, gzip_only):
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("deflate") is None
+
+    def test_zero_quality_rejected(self, gzip_only):
+        assert negotiate_encoding("gzip;q=0") is None
+
+    def test_wildcard(self, gzip_only):
+        assert negotiate_encoding("*") == "gzip"
+        assert negotiate_encoding("*, gzip;q=0") is None
+
+    def test_prefers_client_quality(self, monkeypatch):
+        monkeypatch.setattr(compression, "HAS_ZSTD", True)
+        monkeypatch.setattr(compression, "HAS_BROTLI", True)
+        assert negotiate_encoding("gzip, br, zstd") == "zstd"
+        assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5") == "gzip"
+        assert negotiate_encoding("gzip, br") == "br"
+
+    def test_optional_codecs_not_offered_when_missing(self, gzip_only):
+        assert negotiate_encoding("zstd, br") is None
+
+
+class TestCompressionMiddleware:
+    def test_large_execute_response_compressed(self, gzip_only):
+        client = TestClient(create_app(make_config()))
+        resp = client.post(
+            "/execute",
+            json={"command": "echo $(seq 1 2000)"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in resp.headers["vary"].lower()
+        assert "1999 2000" in resp.json()["stdout"]
+
+    def test_small_response_not_compressed(self, gzip_only):
+        client = TestClient(create_app(make_config()))
+        resp = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers
+
+    def test_min_size_configurable(self, gzip_only):
+        client = TestClient(create_app(make_config(compression_min_size=10)))
+        resp = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+
+    def test_not_compressed_without_accept_encoding(self, gzip_only):
+        client = TestClient(create_app(make_config()))
+        resp = client.post(
+            "/execute",
+            json={"command": "echo $(seq 1 2000)"},
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert "content-encoding" not in resp.headers
+
+    def test_disabled_by_config(self, gzip_only):
+        client = TestClient(create_app(make_config(compress_responses=False)))
+        resp = client.post(
+            "/execute",
+            json={"command": "echo $(seq 1 2000)"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert "content-encoding" not in resp.headers
+
+    def test_streaming_response_compressed_per_chunk(self, gzip_only):
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=1024)
+        chunks = [f"line {i}\n".encode() * 50 for i in range(20)]
+
+        @app.get("/stream")
+        async def stream() -> StreamingResponse:
+            async def body():
+                for chunk in chunks:
+                    yield chunk
+
+            return StreamingResponse(body(), media_type="text/plain")
+
+        with TestClient(app).stream(
+            "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+        ) as resp:
+            assert resp.headers["content-encoding"] == "gzip"
+            assert "content-length" not in resp.headers
+            raw = b"".join(resp.iter_raw())
+
+        assert gzip.decompress(raw) == b"".join(chunks)
+
+    @pytest.mark.parametrize("encoding", ["zstd", "br"])
+    def test_optional_codecs(self, encoding):
+        module = "zstandard" if encoding == "zstd" else "brotli"
+        codec = pytest.importorskip(module)
+        client = TestClient(create_app(make_config()))
+        with client.stream(
+            "POST",
+            "/execute",
+            json={"command": "echo $(seq 1 2000)"},
+            headers={"Accept-Encoding": encoding},
+        ) as resp:
+            assert resp.headers["content-encoding"] == encoding
+            raw = b"".join(resp.iter_raw())
+
+        if encoding == "zstd":
+            body = codec.ZstdDecompressor().decompressobj().decompress(raw)
+        else:
+            body = codec.decompress(raw)
+        assert b"1999 2000" in body
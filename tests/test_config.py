@@ -6,8 +6,10 @@ from host_terminal_mcp.config import (
     CommandPattern,
     Config,
     PermissionMode,
+    create_default_config_file,
     get_default_allowed_commands,
     get_default_blocked_commands,
+    load_config,
 )
 
 
@@ -183,6 +185,25 @@ class TestDefaultCommands:
         assert "killall" in patterns
         assert "pkill" in patterns
 
+    def test_commands_that_can_write_not_cacheable(self):
+        """Test commands taking --output=<file> are never shared between callers."""
+        cacheable = {c.pattern for c in get_default_allowed_commands() if c.cacheable}
+
+        assert "git status" in cacheable
+        assert not cacheable & {"git log", "git diff", "git show"}
+
+
+class TestSaveConfig:
+    """Tests for writing configuration files."""
+
+    def test_cacheable_survives_save_and_load(self, tmp_path):
+        """Test a saved config loads back with the same cacheable patterns."""
+        path = create_default_config_file(tmp_path / "config.yaml")
+        config = load_config(path)
+
+        cacheable = [c.pattern for c in get_default_allowed_commands() if c.cacheable]
+        assert [c.pattern for c in config.allowed_commands if c.cacheable] == cacheable
+
 
 class TestFindExecBlocking:
     """Tests for find -exec blocking with detailed error messages."""
@@ -427,3 +448,30 @@ class TestSystemShutdownBlocking:
         pattern = CommandPattern(pattern="kill", description="Kill")
         assert pattern.matches("kill -9 1234")
         assert not pattern.matches("killall firefox")
+
+
+class TestCheckPath:
+    """Tests for the path rules applied by the file tools."""
+
+    @pytest.fixture
+    def config(self):
+        return Config(
+            allowed_directories=["/home/me", "/tmp/"],
+            blocked_commands=get_default_blocked_commands(),
+        )
+
+    def test_inside_allowed_directory(self, config):
+        assert config.check_path("/home/me/project/README.md")[0]
+        assert config.check_path("/home/me")[0]
+        assert config.check_path("/tmp/x")[0]
+
+    def test_sibling_prefix_not_allowed(self, config):
+        allowed, reason = config.check_path("/home/me2/file")
+        assert not allowed
+        assert "not in allowed directories" in reason
+
+    def test_sensitive_paths_blocked(self, config):
+        for path in ("/home/me/.ssh/id_rsa", "/home/me/.ssh", "/home/me/.aws/credentials"):
+            allowed, reason = config.check_path(path)
+            assert not allowed, path
+            assert "blocked pattern" in reason
@@ -0,0 +1,149 @@
+"""Tests for cached, parallel disk usage."""
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.diskusage import DiskUsage
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+
+
+def write(path: str, size: int) -> None:
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """big/ (with big/inner/) outweighs small/, and a file sits at the top."""
+    root = os.path.realpath(tmp_path)
+    os.makedirs(os.path.join(root, "big", "inner"))
+    os.makedirs(os.path.join(root, "small"))
+    write(os.path.join(root, "top.bin"), 10_000)
+    write(os.path.join(root, "big", "data.bin"), 200_000)
+    write(os.path.join(root, "big", "inner", "data.bin"), 100_000)
+    write(os.path.join(root, "small", "data.bin"), 1_000)
+    return root
+
+
+@pytest.fixture
+def usage():
+    usage = DiskUsage(workers=4)
+    yield usage
+    usage.close()
+
+
+def largest(result) -> list[str]:
+    return [subtree["path"] for subtree in result["largest"]]
+
+
+class TestMeasure:
+    def test_totals_and_largest(self, tree, usage):
+        result = usage.measure(tree)
+
+        assert result["status"] == "success"
+        assert result["files"] == 4
+        assert result["directories"] == 4
+        assert result["apparent_bytes"] >= 311_000
+        assert result["bytes"] >= 311_000
+        assert largest(result) == ["big", "big/inner", "small"]
+        big = result["largest"][0]
+        assert big["files"] == 2
+        assert big["apparent_bytes"] >= 300_000
+
+    def test_depth_and_limit(self, tree, usage):
+        assert largest(usage.measure(tree, depth=1)) == ["big", "small"]
+        assert largest(usage.measure(tree, limit=1)) == ["big"]
+
+    def test_repeat_uses_cache(self, tree, usage):
+        first = usage.measure(tree)
+        second = usage.measure(tree)
+
+        assert first["scanned"] == 4
+        assert second["scanned"] == 0
+        assert second["cached"] == 4
+        assert second["bytes"] == first["bytes"]
+
+    def test_changed_directory_rescanned(self, tree, usage):
+        usage.measure(tree)
+        write(os.path.join(tree, "small", "more.bin"), 500_000)
+        result = usage.measure(tree)
+
+        # Only small/ gained an entry, so only its mtime moved
+        assert result["scanned"] == 1
+        assert result["files"] == 5
+        assert largest(result)[0] == "small"
+
+    def test_refresh(self, tree, usage):
+        usage.measure(tree)
+
+        assert usage.measure(tree, refresh=True)["scanned"] == 4
+
+    def test_hard_links_counted_once(self, tree, usage):
+        before = usage.measure(tree)
+        os.link(os.path.join(tree, "big", "data.bin"), os.path.join(tree, "small", "link.bin"))
+        # Linking changed data.bin's link count, not big/'s mtime
+        after = usage.measure(tree, refresh=True)
+
+        assert after["files"] == before["files"]
+        assert after["bytes"] == before["bytes"]
+
+    def test_symlinks_not_followed(self, tree, usage):
+        before = usage.measure(tree)
+        os.symlink(os.path.join(tree, "big"), os.path.join(tree, "small", "big"))
+        after = usage.measure(tree)
+
+        assert after["files"] == before["files"] + 1
+        assert after["directories"] == before["directories"]
+
+    def test_exclude(self, tree, usage):
+        result = usage.measure(tree, exclude=lambda path: path.endswith("inner"))
+
+        assert result["files"] == 3
+        assert "big/inner" not in largest(result)
+
+    def test_not_a_directory(self, tree, usage):
+        with pytest.raises(ValueError, match="Not a directory"):
+            usage.measure(os.path.join(tree, "top.bin"))
+
+    def test_invalid_depth(self, tree, usage):
+        with pytest.raises(ValueError, match="depth"):
+            usage.measure(tree, depth=0)
+
+
+class TestDiskUsageTool:
+    async def test_current_directory(self, tree, make_config):
+        server = HostTerminalServer(make_config(tree))
+        server.executor.change_directory(tree)
+        result = await server._call_tool("disk_usage", {"depth": 1})
+
+        assert largest(json.loads(result.content[0].text)) == ["big", "small"]
+
+    async def test_sensitive_directories_not_counted(self, tree, make_config):
+        os.makedirs(os.path.join(tree, ".ssh"))
+        write(os.path.join(tree, ".ssh", "id_rsa"), 100)
+        server = HostTerminalServer(make_config(tree))
+        result = await server._call_tool("disk_usage", {"path": tree})
+
+        assert json.loads(result.content[0].text)["files"] == 4
+
+
+class TestUsageEndpoint:
+    def test_usage(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        client.post("/cd", json={"path": tree})
+        data = client.get("/files/usage", params={"path": "big"}).json()
+
+        assert data["status"] == "success"
+        assert data["files"] == 2
+        assert largest(data) == ["inner"]
+
+    def test_invalid_limit(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        data = client.get("/files/usage", params={"path": tree, "limit": 0}).json()
+
+        assert data["status"] == "error"
+        assert "limit" in data["error"]
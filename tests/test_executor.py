@@ -1,13 +1,15 @@
 """Tests for command executor module."""
 
+import asyncio
+import base64
 import os
 import tempfile
 from pathlib import Path
 
 import pytest
 
-from host_terminal_mcp.config import Config
-from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.config import CommandPattern, Config
+from host_terminal_mcp.executor import CommandExecutor, OutputEncoding
 
 
 class TestCommandExecutor:
@@ -68,6 +70,13 @@ class TestCommandExecutor:
         assert result.stdout.strip() == "hello"
         assert result.return_code == 0
 
+    @pytest.mark.asyncio
+    async def test_execute_does_not_inherit_stdin(self, executor):
+        """Test commands read EOF instead of the server's stdin."""
+        result = await executor.execute("wc -c")
+        assert result.stdout.strip() == "0"
+        assert not result.timed_out
+
     @pytest.mark.asyncio
     async def test_execute_command_with_stderr(self, executor):
         """Test executing a command that produces stderr."""
@@ -108,3 +117,290 @@ class TestCommandExecutor:
         result = await executor.execute("sleep 10")
         assert result.timed_out
         assert result.return_code == -1
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_preserves_order(self, executor):
+        """Test batch results come back in input order."""
+        results = await executor.execute_batch(
+            [("sleep 0.2; echo first", None), ("echo second", "/tmp")]
+        )
+        assert [r.stdout.strip() for r in results] == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_runs_concurrently(self, executor):
+        """Test batch commands overlap instead of running serially."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await executor.execute_batch([("sleep 0.5", None)] * 4)
+        assert all(r.return_code == 0 for r in results)
+        assert loop.time() - start < 1.5
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_respects_parallel_cap(self, executor):
+        """Test max_parallel=1 serializes the batch."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await executor.execute_batch([("sleep 0.3", None)] * 3, max_parallel=1)
+        assert loop.time() - start >= 0.9
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_isolates_timeouts(self):
+        """Test a timed-out item does not fail the rest of the batch."""
+        config = Config(allowed_directories=[str(Path.home())], timeout_seconds=1)
+        executor = CommandExecutor(config)
+
+        slow, fast = await executor.execute_batch([("sleep 10", None), ("echo ok", None)])
+        assert slow.timed_out
+        assert fast.stdout.strip() == "ok"
+        assert fast.return_code == 0
+
+
+class TestOutputEncoding:
+    """Tests for binary-safe output modes."""
+
+    @pytest.fixture
+    def executor(self):
+        config = Config(
+            allowed_directories=[str(Path.home()), "/tmp"],
+            timeout_seconds=2,
+            max_output_size=1000,
+        )
+        return CommandExecutor(config)
+
+    @pytest.mark.asyncio
+    async def test_base64_preserves_binary(self, executor):
+        """Test base64 mode returns bytes that are not valid UTF-8 untouched."""
+        result = await executor.execute(
+            "printf '\\x00\\xff\\xfe\\x80binary'", output_encoding=OutputEncoding.BASE64
+        )
+        assert result.return_code == 0
+        assert result.output_encoding == OutputEncoding.BASE64
+        assert base64.b64decode(result.stdout) == b"\x00\xff\xfe\x80binary"
+
+    @pytest.mark.asyncio
+    async def test_text_mode_replaces_invalid_bytes(self, executor):
+        """Test text mode still decodes with replacement characters."""
+        result = await executor.execute("printf '\\xffok'")
+        assert result.stdout == "\ufffdok"
+
+    @pytest.mark.asyncio
+    async def test_base64_truncates_at_byte_boundary(self, executor):
+        """Test base64 output is capped at max_output_size bytes without a marker."""
+        result = await executor.execute(
+            "head -c 5000 /dev/zero", output_encoding=OutputEncoding.BASE64
+        )
+        assert result.truncated
+        assert base64.b64decode(result.stdout) == b"\x00" * 1000
+
+    @pytest.mark.asyncio
+    async def test_execute_rejects_raw(self, executor):
+        """Test raw output must go through stream_output."""
+        with pytest.raises(ValueError):
+            await executor.execute("echo hi", output_encoding=OutputEncoding.RAW)
+
+    @pytest.mark.asyncio
+    async def test_stream_output_yields_raw_bytes(self, executor):
+        """Test stream_output passes bytes through undecoded and in full."""
+        chunks = [
+            chunk
+            async for chunk in executor.stream_output(
+                "head -c 200000 /dev/zero; printf '\\xff'", "/tmp", chunk_size=4096
+            )
+        ]
+        data = b"".join(chunks)
+        assert len(chunks) > 1
+        assert data == b"\x00" * 200000 + b"\xff"
+
+    @pytest.mark.asyncio
+    async def test_stream_output_times_out(self, executor):
+        """Test a stream that runs past the timeout is cut off."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        data = b"".join([c async for c in executor.stream_output("echo start; sleep 10", "/tmp")])
+        assert data == b"start\n"
+        assert loop.time() - start < 5
+
+
+
+class TestSingleFlight:
+    """Tests for coalescing of identical concurrent commands."""
+
+    @pytest.fixture
+    def executor(self):
+        """Executor whose allow list covers the commands used below."""
+        config = Config(
+            allowed_commands=[
+                CommandPattern(pattern="sleep ", description="Sleep", cacheable=True),
+                CommandPattern(pattern="touch ", description="Touch"),
+            ],
+            allowed_directories=[str(Path.home()), "/tmp"],
+            timeout_seconds=10,
+        )
+        return CommandExecutor(config)
+
+    @pytest.mark.asyncio
+    async def test_identical_commands_share_one_process(self, executor):
+        """Test concurrent identical commands spawn once and share the result."""
+        command = "sleep 0.3"
+        first, second, third = await asyncio.gather(
+            executor.execute(command), executor.execute(command), executor.execute(command)
+        )
+        assert first.return_code == second.return_code == third.return_code == 0
+        assert first is not second
+        assert executor.stats.spawned == 1
+        assert executor.stats.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_different_directories_not_shared(self, executor):
+        """Test the same command in different directories runs separately."""
+        await asyncio.gather(
+            executor.execute("sleep 0.2", working_directory="/tmp"),
+            executor.execute("sleep 0.2", working_directory=str(Path.home())),
+        )
+        assert executor.stats.spawned == 2
+        assert executor.stats.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_commands_not_shared(self, executor):
+        """Test a finished run is not reused by a later request."""
+        await executor.execute("sleep 0.1")
+        await executor.execute("sleep 0.1")
+        assert executor.stats.spawned == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "sleep 0.2 > /dev/null",
+            "sleep 0.2; touch /tmp/x",
+            "sleep 0.2 && touch /tmp/x",
+            "sleep 0.2 | tee /tmp/x",
+            "sleep 0.2 & touch /tmp/x",
+            "sleep `touch /tmp/x`",
+            "sleep $(touch /tmp/x)",
+            "sleep 0.2\ntouch /tmp/x",
+        ],
+    )
+    async def test_chained_commands_not_shared(self, executor, command):
+        """Test redirection, pipes, chains and substitution always run individually."""
+        assert not executor._can_coalesce(command)
+
+    @pytest.mark.asyncio
+    async def test_pattern_without_cacheable_not_shared(self, executor, tmp_path):
+        """Test allow-listed commands are shared only when their pattern opts in."""
+        command = f"touch {tmp_path / 'x'}"
+        await asyncio.gather(executor.execute(command), executor.execute(command))
+        assert executor.stats.spawned == 2
+
+    @pytest.mark.asyncio
+    async def test_unlisted_commands_not_shared(self, executor):
+        """Test commands outside the allow list always run individually."""
+        command = "echo hi"
+        await asyncio.gather(executor.execute(command), executor.execute(command))
+        assert executor.stats.spawned == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_config(self, executor):
+        """Test coalescing can be turned off."""
+        executor.config.coalesce_identical_commands = False
+        command = "sleep 0.2"
+        await asyncio.gather(executor.execute(command), executor.execute(command))
+        assert executor.stats.spawned == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_run(self, executor):
+        """Test cancelling the first caller leaves the shared run for others."""
+        command = "sleep 0.3"
+        leader = asyncio.ensure_future(executor.execute(command))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(executor.execute(command))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        result = await follower
+        assert result.return_code == 0
+        assert not result.timed_out
+        assert executor.stats.spawned == 1
+
+
+class TestPty:
+    """Tests for pseudo-terminal execution and terminal sessions."""
+
+    @pytest.fixture
+    def executor(self):
+        return CommandExecutor(
+            Config(
+                allowed_directories=["/tmp"],
+                timeout_seconds=5,
+                max_terminal_sessions=2,
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_is_a_terminal(self, executor):
+        """Test commands see a terminal on stdout."""
+        result = await executor.execute_pty("test -t 1 && echo tty || echo pipe", "/tmp")
+        assert result.stdout == "tty\n"
+        assert result.return_code == 0
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_merges_stderr_and_keeps_exit_code(self, executor):
+        """Test stderr arrives in stdout and the exit code is preserved."""
+        result = await executor.execute_pty("echo out; echo err >&2; exit 4", "/tmp")
+        assert result.stdout == "out\nerr\n"
+        assert result.stderr == ""
+        assert result.return_code == 4
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_window_size(self, executor):
+        """Test the requested window size is applied."""
+        result = await executor.execute_pty("stty size", "/tmp", rows=33, cols=111)
+        assert result.stdout == "33 111\n"
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_escape_handling(self, executor):
+        """Test escape sequences are stripped by default and kept on request."""
+        command = "printf '\\033[1mbold\\033[0m\\n'"
+        assert (await executor.execute_pty(command, "/tmp")).stdout == "bold\n"
+        kept = await executor.execute_pty(command, "/tmp", strip_escapes=False)
+        assert kept.stdout == "\x1b[1mbold\x1b[0m\r\n"
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_timeout(self, executor):
+        """Test PTY commands are killed at the timeout."""
+        executor.config.timeout_seconds = 1
+        result = await executor.execute_pty("echo started; sleep 10", "/tmp")
+        assert result.timed_out
+        assert result.return_code == -1
+        assert "started" in result.stdout
+
+    @pytest.mark.asyncio
+    async def test_execute_pty_directory_not_allowed(self, executor):
+        """Test the working directory is still checked."""
+        result = await executor.execute_pty("pwd", "/etc")
+        assert result.return_code == 1
+        assert "not allowed" in result.stderr
+
+    @pytest.mark.asyncio
+    async def test_terminal_sessions(self, executor):
+        """Test sessions persist, are capped and can be closed."""
+        first, _ = await executor.start_terminal("cat", "/tmp")
+        second, _ = await executor.start_terminal("cat", "/tmp")
+        try:
+            assert executor.get_terminal(first.session_id) is first
+            third, error = await executor.start_terminal("cat", "/tmp")
+            assert third is None
+            assert "Too many terminal sessions" in error
+        finally:
+            assert await executor.close_terminal(first.session_id)
+            assert await executor.close_terminal(second.session_id)
+        assert executor.get_terminal(first.session_id) is None
+        assert not await executor.close_terminal(first.session_id)
+
+    @pytest.mark.asyncio
+    async def test_idle_terminals_reaped(self, executor):
+        """Test sessions idle past the timeout are killed."""
+        executor.config.terminal_idle_timeout_seconds = 0
+        session, _ = await executor.start_terminal("cat", "/tmp")
+        assert await executor.reap_idle_terminals() == 1
+        assert executor.get_terminal(session.session_id) is None
+        assert not session.running
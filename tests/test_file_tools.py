@@ -0,0 +1,72 @@
+"""Path checks every file tool and endpoint applies (see FILE_TOOLS in conftest.py)."""
+
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+
+
+def own_path(tool, sandbox: str) -> str:
+    """A path inside the sandbox that the tool accepts."""
+    return sandbox if tool.walks else os.path.join(sandbox, "notes.txt")
+
+
+class TestFileTools:
+    async def test_relative_to_current_directory(self, file_tool, sandbox, make_config):
+        server = HostTerminalServer(make_config(sandbox))
+        server.executor.change_directory(sandbox)
+        relative = "." if file_tool.walks else "notes.txt"
+        result = await server._call_tool(file_tool.name, file_tool.target(relative))
+
+        assert not result.isError, result.content[0].text
+        assert own_path(file_tool, sandbox) in result.content[0].text
+
+    async def test_outside_allowed_directories(self, file_tool, sandbox, make_config):
+        server = HostTerminalServer(make_config(sandbox))
+        outside = "/etc" if file_tool.walks else "/etc/hostname"
+        result = await server._call_tool(file_tool.name, file_tool.target(outside))
+
+        assert result.isError
+        assert "not in allowed directories" in result.content[0].text
+
+    async def test_sensitive_path_refused(self, file_tool, sandbox, make_config):
+        server = HostTerminalServer(make_config(sandbox))
+        key = (
+            os.path.join(sandbox, ".ssh")
+            if file_tool.walks
+            else os.path.join(sandbox, ".ssh", "id_rsa")
+        )
+        result = await server._call_tool(file_tool.name, file_tool.target(key))
+
+        assert result.isError
+        assert "blocked pattern" in result.content[0].text
+
+    async def test_sensitive_files_left_out_of_walks(self, walking_tool, sandbox, make_config):
+        server = HostTerminalServer(make_config(sandbox))
+        result = await server._call_tool(walking_tool.name, walking_tool.target(sandbox))
+
+        assert not result.isError
+        assert ".ssh" not in result.content[0].text
+        assert "id_rsa" not in result.content[0].text
+
+
+class TestFileEndpoints:
+    def test_relative_to_session_directory(self, file_tool, sandbox, make_config):
+        client = TestClient(create_app(make_config(sandbox)))
+        client.post("/cd", json={"path": sandbox})
+        relative = "." if file_tool.walks else "notes.txt"
+        data = client.get(file_tool.endpoint, params=file_tool.target(relative)).json()
+
+        assert data["status"] == "success"
+        assert own_path(file_tool, sandbox) in json.dumps(data)
+
+    def test_outside_allowed_directories(self, file_tool, sandbox, make_config):
+        client = TestClient(create_app(make_config(sandbox)))
+        outside = "/etc" if file_tool.walks else "/etc/hostname"
+        data = client.get(file_tool.endpoint, params=file_tool.target(outside)).json()
+
+        assert data["status"] == "error"
+        assert "not in allowed directories" in data["error"]
@@ -0,0 +1,211 @@
+"""Tests for the background file index and find_files."""
+
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp import fileindex
+from host_terminal_mcp.fileindex import FileIndex, find_files, walk_and_find
+from host_terminal_mcp.http_server import create_app
+
+
+def touch(root: str, *names: str) -> None:
+    for name in names:
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small project, with a .git directory that is never indexed."""
+    root = os.path.realpath(tmp_path / "project")
+    touch(
+        root,
+        "README.md",
+        "setup.py",
+        "src/app/main.py",
+        "src/app/Models.py",
+        "src/app/static/app.js",
+        "src-extra/notes.txt",
+        "tests/test_main.py",
+        ".git/HEAD",
+    )
+    return root
+
+
+async def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+async def index(tree, tmp_path):
+    index = FileIndex([tree], snapshot=str(tmp_path / "index.json.gz"))
+    index.start()
+    await wait_for(lambda: index.state == "ready")
+    yield index
+    index.close()
+
+
+def matches(result) -> list[str]:
+    return sorted(result["matches"])
+
+
+class TestQueries:
+    def test_extension(self, tree):
+        result = walk_and_find(tree, extension="py")
+
+        assert result["status"] == "success"
+        assert matches(result) == [
+            "setup.py",
+            "src/app/Models.py",
+            "src/app/main.py",
+            "tests/test_main.py",
+        ]
+        assert result["index"]["source"] == "walk"
+
+    def test_glob_matches_names_at_any_depth(self, tree):
+        assert matches(walk_and_find(tree, glob="test_*.py")) == ["tests/test_main.py"]
+        assert matches(walk_and_find(tree, glob="src/**/*.js")) == ["src/app/static/app.js"]
+
+    def test_contains_and_type(self, tree):
+        result = walk_and_find(tree, contains="app", entry_type="dir")
+
+        assert matches(result) == ["src/app/", "src/app/static/"]
+
+    def test_ignore_case(self, tree):
+        assert matches(walk_and_find(tree, glob="models.py")) == []
+        assert matches(walk_and_find(tree, glob="models.py", ignore_case=True)) == [
+            "src/app/Models.py"
+        ]
+
+    def test_scope_is_a_subtree(self, tree):
+        # src-extra/ sorts right after src/ but is not inside it
+        result = walk_and_find(os.path.join(tree, "src"))
+
+        assert matches(result) == [
+            "app/",
+            "app/Models.py",
+            "app/main.py",
+            "app/static/",
+            "app/static/app.js",
+        ]
+
+    def test_limit(self, tree):
+        result = walk_and_find(tree, extension="py", limit=2)
+
+        assert result["count"] == 2
+        assert result["truncated"] is True
+
+    def test_git_and_excluded_paths_skipped(self, tree):
+        result = walk_and_find(tree, exclude=lambda path: path.endswith(".txt"))
+
+        assert not any(".git" in path or path.endswith(".txt") for path in result["matches"])
+
+    def test_invalid_type(self, tree):
+        with pytest.raises(ValueError, match="type"):
+            walk_and_find(tree, entry_type="link")  # type: ignore[arg-type]
+
+
+class TestFileIndex:
+    async def test_answers_from_index(self, tree, index):
+        result = await find_files(index, tree, extension="py")
+
+        assert result["index"]["source"] == "index"
+        assert result["index"]["complete"] is True
+        assert matches(result) == matches(walk_and_find(tree, extension="py"))
+
+    async def test_unindexed_scope_walks(self, tree, tmp_path, index):
+        touch(str(tmp_path), "elsewhere/a.py")
+        result = await find_files(index, str(tmp_path / "elsewhere"), extension="py")
+
+        assert result["index"]["source"] == "walk"
+        assert result["matches"] == ["a.py"]
+
+    async def test_follows_changes(self, tree, index):
+        touch(tree, "src/app/new.py", "docs/guide/index.md")
+        await wait_for(lambda: "docs/guide/index.md" in index.find(tree, extension="md")["matches"])
+        assert "src/app/new.py" in index.find(tree, extension="py")["matches"]
+
+        os.rename(os.path.join(tree, "docs"), os.path.join(tree, "manual"))
+        await wait_for(lambda: "manual/guide/index.md" in index.find(tree, extension="md")["matches"])
+        assert "docs/guide/index.md" not in index.find(tree, extension="md")["matches"]
+
+    async def test_query_does_not_wait_for_watch_lock(self, tree, index):
+        # The loop holds the watch lock while reading inotify events; a query
+        # joining a fresh tree on a worker thread must not need it
+        with index._watch_lock:
+            index._tree = fileindex._Tree(dict(index._tree.directories))
+            result = await asyncio.wait_for(asyncio.to_thread(index.find, tree, extension="py"), 5)
+
+        assert matches(result) == matches(walk_and_find(tree, extension="py"))
+
+    async def test_snapshot_loaded_at_start(self, tree, tmp_path, index):
+        with gzip.open(tmp_path / "index.json.gz", "rt") as f:
+            assert json.load(f)["roots"] == [tree]
+
+        restarted = FileIndex([tree], snapshot=str(tmp_path / "index.json.gz"))
+        directories = restarted._load_snapshot()
+        assert directories is not None and os.path.join(tree, "src", "app") in directories
+        assert os.stat(tmp_path / "index.json.gz").st_mode & 0o777 == 0o600
+
+    async def test_snapshot_for_other_roots_ignored(self, tree, tmp_path, index):
+        other = FileIndex([str(tmp_path)], snapshot=str(tmp_path / "index.json.gz"))
+
+        assert other._load_snapshot() is None
+
+    async def test_one_process_per_snapshot(self, tree, tmp_path, index):
+        # As another worker of the same server would
+        standby = FileIndex([tree], snapshot=str(tmp_path / "index.json.gz"), rescan_seconds=0.05)
+        standby.start()
+        try:
+            await wait_for(lambda: standby.state == "standby")
+            assert standby.find(tree, extension="py") is None
+            assert standby._fd < 0
+
+            index.close()
+            await wait_for(lambda: standby.state == "ready")
+            assert standby.find(tree, extension="py") is not None
+        finally:
+            standby.close()
+
+    async def test_max_entries(self, tree):
+        index = FileIndex([tree], max_entries=3)
+        index.start()
+        try:
+            await wait_for(lambda: index.state == "ready")
+            assert index.status()["complete"] is False
+            assert index.status()["entries"] <= 3
+        finally:
+            index.close()
+
+    def test_nested_roots_deduplicated(self, tree):
+        index = FileIndex([tree, os.path.join(tree, "src"), tree + "-other"])
+
+        assert index.roots == [tree, tree + "-other"]
+
+
+class TestFindEndpoint:
+    def test_find_with_index(self, tree, tmp_path, make_config):
+        config = make_config(
+            tree, file_index=True, file_index_snapshot=str(tmp_path / "index.json.gz")
+        )
+        with TestClient(create_app(config)) as client:
+            client.post("/cd", json={"path": tree})
+            data = client.get("/files/find", params={"extension": "md", "type": "file"}).json()
+
+        assert data["status"] == "success"
+        assert data["matches"] == ["README.md"]
+
+    def test_invalid_type(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        response = client.get("/files/find", params={"path": tree, "type": "link"})
+
+        assert response.status_code == 422
@@ -0,0 +1,238 @@
+"""Tests for in-process file reads."""
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp import files
+from host_terminal_mcp.executor import OutputEncoding
+from host_terminal_mcp.files import FileReader, LineIndex
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return os.path.realpath(tmp_path)
+
+
+@pytest.fixture
+def numbered(directory):
+    """A file whose lines are "line 1" to "line 5000"."""
+    path = os.path.join(directory, "numbered.txt")
+    with open(path, "w") as f:
+        f.writelines(f"line {n}\n" for n in range(1, 5001))
+    return path
+
+
+def lines_of(content: str) -> list[str]:
+    return content.splitlines()
+
+
+class TestByteRanges:
+    def test_whole_file(self, directory):
+        path = os.path.join(directory, "a.txt")
+        with open(path, "w") as f:
+            f.write("hello\nworld\n")
+        result = FileReader(1000).read(path)
+
+        assert result.content == "hello\nworld\n"
+        assert result.size == 12
+        assert not result.truncated
+
+    def test_offset_and_length(self, numbered):
+        result = FileReader(1000).read(numbered, offset=7, length=6)
+
+        assert result.content == "line 2"
+        assert (result.offset, result.length) == (7, 6)
+
+    def test_negative_offset(self, numbered):
+        assert FileReader(1000).read(numbered, offset=-10).content == "line 5000\n"
+
+    def test_capped_at_max_bytes(self, numbered):
+        result = FileReader(10).read(numbered)
+
+        assert result.length == 10
+        assert result.truncated
+
+    def test_base64(self, directory):
+        path = os.path.join(directory, "bin")
+        with open(path, "wb") as f:
+            f.write(b"\x00\xff\x10")
+        result = FileReader(1000).read(path, encoding=OutputEncoding.BASE64)
+
+        assert result.content == "AP8Q"
+        assert result.to_dict()["encoding"] == "base64"
+
+    def test_empty_file(self, directory):
+        path = os.path.join(directory, "empty")
+        open(path, "w").close()
+
+        assert FileReader(1000).read(path).content == ""
+        assert FileReader(1000).read(path, start_line=1).total_lines == 0
+
+
+class TestLineRanges:
+    def test_range(self, numbered):
+        result = FileReader(100_000).read(numbered, start_line=2500, end_line=2502)
+
+        assert lines_of(result.content) == ["line 2500", "line 2501", "line 2502"]
+        assert (result.start_line, result.end_line) == (2500, 2502)
+
+    def test_from_end(self, numbered):
+        result = FileReader(100_000).read(numbered, start_line=-3)
+
+        assert lines_of(result.content) == ["line 4998", "line 4999", "line 5000"]
+        assert (result.start_line, result.end_line, result.total_lines) == (4998, 5000, 5000)
+
+    def test_head(self, numbered):
+        result = FileReader(100_000).read(numbered, end_line=2)
+
+        assert result.content == "line 1\nline 2\n"
+        # Only the start of the file was scanned
+        assert result.total_lines is None
+
+    def test_past_end(self, numbered):
+        result = FileReader(100_000).read(numbered, start_line=6000)
+
+        assert result.content == ""
+        assert result.end_line is None
+        assert result.total_lines == 5000
+
+    def test_truncated_on_whole_line(self, numbered):
+        result = FileReader(20).read(numbered, start_line=1)
+
+        assert result.content == "line 1\nline 2\n"
+        assert result.end_line == 2
+        assert result.truncated
+
+    def test_last_line_without_newline(self, directory):
+        path = os.path.join(directory, "partial")
+        with open(path, "w") as f:
+            f.write("a\nb")
+        result = FileReader(1000).read(path, start_line=-1)
+
+        assert result.content == "b"
+        assert (result.start_line, result.end_line, result.total_lines) == (2, 2, 2)
+
+    def test_conflicting_ranges_rejected(self, numbered):
+        with pytest.raises(ValueError):
+            FileReader(1000).read(numbered, offset=1, start_line=1)
+        with pytest.raises(ValueError):
+            FileReader(1000).read(numbered, start_line=0)
+
+    def test_directory_rejected(self, directory):
+        with pytest.raises(ValueError):
+            FileReader(1000).read(directory)
+
+
+class TestLineIndex:
+    def test_sparse_offsets_built_lazily(self, numbered):
+        reader = FileReader(100_000)
+        reader.read(numbered, start_line=3000, end_line=3000)
+        (index,) = reader._indexes.values()
+
+        # Indexed as far as the range, not the whole file
+        assert len(index.offsets) == 3000 // index.stride + 1
+        assert index.total_lines is None
+
+    def test_every_line_found_with_small_stride(self, numbered, monkeypatch):
+        # Small chunks make strides cross chunk boundaries
+        monkeypatch.setattr(files, "INDEX_CHUNK_SIZE", 100)
+        monkeypatch.setattr(files, "SKIP_CHUNK_SIZE", 10)
+        index = LineIndex(stride=7)
+        with open(numbered, "rb") as f:
+            fd, size, data = f.fileno(), os.fstat(f.fileno()).st_size, f.read()
+            for line in (0, 6, 7, 8, 1234, 4999):
+                offset = index.line_offset(fd, size, line)
+                assert data[offset:].split(b"\n", 1)[0] == f"line {line + 1}".encode()
+            assert index.line_offset(fd, size, 5000) is None
+            assert index.count_lines(fd, size) == 5000
+
+    def test_file_truncated_while_read(self, numbered, monkeypatch):
+        reader = FileReader(100_000)
+        index = reader._index
+
+        def truncate_then_index(path, st):
+            # As copytruncate log rotation would, after the file was opened
+            os.truncate(numbered, 0)
+            return index(path, st)
+
+        monkeypatch.setattr(reader, "_index", truncate_then_index)
+        result = reader.read(numbered, start_line=-10)
+
+        assert result.content == ""
+        assert result.total_lines == 0
+
+    def test_file_truncated_before_byte_range_read(self, numbered, monkeypatch):
+        fstat = os.fstat
+
+        def fstat_then_truncate(fd):
+            st = fstat(fd)
+            os.truncate(numbered, 100)
+            return st
+
+        monkeypatch.setattr(files.os, "fstat", fstat_then_truncate)
+        result = FileReader(100_000).read(numbered, offset=50)
+
+        assert result.size > 100
+        assert result.length == 50
+
+    def test_rebuilt_when_file_changes(self, numbered):
+        reader = FileReader(100_000)
+        reader.read(numbered, start_line=-1)
+        with open(numbered, "a") as f:
+            f.write("line 5001\n")
+        os.utime(numbered, ns=(0, 10**9))
+
+        assert reader.read(numbered, start_line=-1).content == "line 5001\n"
+        assert len(reader._indexes) == 1
+
+
+class TestReadFileTool:
+    async def test_read_lines(self, directory, numbered, make_config):
+        server = HostTerminalServer(make_config(directory))
+        server.executor.change_directory(directory)
+        result = await server._call_tool(
+            "read_file", {"path": "numbered.txt", "start_line": 10, "end_line": 11}
+        )
+
+        assert not result.isError
+        data = json.loads(result.content[0].text)
+        assert data["content"] == "line 10\nline 11\n"
+        assert data["path"] == numbered
+
+    async def test_symlink_out_of_allowed_directories(self, directory, make_config):
+        os.symlink("/etc/hostname", os.path.join(directory, "link"))
+        server = HostTerminalServer(make_config(directory))
+        result = await server._call_tool("read_file", {"path": os.path.join(directory, "link")})
+
+        assert result.isError
+
+    async def test_missing_file(self, directory, make_config):
+        server = HostTerminalServer(make_config(directory))
+        result = await server._call_tool("read_file", {"path": os.path.join(directory, "nope")})
+
+        assert result.isError
+        assert "No such file" in result.content[0].text
+
+
+class TestReadFileEndpoint:
+    def test_read_relative_to_session_directory(self, directory, numbered, make_config):
+        client = TestClient(create_app(make_config(directory)))
+        client.post("/cd", json={"path": directory})
+        data = client.get(
+            "/files/read", params={"path": "numbered.txt", "start_line": -1}
+        ).json()
+
+        assert data["status"] == "success"
+        assert data["content"] == "line 5000\n"
+        assert data["total_lines"] == 5000
+
+    def test_invalid_range(self, directory, numbered, make_config):
+        client = TestClient(create_app(make_config(directory)))
+        data = client.get("/files/read", params={"path": numbered, "start_line": 0}).json()
+
+        assert data["status"] == "error"
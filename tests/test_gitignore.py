@@ -0,0 +1,81 @@
+"""Tests for .gitignore matching."""
+
+import os
+
+import pytest
+
+from host_terminal_mcp.gitignore import IgnoreRules, descend, is_ignored, rules_for
+
+
+def ignored(lines, relative, is_dir=False):
+    return IgnoreRules("/repo", lines).match("/repo/" + relative, is_dir)
+
+
+class TestPatterns:
+    @pytest.mark.parametrize(
+        "lines, relative, is_dir, expected",
+        [
+            (["*.pyc"], "a.pyc", False, True),
+            (["*.pyc"], "src/deep/a.pyc", False, True),
+            (["*.pyc"], "a.py", False, None),
+            (["build/"], "src/build", True, True),
+            (["build/"], "src/build", False, None),
+            (["/dist"], "dist", True, True),
+            (["/dist"], "src/dist", True, None),
+            (["foo/bar"], "foo/bar", False, True),
+            (["foo/bar"], "x/foo/bar", False, None),
+            (["docs/**/*.md"], "docs/a/b/c.md", False, True),
+            (["docs/**/*.md"], "docs/c.md", False, True),
+            (["**/logs"], "a/b/logs", True, True),
+            (["out/**"], "out/x/y", False, True),
+            (["?.txt"], "a.txt", False, True),
+            (["?.txt"], "ab.txt", False, None),
+            (["[!a]b.txt"], "cb.txt", False, True),
+            (["[!a]b.txt"], "ab.txt", False, None),
+            (["\\#notes"], "#notes", False, True),
+            (["# comment", ""], "# comment", False, None),
+        ],
+    )
+    def test_match(self, lines, relative, is_dir, expected):
+        assert ignored(lines, relative, is_dir) is expected
+
+    def test_last_matching_line_wins(self):
+        assert ignored(["*.log", "!keep.log"], "keep.log") is False
+        assert ignored(["!keep.log", "*.log"], "keep.log") is True
+
+    def test_star_stays_within_component(self):
+        assert ignored(["src/*.py"], "src/a.py") is True
+        assert ignored(["src/*.py"], "src/sub/a.py") is None
+
+
+class TestStack:
+    def test_nested_file_overrides_parent(self, tmp_path):
+        root = os.path.realpath(tmp_path)
+        (tmp_path / ".gitignore").write_text("*.tmp\n")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / ".gitignore").write_text("!keep.tmp\n")
+
+        stack = descend(rules_for(root), os.path.join(root, "sub"))
+
+        assert is_ignored(stack, os.path.join(root, "sub", "x.tmp"), False)
+        assert not is_ignored(stack, os.path.join(root, "sub", "keep.tmp"), False)
+        assert not is_ignored(stack, os.path.join(root, "sub", "x.py"), False)
+
+    def test_parents_read_up_to_repository_root(self, tmp_path):
+        (tmp_path / "repo" / ".git").mkdir(parents=True)
+        (tmp_path / "repo" / ".gitignore").write_text("*.o\n")
+        (tmp_path / "repo" / "src").mkdir()
+        # Outside the repository, so not applied
+        (tmp_path / ".gitignore").write_text("*.c\n")
+        src = os.path.realpath(tmp_path / "repo" / "src")
+
+        stack = rules_for(src)
+
+        assert is_ignored(stack, os.path.join(src, "a.o"), False)
+        assert not is_ignored(stack, os.path.join(src, "a.c"), False)
+
+    def test_outside_repository_only_own_file(self, tmp_path):
+        (tmp_path / ".gitignore").write_text("*.c\n")
+        (tmp_path / "sub").mkdir()
+
+        assert rules_for(os.path.realpath(tmp_path / "sub")) == ()
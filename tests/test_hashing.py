@@ -0,0 +1,165 @@
+"""Tests for parallel, cached file hashing."""
+
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp import hashing
+from host_terminal_mcp.hashing import CHUNK_SIZE, FileHasher
+from host_terminal_mcp.http_server import create_app
+
+
+def write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Two small artifacts, a large one read in several chunks, and an empty file."""
+    root = os.path.realpath(tmp_path)
+    write(os.path.join(root, "dist", "app.whl"), b"wheel")
+    write(os.path.join(root, "dist", "app.tar.gz"), b"sdist")
+    write(os.path.join(root, "dist", "nested", "big.bin"), os.urandom(CHUNK_SIZE * 3 + 7))
+    write(os.path.join(root, "empty"), b"")
+    return root
+
+
+@pytest.fixture
+def hasher():
+    hasher = FileHasher(workers=4)
+    yield hasher
+    hasher.close()
+
+
+def by_path(result) -> dict[str, dict]:
+    return {entry["path"]: entry for entry in result["files"]}
+
+
+class TestHash:
+    def test_digests_match_hashlib(self, tree, hasher):
+        big = os.path.join(tree, "dist", "nested", "big.bin")
+        result = hasher.hash([big, os.path.join(tree, "empty")], algorithms=["sha256", "MD5"])
+
+        assert result["status"] == "success"
+        assert result["algorithms"] == ["sha256", "md5"]
+        with open(big, "rb") as f:
+            data = f.read()
+        files = by_path(result)
+        assert files[big]["sha256"] == sha256(data)
+        assert files[big]["md5"] == hashlib.md5(data).hexdigest()
+        assert files[os.path.join(tree, "empty")]["sha256"] == sha256(b"")
+
+    def test_directory_hashed_recursively_in_order(self, tree, hasher):
+        result = hasher.hash([os.path.join(tree, "dist")])
+
+        assert [os.path.relpath(entry["path"], tree) for entry in result["files"]] == [
+            "dist/app.tar.gz",
+            "dist/app.whl",
+            "dist/nested/big.bin",
+        ]
+        assert by_path(result)[os.path.join(tree, "dist", "app.whl")]["sha256"] == sha256(b"wheel")
+
+    def test_unchanged_files_cached(self, tree, hasher):
+        first = hasher.hash([tree])
+        second = hasher.hash([tree])
+
+        assert first["cached"] == 0
+        assert first["bytes_read"] == first["bytes"]
+        assert second["cached"] == 4
+        assert second["bytes_read"] == 0
+        assert second["files"] == first["files"]
+
+    def test_changed_file_rehashed(self, tree, hasher):
+        path = os.path.join(tree, "dist", "app.whl")
+        hasher.hash([path])
+        write(path, b"rebuilt wheel")
+        result = hasher.hash([path])
+
+        assert result["cached"] == 0
+        assert result["files"][0]["sha256"] == sha256(b"rebuilt wheel")
+
+    def test_new_algorithm_reads_again(self, tree, hasher):
+        path = os.path.join(tree, "dist", "app.whl")
+        hasher.hash([path], algorithms=["sha256"])
+
+        assert hasher.hash([path], algorithms=["sha1"])["cached"] == 0
+        assert hasher.hash([path], algorithms=["sha1", "sha256"])["cached"] == 1
+
+    def test_refresh(self, tree, hasher):
+        hasher.hash([tree])
+
+        assert hasher.hash([tree], refresh=True)["cached"] == 0
+
+    def test_limit(self, tree, hasher):
+        result = hasher.hash([tree], limit=2)
+
+        assert result["count"] == 2
+        assert result["truncated"] is True
+
+    def test_missing_file_reported(self, tree, hasher):
+        missing = os.path.join(tree, "missing")
+        result = hasher.hash([missing, os.path.join(tree, "empty")])
+
+        assert result["count"] == 1
+        assert result["errors"] == [{"path": missing, "error": "No such file or directory"}]
+
+    def test_exclude(self, tree, hasher):
+        result = hasher.hash([tree], exclude=lambda path: path.endswith("nested"))
+
+        assert result["count"] == 3
+
+    def test_file_truncated_while_hashed(self, tree, hasher, monkeypatch):
+        big = os.path.join(tree, "dist", "nested", "big.bin")
+
+        class TruncatedAfterFirstRead(io.FileIO):
+            def readinto(self, buffer):
+                read = super().readinto(buffer)
+                # As copytruncate log rotation would, mid-hash
+                os.truncate(big, 0)
+                return read
+
+        monkeypatch.setattr(
+            hashing,
+            "open",
+            lambda file, *args, **kwargs: TruncatedAfterFirstRead(file),
+            raising=False,
+        )
+        result = hasher.hash([big])
+        monkeypatch.undo()
+
+        assert result["status"] == "success"
+        assert result["count"] == 1
+        # The digest of a file that changed under the read is not cached
+        assert hasher.hash([big])["cached"] == 0
+
+    def test_unknown_algorithm(self, tree, hasher):
+        with pytest.raises(ValueError, match="Unknown algorithms: crc32"):
+            hasher.hash([tree], algorithms=["crc32"])
+
+
+class TestHashEndpoint:
+    def test_hash(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        client.post("/cd", json={"path": tree})
+        data = client.get(
+            "/files/hash", params={"paths": ["dist/app.whl"], "algorithms": ["sha1", "sha256"]}
+        ).json()
+
+        assert data["status"] == "success"
+        assert data["files"][0]["sha1"] == hashlib.sha1(b"wheel").hexdigest()
+
+    def test_unknown_algorithm(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        data = client.get("/files/hash", params={"paths": tree, "algorithms": "crc32"}).json()
+
+        assert data["status"] == "error"
+        assert "sha256" in data["error"]
@@ -1,10 +1,13 @@
 """Tests for HTTP server transport."""
 
+import base64
+
 import pytest
 from fastapi.testclient import TestClient
 
 from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
-from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.http_server import CONFIG_ENV_VAR, create_app, create_app_from_env
+from host_terminal_mcp.sessions import SQLiteSessionStore
 
 
 @pytest.fixture
@@ -17,6 +20,7 @@ def allowlist_app():
             CommandPattern(pattern="echo ", description="Echo"),
             CommandPattern(pattern="pwd", description="Working dir"),
             CommandPattern(pattern="cat ", description="Cat files"),
+            CommandPattern(pattern="printf ", description="Printf"),
         ],
         blocked_commands=[
             CommandPattern(
@@ -171,6 +175,107 @@ class TestExecute:
         assert data["truncated"] is True
 
 
+class TestExecuteOutputEncoding:
+    def test_default_encoding_is_text(self, client):
+        data = client.post("/execute", json={"command": "echo hi"}).json()
+        assert data["output_encoding"] == "text"
+
+    def test_base64_encoding(self, client):
+        resp = client.post(
+            "/execute",
+            json={"command": "printf '\\x00\\xffdata'", "output_encoding": "base64"},
+        )
+        data = resp.json()
+        assert data["status"] == "success"
+        assert data["output_encoding"] == "base64"
+        assert base64.b64decode(data["stdout"]) == b"\x00\xffdata"
+
+    def test_raw_encoding_streams_bytes(self, client):
+        resp = client.post(
+            "/execute",
+            json={
+                "command": "printf '\\x1f\\x8b\\x00\\xff'",
+                "working_directory": "/tmp",
+                "output_encoding": "raw",
+            },
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/octet-stream"
+        assert "tmp" in resp.headers["x-working-directory"]
+        assert resp.content == b"\x1f\x8b\x00\xff"
+
+    def test_raw_encoding_still_permission_checked(self, client):
+        resp = client.post("/execute", json={"command": "sudo ls", "output_encoding": "raw"})
+        data = resp.json()
+        assert data["status"] == "error"
+        assert "not allowed" in data["error"].lower()
+
+    def test_invalid_encoding_rejected(self, client):
+        resp = client.post("/execute", json={"command": "echo hi", "output_encoding": "utf16"})
+        assert resp.status_code == 422
+
+
+# ---------- /execute/batch ----------
+
+
+class TestExecuteBatch:
+    def test_batch_results_in_order(self, client):
+        resp = client.post(
+            "/execute/batch",
+            json={
+                "commands": [
+                    {"command": "echo one"},
+                    {"command": "pwd", "working_directory": "/tmp"},
+                    {"command": "echo three"},
+                ]
+            },
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["status"] == "success"
+        results = data["results"]
+        assert len(results) == 3
+        assert "one" in results[0]["stdout"]
+        assert "tmp" in results[1]["stdout"]
+        assert "three" in results[2]["stdout"]
+
+    def test_denied_item_does_not_fail_batch(self, client):
+        resp = client.post(
+            "/execute/batch",
+            json={"commands": [{"command": "sudo ls"}, {"command": "echo ok"}]},
+        )
+        data = resp.json()
+        assert data["status"] == "success"
+        assert data["results"][0]["status"] == "error"
+        assert "not allowed" in data["results"][0]["error"].lower()
+        assert data["results"][1]["status"] == "success"
+        assert "ok" in data["results"][1]["stdout"]
+
+    def test_failed_item_does_not_fail_batch(self, client):
+        resp = client.post(
+            "/execute/batch",
+            json={"commands": [{"command": "ls /nonexistent_dir_xyz"}, {"command": "echo ok"}]},
+        )
+        results = resp.json()["results"]
+        assert results[0]["exit_code"] != 0
+        assert results[1]["exit_code"] == 0
+
+    def test_needs_approval_item_in_ask_mode(self, ask_client):
+        resp = ask_client.post(
+            "/execute/batch",
+            json={"commands": [{"command": "curl example.com"}, {"command": "ls /tmp"}]},
+        )
+        results = resp.json()["results"]
+        assert results[0]["status"] == "needs_approval"
+        assert results[1]["status"] == "success"
+
+    def test_empty_batch(self, client):
+        resp = client.post("/execute/batch", json={"commands": []})
+        data = resp.json()
+        assert data["status"] == "error"
+        assert "no commands" in data["error"].lower()
+
+
 # ---------- /cd ----------
 
 
@@ -209,6 +314,104 @@ class TestCwd:
         assert len(data["current_directory"]) > 0
 
 
+# ---------- sessions ----------
+
+
+class TestSessions:
+    def test_cd_isolated_between_sessions(self, client):
+        client.post("/cd", json={"path": "/tmp"}, headers={"X-Session-Id": "agent-a"})
+        client.post("/cd", json={"path": "/"}, headers={"X-Session-Id": "agent-b"})
+
+        cwd_a = client.get("/cwd", headers={"X-Session-Id": "agent-a"}).json()
+        cwd_b = client.get("/cwd", headers={"X-Session-Id": "agent-b"}).json()
+        assert "tmp" in cwd_a["current_directory"]
+        assert cwd_b["current_directory"] == "/"
+
+    def test_execute_runs_in_session_directory(self, client):
+        headers = {"X-Session-Id": "agent-a"}
+        client.post("/cd", json={"path": "/tmp"}, headers=headers)
+        data = client.post("/execute", json={"command": "pwd"}, headers=headers).json()
+        assert "tmp" in data["stdout"]
+
+        other = client.post(
+            "/execute", json={"command": "pwd"}, headers={"X-Session-Id": "agent-b"}
+        ).json()
+        assert "tmp" not in other["stdout"]
+
+    def test_session_cookie(self, client):
+        client.cookies.set("host_terminal_session", "cookie-agent")
+        client.post("/cd", json={"path": "/tmp"})
+        client.cookies.clear()
+
+        assert "tmp" not in client.get("/cwd").json()["current_directory"]
+        client.cookies.set("host_terminal_session", "cookie-agent")
+        assert "tmp" in client.get("/cwd").json()["current_directory"]
+
+    def test_batch_uses_session_directory(self, client):
+        headers = {"X-Session-Id": "agent-a"}
+        client.post("/cd", json={"path": "/tmp"}, headers=headers)
+        resp = client.post(
+            "/execute/batch", json={"commands": [{"command": "pwd"}]}, headers=headers
+        )
+        assert "tmp" in resp.json()["results"][0]["stdout"]
+
+    def test_invalid_session_id(self, client):
+        data = client.get("/cwd", headers={"X-Session-Id": "bad id!"}).json()
+        assert data["status"] == "error"
+        assert "session" in data["error"].lower()
+
+    def test_shared_session_store(self, tmp_path):
+        config = Config(
+            allowed_commands=[CommandPattern(pattern="pwd", description="Working dir")],
+            allowed_directories=["/tmp", "/"],
+            session_store=str(tmp_path / "sessions.db"),
+        )
+        worker_a = TestClient(create_app(config))
+        worker_b = TestClient(create_app(config))
+        headers = {"X-Session-Id": "agent-a"}
+
+        worker_a.post("/cd", json={"path": "/tmp"}, headers=headers)
+        data = worker_b.post("/execute", json={"command": "pwd"}, headers=headers).json()
+        assert "tmp" in data["stdout"]
+
+    def test_session_store_closed_on_shutdown(self, tmp_path, monkeypatch):
+        closed = []
+        close = SQLiteSessionStore.close
+
+        def record(store):
+            closed.append(store)
+            close(store)
+
+        monkeypatch.setattr(SQLiteSessionStore, "close", record)
+        config = Config(allowed_directories=["/tmp"], session_store=str(tmp_path / "sessions.db"))
+        with TestClient(create_app(config)) as client:
+            client.get("/cwd", headers={"X-Session-Id": "agent-a"})
+
+        assert len(closed) == 1
+
+    def test_health_reports_sessions(self, client):
+        client.get("/cwd", headers={"X-Session-Id": "agent-a"})
+        assert client.get("/health").json()["active_sessions"] == 1
+
+
+# ---------- worker factory ----------
+
+
+class TestAppFromEnv:
+    def test_rebuilds_config_from_environment(self, monkeypatch):
+        config = Config(
+            permission_mode=PermissionMode.ASK,
+            allowed_commands=[CommandPattern(pattern="echo ", description="Echo")],
+            allowed_directories=["/tmp"],
+        )
+        monkeypatch.setenv(CONFIG_ENV_VAR, config.model_dump_json())
+        client = TestClient(create_app_from_env())
+
+        assert client.get("/health").json()["permission_mode"] == "ask"
+        data = client.post("/execute", json={"command": "echo hi", "working_directory": "/tmp"})
+        assert "hi" in data.json()["stdout"]
+
+
 # ---------- /permissions ----------
 
 
@@ -219,7 +422,7 @@ class TestPermissions:
         data = resp.json()
         assert data["status"] == "success"
         assert data["permission_mode"] == "allowlist"
-        assert data["num_allowed_patterns"] == 4
+        assert data["num_allowed_patterns"] == 5
         assert data["num_blocked_patterns"] == 2
         assert data["timeout_seconds"] == 10
         assert isinstance(data["allowed_directories"], list)
@@ -0,0 +1,146 @@
+"""Tests for in-process directory listings."""
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.listing import list_directory
+from host_terminal_mcp.server import HostTerminalServer
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small repository: src/pkg/mod.py, a .gitignore'd build/ and a dotfile."""
+    root = os.path.realpath(tmp_path)
+    for directory in (".git", "src/pkg", "build", "docs"):
+        os.makedirs(os.path.join(root, directory))
+    files = {
+        ".gitignore": "build/\n*.log\n",
+        ".env": "TOKEN=x\n",
+        "README.md": "# readme\n",
+        "debug.log": "log\n",
+        "src/main.py": "print('hi')\n",
+        "src/pkg/mod.py": "x = 1\n",
+        "docs/big.txt": "x" * 1000,
+    }
+    for name, content in files.items():
+        with open(os.path.join(root, name), "w") as f:
+            f.write(content)
+    os.symlink("src/main.py", os.path.join(root, "main"))
+    return root
+
+
+def paths(listing) -> list[str]:
+    return [entry["path"] for entry in listing.entries]
+
+
+class TestListDirectory:
+    def test_one_level(self, tree):
+        listing = list_directory(tree)
+
+        assert paths(listing) == ["README.md", "docs", "main", "src"]
+        assert listing.directories == 2
+        assert not listing.truncated
+
+    def test_entry_fields(self, tree):
+        entries = {entry["path"]: entry for entry in list_directory(tree).entries}
+
+        assert entries["README.md"] == {"path": "README.md", "type": "file", "size": 9}
+        assert entries["docs"] == {"path": "docs", "type": "dir"}
+        assert entries["main"] == {"path": "main", "type": "link", "target": "src/main.py"}
+
+    def test_depth_is_depth_first_and_sorted(self, tree):
+        listing = list_directory(tree, depth=3)
+
+        assert paths(listing) == [
+            "README.md",
+            "docs",
+            "docs/big.txt",
+            "main",
+            "src",
+            "src/main.py",
+            "src/pkg",
+            "src/pkg/mod.py",
+        ]
+
+    def test_without_gitignore_and_hidden(self, tree):
+        listing = list_directory(tree, use_gitignore=False, show_hidden=True)
+
+        assert {".git", ".gitignore", ".env", "build", "debug.log"} <= set(paths(listing))
+
+    def test_hidden_does_not_show_git(self, tree):
+        assert ".git" not in paths(list_directory(tree, show_hidden=True))
+
+    def test_ignore_patterns(self, tree):
+        listing = list_directory(tree, depth=3, ignore=["docs/", "*.py"])
+
+        assert paths(listing) == ["README.md", "main", "src", "src/pkg"]
+
+    def test_sort_by_size(self, tree):
+        # The link's size is the length of its target, 11 bytes
+        listing = list_directory(tree, sort="size", ignore=["*/"])
+        assert paths(listing) == ["main", "README.md"]
+
+        listing = list_directory(tree, sort="size", reverse=True, ignore=["*/"])
+        assert paths(listing) == ["README.md", "main"]
+
+    def test_long(self, tree):
+        entry = list_directory(tree, long=True).entries[0]
+
+        assert entry["mode"].startswith("-rw")
+        assert entry["mtime"] > 0
+
+    def test_max_entries(self, tree):
+        listing = list_directory(tree, depth=3, max_entries=5)
+
+        assert len(listing.entries) == 5
+        assert listing.truncated
+
+    def test_exclude(self, tree):
+        listing = list_directory(tree, depth=2, exclude=lambda path: path.endswith("pkg"))
+
+        assert "src/pkg" not in paths(listing)
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [{"depth": 0}, {"depth": 100}, {"sort": "color"}, {"max_entries": 0}],
+    )
+    def test_invalid_arguments(self, tree, arguments):
+        with pytest.raises(ValueError):
+            list_directory(tree, **arguments)
+
+    def test_file_rejected(self, tree):
+        with pytest.raises(ValueError, match="Not a directory"):
+            list_directory(os.path.join(tree, "README.md"))
+
+
+class TestListDirectoryTool:
+    async def test_current_directory_by_default(self, tree, make_config):
+        server = HostTerminalServer(make_config(tree))
+        server.executor.change_directory(tree)
+        result = await server._call_tool("list_directory", {"depth": 2})
+
+        data = json.loads(result.content[0].text)
+        assert data["path"] == tree
+        assert "src/main.py" in [entry["path"] for entry in data["entries"]]
+
+
+class TestListEndpoint:
+    def test_list_with_ignore(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        client.post("/cd", json={"path": tree})
+        data = client.get(
+            "/files/list", params={"depth": 2, "ignore": ["docs/", "src/"]}
+        ).json()
+
+        assert data["status"] == "success"
+        assert [entry["path"] for entry in data["entries"]] == ["README.md", "main"]
+
+    def test_invalid_depth(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        data = client.get("/files/list", params={"path": tree, "depth": 0}).json()
+
+        assert data["status"] == "error"
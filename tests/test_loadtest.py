@@ -0,0 +1,97 @@
+"""Tests for the HTTP load generator."""
+
+import os
+
+import httpx
+import pytest
+
+from host_terminal_mcp.config import load_config
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.loadtest import (
+    OPERATIONS,
+    parse_mix,
+    percentile,
+    rss_bytes,
+    run_load,
+    write_config,
+    write_data_file,
+)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = os.path.realpath(tmp_path)
+    write_data_file(directory, 10_000)
+    return directory
+
+
+def make_client(directory, **overrides) -> httpx.AsyncClient:
+    config = load_config(write_config(directory, concurrency=4))
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app(config)), base_url="http://test"
+    )
+
+
+class TestHelpers:
+    def test_parse_mix(self):
+        assert parse_mix("echo=3, cat=1,cd") == {"echo": 3.0, "cat": 1.0, "cd": 1.0}
+
+    @pytest.mark.parametrize("text", ["rm=1", "echo=x", "echo=0", "echo=-1"])
+    def test_parse_mix_rejects(self, text):
+        with pytest.raises(ValueError):
+            parse_mix(text)
+
+    def test_percentile(self):
+        values = [float(n) for n in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([7.0], 95) == 7
+
+    def test_data_file_size(self, directory):
+        assert os.path.getsize(os.path.join(directory, "loadtest.dat")) == 10_000
+
+    def test_rss_of_this_process(self):
+        assert rss_bytes(os.getpid()) > 1024 * 1024
+
+
+class TestRunLoad:
+    async def test_every_operation_succeeds(self, directory):
+        mix = dict.fromkeys(OPERATIONS, 1.0)
+        async with make_client(directory) as client:
+            result = await run_load(
+                client, directory, mix, concurrency=4, requests=60, sleep_seconds=0.01, seed=1
+            )
+
+        summary = result.summary()
+        assert summary["total"]["requests"] == 60
+        assert summary["total"]["errors"] == 0, summary["total"]["error_kinds"]
+        assert set(summary["operations"]) == set(OPERATIONS)
+        assert summary["total"]["p50_ms"] <= summary["total"]["p99_ms"]
+        assert "total" in result.format_report()
+
+    async def test_denied_commands_counted_as_errors(self, directory):
+        async with make_client(directory, allowed_commands=[]) as client:
+            result = await run_load(client, directory, {"echo": 1.0}, concurrency=2, requests=4)
+
+        stats = result.operations["echo"]
+        assert stats.requests == 4
+        assert sum(stats.errors.values()) == 4
+        assert result.summary()["total"]["error_rate"] == 1.0
+
+    async def test_rss_sampled(self, directory):
+        async with make_client(directory) as client:
+            result = await run_load(
+                client,
+                directory,
+                {"cd": 1.0},
+                concurrency=1,
+                duration=0.3,
+                sample_rss=lambda: 42,
+                sample_interval=0.1,
+            )
+
+        assert len(result.rss) >= 2
+        assert all(size == 42 for _, size in result.rss)
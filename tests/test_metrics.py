@@ -0,0 +1,180 @@
+"""Tests for in-process metrics."""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.metrics import MetricsRegistry, write_metrics_file
+from host_terminal_mcp.server import HostTerminalServer
+
+
+def make_config(**overrides) -> Config:
+    settings = {
+        "permission_mode": PermissionMode.ALLOWLIST,
+        "allowed_commands": [
+            CommandPattern(pattern="echo ", description="Echo"),
+            CommandPattern(pattern="sleep ", description="Sleep"),
+            CommandPattern(pattern="seq ", description="Sequence"),
+        ],
+        "blocked_commands": [CommandPattern(pattern="sudo ", description="Superuser")],
+        "allowed_directories": ["/tmp"],
+        "timeout_seconds": 5,
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+@pytest.fixture
+def executor():
+    return CommandExecutor(make_config())
+
+
+class TestRegistry:
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests.", ["path"])
+        gauge = registry.gauge("in_flight", "In flight.")
+        counter.inc(path="/a")
+        counter.inc(2, path="/b")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        assert registry.render() == (
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{path="/a"} 1\n'
+            'requests_total{path="/b"} 2\n'
+            "# HELP in_flight In flight.\n"
+            "# TYPE in_flight gauge\n"
+            "in_flight 1\n"
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1])
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()[2:]
+        assert lines == [
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 5.65",
+            "latency_seconds_count 4",
+        ]
+
+    def test_label_values_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c", "C.", ["pattern"]).inc(pattern='a\\b "c"\n')
+
+        assert 'c{pattern="a\\\\b \\"c\\"\\n"} 1' in registry.render()
+
+    def test_label_names_enforced(self):
+        counter = MetricsRegistry().counter("c", "C.", ["pattern"])
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+
+    def test_duplicate_names_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("c", "C.")
+        with pytest.raises(ValueError):
+            registry.gauge("c", "C.")
+
+    def test_write_metrics_file(self, tmp_path):
+        path = tmp_path / "host_terminal.prom"
+        write_metrics_file("a 1\n", str(path))
+        write_metrics_file("a 2\n", str(path))
+
+        assert path.read_text() == "a 2\n"
+        assert os.listdir(tmp_path) == ["host_terminal.prom"]
+
+
+class TestExecutorMetrics:
+    async def test_execution_recorded_by_pattern(self, executor):
+        assert executor.check_permission("echo hi") == (
+            True,
+            "Command matches allowed pattern: Echo",
+        )
+        await executor.execute("echo hi", "/tmp")
+        await asyncio.sleep(0.05)
+        metrics = executor.metrics
+
+        assert metrics.permission_check_seconds.count(outcome="allowed", pattern="echo ") == 1
+        assert metrics.spawn_seconds.count(pattern="echo ") == 1
+        assert metrics.execution_seconds.count(pattern="echo ") == 1
+        assert metrics.output_bytes.value(pattern="echo ", stream="stdout") == 3
+        assert metrics.active_subprocesses.value(pattern="echo ") == 0
+
+    async def test_active_subprocesses(self, executor):
+        task = asyncio.ensure_future(executor.execute("sleep 0.5", "/tmp"))
+        await asyncio.sleep(0.2)
+        assert executor.metrics.active_subprocesses.value(pattern="sleep ") == 1
+        await task
+        await asyncio.sleep(0.05)
+        assert executor.metrics.active_subprocesses.value(pattern="sleep ") == 0
+
+    async def test_denials_by_reason(self):
+        executor = CommandExecutor(make_config())
+        executor.check_permission("sudo ls")
+        executor.check_permission("python3")
+        await executor.execute("echo hi", "/etc")
+        executor.config.permission_mode = PermissionMode.ASK
+        executor.check_permission("python3")
+        denials = executor.metrics.denials
+
+        assert denials.value(reason="blocked", pattern="sudo ") == 1
+        assert denials.value(reason="not_allowed", pattern="other") == 1
+        assert denials.value(reason="directory", pattern="echo ") == 1
+        assert denials.value(reason="needs_approval", pattern="other") == 1
+
+    async def test_timeouts_and_truncations(self):
+        executor = CommandExecutor(make_config(timeout_seconds=1, max_output_size=10))
+        await executor.execute("sleep 5", "/tmp")
+        await executor.execute("seq 1 100", "/tmp")
+
+        assert executor.metrics.timeouts.value(pattern="sleep ") == 1
+        assert executor.metrics.truncations.value(pattern="seq ") == 1
+
+    async def test_batch_queue_wait(self):
+        executor = CommandExecutor(make_config(max_parallel_commands=1))
+        await executor.execute_batch([("sleep 0.2", "/tmp"), ("sleep 0.2", "/tmp")])
+        queue_wait = executor.metrics.queue_wait_seconds
+
+        assert queue_wait.count(pattern="sleep ") == 2
+        assert queue_wait.sum(pattern="sleep ") >= 0.15
+
+
+class TestEndpoints:
+    def test_http_metrics(self):
+        client = TestClient(create_app(make_config()))
+        client.post("/execute", json={"command": "echo hi", "working_directory": "/tmp"})
+        client.post("/execute", json={"command": "rm -rf /tmp/x"})
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'host_terminal_execution_seconds_count{pattern="echo "} 1' in body
+        assert 'host_terminal_denials_total{reason="not_allowed",pattern="other"} 1' in body
+        assert "# TYPE host_terminal_spawn_seconds histogram" in body
+
+    async def test_stdio_metrics_file(self, tmp_path):
+        path = tmp_path / "metrics.prom"
+        server = HostTerminalServer(make_config(metrics_file=str(path)))
+        await server._handle_execute_command({"command": "echo hi", "working_directory": "/tmp"})
+        server.write_metrics()
+
+        assert 'host_terminal_spawn_seconds_count{pattern="echo "} 1' in path.read_text()
+
+    def test_metrics_file_off_by_default(self, tmp_path):
+        server = HostTerminalServer(make_config())
+        server.write_metrics()
+
+        assert os.listdir(tmp_path) == []
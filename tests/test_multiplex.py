@@ -0,0 +1,305 @@
+"""Tests for multiplexed command streams over the /ws WebSocket."""
+
+import base64
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.http_server import create_app
+
+
+def make_client(**overrides) -> TestClient:
+    settings = {
+        "permission_mode": PermissionMode.ALLOWLIST,
+        "allowed_commands": [
+            CommandPattern(pattern="echo ", description="Echo"),
+            CommandPattern(pattern="printf ", description="Printf"),
+            CommandPattern(pattern="cat", description="Cat"),
+            CommandPattern(pattern="sleep ", description="Sleep"),
+            CommandPattern(pattern="seq ", description="Sequence"),
+            CommandPattern(pattern="pwd", description="Print directory"),
+            CommandPattern(pattern="test ", description="Test"),
+            CommandPattern(pattern="stty ", description="Terminal settings"),
+        ],
+        "allowed_directories": ["/tmp", "/"],
+        "timeout_seconds": 10,
+    }
+    settings.update(overrides)
+    return TestClient(create_app(Config(**settings)))
+
+
+@pytest.fixture
+def client():
+    return make_client()
+
+
+def collect(ws, stream_ids):
+    """Read frames until every stream in stream_ids has exited or errored."""
+    frames = {stream_id: [] for stream_id in stream_ids}
+    pending = set(stream_ids)
+    while pending:
+        frame = ws.receive_json()
+        frames[frame["id"]].append(frame)
+        if frame["type"] in ("exit", "error"):
+            pending.discard(frame["id"])
+    return frames
+
+
+def output(frames, name="stdout"):
+    return "".join(f["data"] for f in frames if f["type"] == name)
+
+
+class TestStreams:
+    def test_run_command(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "echo hello"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert frames[0] == {"type": "started", "id": "a", "working_directory": os.path.expanduser("~")}
+        assert output(frames) == "hello\n"
+        assert frames[-1] == {
+            "type": "exit",
+            "id": "a",
+            "return_code": 0,
+            "timed_out": False,
+            "cancelled": False,
+        }
+
+    def test_concurrent_streams_on_one_connection(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "slow", "command": "sleep 0.5; echo slow"})
+            ws.send_json({"type": "start", "id": "fast", "command": "echo fast"})
+            order = []
+            frames = {"slow": [], "fast": []}
+            while len(order) < 2:
+                frame = ws.receive_json()
+                frames[frame["id"]].append(frame)
+                if frame["type"] == "exit":
+                    order.append(frame["id"])
+
+        assert order == ["fast", "slow"]
+        assert output(frames["slow"]) == "slow\n"
+        assert output(frames["fast"]) == "fast\n"
+
+    def test_stderr_and_exit_code(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "echo oops >&2; exit 3"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert output(frames, "stderr") == "oops\n"
+        assert frames[-1]["return_code"] == 3
+
+    def test_large_output_complete_and_ordered(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "seq 1 100000"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert output(frames) == "".join(f"{i}\n" for i in range(1, 100001))
+
+    def test_working_directory(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "pwd", "working_directory": "/tmp"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert output(frames) == "/tmp\n"
+
+    def test_uses_session_directory(self, client):
+        headers = {"X-Session-Id": "ws-session"}
+        client.post("/cd", json={"path": "/tmp"}, headers=headers)
+        with client.websocket_connect("/ws", headers=headers) as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "pwd"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert output(frames) == "/tmp\n"
+
+    def test_base64_output(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json(
+                {"type": "start", "id": "a", "command": "printf 'a\\377b'", "output_encoding": "base64"}
+            )
+            frames = collect(ws, ["a"])["a"]
+
+        data = b"".join(base64.b64decode(f["data"]) for f in frames if f["type"] == "stdout")
+        assert data == b"a\xffb"
+
+
+class TestStdin:
+    def test_stdin_then_eof(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "cat"})
+            ws.send_json({"type": "stdin", "id": "a", "data": "line one\n"})
+            ws.send_json(
+                {"type": "stdin", "id": "a", "data": base64.b64encode(b"\x00two\n").decode(), "encoding": "base64"}
+            )
+            ws.send_json({"type": "stdin", "id": "a", "eof": True})
+            frames = collect(ws, ["a"])["a"]
+
+        assert output(frames) == "line one\n\x00two\n"
+        assert frames[-1]["return_code"] == 0
+
+    def test_stdin_unknown_stream(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "stdin", "id": "missing", "data": "x"})
+            frame = ws.receive_json()
+
+        assert frame["type"] == "error"
+        assert "No such stream" in frame["error"]
+
+
+class TestCancelAndLimits:
+    def test_cancel(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "sleep 30"})
+            assert ws.receive_json()["type"] == "started"
+            start = time.monotonic()
+            ws.send_json({"type": "cancel", "id": "a"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert time.monotonic() - start < 5
+        assert frames[-1]["cancelled"] is True
+        assert frames[-1]["return_code"] != 0
+
+    def test_timeout(self):
+        client = make_client(timeout_seconds=1)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "sleep 10"})
+            frames = collect(ws, ["a"])["a"]
+
+        assert frames[-1]["timed_out"] is True
+
+    def test_disconnect_kills_commands(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "echo $$; exec sleep 30"})
+            frames = []
+            while not output(frames):
+                frames.append(ws.receive_json())
+            pid = int(output(frames))
+
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_stream_limit(self):
+        client = make_client(max_streams_per_connection=1)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "sleep 30"})
+            ws.send_json({"type": "start", "id": "b", "command": "echo hi"})
+            frames = []
+            while not any(f["id"] == "b" for f in frames):
+                frames.append(ws.receive_json())
+            ws.send_json({"type": "cancel", "id": "a"})
+
+        error = next(f for f in frames if f["id"] == "b")
+        assert error["type"] == "error"
+        assert "Too many concurrent commands" in error["error"]
+
+    def test_duplicate_stream_id(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "sleep 30"})
+            ws.send_json({"type": "start", "id": "a", "command": "echo hi"})
+            frames = [ws.receive_json(), ws.receive_json()]
+            ws.send_json({"type": "cancel", "id": "a"})
+
+        assert {"type": "error", "id": "a", "status": "error", "error": "Stream id already in use"} in frames
+
+
+class TestRejections:
+    def test_denied_command(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "rm -rf /tmp/x"})
+            frame = ws.receive_json()
+
+        assert frame["type"] == "error"
+        assert frame["status"] == "error"
+        assert "not allowed" in frame["error"]
+
+    def test_needs_approval(self):
+        client = make_client(permission_mode=PermissionMode.ASK)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "uname -a"})
+            frame = ws.receive_json()
+
+        assert frame["type"] == "error"
+        assert frame["status"] == "needs_approval"
+        assert frame["command"] == "uname -a"
+
+    def test_directory_not_allowed(self):
+        client = make_client(allowed_directories=["/tmp"])
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "pwd", "working_directory": "/etc"})
+            frame = ws.receive_json()
+
+        assert "Working directory not allowed" in frame["error"]
+
+    def test_invalid_frames_keep_connection_open(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text("not json")
+            assert ws.receive_json()["error"] == "Invalid JSON"
+            ws.send_json({"type": "start", "command": "echo hi"})
+            assert ws.receive_json()["error"] == "Missing stream id"
+            ws.send_json({"type": "bogus", "id": "a"})
+            assert "Unknown message type" in ws.receive_json()["error"]
+            ws.send_json({"type": "start", "id": "a", "command": "echo hi", "output_encoding": "raw"})
+            assert "output_encoding" in ws.receive_json()["error"]
+            ws.send_json({"type": "start", "id": "b", "command": "echo still open"})
+            frames = collect(ws, ["b"])["b"]
+
+        assert output(frames) == "still open\n"
+
+    def test_invalid_session_closes(self, client):
+        with client.websocket_connect("/ws", headers={"X-Session-Id": "bad id!"}) as ws:
+            frame = ws.receive_json()
+
+        assert frame["type"] == "error"
+        assert "Invalid session id" in frame["error"]
+
+
+class TestPtyStreams:
+    def test_pty_stream(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json(
+                {
+                    "type": "start",
+                    "id": "t",
+                    "command": "test -t 1 && stty size",
+                    "pty": {"rows": 30, "cols": 90},
+                }
+            )
+            frames = collect(ws, ["t"])["t"]
+
+        assert output(frames) == "30 90\r\n"
+        assert frames[-1]["return_code"] == 0
+
+    def test_pty_input_resize_and_eof(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json(
+                {"type": "start", "id": "t", "command": "cat && stty size", "pty": True}
+            )
+            ws.send_json({"type": "stdin", "id": "t", "data": "typed\n"})
+            ws.send_json({"type": "resize", "id": "t", "rows": 40, "cols": 100})
+            ws.send_json({"type": "stdin", "id": "t", "eof": True})
+            frames = collect(ws, ["t"])["t"]
+
+        text = output(frames)
+        assert "typed" in text
+        assert text.endswith("40 100\r\n")
+
+    def test_resize_requires_pty_stream(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "start", "id": "a", "command": "sleep 30"})
+            ws.send_json({"type": "resize", "id": "a", "rows": 10, "cols": 10})
+            frames = [ws.receive_json(), ws.receive_json()]
+            ws.send_json({"type": "cancel", "id": "a"})
+
+        assert any(f.get("error") == "No such PTY stream" for f in frames)
+
+    def test_invalid_window_size(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json(
+                {"type": "start", "id": "t", "command": "cat", "pty": {"rows": 0, "cols": 80}}
+            )
+            frame = ws.receive_json()
+
+        assert "rows and cols" in frame["error"]
@@ -0,0 +1,114 @@
+"""Tests for process listings read from /proc."""
+
+import getpass
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.config import Config
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.processes import list_processes
+from host_terminal_mcp.server import HostTerminalServer
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="reads /proc")
+
+BUSY_LOOP = "import time\nend = time.time() + 30\nwhile time.time() < end: pass\n"
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return os.path.realpath(tmp_path)
+
+
+@pytest.fixture
+def busy(directory):
+    """A process spinning on the CPU, working in directory."""
+    process = subprocess.Popen([sys.executable, "-c", BUSY_LOOP], cwd=directory)
+    yield process
+    process.kill()
+    process.wait()
+
+
+def pids(result) -> list[int]:
+    return [row["pid"] for row in result["processes"]]
+
+
+class TestListProcesses:
+    async def test_own_process(self):
+        result = await list_processes(sort="pid", limit=100000)
+
+        row = next(row for row in result["processes"] if row["pid"] == os.getpid())
+        assert row["ppid"] == os.getppid()
+        assert row["user"] == getpass.getuser()
+        assert row["rss"] > 0
+        assert row["cwd"] == os.getcwd()
+        assert "pytest" in row["command"]
+        assert pids(result) == sorted(pids(result))
+
+    async def test_filter_by_cwd(self, directory, busy):
+        result = await list_processes(cwd=directory)
+
+        assert pids(result) == [busy.pid]
+
+    async def test_filter_by_name_and_user(self, busy):
+        result = await list_processes(name="WHILE TIME.TIME()", user=getpass.getuser())
+        assert busy.pid in pids(result)
+        assert all("while time.time()" in row["command"] for row in result["processes"])
+
+        assert await list_processes(name="no-such-process-name") == {
+            "status": "success",
+            "sort": "cpu",
+            "sample_seconds": None,
+            "matched": 0,
+            "count": 0,
+            "processes": [],
+        }
+
+    async def test_sampled_cpu(self, directory, busy):
+        result = await list_processes(cwd=directory, sample_seconds=0.5)
+
+        assert result["sample_seconds"] == 0.5
+        # Spinning the whole interval, on a machine shared with the test runner
+        assert result["processes"][0]["cpu_percent"] > 10
+
+    async def test_top_n_by_rss(self):
+        result = await list_processes(sort="rss", limit=3)
+
+        rss = [row["rss"] for row in result["processes"]]
+        assert len(rss) == 3
+        assert rss == sorted(rss, reverse=True)
+        assert result["matched"] >= 3
+
+    @pytest.mark.parametrize(
+        "arguments", [{"sort": "name"}, {"limit": 0}, {"sample_seconds": 11}]
+    )
+    async def test_invalid(self, arguments):
+        with pytest.raises(ValueError):
+            await list_processes(**arguments)
+
+
+class TestListProcessesTool:
+    async def test_relative_cwd(self, directory, busy):
+        parent = os.path.dirname(directory)
+        server = HostTerminalServer(Config(allowed_directories=[parent]))
+        server.executor.change_directory(parent)
+        result = await server._call_tool(
+            "list_processes", {"cwd": os.path.basename(directory), "limit": 5}
+        )
+
+        assert not result.isError
+        data = json.loads(result.content[0].text)
+        assert [row["pid"] for row in data["processes"]] == [busy.pid]
+
+
+class TestProcessesEndpoint:
+    def test_endpoint(self, directory, busy):
+        client = TestClient(create_app(Config(allowed_directories=[directory])))
+        data = client.get("/processes", params={"cwd": directory, "sort": "rss"}).json()
+
+        assert data["status"] == "success"
+        assert [row["pid"] for row in data["processes"]] == [busy.pid]
@@ -0,0 +1,122 @@
+"""Tests for pseudo-terminal sessions."""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from host_terminal_mcp.config import Config
+from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.pty_session import strip_ansi
+
+
+@pytest.fixture
+def executor():
+    return CommandExecutor(
+        Config(allowed_directories=["/tmp"], timeout_seconds=10, max_output_size=1000)
+    )
+
+
+@pytest.fixture
+def cwd():
+    return os.path.realpath(tempfile.gettempdir())
+
+
+class TestStripAnsi:
+    def test_colors_and_cursor(self):
+        assert strip_ansi("\x1b[1;31mred\x1b[0m \x1b[2K\x1b[10;5Hplain") == "red plain"
+
+    def test_osc_title(self):
+        assert strip_ansi("\x1b]0;window title\x07text") == "text"
+        assert strip_ansi("\x1b]2;title\x1b\\text") == "text"
+
+    def test_crlf_normalized(self):
+        assert strip_ansi("one\r\ntwo\r\n") == "one\ntwo\n"
+
+    def test_carriage_return_kept(self):
+        assert strip_ansi("10%\r50%\r100%\n") == "10%\r50%\r100%\n"
+
+
+class TestPtySession:
+    async def test_is_a_terminal(self, executor, cwd):
+        session = await executor.spawn_pty("test -t 0 && test -t 1 && echo tty", cwd)
+        try:
+            assert await session.read_output(timeout=5) == "tty\n"
+        finally:
+            await session.close()
+
+    async def test_window_size_and_resize(self, executor, cwd):
+        session = await executor.spawn_pty("stty size; read line; stty size", cwd, rows=30, cols=100)
+        try:
+            assert await session.read_output(timeout=5) == "30 100\n"
+            session.resize(50, 132)
+            await session.write(b"\n")
+            assert (await session.read_output(timeout=5)).endswith("50 132\n")
+        finally:
+            await session.close()
+
+    async def test_input_across_calls(self, executor, cwd):
+        session = await executor.spawn_pty("cat", cwd)
+        try:
+            await session.write(b"first\n")
+            assert "first" in await session.read_output(timeout=5)
+            await session.write(b"second\n")
+            assert "second" in await session.read_output(timeout=5)
+            await session.write(b"\x04")
+            await session.read_output(timeout=5)
+            assert session.finished
+            assert session.return_code == 0
+        finally:
+            await session.close()
+
+    async def test_ctrl_c_interrupts(self, executor, cwd):
+        session = await executor.spawn_pty("sleep 30", cwd)
+        try:
+            await session.write(b"\x03")
+            await session.read_output(timeout=5)
+            assert not session.running
+            assert session.return_code != 0
+        finally:
+            await session.close()
+
+    async def test_keeps_escapes_on_request(self, executor, cwd):
+        session = await executor.spawn_pty("printf '\\033[32mok\\033[0m\\n'", cwd)
+        try:
+            assert await session.read_output(timeout=5, strip=False) == "\x1b[32mok\x1b[0m\r\n"
+        finally:
+            await session.close()
+
+    async def test_reading_pauses_when_buffer_full(self, executor, cwd):
+        session = await executor.spawn_pty("seq 1 100000", cwd)
+        try:
+            await session.wait_for_output(5)
+            # Don't read: the producer must block rather than run ahead
+            await asyncio.sleep(0.5)
+            assert session.running
+            total = b""
+            while not session.finished:
+                await session.wait_for_output(5)
+                chunk = session.read_bytes()
+                # Never more than one read past the limit
+                assert len(chunk) <= 1000 + 64 * 1024
+                total += chunk
+            assert total.endswith(b"100000\r\n")
+        finally:
+            await session.close()
+
+    async def test_close_kills_background_jobs(self, executor, cwd):
+        session = await executor.spawn_pty("sleep 30 & echo $!; wait", cwd)
+        pid = int(await session.read_output(timeout=5))
+        await session.close()
+        await asyncio.sleep(0.2)
+        assert not is_alive(pid)
+
+
+def is_alive(pid: int) -> bool:
+    """Whether pid is a running (not zombie) process."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,219 @@
+"""Tests for in-process content search."""
+
+import io
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp import search
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.search import MAX_LINE_LENGTH, FileSearch
+from host_terminal_mcp.server import HostTerminalServer
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A repository with matches in src/, a .gitignore'd build/ and a binary file."""
+    root = os.path.realpath(tmp_path)
+    for directory in (".git", "src", "build"):
+        os.makedirs(os.path.join(root, directory))
+    files = {
+        ".gitignore": "build/\n",
+        ".env": "TODO hidden\n",
+        "src/a.py": "import os\n# TODO first\nx = 1\n# todo lower\n",
+        "src/b.py": "# TODO second\n",
+        "src/notes.txt": "TODO in text\n",
+        "build/out.py": "# TODO built\n",
+    }
+    for name, content in files.items():
+        with open(os.path.join(root, name), "w") as f:
+            f.write(content)
+    with open(os.path.join(root, "src", "blob.bin"), "wb") as f:
+        f.write(b"TODO\0\x01\x02")
+    return root
+
+
+@pytest.fixture
+def searcher():
+    searcher = FileSearch(workers=4)
+    yield searcher
+    searcher.close()
+
+
+def found(results) -> list[tuple[str, int]]:
+    return [(match["path"], match["line"]) for match in results.matches]
+
+
+class TestSearch:
+    def test_matches_in_walk_order(self, tree, searcher):
+        results = searcher.search(tree, "TODO")
+
+        assert found(results) == [("src/a.py", 2), ("src/b.py", 1), ("src/notes.txt", 1)]
+        assert results.matches[0]["text"] == "# TODO first"
+        assert results.binary_files_skipped == 1
+        assert not results.truncated
+        assert results.next_offset is None
+
+    def test_ignore_case_and_regex(self, tree, searcher):
+        results = searcher.search(tree, r"^# todo \w+$", ignore_case=True, include=["*.py"])
+
+        assert found(results) == [("src/a.py", 2), ("src/a.py", 4), ("src/b.py", 1)]
+
+    def test_fixed_strings(self, tree, searcher):
+        assert found(searcher.search(tree, "x = 1", fixed_strings=True)) == [("src/a.py", 3)]
+        assert found(searcher.search(tree, "x.=.1", fixed_strings=True)) == []
+
+    def test_gitignore_and_hidden(self, tree, searcher):
+        results = searcher.search(tree, "TODO", use_gitignore=False, show_hidden=True)
+
+        paths = {path for path, _ in found(results)}
+        assert {".env", "build/out.py"} <= paths
+        assert not any(path.startswith(".git/") for path in paths)
+
+    def test_ignore_patterns(self, tree, searcher):
+        assert found(searcher.search(tree, "TODO", ignore=["*.txt", "b.py"])) == [("src/a.py", 2)]
+
+    def test_single_file(self, tree, searcher):
+        results = searcher.search(os.path.join(tree, "src", "a.py"), "TODO")
+
+        assert found(results) == [("a.py", 2)]
+
+    def test_exclude(self, tree, searcher):
+        results = searcher.search(tree, "TODO", exclude=lambda path: path.endswith("b.py"))
+
+        assert ("src/b.py", 1) not in found(results)
+
+    def test_long_lines_cut(self, tree, searcher):
+        with open(os.path.join(tree, "src", "min.js"), "w") as f:
+            f.write("var x=" + "1" * 10000 + ";needle\n")
+
+        results = searcher.search(tree, "needle")
+
+        assert len(results.matches[0]["text"]) == MAX_LINE_LENGTH
+
+    def test_matches_across_block_boundaries(self, tmp_path, searcher, monkeypatch):
+        monkeypatch.setattr(search, "READ_BLOCK_SIZE", 16)
+        path = os.path.join(tmp_path, "log.txt")
+        with open(path, "w") as f:
+            f.writelines(
+                f"{'needle' if n % 7 == 0 else 'hay'} {'x' * (n % 30)}\n" for n in range(200)
+            )
+            f.write("last needle without newline")
+
+        results = searcher.search(path, "needle", max_results=1000)
+
+        assert [line for _, line in found(results)] == [n + 1 for n in range(0, 200, 7)] + [201]
+        assert results.matches[-1]["text"] == "last needle without newline"
+
+    def test_file_truncated_while_searched(self, tmp_path, searcher, monkeypatch):
+        monkeypatch.setattr(search, "READ_BLOCK_SIZE", 64)
+        path = os.path.join(tmp_path, "app.log")
+        with open(path, "w") as f:
+            f.writelines(f"needle {n}\n" for n in range(100))
+
+        class TruncatedAfterFirstRead(io.FileIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                # As copytruncate log rotation would, mid-search
+                os.truncate(path, 0)
+                return data
+
+        monkeypatch.setattr(
+            search,
+            "open",
+            lambda file, *args, **kwargs: TruncatedAfterFirstRead(file),
+            raising=False,
+        )
+        results = searcher.search(path, "needle")
+
+        assert 0 < len(results.matches) < 100
+        assert results.matches[0]["text"] == "needle 0"
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [{"pattern": ""}, {"pattern": "("}, {"pattern": "x", "max_results": 0}],
+    )
+    def test_invalid(self, tree, searcher, arguments):
+        with pytest.raises(ValueError):
+            searcher.search(tree, **arguments)
+
+
+class TestPaging:
+    @pytest.fixture
+    def many(self, tmp_path):
+        root = os.path.realpath(tmp_path)
+        for n in range(20):
+            with open(os.path.join(root, f"f{n:02}.txt"), "w") as f:
+                f.writelines(f"match {n}.{line}\n" for line in range(5))
+        return root
+
+    def test_pages_cover_every_match_once(self, many, searcher):
+        seen = []
+        offset: int | None = 0
+        while offset is not None:
+            page = searcher.search(many, "match", max_results=7, offset=offset)
+            seen.extend(found(page))
+            offset = page.next_offset
+
+        assert len(seen) == 100
+        assert len(set(seen)) == 100
+        assert seen == sorted(seen)
+
+    def test_exact_fit_is_not_truncated(self, many, searcher):
+        results = searcher.search(many, "match", max_results=100)
+
+        assert len(results.matches) == 100
+        assert not results.truncated
+
+    def test_max_bytes(self, many, searcher):
+        results = searcher.search(many, "match", max_bytes=30)
+
+        # "match 0.0" is 9 bytes: three lines fit, the fourth would not
+        assert len(results.matches) == 3
+        assert results.truncated
+        assert results.next_offset == 3
+
+    def test_first_line_returned_even_over_max_bytes(self, many, searcher):
+        results = searcher.search(many, "match", max_bytes=1)
+
+        assert len(results.matches) == 1
+        assert results.next_offset == 1
+
+    def test_stops_early(self, many, searcher):
+        results = searcher.search(many, "match", max_results=3)
+
+        # Files queued ahead of the consumer are cancelled or discarded
+        assert results.files_searched == 1
+
+
+class TestSearchFilesTool:
+    async def test_first_page(self, tree, make_config):
+        server = HostTerminalServer(make_config(tree))
+        server.executor.change_directory(tree)
+        result = await server._call_tool("search_files", {"pattern": "TODO", "max_results": 1})
+
+        assert not result.isError
+        data = json.loads(result.content[0].text)
+        assert data["matches"] == [{"path": "src/a.py", "line": 2, "text": "# TODO first"}]
+        assert data["next_offset"] == 1
+
+
+class TestSearchEndpoint:
+    def test_search(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        client.post("/cd", json={"path": tree})
+        data = client.get(
+            "/files/search", params={"pattern": "todo", "ignore_case": True, "include": "*.txt"}
+        ).json()
+
+        assert data["status"] == "success"
+        assert [match["path"] for match in data["matches"]] == ["src/notes.txt"]
+
+    def test_invalid_pattern(self, tree, make_config):
+        client = TestClient(create_app(make_config(tree)))
+        data = client.get("/files/search", params={"pattern": "(", "path": tree}).json()
+
+        assert data["status"] == "error"
+        assert "Invalid pattern" in data["error"]
@@ -0,0 +1,155 @@
+"""Tests for the MCP server's tool handlers and entry point helpers."""
+
+import json
+import os
+import socket
+import stat
+
+import pytest
+
+from host_terminal_mcp.config import CommandPattern, Config, PermissionMode
+from host_terminal_mcp.server import HostTerminalServer, bind_unix_socket, default_session_store
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # AF_UNIX paths are limited to ~100 bytes, so keep it short
+    path = tmp_path / "s.sock"
+    yield str(path)
+    if path.exists():
+        path.unlink()
+
+
+class TestBindUnixSocket:
+    def test_sets_permissions(self, socket_path):
+        sock = bind_unix_socket(socket_path, 0o600)
+        try:
+            mode = os.stat(socket_path).st_mode
+            assert stat.S_ISSOCK(mode)
+            assert stat.S_IMODE(mode) == 0o600
+        finally:
+            sock.close()
+
+    def test_accepts_connections(self, socket_path):
+        sock = bind_unix_socket(socket_path, 0o660)
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+        finally:
+            sock.close()
+
+    def test_replaces_stale_socket(self, socket_path):
+        bind_unix_socket(socket_path, 0o660).close()
+        assert os.path.exists(socket_path)
+
+        sock = bind_unix_socket(socket_path, 0o660)
+        sock.close()
+
+    def test_refuses_socket_in_use(self, socket_path):
+        sock = bind_unix_socket(socket_path, 0o660)
+        try:
+            with pytest.raises(OSError, match="in use"):
+                bind_unix_socket(socket_path, 0o660)
+        finally:
+            sock.close()
+
+    def test_refuses_regular_file(self, socket_path):
+        with open(socket_path, "w") as f:
+            f.write("data")
+        with pytest.raises(OSError, match="non-socket"):
+            bind_unix_socket(socket_path, 0o660)
+        assert open(socket_path).read() == "data"
+
+
+class TestDefaultSessionStore:
+    def test_keyed_by_port(self):
+        assert default_session_store(8099).endswith("sessions-8099.db")
+
+    def test_keyed_by_socket_path(self, tmp_path):
+        first = default_session_store(8099, str(tmp_path / "a.sock"))
+        second = default_session_store(8099, str(tmp_path / "b.sock"))
+
+        assert first != second
+        assert "8099" not in os.path.basename(first)
+        assert first == default_session_store(8080, str(tmp_path / "a.sock"))
+
+
+@pytest.fixture
+def server():
+    return HostTerminalServer(
+        Config(
+            permission_mode=PermissionMode.ALLOWLIST,
+            allowed_commands=[
+                CommandPattern(pattern="cat", description="Cat"),
+                CommandPattern(pattern="test ", description="Test"),
+            ],
+            allowed_directories=["/tmp"],
+            timeout_seconds=5,
+        )
+    )
+
+
+class TestTerminalTools:
+    async def test_execute_command_pty(self, server):
+        result = await server._handle_execute_command(
+            {"command": "test -t 1 && echo tty", "working_directory": "/tmp", "pty": True}
+        )
+        assert not result.isError
+        assert "stdout:\ntty\n" in result.content[0].text
+
+    async def test_session_round_trip(self, server):
+        started = await server._handle_start_terminal_session(
+            {"command": "cat", "working_directory": "/tmp", "wait_seconds": 0.2}
+        )
+        status = json.loads(started.content[0].text)
+        assert status["running"]
+        session_id = status["session_id"]
+
+        sent = await server._handle_send_terminal_input(
+            {"session_id": session_id, "input": "hello\n"}
+        )
+        assert "hello" in json.loads(sent.content[0].text)["output"]
+
+        ended = await server._handle_send_terminal_input(
+            {"session_id": session_id, "input": "\u0004"}
+        )
+        status = json.loads(ended.content[0].text)
+        assert status["running"] is False
+        assert status["exit_code"] == 0
+        # Finished sessions are closed automatically
+        assert server.executor.get_terminal(session_id) is None
+
+    async def test_resize_keeps_dimension_left_out(self, server):
+        started = await server._handle_start_terminal_session(
+            {"command": "cat", "working_directory": "/tmp", "wait_seconds": 0}
+        )
+        session_id = json.loads(started.content[0].text)["session_id"]
+        session = server.executor.get_terminal(session_id)
+
+        await server._handle_send_terminal_input(
+            {"session_id": session_id, "rows": 40, "cols": 100, "wait_seconds": 0}
+        )
+        await server._handle_send_terminal_input(
+            {"session_id": session_id, "rows": 50, "wait_seconds": 0}
+        )
+        assert session.window_size == (50, 100)
+        await server._handle_send_terminal_input(
+            {"session_id": session_id, "cols": 120, "wait_seconds": 0}
+        )
+        assert session.window_size == (50, 120)
+        await server._handle_close_terminal_session({"session_id": session_id})
+
+    async def test_close_session(self, server):
+        started = await server._handle_start_terminal_session(
+            {"command": "cat", "working_directory": "/tmp", "wait_seconds": 0}
+        )
+        session_id = json.loads(started.content[0].text)["session_id"]
+        closed = await server._handle_close_terminal_session({"session_id": session_id})
+        assert not closed.isError
+        missing = await server._handle_send_terminal_input({"session_id": session_id})
+        assert missing.isError
+
+    async def test_start_requires_permission(self, server):
+        result = await server._handle_start_terminal_session({"command": "python3"})
+        assert result.isError
+        assert "Command not allowed" in result.content[0].text
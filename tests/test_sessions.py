@@ -0,0 +1,138 @@
+"""Tests for HTTP session management."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from host_terminal_mcp.config import Config
+from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.sessions import (
+    DEFAULT_SESSION_ID,
+    MemorySessionStore,
+    SessionManager,
+    SQLiteSessionStore,
+)
+
+
+@pytest.fixture
+def executor():
+    return CommandExecutor(Config(allowed_directories=[str(Path.home()), "/tmp"]))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def manager(request, executor, tmp_path):
+    """A manager backed by each store implementation."""
+    if request.param == "memory":
+        store = MemorySessionStore()
+    else:
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+    return SessionManager(executor, max_sessions=2, idle_timeout=60, store=store)
+
+
+class TestSessionManager:
+    def test_missing_id_uses_default_session(self, manager):
+        session, error = manager.get(None)
+        assert session.session_id == DEFAULT_SESSION_ID
+        assert error == ""
+        assert len(manager) == 0
+
+    def test_same_id_returns_same_session(self, manager):
+        first, _ = manager.get("agent-1")
+        manager.change_directory(first, "/tmp")
+        second, _ = manager.get("agent-1")
+        assert second.current_directory == first.current_directory
+        assert len(manager) == 1
+
+    def test_invalid_id_rejected(self, manager):
+        session, error = manager.get("../etc")
+        assert session is None
+        assert "invalid session id" in error.lower()
+
+    def test_session_cap(self, manager):
+        manager.get("a")
+        manager.get("b")
+        session, error = manager.get("c")
+        assert session is None
+        assert "limit" in error.lower()
+        # Existing sessions keep working at the cap
+        assert manager.get("a")[0] is not None
+
+    def test_idle_sessions_evicted(self, manager):
+        old, _ = manager.get("a")
+        manager.change_directory(old, "/tmp")
+        old.last_used -= 120
+        manager.store.save(old)
+        manager.get("b")
+        session, _ = manager.get("c")
+        assert session is not None
+        assert len(manager) == 2
+        assert manager.get("a")[0] is None
+
+    def test_default_session_never_evicted(self, manager):
+        default, _ = manager.get(None)
+        manager.change_directory(default, "/tmp")
+        default.last_used -= 120
+        manager.store.save(default)
+        manager.evict_idle()
+        assert manager.get(None)[0].current_directory == os.path.realpath("/tmp")
+
+    def test_change_directory_is_per_session(self, manager):
+        first, _ = manager.get("a")
+        second, _ = manager.get("b")
+        success, _ = manager.change_directory(first, "/tmp")
+        assert success
+        assert first.current_directory == os.path.realpath("/tmp")
+        assert second.current_directory == str(Path.home())
+
+    def test_change_directory_relative_to_session(self, manager):
+        session, _ = manager.get("a")
+        manager.change_directory(session, "/tmp")
+        with tempfile.TemporaryDirectory(dir="/tmp") as tmpdir:
+            success, _ = manager.change_directory(session, os.path.basename(tmpdir))
+            assert success
+            assert session.current_directory == os.path.realpath(tmpdir)
+
+    def test_change_directory_not_allowed(self, manager):
+        session, _ = manager.get("a")
+        success, message = manager.change_directory(session, "/etc")
+        assert not success
+        assert "not in allowed" in message
+        assert session.current_directory == str(Path.home())
+
+
+class TestSQLiteSessionStore:
+    """Tests for state shared between worker processes."""
+
+    def test_workers_share_sessions(self, executor, tmp_path):
+        """Test two managers on one database (as two workers would) agree on state."""
+        path = tmp_path / "sessions.db"
+        worker_a = SessionManager(executor, 10, 60, store=SQLiteSessionStore(path))
+        worker_b = SessionManager(executor, 10, 60, store=SQLiteSessionStore(path))
+
+        session, _ = worker_a.get("agent")
+        worker_a.change_directory(session, "/tmp")
+        default, _ = worker_b.get(None)
+        worker_b.change_directory(default, "/tmp")
+
+        assert worker_b.get("agent")[0].current_directory == os.path.realpath("/tmp")
+        assert worker_a.get(None)[0].current_directory == os.path.realpath("/tmp")
+        assert len(worker_a) == len(worker_b) == 1
+
+    def test_cap_shared_between_workers(self, executor, tmp_path):
+        path = tmp_path / "sessions.db"
+        worker_a = SessionManager(executor, 1, 60, store=SQLiteSessionStore(path))
+        worker_b = SessionManager(executor, 1, 60, store=SQLiteSessionStore(path))
+
+        assert worker_a.get("first")[0] is not None
+        session, error = worker_b.get("second")
+        assert session is None
+        assert "limit" in error.lower()
+        # An existing session is still reachable through any worker
+        assert worker_b.get("first")[0] is not None
+
+    def test_uses_wal_mode(self, tmp_path):
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
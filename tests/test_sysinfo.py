@@ -0,0 +1,108 @@
+"""Tests for structured host information."""
+
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.config import Config
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+from host_terminal_mcp.sysinfo import _utilization, disk_info, system_info
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+
+
+class TestSystemInfo:
+    async def test_all_sections(self):
+        info = await system_info()
+
+        assert info["status"] == "success"
+        assert info["os"]["hostname"] == os.uname().nodename
+        assert info["cpu"]["count"] == os.cpu_count()
+        assert len(info["cpu"]["load_average"]) == 3
+        assert info["memory"]["total"] > 0
+        assert any(disk["mount_point"] == "/" for disk in info["disk"])
+        assert "utilization" not in info["cpu"]
+
+    async def test_selected_sections(self):
+        info = await system_info(["memory"])
+
+        assert "memory" in info
+        assert "cpu" not in info
+
+    @linux_only
+    async def test_proc_fields(self):
+        info = await system_info(["os", "memory", "network"])
+
+        assert info["os"]["uptime_seconds"] > 0
+        assert 0 < info["memory"]["available"] <= info["memory"]["total"]
+        loopback = next(interface for interface in info["network"] if interface["name"] == "lo")
+        assert loopback["ipv4"] == "127.0.0.1"
+        assert loopback["rx_bytes"] >= 0
+
+    @linux_only
+    async def test_sampling_reports_rates(self):
+        info = await system_info(["cpu", "network"], sample_seconds=0.2)
+
+        utilization = info["cpu"]["utilization"]
+        assert 0 <= utilization["busy"] <= 100
+        assert len(info["cpu"]["per_cpu_busy"]) == os.cpu_count()
+        assert "rx_bytes_per_second" in info["network"][0]
+        assert info["sample_seconds"] == 0.2
+
+    @pytest.mark.parametrize(
+        "arguments", [{"sections": ["gpu"]}, {"sample_seconds": -1}, {"sample_seconds": 60}]
+    )
+    async def test_invalid(self, arguments):
+        with pytest.raises(ValueError):
+            await system_info(**arguments)
+
+
+class TestHelpers:
+    def test_utilization(self):
+        before = [100, 0, 50, 800, 50, 0, 0, 0]
+        after = [200, 0, 100, 1000, 100, 0, 0, 0]
+
+        usage = _utilization(before, after)
+        # 150 busy jiffies out of 400
+        assert usage["busy"] == 37.5
+        assert usage["user"] == 25.0
+        assert usage["iowait"] == 12.5
+
+    def test_disk_includes_extra_paths_once(self, tmp_path):
+        disks = disk_info([str(tmp_path), str(tmp_path)])
+
+        device = os.stat(tmp_path).st_dev
+        assert sum(os.stat(disk["mount_point"]).st_dev == device for disk in disks) == 1
+        assert all(disk["used"] + disk["free"] <= disk["total"] for disk in disks)
+
+
+class TestSystemInfoTool:
+    async def test_tool(self, tmp_path):
+        server = HostTerminalServer(Config(allowed_directories=[str(tmp_path)]))
+        result = await server._call_tool("system_info", {"sections": ["os", "cpu"]})
+
+        assert not result.isError
+        data = json.loads(result.content[0].text)
+        assert set(data) >= {"os", "cpu"}
+        assert "disk" not in data
+
+    async def test_invalid_section(self, tmp_path):
+        server = HostTerminalServer(Config(allowed_directories=[str(tmp_path)]))
+        result = await server._call_tool("system_info", {"sections": ["gpu"]})
+
+        assert result.isError
+        assert "Unknown sections" in result.content[0].text
+
+
+class TestSystemInfoEndpoint:
+    def test_endpoint(self, tmp_path):
+        client = TestClient(create_app(Config(allowed_directories=[str(tmp_path)])))
+        data = client.get("/system/info", params={"sections": ["memory", "disk"]}).json()
+
+        assert data["status"] == "success"
+        assert data["memory"]["total"] > 0
+        assert "os" not in data
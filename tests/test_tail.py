@@ -0,0 +1,183 @@
+"""Tests for incremental log file reads."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+from host_terminal_mcp.tail import DirectoryWatch, follow, parse_cursor, read_new, wait_for_lines
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return os.path.realpath(tmp_path)
+
+
+@pytest.fixture
+def log(directory):
+    """A log with lines "line 1" to "line 100"."""
+    path = os.path.join(directory, "app.log")
+    with open(path, "w") as f:
+        f.writelines(f"line {n}\n" for n in range(1, 101))
+    return path
+
+
+def append(path: str, text: str) -> None:
+    with open(path, "a") as f:
+        f.write(text)
+
+
+class TestReadNew:
+    def test_last_lines_without_cursor(self, log):
+        chunk = read_new(log, lines=3)
+
+        assert chunk.content == "line 98\nline 99\nline 100\n"
+        assert parse_cursor(chunk.cursor) == (os.stat(log).st_ino, os.path.getsize(log))
+
+    def test_more_lines_than_file(self, log):
+        assert read_new(log, lines=1000).offset == 0
+
+    def test_zero_lines_starts_at_end(self, log):
+        chunk = read_new(log, lines=0)
+
+        assert chunk.content == ""
+        assert chunk.offset == os.path.getsize(log)
+
+    def test_only_new_lines_after_cursor(self, log):
+        cursor = read_new(log, lines=0).cursor
+        append(log, "new 1\nnew 2\n")
+
+        chunk = read_new(log, cursor)
+        assert chunk.content == "new 1\nnew 2\n"
+        assert read_new(log, chunk.cursor).content == ""
+
+    def test_partial_line_held_back(self, log):
+        cursor = read_new(log, lines=0).cursor
+        append(log, "done\nhalf")
+
+        chunk = read_new(log, cursor)
+        assert chunk.content == "done\n"
+        assert chunk.pending_bytes == 4
+
+        append(log, " line\n")
+        assert read_new(log, chunk.cursor).content == "half line\n"
+
+    def test_truncated_in_place(self, log):
+        cursor = read_new(log, lines=0).cursor
+        with open(log, "w") as f:
+            f.write("after truncate\n")
+
+        chunk = read_new(log, cursor)
+        assert chunk.file_truncated
+        assert chunk.content == "after truncate\n"
+
+    def test_rotation_reads_rest_of_old_file_first(self, log):
+        cursor = read_new(log, lines=0).cursor
+        append(log, "last old line\n")
+        os.rename(log, log + ".1")
+        with open(log, "w") as f:
+            f.write("first new line\n")
+
+        chunk = read_new(log, cursor)
+        assert chunk.rotated
+        assert chunk.content == "last old line\nfirst new line\n"
+        assert parse_cursor(chunk.cursor)[0] == os.stat(log).st_ino
+
+    def test_rotation_with_old_file_gone(self, log):
+        cursor = read_new(log, lines=0).cursor
+        # Created before the old file is gone, so it cannot reuse its inode
+        with open(log + ".new", "w") as f:
+            f.write("new\n")
+        os.replace(log + ".new", log)
+
+        chunk = read_new(log, cursor)
+        assert chunk.rotated
+        assert chunk.content == "new\n"
+
+    def test_capped_at_max_bytes(self, log):
+        chunk = read_new(log, lines=100, max_bytes=20)
+
+        # Whole lines only: "line 1\nline 2\n" is 14 bytes
+        assert chunk.content == "line 1\nline 2\n"
+        assert chunk.truncated
+        assert read_new(log, chunk.cursor, max_bytes=20).content == "line 3\nline 4\n"
+
+    def test_invalid_cursor(self, log):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            read_new(log, "nope")
+
+    def test_directory_rejected(self, directory):
+        with pytest.raises(ValueError, match="Not a regular file"):
+            read_new(directory)
+
+
+class TestFollow:
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    async def test_yields_appended_lines(self, log, use_inotify):
+        if use_inotify and DirectoryWatch.open(log) is None:
+            pytest.skip("inotify not available")
+        chunks = follow(log, lines=0, poll_interval=0.05, use_inotify=use_inotify)
+        try:
+            first = await anext(chunks)
+            assert first.content == ""
+
+            threading.Timer(0.1, append, (log, "appended\n")).start()
+            started = time.monotonic()
+            chunk = await asyncio.wait_for(anext(chunks), 5)
+            assert chunk.content == "appended\n"
+            assert time.monotonic() - started < 2
+        finally:
+            await chunks.aclose()
+
+    async def test_wait_for_lines_times_out(self, log):
+        started = time.monotonic()
+        chunk = await wait_for_lines(log, read_new(log, lines=0).cursor, wait=0.2)
+
+        assert chunk.content == ""
+        assert time.monotonic() - started >= 0.2
+
+
+class TestTailFileTool:
+    async def test_cursor_round_trip(self, directory, log, make_config):
+        server = HostTerminalServer(make_config(directory))
+        result = await server._call_tool("tail_file", {"path": log, "lines": 1})
+        data = json.loads(result.content[0].text)
+        assert data["content"] == "line 100\n"
+
+        append(log, "next\n")
+        result = await server._call_tool("tail_file", {"path": log, "cursor": data["cursor"]})
+        assert json.loads(result.content[0].text)["content"] == "next\n"
+
+
+class TestTailEndpoint:
+    def test_tail(self, directory, log, make_config):
+        client = TestClient(create_app(make_config(directory)))
+        data = client.get("/files/tail", params={"path": log, "lines": 2}).json()
+
+        assert data["content"] == "line 99\nline 100\n"
+
+    def test_follow_streams_ndjson(self, directory, log, make_config):
+        client = TestClient(create_app(make_config(directory)))
+        threading.Timer(0.2, append, (log, "streamed\n")).start()
+        response = client.get(
+            "/files/tail", params={"path": log, "lines": 0, "follow": True, "duration": 1}
+        )
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        chunks = [json.loads(line) for line in response.text.splitlines()]
+        assert chunks[0]["content"] == ""
+        assert chunks[1]["content"] == "streamed\n"
+
+    def test_follow_missing_file(self, directory, make_config):
+        client = TestClient(create_app(make_config(directory)))
+        data = client.get(
+            "/files/tail", params={"path": os.path.join(directory, "nope"), "follow": True}
+        ).json()
+
+        assert data["status"] == "error"
@@ -0,0 +1,246 @@
+"""Tests for request tracing."""
+
+import asyncio
+import json
+import timeit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from host_terminal_mcp.config import CommandPattern, Config, TraceFormat
+from host_terminal_mcp.executor import CommandExecutor
+from host_terminal_mcp.http_server import create_app
+from host_terminal_mcp.server import HostTerminalServer
+from host_terminal_mcp.tracing import NOOP_SPAN, Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+
+def make_config(trace_file, **overrides) -> Config:
+    settings = {
+        "allowed_commands": [CommandPattern(pattern="echo ", description="Echo")],
+        "allowed_directories": ["/tmp"],
+        "timeout_seconds": 5,
+        "trace_file": str(trace_file),
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    return tmp_path / "traces.jsonl"
+
+
+class TestTraceparent:
+    def test_valid(self):
+        assert parse_traceparent(TRACEPARENT) == (TRACE_ID, PARENT_ID)
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            None,
+            "",
+            "garbage",
+            f"ff-{TRACE_ID}-{PARENT_ID}-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'0' * 16}-01",
+        ],
+    )
+    def test_invalid(self, value):
+        assert parse_traceparent(value) is None
+
+
+class TestTracer:
+    def test_disabled_is_noop(self):
+        tracer = Tracer()
+        assert not tracer.enabled
+        assert tracer.span("anything") is NOOP_SPAN
+
+    def test_disabled_overhead_is_negligible(self):
+        tracer = Tracer()
+
+        def traced():
+            with tracer.span("phase") as span:
+                span.set_attribute("key", 1)
+
+        # Generous bound for slow CI machines; typically well under 1 us
+        assert timeit.timeit(traced, number=10000) / 10000 < 20e-6
+
+    def test_nesting_and_export_on_root_end(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file))
+        with tracer.span("root", kind="test") as root:
+            with tracer.span("child") as child:
+                child.set_attribute("n", 1)
+            assert not trace_file.exists() or trace_file.read_text() == ""
+        tracer.close()
+
+        child_span, root_span = read_spans(trace_file)
+        assert root_span["name"] == "root"
+        assert root_span["parent_span_id"] is None
+        assert root_span["attributes"] == {"kind": "test"}
+        assert child_span["trace_id"] == root_span["trace_id"] == root.trace_id
+        assert child_span["parent_span_id"] == root_span["span_id"]
+        assert child_span["attributes"] == {"n": 1}
+        assert root_span["start_time_unix_nano"] <= child_span["start_time_unix_nano"]
+
+    def test_incoming_trace_id(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file))
+        with tracer.span("root", TRACEPARENT) as span:
+            assert span.traceparent.startswith(f"00-{TRACE_ID}-")
+        tracer.close()
+
+        (root,) = read_spans(trace_file)
+        assert root["trace_id"] == TRACE_ID
+        assert root["parent_span_id"] == PARENT_ID
+
+    def test_exception_marks_error(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file))
+        with pytest.raises(RuntimeError):
+            with tracer.span("root"):
+                raise RuntimeError("boom")
+        tracer.close()
+
+        (root,) = read_spans(trace_file)
+        assert root["status"] == "error"
+        assert root["error"] == "RuntimeError: boom"
+
+    async def test_span_ending_after_root_exported_alone(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file))
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def background():
+            with tracer.span("background"):
+                started.set()
+                await release.wait()
+
+        with tracer.span("root"):
+            task = asyncio.ensure_future(background())
+            await started.wait()
+        release.set()
+        await task
+        tracer.close()
+
+        root, late = read_spans(trace_file)
+        assert root["name"] == "root"
+        assert late["name"] == "background"
+        assert late["parent_span_id"] == root["span_id"]
+
+    def test_export_does_not_write_inline(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file))
+        exporter = tracer.exporter
+        assert exporter is not None
+        with exporter._ready:
+            # The writer cannot take the queue while we hold its lock
+            with tracer.span("root"):
+                pass
+            assert trace_file.read_text() == ""
+        tracer.close()
+
+        assert [span["name"] for span in read_spans(trace_file)] == ["root"]
+
+    def test_otlp_format(self, trace_file):
+        tracer = Tracer.from_file(str(trace_file), otlp=True)
+        with tracer.span("root", TRACEPARENT, count=3, ok=True):
+            with tracer.span("child"):
+                pass
+        tracer.close()
+
+        (request,) = read_spans(trace_file)
+        resource_spans = request["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["value"] == {
+            "stringValue": "host-terminal-mcp"
+        }
+        child, root = resource_spans["scopeSpans"][0]["spans"]
+        assert root["traceId"] == TRACE_ID
+        assert root["parentSpanId"] == PARENT_ID
+        assert root["kind"] == 2
+        assert {"key": "count", "value": {"intValue": "3"}} in root["attributes"]
+        assert {"key": "ok", "value": {"boolValue": True}} in root["attributes"]
+        assert child["parentSpanId"] == root["spanId"]
+        assert child["status"] == {"code": 1}
+        assert isinstance(child["startTimeUnixNano"], str)
+
+
+class TestRequestSpans:
+    async def test_executor_phases(self, trace_file):
+        executor = CommandExecutor(make_config(trace_file))
+        with executor.tracer.span("request"):
+            executor.check_permission("echo hi")
+            await executor.execute("echo hi", "/tmp")
+        executor.tracer.close()
+
+        names = [span["name"] for span in read_spans(trace_file)]
+        assert names == [
+            "permission.check",
+            "directory.resolve",
+            "process.spawn",
+            "process.wait",
+            "output.decode",
+            "request",
+        ]
+
+    async def test_mcp_tool_call(self, trace_file):
+        server = HostTerminalServer(make_config(trace_file))
+        with server.executor.tracer.span("tool execute_command", TRACEPARENT):
+            await server._call_tool(
+                "execute_command", {"command": "echo hi", "working_directory": "/tmp"}
+            )
+        server.executor.tracer.close()
+
+        spans = read_spans(trace_file)
+        assert [span["name"] for span in spans] == [
+            "permission.check",
+            "directory.resolve",
+            "process.spawn",
+            "process.wait",
+            "output.decode",
+            "response.format",
+            "tool execute_command",
+        ]
+        assert {span["trace_id"] for span in spans} == {TRACE_ID}
+
+    def test_http_request(self, trace_file):
+        with TestClient(create_app(make_config(trace_file))) as client:
+            response = client.post(
+                "/execute",
+                json={"command": "echo hi", "working_directory": "/tmp"},
+                headers={"traceparent": TRACEPARENT},
+            )
+        assert response.json()["stdout"] == "hi\n"
+        assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+
+        spans = read_spans(trace_file)
+        root = spans[-1]
+        assert root["name"] == "POST /execute"
+        assert root["parent_span_id"] == PARENT_ID
+        assert root["attributes"]["http.status_code"] == 200
+        assert {span["trace_id"] for span in spans} == {TRACE_ID}
+        assert {span["name"] for span in spans} >= {
+            "session.lookup",
+            "permission.check",
+            "directory.resolve",
+            "process.spawn",
+            "process.wait",
+            "output.decode",
+            "response.format",
+        }
+
+    def test_http_otlp_config(self, trace_file):
+        config = make_config(trace_file, trace_format=TraceFormat.OTLP)
+        with TestClient(create_app(config)) as client:
+            client.get("/health")
+
+        (request,) = read_spans(trace_file)
+        (span,) = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert span["name"] == "GET /health"
+
+    def test_http_untraced_without_trace_file(self):
+        client = TestClient(create_app(Config(allowed_directories=["/tmp"])))
+        assert "traceparent" not in client.get("/health").headers
@@ -0,0 +1,47 @@
+"""Tests for the shared worker pool and LRU cache."""
+
+import threading
+
+from host_terminal_mcp.workers import LRUCache, WorkerPool
+
+
+class TestWorkerPool:
+    def test_started_on_first_use(self):
+        pool = WorkerPool(2, "test")
+        assert pool._executor is None
+
+        assert pool.submit(threading.current_thread).result().name.startswith("test")
+        assert list(pool.map(lambda n: n * 2, [1, 2, 3])) == [2, 4, 6]
+        pool.close()
+
+    def test_restarts_after_close(self):
+        pool = WorkerPool(1, "test")
+        pool.submit(int).result()
+        pool.close()
+        assert pool._executor is None
+
+        assert pool.submit(int, "7").result() == 7
+        pool.close()
+
+    def test_at_least_one_worker(self):
+        assert WorkerPool(0, "test").workers == 1
+
+
+class TestLRUCache:
+    def test_least_recently_used_dropped(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert list(cache) == ["a", "c"]
+        assert cache.get("b") is None
+
+    def test_pop(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.put("a", 1)
+
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        assert len(cache) == 0